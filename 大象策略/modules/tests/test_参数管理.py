@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+参数管理模块的测试文件
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.参数管理 import 参数管理器, 参数快照
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.参数管理 import 参数管理器, 参数快照
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..参数管理 import 参数管理器, 参数快照
+        from ..日志 import get_logger
+
+def _读取json(路径: str):
+    """读取JSON文件"""
+    with open(路径, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def 测试参数写入() -> Dict:
+    """测试参数的批量修改、延迟合并写入和原子写入"""
+    logger = get_logger("测试_参数管理")
+    logger.info("开始测试参数写入功能")
+
+    临时目录 = tempfile.mkdtemp(prefix="参数管理测试_")
+    try:
+        管理器 = 参数管理器(配置目录=临时目录, 写入延迟=0.1)
+        全局参数文件 = 管理器.全局参数文件
+        品种参数文件 = 管理器.品种参数文件
+        全局文件签名 = os.stat(全局参数文件).st_mtime_ns, os.stat(全局参数文件).st_ino
+
+        # 批量修改：只重建一次快照，结束前其他线程读到的仍是旧参数
+        起始版本 = 管理器.版本
+        with 管理器.批量修改():
+            for 序号 in range(5):
+                管理器.设置品种参数("600000", "大象识别", f"参数{序号}", 序号)
+            批量中未生效 = 管理器.获取参数("600000", "大象识别", "参数0") is None
+        批量修改正确 = (
+            批量中未生效 and
+            管理器.版本 == 起始版本 + 1 and
+            管理器.获取参数("600000", "大象识别", "参数4") == 4
+        )
+
+        # 延迟写入：写入前文件不变，延迟后合并写入一次
+        延迟前未写入 = _读取json(品种参数文件) == {}
+        管理器.设置品种参数("600000", "交易执行", "等待时间", 5)
+        time.sleep(0.3)
+        延迟写入正确 = (
+            延迟前未写入 and
+            _读取json(品种参数文件)["600000"]["大象识别"]["参数4"] == 4 and
+            _读取json(品种参数文件)["600000"]["交易执行"]["等待时间"] == 5
+        )
+
+        # 只写入内容有变化的文件，未修改的全局参数文件保持原样
+        管理器.设置品种参数("600000", "交易执行", "等待时间", 5)
+        重复写入 = 管理器.刷新写入()
+        只写变化文件 = (
+            重复写入 == [] and
+            (os.stat(全局参数文件).st_mtime_ns, os.stat(全局参数文件).st_ino) == 全局文件签名
+        )
+
+        # 原子写入不留下临时文件；已发布的旧快照不随之后的修改变化
+        旧快照 = 管理器._快照
+        管理器.设置全局参数("大象识别", "大象委托量阈值", 100)
+        快照不变 = (
+            "大象识别" not in 旧快照.全局参数 and
+            旧快照.默认解析["大象识别"] == {} and
+            管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 100
+        )
+        实际写入 = 管理器.刷新写入()
+        原子写入正确 = (
+            实际写入 == [全局参数文件] and
+            _读取json(全局参数文件) == {"大象识别": {"大象委托量阈值": 100}} and
+            not [文件名 for 文件名 in os.listdir(临时目录) if 文件名.endswith(".tmp")]
+        )
+
+        # 关闭时写回尚未落盘的修改
+        管理器.设置股票列表(["600000", "000001"])
+        管理器.关闭()
+        关闭写回正确 = _读取json(管理器.股票列表文件) == {"stocks": ["600000", "000001"]}
+    finally:
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 批量修改正确 and 延迟写入正确 and 只写变化文件 and 原子写入正确 and 快照不变 and 关闭写回正确
+
+    if 测试通过:
+        logger.info("参数写入测试通过")
+    else:
+        logger.error("参数写入测试失败")
+
+    return {
+        "成功": 测试通过,
+        "批量修改正确": 批量修改正确,
+        "延迟写入正确": 延迟写入正确,
+        "只写变化文件": 只写变化文件,
+        "原子写入正确": 原子写入正确,
+        "快照不变": 快照不变,
+        "关闭写回正确": 关闭写回正确
+    }
+
+def 测试SQLite参数存储() -> Dict:
+    """测试SQLite参数存储的迁移、增量写入、版本历史和JSON导出"""
+    logger = get_logger("测试_参数管理")
+    logger.info("开始测试SQLite参数存储功能")
+
+    临时目录 = tempfile.mkdtemp(prefix="参数存储测试_")
+    try:
+        原始全局参数 = {"大象识别": {"大象委托量阈值": 100, "启用卖单识别": True}}
+        原始品种参数 = {
+            f"{序号:06d}": {"大象识别": {"大象委托量阈值": 序号}} for 序号 in range(1, 1001)
+        }
+        for 文件名, 内容 in (("global_params.json", 原始全局参数),
+                             ("symbol_params.json", 原始品种参数),
+                             ("stocks.json", {"stocks": ["000001", "000002"]})):
+            with open(os.path.join(临时目录, 文件名), "w", encoding="utf-8") as f:
+                json.dump(内容, f, ensure_ascii=False)
+
+        # 首次启动从JSON迁移
+        管理器 = 参数管理器(配置目录=临时目录, 写入延迟=0, 存储="sqlite")
+        迁移正确 = (
+            管理器.获取参数("000500", "大象识别", "大象委托量阈值") == 500 and
+            管理器.获取参数("999999", "大象识别", "启用卖单识别") is True and
+            管理器.获取股票列表() == ["000001", "000002"]
+        )
+
+        # 修改一个品种只写入这一行，版本递增并留下历史
+        存储 = 管理器._数据库
+        管理器.设置品种参数("000001", "大象识别", "大象委托量阈值", 300)
+        管理器.删除品种参数("000002", "大象识别", "大象委托量阈值")
+        版本 = 存储.获取版本("000001", "大象识别", "大象委托量阈值")
+        未修改版本 = 存储.获取版本("000003", "大象识别", "大象委托量阈值")
+        历史 = 管理器.获取参数历史("000001", "大象识别", "大象委托量阈值")
+        删除历史 = 管理器.获取参数历史("000002", "大象识别", "大象委托量阈值")
+        版本历史正确 = (
+            版本["值"] == 300 and 版本["版本"] == 2 and
+            未修改版本["版本"] == 1 and
+            [记录["值"] for 记录 in 历史] == [300, 1] and
+            删除历史[0]["已删除"] and 存储.获取版本("000002", "大象识别", "大象委托量阈值") is None
+        )
+        未变化不写入 = 存储.保存({"000003": 存储.获取("000003")}) == 0
+        管理器.关闭()
+
+        # 重新打开读取到相同的参数，不再从JSON迁移
+        with open(os.path.join(临时目录, "symbol_params.json"), "w", encoding="utf-8") as f:
+            json.dump({}, f)
+        管理器 = 参数管理器(配置目录=临时目录, 写入延迟=0, 存储="sqlite")
+        # 启动时只读取全局参数和品种列表，品种参数第一次读取时才加载，加载不改变版本
+        启动版本 = 管理器.版本
+        启动未加载 = "000500" not in 管理器.品种参数 and "000500" in 管理器._未加载品种
+        按需加载正确 = (
+            启动未加载 and
+            "000500" in 管理器.获取品种所有参数("000999")["_品种特定参数标记"] and
+            管理器.获取参数("000500", "大象识别", "大象委托量阈值") == 500 and
+            "000500" in 管理器.品种参数 and "000500" not in 管理器._未加载品种 and
+            管理器.版本 == 启动版本
+        )
+        重新打开正确 = (
+            管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 300 and
+            管理器.获取参数("000002", "大象识别", "大象委托量阈值") == 100 and
+            管理器.获取参数("000003", "大象识别", "大象委托量阈值") == 3
+        )
+
+        # 导出为原来的JSON格式，JSON存储可以直接读取
+        导出目录 = os.path.join(临时目录, "导出")
+        管理器.导出json(导出目录)
+        管理器.关闭()
+        json管理器 = 参数管理器(配置目录=导出目录, 写入延迟=0)
+        导出正确 = (
+            json管理器.全局参数 == 原始全局参数 and
+            json管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 300 and
+            json管理器.获取参数("000500", "大象识别", "大象委托量阈值") == 500 and
+            json管理器.获取股票列表() == ["000001", "000002"]
+        )
+        json管理器.关闭()
+    finally:
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 迁移正确 and 版本历史正确 and 未变化不写入 and 按需加载正确 and 重新打开正确 and 导出正确
+
+    if 测试通过:
+        logger.info("SQLite参数存储测试通过")
+    else:
+        logger.error("SQLite参数存储测试失败")
+
+    return {
+        "成功": 测试通过,
+        "迁移正确": 迁移正确,
+        "版本历史正确": 版本历史正确,
+        "未变化不写入": 未变化不写入,
+        "按需加载正确": 按需加载正确,
+        "重新打开正确": 重新打开正确,
+        "导出正确": 导出正确
+    }
+
+def 测试批量修改出错() -> Dict:
+    """测试批量修改中任何一项出错时整批修改被丢弃，不发布快照也不写入磁盘"""
+    logger = get_logger("测试_参数管理")
+    logger.info("开始测试批量修改出错回滚")
+
+    临时目录 = tempfile.mkdtemp(prefix="参数回滚测试_")
+    try:
+        管理器 = 参数管理器(配置目录=临时目录, 写入延迟=0)
+        管理器.设置全局参数("大象识别", "大象委托量阈值", 100)
+        管理器.设置品种参数("600000", "大象识别", "大象委托量阈值", 200)
+        管理器.设置品种参数("600000", "交易执行", "等待时间", 5)
+        起始版本 = 管理器.版本
+        起始文件 = _读取json(管理器.品种参数文件)
+
+        # 第三项类型错误：前两项也不生效
+        try:
+            with 管理器.批量修改():
+                管理器.设置品种参数("600000", "大象识别", "大象委托量阈值", 300)
+                管理器.删除品种参数("600000", "交易执行")
+                管理器.设置品种参数("600000", "大象识别", "大象委托量阈值", "很多")
+            校验出错 = False
+        except ValueError:
+            校验出错 = True
+        类型错误回滚 = (
+            校验出错 and
+            管理器.版本 == 起始版本 and
+            管理器.获取参数("600000", "大象识别", "大象委托量阈值") == 200 and
+            管理器.获取参数("600000", "交易执行", "等待时间") == 5 and
+            管理器.品种参数["600000"] == {"大象识别": {"大象委托量阈值": 200}, "交易执行": {"等待时间": 5}} and
+            not 管理器._待写入 and
+            _读取json(管理器.品种参数文件) == 起始文件
+        )
+
+        # 调用方代码出错同样丢弃，之后的修改不会带上被丢弃的部分
+        try:
+            with 管理器.批量修改():
+                管理器.设置全局参数("大象识别", "大象委托量阈值", 500)
+                管理器.设置股票列表(["600000"])
+                raise RuntimeError("中途出错")
+        except RuntimeError:
+            pass
+        管理器.设置品种参数("000001", "交易执行", "等待时间", 7)
+        调用方出错回滚 = (
+            管理器.全局参数 == {"大象识别": {"大象委托量阈值": 100}} and
+            管理器.获取股票列表() == [] and
+            管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 100 and
+            _读取json(管理器.全局参数文件) == {"大象识别": {"大象委托量阈值": 100}} and
+            _读取json(管理器.股票列表文件) == {"stocks": []}
+        )
+
+        # 按全局参数校验范围和类型：负数、开关参数非布尔值报错，整数参数的整数值浮点数转换为整数
+        管理器.设置全局参数("交易执行", "等待时间", 10)
+        管理器.设置全局参数("大象识别", "启用卖单识别", True)
+        无效值 = [("大象识别", "大象委托量阈值", -1), ("交易执行", "等待时间", 2.5),
+                 ("大象识别", "启用卖单识别", "是"), ("大象识别", "大象委托量阈值", float("nan"))]
+        无效值报错 = 0
+        for 模块, 参数名, 参数值 in 无效值:
+            try:
+                管理器.设置品种参数("000001", 模块, 参数名, 参数值)
+            except ValueError:
+                无效值报错 += 1
+        管理器.设置品种参数("000001", "交易执行", "等待时间", 8.0)
+        范围校验正确 = (
+            无效值报错 == len(无效值) and
+            type(管理器.获取参数("000001", "交易执行", "等待时间")) is int and
+            管理器.获取参数("000001", "大象识别", "启用卖单识别") is True
+        )
+        管理器.关闭()
+    finally:
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 类型错误回滚 and 调用方出错回滚 and 范围校验正确
+
+    if 测试通过:
+        logger.info("批量修改出错回滚测试通过")
+    else:
+        logger.error("批量修改出错回滚测试失败")
+
+    return {
+        "成功": 测试通过,
+        "类型错误回滚": 类型错误回滚,
+        "调用方出错回滚": 调用方出错回滚,
+        "范围校验正确": 范围校验正确
+    }
+
+def 测试快照增量() -> Dict:
+    """测试增量派生的参数快照与完整解析一致，并共享未修改品种的参数表"""
+    logger = get_logger("测试_参数管理")
+    logger.info("开始测试参数快照增量派生")
+
+    临时目录 = tempfile.mkdtemp(prefix="参数快照测试_")
+    try:
+        管理器 = 参数管理器(配置目录=临时目录, 写入延迟=10)
+        with 管理器.批量修改():
+            管理器.设置全局参数("大象识别", "大象委托量阈值", 100)
+            for 序号 in range(20):
+                管理器.设置品种参数(f"{600000 + 序号}", "大象识别", "大象委托量阈值", 序号)
+
+        # 只修改一个品种：其余品种的参数表和解析结果与上一个快照是同一个对象
+        旧快照 = 管理器._快照
+        管理器.设置品种参数("600001", "交易执行", "等待时间", 5)
+        新快照 = 管理器._快照
+        共享未修改品种 = (
+            新快照.已解析["600002"] is 旧快照.已解析["600002"] and
+            新快照.品种参数["600002"] is 旧快照.品种参数["600002"] and
+            新快照.默认解析 is 旧快照.默认解析 and
+            "交易执行" not in 旧快照.已解析["600001"].get("交易执行", {}) and
+            管理器.获取参数("600001", "交易执行", "等待时间") == 5
+        )
+
+        # 各种修改之后，增量派生的快照与重新完整解析的结果相同
+        操作列表 = [
+            lambda: 管理器.设置全局参数("交易执行", "等待时间", 10),
+            lambda: 管理器.设置品种参数("600003", "交易执行", "等待时间", 3),
+            lambda: 管理器.设置品种参数("000001", "风险控制", "单股最大交易次数", 2),
+            lambda: 管理器.删除品种参数("600003", "交易执行"),
+            lambda: 管理器.设置全局参数("大象识别", "大象委托量阈值", 200),
+            lambda: 管理器.删除品种参数("600004"),
+            lambda: 管理器.设置全局参数("额外模块", "参数", 1),
+        ]
+        与完整解析一致 = True
+        for 操作 in 操作列表:
+            操作()
+            快照 = 管理器._快照
+            完整快照 = 参数快照(0, 管理器.全局参数, 管理器.品种参数, [])
+            与完整解析一致 = 与完整解析一致 and (
+                快照.全局参数 == 完整快照.全局参数 and
+                快照.品种参数 == 完整快照.品种参数 and
+                快照.默认解析 == 完整快照.默认解析 and
+                快照.已解析 == 完整快照.已解析
+            )
+        全局修改生效 = (
+            管理器.获取参数("600005", "大象识别", "大象委托量阈值") == 5 and
+            管理器.获取参数("600005", "交易执行", "等待时间") == 10 and
+            管理器.获取参数("600004", "大象识别", "大象委托量阈值") == 200 and
+            "600004" not in 管理器.获取品种所有参数("600005")["_品种特定参数标记"]
+        )
+        管理器.关闭()
+    finally:
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 共享未修改品种 and 与完整解析一致 and 全局修改生效
+
+    if 测试通过:
+        logger.info("参数快照增量派生测试通过")
+    else:
+        logger.error("参数快照增量派生测试失败")
+
+    return {
+        "成功": 测试通过,
+        "共享未修改品种": 共享未修改品种,
+        "与完整解析一致": 与完整解析一致,
+        "全局修改生效": 全局修改生效
+    }
+
+if __name__ == "__main__":
+    结果 = 测试参数写入()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
+    结果 = 测试SQLite参数存储()
+    print(f"SQLite测试结果: {'通过' if 结果['成功'] else '失败'}")
+    结果 = 测试批量修改出错()
+    print(f"批量修改出错测试结果: {'通过' if 结果['成功'] else '失败'}")
+    结果 = 测试快照增量()
+    print(f"快照增量测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大象特征模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.大象特征 import 大象特征表, 定位价格档
+    from modules.大象识别 import 大象识别器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.大象特征 import 大象特征表, 定位价格档
+        from 大象策略.modules.大象识别 import 大象识别器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..大象特征 import 大象特征表, 定位价格档
+        from ..大象识别 import 大象识别器
+        from ..日志 import get_logger
+
+def 测试大象特征() -> Dict:
+    """测试大象滚动特征的增量更新、信号强度和槽位管理"""
+    logger = get_logger("测试_大象特征")
+    logger.info("开始测试大象特征功能")
+
+    # 定位价格档：连续报价、有空档、已消失、在可见档位之外
+    买盘 = [(1000, 10), (990, 150000), (980, 10), (970, 10), (960, 10)]
+    定位正确 = (
+        定位价格档(买盘, 990, 1) == 1 and
+        定位价格档([(1010, 10), (1000, 10), (990, 5), (950, 10), (940, 10)], 990, 1) == 2 and
+        定位价格档([(1000, 10), (980, 10), (970, 10), (960, 10), (950, 10)], 990, 1) == -1 and
+        定位价格档([(980, 10), (970, 10), (960, 10), (950, 10), (940, 10)], 990, 1) == -1 and
+        定位价格档([(1050, 10), (1040, 10), (1030, 10), (1020, 10), (1010, 10)], 990, 1) == -2 and
+        定位价格档([(1010, 10), (1020, 200000), (1030, 10)], 1020, -1) == 1
+    )
+
+    识别器 = 大象识别器(大象委托量阈值=1000000.0, 确认次数=1, 大象稳定时间=0)
+    卖盘 = [(1010, 1000), (1020, 1000), (1030, 1000), (1040, 1000), (1050, 1000)]
+    识别器.检测大象("600000", 0, 买盘, 卖盘)
+    大象 = 识别器.大象跟踪[("600000", 990)]
+    登记正确 = 大象["特征槽位"] == 0 and 大象["信号强度"] == 1.0 and len(识别器.特征) == 1
+
+    # 数量不变时强度由盘口对比决定，对手盘比和盘口占比按金额计算
+    识别器.更新特征("600000", 3000, 买盘, 卖盘)
+    特征 = 识别器.特征.获取特征(大象)
+    初始强度 = 大象["信号强度"]
+    特征正确 = (
+        abs(特征["对手盘比"] - 990 * 150000 / (1000 * (1010 + 1020 + 1030 + 1040 + 1050))) < 1e-9 and
+        abs(特征["盘口占比"] - 990 * 150000 / (10 * (1000 + 980 + 970 + 960))) < 1e-9 and
+        特征["驻留秒数"] == 3.0 and 特征["数量均值"] == 150000 and 特征["消耗速度"] == 0 and
+        0.9 < 初始强度 < 1.0
+    )
+
+    # 大象被成交消耗、数量减少后，数量均值按半衰期下降，消耗速度上升，强度下降
+    大象["成交消耗"] = 90000
+    识别器.更新特征("600000", 6000, [(1000, 10), (990, 60000), (980, 10), (970, 10), (960, 10)], 卖盘)
+    特征 = 识别器.特征.获取特征(大象)
+    衰减正确 = (
+        abs(特征["数量均值"] - 105000) < 1e-6 and
+        abs(特征["消耗速度"] - 15000) < 1e-6 and
+        大象["信号强度"] < 初始强度 * 0.5 and
+        识别器.信号强度表() == {"600000": 大象["信号强度"]}
+    )
+
+    # 大象移除后释放槽位，容量用完时不再分配
+    识别器.重置("600000")
+    小表 = 大象特征表(容量=1)
+    槽位正确 = (
+        len(识别器.特征) == 0 and 大象["特征槽位"] == -1 and
+        小表.登记({"股票代码": "1", "数量": 1, "首次发现时间": 0}) == 0 and
+        小表.登记({"股票代码": "2", "数量": 1, "首次发现时间": 0}) == -1
+    )
+
+    测试通过 = 定位正确 and 登记正确 and 特征正确 and 衰减正确 and 槽位正确
+
+    if 测试通过:
+        logger.info("大象特征测试通过")
+    else:
+        logger.error("大象特征测试失败")
+
+    return {
+        "成功": 测试通过,
+        "定位正确": 定位正确,
+        "登记正确": 登记正确,
+        "特征正确": 特征正确,
+        "衰减正确": 衰减正确,
+        "槽位正确": 槽位正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试大象特征()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大象监控模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.大象监控 import 大象消失监控器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.大象监控 import 大象消失监控器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..大象监控 import 大象消失监控器
+        from ..日志 import get_logger
+
+def _盘口(买盘: list, 卖盘: list) -> Dict:
+    """生成整数价格档盘口"""
+    return {"买盘": 买盘, "卖盘": 卖盘}
+
+def 测试大象监控() -> Dict:
+    """测试持仓期间大象消失监控的各种消失情形"""
+    logger = get_logger("测试_大象监控")
+    logger.info("开始测试大象监控功能")
+
+    监控 = 大象消失监控器(消失比例=0.8)
+    买单大象 = {"股票代码": "600000", "类型": "买单大象", "价格档": 990, "数量": 150000}
+    卖单大象 = {"股票代码": "000001", "类型": "卖单大象", "价格档": 1020, "数量": 200000}
+    卖盘 = [(1000, 100), (1010, 100), (1020, 100), (1030, 100), (1040, 100)]
+
+    # 大象仍在、数量小幅下降、盘口有空档、价格上移到可见档位之外、没有报价时都不触发
+    监控.登记(买单大象)
+    未消失正确 = (
+        监控.检查("600000", _盘口([(1000, 10), (990, 150000), (980, 10), (970, 10), (960, 10)], 卖盘)) is None and
+        监控.检查("600000", _盘口([(1000, 10), (990, 40000), (980, 10), (970, 10), (960, 10)], 卖盘)) is None and
+        监控.检查("600000", _盘口([(1010, 10), (1000, 10), (990, 150000), (950, 10), (940, 10)], 卖盘)) is None and
+        监控.检查("600000", _盘口([(1050, 10), (1040, 10), (1030, 10), (1020, 10), (1010, 10)], 卖盘)) is None and
+        监控.检查("600000", _盘口([(0, 0)] * 5, 卖盘)) is None and
+        监控.检查("000002", _盘口([(1000, 10)], 卖盘)) is None and
+        "600000" in 监控
+    )
+
+    # 数量下降超过比例
+    数量下降正确 = (
+        监控.检查("600000", _盘口([(1000, 10), (990, 20000), (980, 10), (970, 10), (960, 10)], 卖盘)) == "数量下降" and
+        "600000" not in 监控
+    )
+
+    # 大象所在价格档不在盘口中，且大象两侧的价格档都在
+    监控.登记(买单大象)
+    价格档消失正确 = (
+        监控.检查("600000", _盘口([(1000, 10), (980, 10), (970, 10), (960, 10), (950, 10)], 卖盘)) == "价格档消失"
+    )
+
+    # 最优价越过大象价格，之后不再重复触发
+    监控.登记(买单大象)
+    价格穿越正确 = (
+        监控.检查("600000", _盘口([(980, 10), (970, 10), (960, 10), (950, 10), (940, 10)], 卖盘)) == "价格穿越" and
+        监控.检查("600000", _盘口([(980, 10), (970, 10), (960, 10), (950, 10), (940, 10)], 卖盘)) is None
+    )
+
+    # 卖单大象按卖盘方向判断
+    监控.登记(卖单大象)
+    买盘 = [(990, 100), (980, 100), (970, 100), (960, 100), (950, 100)]
+    卖单正确 = (
+        监控.检查("000001", _盘口(买盘, [(1000, 10), (1010, 10), (1020, 200000), (1030, 10), (1040, 10)])) is None and
+        监控.检查("000001", _盘口(买盘, [(1000, 10), (1010, 10), (1030, 10), (1040, 10), (1050, 10)])) == "价格档消失"
+    )
+    监控.登记(卖单大象)
+    卖单正确 = 卖单正确 and (
+        监控.检查("000001", _盘口(买盘, [(1030, 10), (1040, 10), (1050, 10), (1060, 10), (1070, 10)])) == "价格穿越"
+    )
+
+    # 缺少价格档的大象信息不登记
+    登记校验正确 = 监控.登记({"股票代码": "600000", "类型": "买单大象"}) is None and len(监控) == 0
+    统计正确 = 监控.统计 == {"登记": 5, "价格穿越": 2, "价格档消失": 2, "数量下降": 1}
+
+    测试通过 = 未消失正确 and 数量下降正确 and 价格档消失正确 and 价格穿越正确 and 卖单正确 and 登记校验正确 and 统计正确
+
+    if 测试通过:
+        logger.info("大象监控测试通过")
+    else:
+        logger.error("大象监控测试失败")
+
+    return {
+        "成功": 测试通过,
+        "未消失正确": 未消失正确,
+        "数量下降正确": 数量下降正确,
+        "价格档消失正确": 价格档消失正确,
+        "价格穿越正确": 价格穿越正确,
+        "卖单正确": 卖单正确,
+        "登记校验正确": 登记校验正确,
+        "统计正确": 统计正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试大象监控()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,487 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大象策略主类的测试文件
+"""
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.性能测试 import 桩CTA引擎
+    from modules.委托限流 import 委托限流器, 优先级_开仓
+    from modules.紧急撤单 import 状态_撤单中, 状态_已清空
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.性能测试 import 桩CTA引擎
+        from 大象策略.modules.委托限流 import 委托限流器, 优先级_开仓
+        from 大象策略.modules.紧急撤单 import 状态_撤单中, 状态_已清空
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..性能测试 import 桩CTA引擎
+        from ..委托限流 import 委托限流器, 优先级_开仓
+        from ..紧急撤单 import 状态_撤单中, 状态_已清空
+        from ..日志 import get_logger
+
+def _创建策略():
+    """
+    在临时目录中创建使用桩CTA引擎的策略，需要vnpy
+
+    返回:
+        (策略, 引擎, 临时目录, 原工作目录)
+    """
+    from 大象策略 import 大象策略
+    原工作目录 = os.getcwd()
+    临时目录 = tempfile.mkdtemp(prefix="大象策略测试_")
+    os.chdir(临时目录)
+    引擎 = 桩CTA引擎()
+    策略 = 大象策略(cta_engine=引擎, strategy_name="策略测试", vt_symbol="", setting={})
+    策略.inited = True
+    策略.trading = True
+    return 策略, 引擎, 临时目录, 原工作目录
+
+def _订单回报(委托号: str, 股票代码: str, 方向, 价格: float, 数量: int, 已成交: int, 状态):
+    """按委托号构造vnpy的OrderData"""
+    from vnpy.trader.constant import Exchange, Offset
+    from vnpy.trader.object import OrderData
+    网关, 订单号 = 委托号.split(".", 1)
+    return OrderData(
+        gateway_name=网关,
+        symbol=股票代码,
+        exchange=Exchange.SSE if 股票代码.startswith("6") else Exchange.SZSE,
+        orderid=订单号,
+        direction=方向,
+        offset=Offset.NONE,
+        price=价格,
+        volume=数量,
+        traded=已成交,
+        status=状态
+    )
+
+def _开仓(策略, 股票代码: str, 价格: float, 数量: int) -> str:
+    """
+    经委托限流器发送下方大象策略的买入委托，并按策略的方式记入交易状态
+
+    参数:
+        策略: 大象策略
+        股票代码: 股票代码
+        价格: 委托价格
+        数量: 委托数量
+
+    返回:
+        委托号，限流排队时为排队编号
+    """
+    from vnpy.trader.constant import Direction
+    委托号 = 策略._发送委托(股票代码, Direction.LONG, 价格, 数量, 优先级_开仓, "买入订单ID")
+    策略.交易状态[股票代码] = {
+        "状态": "买入中",
+        "买入订单ID": 委托号,
+        "买入价格": 价格,
+        "买入数量": 数量,
+        "预期卖出价格": round(价格 + 0.05, 2),
+        "大象信息": {"类型": "买单大象", "价格": round(价格 - 0.01, 2), "委托金额": 2000000}
+    }
+    return 委托号
+
+def _行情(股票代码: str, 价格: float):
+    """构造五档盘口的vnpy TickData"""
+    from datetime import datetime
+    from vnpy.trader.constant import Exchange
+    from vnpy.trader.object import TickData
+    字段 = {}
+    for i in range(5):
+        字段[f"bid_price_{i + 1}"], 字段[f"bid_volume_{i + 1}"] = round(价格 - 0.01 * (i + 1), 2), 100
+        字段[f"ask_price_{i + 1}"], 字段[f"ask_volume_{i + 1}"] = round(价格 + 0.01 * (i + 1), 2), 100
+    return TickData(
+        gateway_name="STUB",
+        symbol=股票代码,
+        exchange=Exchange.SSE if 股票代码.startswith("6") else Exchange.SZSE,
+        datetime=datetime.now(),
+        last_price=价格,
+        **字段
+    )
+
+def 测试订单回报() -> Dict:
+    """测试 on_order 按 OrderData.traded 推进交易状态，包括部分成交后撤单"""
+    logger = get_logger("测试_大象策略")
+    logger.info("开始测试订单回报功能")
+
+    try:
+        from vnpy.trader.constant import Direction, Status
+        策略, 引擎, 临时目录, 原工作目录 = _创建策略()
+    except ImportError as e:
+        logger.warning(f"缺少vnpy，跳过订单回报测试: {e}")
+        return {"成功": True, "跳过": str(e)}
+
+    try:
+        # 全部成交: 买入中 -> 卖出中，按成交数量发出止盈单；止盈单全部成交后交易完成
+        买入委托 = _开仓(策略, "600000", 10.0, 1000)
+        策略.on_order(_订单回报(买入委托, "600000", Direction.LONG, 10.0, 1000, 0, Status.NOTTRADED))
+        策略.on_order(_订单回报(买入委托, "600000", Direction.LONG, 10.0, 1000, 1000, Status.ALLTRADED))
+        交易状态 = 策略.交易状态.get("600000", {})
+        卖出委托 = 交易状态.get("卖出订单ID")
+        全部成交正确 = (
+            交易状态.get("状态") == "卖出中" and 交易状态.get("买入成交数量") == 1000 and
+            交易状态.get("卖出数量") == 1000 and 引擎.已发送订单[-1][0] == 卖出委托 and
+            引擎.已发送订单[-1][1] == Direction.SHORT and 引擎.已发送订单[-1][3] == 1000 and
+            买入委托 not in 策略.交易执行.活跃订单 and
+            策略.交易执行.订单历史[-1]["成交数量"] == 1000
+        )
+        策略.on_order(_订单回报(卖出委托, "600000", Direction.SHORT, 10.05, 1000, 1000, Status.ALLTRADED))
+        完成正确 = "600000" not in 策略.交易状态
+
+        # 部分成交不推进状态；随后撤单时按已成交数量持有并发出止盈单
+        买入委托 = _开仓(策略, "000001", 12.0, 1000)
+        策略.on_order(_订单回报(买入委托, "000001", Direction.LONG, 12.0, 1000, 300, Status.PARTTRADED))
+        部分成交正确 = 策略.交易状态.get("000001", {}).get("状态") == "买入中"
+        策略.on_order(_订单回报(买入委托, "000001", Direction.LONG, 12.0, 1000, 300, Status.CANCELLED))
+        交易状态 = 策略.交易状态.get("000001", {})
+        部分撤单正确 = (
+            交易状态.get("状态") == "卖出中" and 交易状态.get("买入成交数量") == 300 and
+            交易状态.get("卖出数量") == 300 and 引擎.已发送订单[-1][3] == 300
+        )
+
+        # 未成交即撤单时清理交易状态
+        买入委托 = _开仓(策略, "600036", 30.0, 100)
+        策略.on_order(_订单回报(买入委托, "600036", Direction.LONG, 30.0, 100, 0, Status.CANCELLED))
+        未成交撤单正确 = "600036" not in 策略.交易状态
+    finally:
+        os.chdir(原工作目录)
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 全部成交正确 and 完成正确 and 部分成交正确 and 部分撤单正确 and 未成交撤单正确
+
+    if 测试通过:
+        logger.info("订单回报测试通过")
+    else:
+        logger.error("订单回报测试失败")
+
+    return {
+        "成功": 测试通过,
+        "全部成交正确": 全部成交正确,
+        "完成正确": 完成正确,
+        "部分成交正确": 部分成交正确,
+        "部分撤单正确": 部分撤单正确,
+        "未成交撤单正确": 未成交撤单正确
+    }
+
+def 测试止损重发() -> Dict:
+    """测试止盈单部分成交后撤单记入平仓，止损和紧急买回被撤销或拒绝时按对手价重发剩余数量"""
+    logger = get_logger("测试_大象策略")
+    logger.info("开始测试止损重发功能")
+
+    try:
+        from vnpy.trader.constant import Direction, Status
+        策略, 引擎, 临时目录, 原工作目录 = _创建策略()
+    except ImportError as e:
+        logger.warning(f"缺少vnpy，跳过止损重发测试: {e}")
+        return {"成功": True, "跳过": str(e)}
+
+    def 盘口(股票代码: str, 买一: float, 卖一: float) -> Dict:
+        品种 = 策略.品种表.获取(股票代码)
+        return {"买盘": [(品种.转价格档(买一), 1000)], "卖盘": [(品种.转价格档(卖一), 1000)]}
+
+    def 最近委托():
+        委托号, 方向, 价格, 数量 = 引擎.已发送订单[-1]
+        return 委托号, 方向, round(价格, 2), 数量
+
+    try:
+        # 下方大象：买入1000股后挂止盈单，大象消失时先撤止盈单
+        买入委托 = _开仓(策略, "600000", 10.0, 1000)
+        策略.on_order(_订单回报(买入委托, "600000", Direction.LONG, 10.0, 1000, 1000, Status.ALLTRADED))
+        止盈委托 = 策略.交易状态["600000"]["卖出订单ID"]
+        策略._最新盘口["600000"] = 盘口("600000", 9.98, 9.99)
+        策略._处理大象消失("600000", 策略._最新盘口["600000"], "测试")
+        撤单正确 = 策略.交易状态["600000"]["状态"] == "止损撤单中" and 引擎.已撤销订单 == [止盈委托]
+
+        # 止盈单撤单前成交200股，记入平仓后按买一止损剩余800股
+        策略.on_order(_订单回报(止盈委托, "600000", Direction.SHORT, 10.05, 1000, 200, Status.CANCELLED))
+        交易状态 = 策略.交易状态["600000"]
+        止损委托, 方向, 价格, 数量 = 最近委托()
+        止损正确 = (
+            交易状态["状态"] == "止损中" and 交易状态["平仓成交数量"] == 200 and
+            方向 == Direction.SHORT and 价格 == 9.98 and 数量 == 800
+        )
+
+        # 止损单成交300股后被撤销，按最新买一重发500股；被拒绝后再次重发
+        策略._最新盘口["600000"] = 盘口("600000", 9.95, 9.96)
+        策略.on_order(_订单回报(止损委托, "600000", Direction.SHORT, 9.98, 800, 300, Status.CANCELLED))
+        止损委托, 方向, 价格, 数量 = 最近委托()
+        重发正确 = 策略.交易状态["600000"]["状态"] == "止损中" and 价格 == 9.95 and 数量 == 500
+        策略.on_order(_订单回报(止损委托, "600000", Direction.SHORT, 9.95, 500, 0, Status.REJECTED))
+        止损委托, 方向, 价格, 数量 = 最近委托()
+        重发正确 = 重发正确 and 数量 == 500 and 策略.交易状态["600000"]["止损重发次数"] == 2
+
+        # 剩余数量全部成交后按三次平仓的成交金额计算盈亏
+        交易次数 = 策略.风险控制.日内总交易次数
+        策略.on_order(_订单回报(止损委托, "600000", Direction.SHORT, 9.95, 500, 500, Status.ALLTRADED))
+        平仓盈亏 = (10.05 * 200 + 9.98 * 300 + 9.95 * 500) - 10.0 * 1000
+        完成正确 = (
+            "600000" not in 策略.交易状态 and 策略.风险控制.日内总交易次数 == 交易次数 + 1 and
+            abs(策略.风险控制.股票盈亏["600000"] - (平仓盈亏 - (10.0 + (平仓盈亏 + 10000) / 1000) * 1000 * 0.0003)) < 1e-6
+        )
+
+        # 上方大象：紧急买回部分成交后撤销，按卖一重发剩余数量；上面的亏损可能已触发日内亏损紧急撤单，先复位
+        策略.复位紧急撤单()
+        策略.交易状态["000001"] = {
+            "状态": "已卖出待买回",
+            "卖出成交价格": 12.0,
+            "卖出成交数量": 500,
+            "大象信息": {"类型": "卖单大象", "价格": 12.01, "委托金额": 2000000}
+        }
+        策略._处理大象消失("000001", 盘口("000001", 12.02, 12.03), "测试")
+        买回委托, 方向, 价格, 数量 = 最近委托()
+        买回正确 = 策略.交易状态["000001"]["状态"] == "紧急买回中" and 方向 == Direction.LONG and 数量 == 500
+        策略._最新盘口["000001"] = 盘口("000001", 12.04, 12.05)
+        策略.on_order(_订单回报(买回委托, "000001", Direction.LONG, 12.03, 500, 100, Status.CANCELLED))
+        买回委托, 方向, 价格, 数量 = 最近委托()
+        买回正确 = (
+            买回正确 and 策略.交易状态["000001"]["状态"] == "紧急买回中" and
+            价格 == 12.05 and 数量 == 400
+        )
+        策略.on_order(_订单回报(买回委托, "000001", Direction.LONG, 12.05, 400, 400, Status.ALLTRADED))
+        买回正确 = 买回正确 and "000001" not in 策略.交易状态
+
+        # 紧急撤单后无法重发，剩余持仓退回持有状态继续跟踪而不是丢弃
+        策略.交易状态["600036"] = {
+            "状态": "止损中",
+            "买入成交价格": 30.0,
+            "买入成交数量": 100,
+            "卖出订单ID": "STUB.99",
+            "大象信息": {"类型": "买单大象", "价格": 29.99, "委托金额": 2000000}
+        }
+        策略._最新盘口["600036"] = 盘口("600036", 29.9, 29.91)
+        if not 策略.紧急撤单.已触发:
+            策略.触发紧急撤单("测试")
+        策略.on_order(_订单回报("STUB.99", "600036", Direction.SHORT, 29.9, 100, 0, Status.CANCELLED))
+        跟踪正确 = (
+            策略.交易状态.get("600036", {}).get("状态") == "持有中" and
+            策略._剩余持仓(策略.交易状态["600036"]) == 100
+        )
+    finally:
+        os.chdir(原工作目录)
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 撤单正确 and 止损正确 and 重发正确 and 完成正确 and 买回正确 and 跟踪正确
+
+    if 测试通过:
+        logger.info("止损重发测试通过")
+    else:
+        logger.error("止损重发测试失败")
+
+    return {
+        "成功": 测试通过,
+        "撤单正确": 撤单正确,
+        "止损正确": 止损正确,
+        "重发正确": 重发正确,
+        "完成正确": 完成正确,
+        "买回正确": 买回正确,
+        "跟踪正确": 跟踪正确
+    }
+
+def 测试行情排空() -> Dict:
+    """测试合并器中等待的行情由 on_timer 处理、on_stop 前处理完，合并等待计入延迟统计"""
+    logger = get_logger("测试_大象策略")
+    logger.info("开始测试行情排空功能")
+
+    try:
+        策略, 引擎, 临时目录, 原工作目录 = _创建策略()
+    except ImportError as e:
+        logger.warning(f"缺少vnpy，跳过行情排空测试: {e}")
+        return {"成功": True, "跳过": str(e)}
+
+    try:
+        # 事件队列积压时行情只进入合并器
+        积压 = [5]
+        策略.行情合并.最大等待毫秒 = 60000
+        策略.行情合并.积压探测 = lambda: 积压[0]
+        策略.on_tick(_行情("600000", 10.0))
+        策略.on_tick(_行情("000001", 12.0))
+        策略.on_tick(_行情("600000", 10.01))
+        积压正确 = len(策略.行情合并) == 2 and 策略.行情合并.处理数 == 0
+
+        # 之后不再有行情推送，积压消失后由定时器处理
+        积压[0] = 0
+        策略.on_timer(1)
+        延迟 = 策略.延迟统计.导出()
+        定时器正确 = (
+            len(策略.行情合并) == 0 and 策略.行情合并.处理数 == 2 and
+            策略._行情计数.标签("600000").值 == 1 and
+            延迟["阶段"]["合并等待"]["次数"] == 2
+        )
+
+        # 停止时先处理完等待中的行情，不丢弃
+        积压[0] = 5
+        策略.on_tick(_行情("600036", 30.0))
+        策略.on_stop()
+        统计 = 策略.行情合并.导出()
+        停止正确 = 统计["等待中"] == 0 and 统计["处理数"] == 3 and 策略._行情计数.标签("600036").值 == 1
+    finally:
+        os.chdir(原工作目录)
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 积压正确 and 定时器正确 and 停止正确
+
+    if 测试通过:
+        logger.info("行情排空测试通过")
+    else:
+        logger.error("行情排空测试失败")
+
+    return {
+        "成功": 测试通过,
+        "积压正确": 积压正确,
+        "定时器正确": 定时器正确,
+        "停止正确": 停止正确
+    }
+
+def 测试网页紧急撤单() -> Dict:
+    """测试网页线程请求的紧急撤单由策略线程执行，丢弃排队委托并经 on_order 确认撤单"""
+    logger = get_logger("测试_大象策略")
+    logger.info("开始测试网页紧急撤单功能")
+
+    try:
+        from vnpy.trader.constant import Direction, Status
+        策略, 引擎, 临时目录, 原工作目录 = _创建策略()
+    except ImportError as e:
+        logger.warning(f"缺少vnpy，跳过网页紧急撤单测试: {e}")
+        return {"成功": True, "跳过": str(e)}
+
+    try:
+        # 每秒只允许一笔委托，第一笔当场发出，后两笔排队
+        时间 = [0]
+        策略.委托限流 = 委托限流器(委托每秒=1, 撤单每秒=0, 单品种委托每秒=0, 时钟=lambda: 时间[0])
+        活跃订单 = {}
+        引擎.main_engine = SimpleNamespace(get_all_active_orders=lambda: list(活跃订单.values()))
+        已发出 = _开仓(策略, "600000", 10.0, 1000)
+        活跃订单[已发出] = _订单回报(已发出, "600000", Direction.LONG, 10.0, 1000, 0, Status.SUBMITTING)
+        排队 = [_开仓(策略, "000001", 12.0, 1000), _开仓(策略, "600036", 30.0, 100)]
+        排队正确 = (
+            已发出 == "STUB.1" and all(编号.startswith("排队.") for 编号 in 排队) and
+            策略.委托限流.排队数() == 2
+        )
+
+        # 网页线程只记录请求，不碰限流队列和交易状态
+        线程 = threading.Thread(target=策略.请求紧急撤单, args=("网页触发",))
+        线程.start()
+        线程.join()
+        请求正确 = (
+            not 策略.紧急撤单.已触发 and 策略.委托限流.排队数() == 2 and
+            not 引擎.已撤销订单 and len(策略.交易状态) == 3
+        )
+
+        # 委托确认回报到达时在策略线程中执行：丢弃排队委托、退回其交易状态，撤销已发出的委托
+        活跃订单[已发出] = _订单回报(已发出, "600000", Direction.LONG, 10.0, 1000, 0, Status.NOTTRADED)
+        策略.on_order(活跃订单[已发出])
+        执行正确 = (
+            策略.紧急撤单.状态 == 状态_撤单中 and 策略.紧急撤单.获取报告()["原因"] == "网页触发" and
+            策略.委托限流.排队数() == 0 and 引擎.已撤销订单 == [已发出] and
+            list(策略.交易状态) == ["600000"]
+        )
+
+        # 令牌补充后排队委托也不会发出，新委托被拒绝
+        时间[0] += 5_000_000_000
+        策略.委托限流.处理()
+        拒绝正确 = (
+            len(引擎.已发送订单) == 1 and
+            策略._发送委托("600519", Direction.LONG, 1500.0, 100, 优先级_开仓, "买入订单ID") is None
+        )
+
+        # 撤单回报经 on_order 确认，全部确认后清空
+        del 活跃订单[已发出]
+        策略.on_order(_订单回报(已发出, "600000", Direction.LONG, 10.0, 1000, 0, Status.CANCELLED))
+        报告 = 策略.紧急撤单.获取报告()
+        确认正确 = (
+            策略.紧急撤单.状态 == 状态_已清空 and 报告["已确认"] == 1 and 报告["等待确认"] == 0 and
+            not 策略.交易状态
+        )
+    finally:
+        os.chdir(原工作目录)
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 排队正确 and 请求正确 and 执行正确 and 拒绝正确 and 确认正确
+
+    if 测试通过:
+        logger.info("网页紧急撤单测试通过")
+    else:
+        logger.error("网页紧急撤单测试失败")
+
+    return {
+        "成功": 测试通过,
+        "排队正确": 排队正确,
+        "请求正确": 请求正确,
+        "执行正确": 执行正确,
+        "拒绝正确": 拒绝正确,
+        "确认正确": 确认正确
+    }
+
+def 测试参数变更() -> Dict:
+    """测试配置监视线程的参数变更只记录下来，由策略线程更新股票列表并订阅新增股票"""
+    logger = get_logger("测试_大象策略")
+    logger.info("开始测试参数变更功能")
+
+    try:
+        策略, 引擎, 临时目录, 原工作目录 = _创建策略()
+    except ImportError as e:
+        logger.warning(f"缺少vnpy，跳过参数变更测试: {e}")
+        return {"成功": True, "跳过": str(e)}
+
+    try:
+        股票列表 = list(策略.交易股票列表) + ["600519"]
+        策略.参数管理.获取股票列表 = lambda: list(股票列表)
+        已订阅数 = len(引擎.已订阅)
+
+        # 配置监视线程只记录变更，不碰股票列表、品种表和行情订阅
+        变更 = {"版本": 2, "新增股票": ["600519"], "移除股票": []}
+        线程 = threading.Thread(target=策略._处理参数变更, args=(变更,))
+        线程.start()
+        线程.join()
+        记录正确 = (
+            "600519" not in 策略.交易股票列表 and "600519" not in 策略.品种表 and
+            len(引擎.已订阅) == 已订阅数
+        )
+
+        # 策略线程在定时事件中应用变更
+        策略.on_timer(1)
+        应用正确 = (
+            策略.交易股票列表 == 股票列表 and "600519" in 策略.已订阅股票 and
+            引擎.已订阅[已订阅数:] == ["600519.SSE"] and not 策略._参数变更请求
+        )
+    finally:
+        os.chdir(原工作目录)
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 记录正确 and 应用正确
+
+    if 测试通过:
+        logger.info("参数变更测试通过")
+    else:
+        logger.error("参数变更测试失败")
+
+    return {
+        "成功": 测试通过,
+        "记录正确": 记录正确,
+        "应用正确": 应用正确
+    }
+
+if __name__ == "__main__":
+    for 测试 in (测试订单回报, 测试止损重发, 测试行情排空, 测试网页紧急撤单, 测试参数变更):
+        结果 = 测试()
+        print(f"{测试.__name__}: {'通过' if 结果['成功'] else '失败'}")
@@ -46,19 +46,19 @@ def 测试大象识别() -> Dict:
         启用卖单识别=True
     )
     
-    # 生成测试盘口数据
+    # 生成测试盘口数据，价格为整数价格档(分)
     买盘 = [
-        (10.0, 1000),  # 价格, 数量
-        (9.9, 150000),  # 大象
-        (9.8, 1000),
-        (9.7, 500)
+        (1000, 1000),  # 价格档, 数量
+        (990, 150000),  # 大象
+        (980, 1000),
+        (970, 500)
     ]
     
     卖盘 = [
-        (10.1, 1000),
-        (10.2, 200000),  # 大象
-        (10.3, 1000),
-        (10.4, 500)
+        (1010, 1000),
+        (1020, 200000),  # 大象
+        (1030, 1000),
+        (1040, 500)
     ]
     
     当前时间 = int(time.time() * 1000)  # 毫秒时间戳
@@ -84,8 +84,12 @@ def 测试大象识别() -> Dict:
     logger.info(f"买单大象检测结果: {买单大象}")
     logger.info(f"卖单大象检测结果: {卖单大象}")
     
-    # 验证结果
+    # 验证结果，对外的价格换算回浮点价格
     测试通过 = 买单大象 is not None and 卖单大象 is not None
+    if 测试通过:
+        测试通过 = (买单大象["价格档"] == 1000 and 买单大象["价格"] == 10.0
+                and 卖单大象["价格档"] == 1020 and 卖单大象["价格"] == 10.2
+                and 买单大象["委托金额"] == 1000000.0)
     
     # 测试大象跟踪和清理
     大象识别.重置("000001")
@@ -118,18 +122,18 @@ def 测试大象消失检测():
         大象稳定时间=1  # 降低稳定时间，方便测试
     )
     
-    # 生成测试盘口数据
+    # 生成测试盘口数据，价格为整数价格档(分)
     买盘1 = [
-        (10.0, 1000), 
-        (9.9, 150000),  # 大象
-        (9.8, 1000),
-        (9.7, 500)
+        (1000, 1000), 
+        (990, 150000),  # 大象
+        (980, 1000),
+        (970, 500)
     ]
     
     卖盘1 = [
-        (10.1, 1000),
-        (10.2, 1000),
-        (10.3, 1000)
+        (1010, 1000),
+        (1020, 1000),
+        (1030, 1000)
     ]
     
     当前时间 = int(time.time() * 1000)
@@ -148,7 +152,7 @@ def 测试大象消失检测():
         logger.error("大象识别测试失败: 无法找到大象")
         return {"成功": False, "错误": "无法识别大象"}
     
-    原大象价格 = 大象["价格"]
+    原大象价格 = 大象["价格档"]
     原大象数量 = 大象["数量"]
     原大象位置 = 大象["深度位置"]
     logger.info(f"原大象价格: {原大象价格}, 原大象数量: {原大象数量}, 深度位置: {原大象位置}")
@@ -188,6 +192,60 @@ def 测试大象消失检测():
         "大象完全消失检测": 大象消失
     }
 
+def 测试重复盘口() -> Dict:
+    """测试盘口未变化时按时间推进确认，结果与完整检测一致"""
+    logger = get_logger("测试_大象识别")
+    logger.info("开始测试重复盘口功能")
+    
+    买盘 = [(1000, 10), (990, 150000), (980, 10), (970, 10), (960, 10)]
+    卖盘 = [(1010, 10), (1020, 200000), (1030, 10), (1040, 10), (1050, 10)]
+    参数 = dict(大象委托量阈值=1000000.0, 卖单委托量阈值=1000000.0, 确认次数=3, 大象稳定时间=2)
+    完整检测 = 大象识别器(**参数)
+    重复推进 = 大象识别器(**参数)
+    
+    # 第一笔两者都完整检测，之后同一盘口每秒一笔：一个每笔完整检测，一个走重复盘口
+    结果一致 = True
+    确认时间 = None
+    for 秒 in range(5):
+        时间戳 = 秒 * 1000
+        结果1 = (完整检测.检测大象("600000", 时间戳, 买盘, 卖盘), 完整检测.检测卖单大象("600000", 时间戳, 买盘, 卖盘))
+        if 秒 == 0:
+            结果2 = (重复推进.检测大象("600000", 时间戳, 买盘, 卖盘), 重复推进.检测卖单大象("600000", 时间戳, 买盘, 卖盘))
+        else:
+            结果2 = 重复推进.重复盘口("600000", 时间戳)
+        结果一致 = 结果一致 and [r is not None for r in 结果1] == [r is not None for r in 结果2]
+        if 结果2[0] is not None and 确认时间 is None:
+            确认时间 = 秒
+    结果一致 = (
+        结果一致 and 确认时间 == 2 and
+        重复推进.大象跟踪[("600000", 990)]["确认次数"] == 完整检测.大象跟踪[("600000", 990)]["确认次数"] == 5 and
+        重复推进.卖单大象跟踪[("600000", 1020)]["最后更新时间"] == 4000 and
+        重复推进.事件统计 == 完整检测.事件统计
+    )
+    
+    # 大象被移除后重复盘口不再返回，命中记录清除
+    重复推进.移除大象("600000", 990, "买单")
+    买单大象, 卖单大象 = 重复推进.重复盘口("600000", 5000)
+    移除正确 = 买单大象 is None and 卖单大象 is not None and "600000" not in 重复推进._买单命中
+    
+    # 完整检测没有命中时清除命中记录
+    重复推进.检测大象("600000", 6000, [(1000, 10)] * 5, 卖盘)
+    重复推进.重置("600000")
+    清除正确 = 重复推进.重复盘口("600000", 7000) == (None, None)
+    
+    测试通过 = 结果一致 and 移除正确 and 清除正确
+    if 测试通过:
+        logger.info("重复盘口测试通过")
+    else:
+        logger.error("重复盘口测试失败")
+    
+    return {
+        "成功": 测试通过,
+        "结果一致": 结果一致,
+        "移除正确": 移除正确,
+        "清除正确": 清除正确
+    }
+
 def 运行所有测试():
     """运行所有测试"""
     print("=" * 50)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+委托限流模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.委托限流 import 委托限流器, 优先级_止损, 优先级_平仓, 优先级_开仓
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.委托限流 import 委托限流器, 优先级_止损, 优先级_平仓, 优先级_开仓
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..委托限流 import 委托限流器, 优先级_止损, 优先级_平仓, 优先级_开仓
+        from ..日志 import get_logger
+
+def 测试委托限流() -> Dict:
+    """测试令牌桶限流、优先级排队、单品种限制和排队撤销"""
+    logger = get_logger("测试_委托限流")
+    logger.info("开始测试委托限流功能")
+
+    时间 = [0]
+    发送记录 = []
+    回调记录 = []
+
+    def 发送(名称):
+        def 函数():
+            发送记录.append(名称)
+            return f"委托.{名称}"
+        return 函数
+
+    # 突发容量内当场发送并返回委托号，超出后排队返回排队编号
+    限流 = 委托限流器(委托每秒=10, 撤单每秒=2, 单品种委托每秒=0, 时钟=lambda: 时间[0])
+    结果 = [限流.提交委托(f"60000{i}", 优先级_开仓, 发送(f"开仓{i}")) for i in range(10)]
+    排队结果 = 限流.提交委托("600010", 优先级_开仓, 发送("开仓10"), 回调记录.append)
+    突发正确 = (
+        结果 == [f"委托.开仓{i}" for i in range(10)] and 排队结果.startswith("排队.") and
+        限流.排队数() == 1 and 限流.统计["委托排队"] == 1
+    )
+
+    # 令牌补充前不发送，补充后按优先级发送：止损先于平仓，平仓先于开仓
+    限流.提交委托("600011", 优先级_平仓, 发送("平仓"), 回调记录.append)
+    限流.提交委托("600012", 优先级_止损, 发送("止损"), 回调记录.append)
+    未补充不发送 = 限流.处理() == 0 and len(发送记录) == 10
+    时间[0] += 100_000_000  # 100毫秒补充1个令牌
+    限流.处理()
+    时间[0] += 200_000_000
+    限流.处理()
+    优先级正确 = (
+        发送记录[10:] == ["止损", "平仓", "开仓10"] and
+        回调记录 == ["委托.止损", "委托.平仓", "委托.开仓10"] and 限流.排队数() == 0 and
+        限流.委托排队延迟.最大值 == 300_000_000
+    )
+
+    # 撤单使用独立的令牌桶
+    撤单结果 = [限流.提交撤单("600000", 优先级_止损, 发送(f"撤单{i}")) for i in range(3)]
+    撤单正确 = (
+        撤单结果[:2] == ["委托.撤单0", "委托.撤单1"] and 撤单结果[2].startswith("排队.") and
+        限流.排队数(撤单=True) == 1 and 限流.排队数() == 0
+    )
+
+    # 被单品种限制挡住的委托不阻塞其他品种
+    时间[0] = 0
+    发送记录.clear()
+    限流 = 委托限流器(委托每秒=100, 撤单每秒=0, 单品种委托每秒=1, 时钟=lambda: 时间[0])
+    限流.提交委托("600000", 优先级_开仓, 发送("A1"))
+    限流.提交委托("600000", 优先级_止损, 发送("A2"))
+    限流.提交委托("000001", 优先级_开仓, 发送("B1"))
+    单品种正确 = 发送记录 == ["A1", "B1"] and 限流.排队数() == 1
+    时间[0] += 1_000_000_000
+    限流.处理()
+    单品种正确 = 单品种正确 and 发送记录 == ["A1", "B1", "A2"]
+
+    # 排队中的委托可以按编号或按品种撤销，撤销后不再发送
+    编号1 = 限流.提交委托("600000", 优先级_开仓, 发送("A3"))
+    编号2 = 限流.提交委托("600000", 优先级_开仓, 发送("A4"))
+    限流.提交委托("000001", 优先级_开仓, 发送("B2"))
+    撤销正确 = 限流.撤销排队(编号1) and not 限流.撤销排队(编号1) and 限流.撤销品种("600000") == 1
+    时间[0] += 5_000_000_000
+    限流.处理()
+    撤销正确 = (
+        撤销正确 and 发送记录[3:] == ["B2"] and not 限流.撤销排队(编号2) and
+        限流.统计["排队撤销"] == 2
+    )
+
+    # 不限流时忽略令牌发送全部排队请求
+    限流 = 委托限流器(委托每秒=1, 撤单每秒=1, 单品种委托每秒=1, 时钟=lambda: 0)
+    发送记录.clear()
+    for i in range(3):
+        限流.提交委托("600000", 优先级_开仓, 发送(f"委托{i}"))
+        限流.提交撤单("600000", 优先级_止损, 发送(f"撤单{i}"))
+    全部发送 = 限流.处理(不限流=True)
+    不限流正确 = (
+        全部发送 == 4 and 发送记录[2:] == ["撤单1", "撤单2", "委托1", "委托2"] and
+        限流.导出()["等待中"] == {"委托": 0, "撤单": 0}
+    )
+
+    测试通过 = 突发正确 and 未补充不发送 and 优先级正确 and 撤单正确 and 单品种正确 and 撤销正确 and 不限流正确
+
+    if 测试通过:
+        logger.info("委托限流测试通过")
+    else:
+        logger.error("委托限流测试失败")
+
+    return {
+        "成功": 测试通过,
+        "突发正确": 突发正确,
+        "未补充不发送": 未补充不发送,
+        "优先级正确": 优先级正确,
+        "撤单正确": 撤单正确,
+        "单品种正确": 单品种正确,
+        "撤销正确": 撤销正确,
+        "不限流正确": 不限流正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试委托限流()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
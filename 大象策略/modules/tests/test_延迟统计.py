@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+延迟统计模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.延迟统计 import 延迟直方图, 延迟统计器, 阶段_盘口构建, 阶段_大象检测, 阶段_订单发送
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.延迟统计 import 延迟直方图, 延迟统计器, 阶段_盘口构建, 阶段_大象检测, 阶段_订单发送
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..延迟统计 import 延迟直方图, 延迟统计器, 阶段_盘口构建, 阶段_大象检测, 阶段_订单发送
+        from ..日志 import get_logger
+
+def 测试延迟统计() -> Dict:
+    """测试延迟直方图和分阶段延迟统计"""
+    logger = get_logger("测试_延迟统计")
+    logger.info("开始测试延迟统计功能")
+
+    # 直方图分位数误差应在 1/8 以内
+    直方图 = 延迟直方图()
+    for 值 in range(1, 10001):
+        直方图.记录(值 * 1000)
+    p50 = 直方图.分位数(0.5)
+    p99 = 直方图.分位数(0.99)
+    分位数准确 = (
+        abs(p50 - 5000000) <= 5000000 / 8 and
+        abs(p99 - 9900000) <= 9900000 / 8 and
+        直方图.分位数(1.0) == 10000000
+    )
+    logger.info(f"p50: {p50}ns p99: {p99}ns")
+
+    # 合并后次数和最大值正确
+    另一个 = 延迟直方图()
+    另一个.记录(20000000)
+    直方图.合并(另一个)
+    合并正确 = 直方图.总次数 == 10001 and 直方图.最大值 == 20000000
+
+    # 超出范围的值计入最后一个桶
+    溢出直方图 = 延迟直方图(最大位数=20)
+    溢出直方图.记录(1 << 30)
+    溢出正确 = 溢出直方图.计数[-1] == 1
+
+    # 分阶段统计，使用可控时钟
+    统计器 = 延迟统计器()
+    时钟 = [0]
+    统计器._时钟 = lambda: 时钟[0]
+
+    时钟[0] = 1000
+    统计器.开始("000001")
+    时钟[0] = 3000
+    统计器.打点(阶段_盘口构建)
+    时钟[0] = 8000
+    统计器.打点(阶段_大象检测)
+    时钟[0] = 11000
+    统计器.打点(阶段_订单发送)
+    统计器.结束()
+
+    # 结束后打点应被忽略
+    统计器.打点(阶段_盘口构建)
+
+    导出 = 统计器.导出()
+    阶段正确 = (
+        导出["阶段"]["盘口构建"]["次数"] == 1 and
+        导出["阶段"]["盘口构建"]["最大微秒"] == 2.0 and
+        导出["阶段"]["大象检测"]["最大微秒"] == 5.0 and
+        导出["阶段"]["订单发送"]["最大微秒"] == 3.0 and
+        导出["行情到下单"]["最大微秒"] == 10.0 and
+        导出["品种"]["000001"]["行情到下单"]["次数"] == 1
+    )
+
+    # 收到到开始处理之间记为合并等待，总耗时从最早收到行情起计
+    时钟[0] = 20000
+    统计器.收到("600000")
+    时钟[0] = 24000
+    统计器.收到("600000")
+    时钟[0] = 30000
+    统计器.开始("600000")
+    时钟[0] = 31000
+    统计器.打点(阶段_订单发送)
+    统计器.结束()
+    导出 = 统计器.导出()
+    合并等待正确 = (
+        导出["阶段"]["合并等待"]["次数"] == 1 and
+        导出["阶段"]["合并等待"]["最大微秒"] == 10.0 and
+        导出["品种"]["600000"]["行情到下单"]["最大微秒"] == 11.0 and
+        not 统计器._收到时间
+    )
+
+    # 关闭后不记录
+    关闭统计器 = 延迟统计器(启用=False)
+    关闭统计器.开始("000001")
+    关闭统计器.打点(阶段_订单发送)
+    关闭正确 = 关闭统计器.总延迟直方图.总次数 == 0
+
+    测试通过 = 分位数准确 and 合并正确 and 溢出正确 and 阶段正确 and 合并等待正确 and 关闭正确
+
+    if 测试通过:
+        logger.info("延迟统计测试通过")
+    else:
+        logger.error("延迟统计测试失败")
+
+    return {
+        "成功": 测试通过,
+        "分位数准确": 分位数准确,
+        "合并正确": 合并正确,
+        "溢出正确": 溢出正确,
+        "阶段正确": 阶段正确,
+        "合并等待正确": 合并等待正确,
+        "关闭正确": 关闭正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试延迟统计()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
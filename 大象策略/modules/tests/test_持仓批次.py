@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+持仓批次模块的测试文件
+"""
+import os
+import sys
+from datetime import date, timedelta
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.持仓批次 import 持仓批次账本
+    from modules.资金管理 import 资金管理器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.持仓批次 import 持仓批次账本
+        from 大象策略.modules.资金管理 import 资金管理器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..持仓批次 import 持仓批次账本
+        from ..资金管理 import 资金管理器
+        from ..日志 import get_logger
+
+def 测试持仓批次() -> Dict:
+    """测试持仓批次的T+1冻结、先进先出卖出、交易日切换和内存回收"""
+    logger = get_logger("测试_持仓批次")
+    logger.info("开始测试持仓批次功能")
+
+    第一天 = date(2025, 3, 3)
+    账本 = 持仓批次账本(第一天)
+
+    # 当日买入全部冻结，同日同价的买入合并为一个批次
+    账本.买入("600000", 100, 10.0)
+    账本.买入("600000", 100.0, 10.0)
+    账本.买入("600000", 300, 10.2)
+    冻结正确 = (
+        账本.总数量("600000") == 500 and 账本.冻结数量("600000") == 500
+        and 账本.可卖数量("600000") == 0 and 账本.批次数("600000") == 2
+    )
+    try:
+        账本.卖出("600000", 100, 10.5)
+        冻结正确 = False
+    except ValueError:
+        pass
+
+    # 交易日切换后全部可卖，新买入的批次单独冻结
+    账本.切换交易日(第一天 + timedelta(days=1))
+    账本.买入("600000", 200, 11.0)
+    切换正确 = 账本.可卖数量("600000") == 500 and 账本.冻结数量("600000") == 200
+
+    # 先进先出：卖出300股消耗10.0的200股和10.2的100股
+    盈亏 = 账本.卖出("600000", 300, 10.5)
+    先进先出正确 = (
+        abs(盈亏 - (200 * 0.5 + 100 * 0.3)) < 1e-6 and 账本.总数量("600000") == 400
+        and abs(账本.成本价("600000") - (200 * 10.2 + 200 * 11.0) / 400) < 1e-6
+        and 账本.可卖数量("600000") == 200
+    )
+
+    # 导出后恢复
+    新账本 = 持仓批次账本(账本.当前交易日)
+    新账本.加载(账本.导出())
+    导出正确 = 新账本.导出() == 账本.导出() and 新账本.冻结数量("600000") == 200
+
+    # 大量小额成交后清仓，内存只与未平批次有关
+    日期 = 第一天 + timedelta(days=2)
+    for i in range(2000):
+        账本.切换交易日(日期 + timedelta(days=i))
+        账本.买入("000001", 100, 10.0 + (i % 7) * 0.01)
+        if i:
+            账本.卖出("000001", 100, 10.1)
+    回收正确 = 账本.批次数("000001") == 1 and len(账本._品种["000001"].数量) <= 34
+    账本.切换交易日(日期 + timedelta(days=2000))
+    账本.卖出("000001", 100, 10.1)
+    回收正确 = 回收正确 and "000001" not in 账本 and len(账本) == 1
+
+    # 资金管理器使用批次账本，兼容旧格式的持仓状态
+    资金 = 资金管理器(初始资产=100000)
+    资金.加载持仓状态({
+        "当前总资产": 100000, "可用资金": 90000, "当前交易日": 第一天.isoformat(),
+        "持仓记录": {"600036": {"总数量": 300, "可交易数量": 200, "冻结数量": 100, "成本价": 30.0, "买入时间": []}}
+    })
+    兼容正确 = 资金.获取可卖出数量("600036") == 200 and 资金.获取持仓总数量("600036") == 300
+    记录 = 资金.更新持仓("600036", 200, 31.0, False)
+    资金.交易日切换(第一天 + timedelta(days=1))
+    兼容正确 = (
+        兼容正确 and abs(记录["已实现盈亏"] - 200.0) < 1e-6
+        and 资金.持仓记录["600036"]["可交易数量"] == 100 and 资金.获取每日统计()["持仓股票数"] == 1
+    )
+
+    测试通过 = 冻结正确 and 切换正确 and 先进先出正确 and 导出正确 and 回收正确 and 兼容正确
+
+    if 测试通过:
+        logger.info("持仓批次测试通过")
+    else:
+        logger.error("持仓批次测试失败")
+
+    return {
+        "成功": 测试通过,
+        "冻结正确": 冻结正确,
+        "切换正确": 切换正确,
+        "先进先出正确": 先进先出正确,
+        "导出正确": 导出正确,
+        "回收正确": 回收正确,
+        "兼容正确": 兼容正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试持仓批次()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+指标模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.指标 import 指标注册表, 解析文本
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.指标 import 指标注册表, 解析文本
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..指标 import 指标注册表, 解析文本
+        from ..日志 import get_logger
+
+def 测试指标() -> Dict:
+    """测试指标注册与Prometheus文本导出"""
+    logger = get_logger("测试_指标")
+    logger.info("开始测试指标功能")
+
+    注册表 = 指标注册表(前缀="test_")
+
+    # 带标签计数器，缓存序列后自增
+    行情计数 = 注册表.计数器("ticks_total", "处理的行情Tick数", ("symbol",))
+    平安 = 行情计数.标签("000001")
+    for _ in range(3):
+        平安.值 += 1
+    行情计数.标签("600000").增加(2)
+
+    # 重复注册返回同一实例
+    重复注册正确 = 注册表.计数器("ticks_total", "处理的行情Tick数", ("symbol",)) is 行情计数
+
+    # 无标签仪表和回调指标
+    注册表.仪表("cash", "可用资金").设置(1234.5)
+    状态 = {"交易中": 2}
+    注册表.回调指标("cycles", "活跃周期", lambda: {(k,): v for k, v in 状态.items()}, ("state",))
+    注册表.注册写入队列("交易日志", lambda: 7)
+
+    # 回调异常不影响其他指标
+    注册表.回调指标("broken", "异常指标", lambda: 1 / 0)
+
+    # 标签数量错误应报错
+    try:
+        行情计数.标签("000001", "多余")
+        标签校验正确 = False
+    except ValueError:
+        标签校验正确 = True
+
+    文本 = 注册表.导出文本()
+    logger.info(f"导出文本:\n{文本}")
+    数值 = 解析文本(文本)
+
+    导出正确 = (
+        数值.get('test_ticks_total{symbol="000001"}') == 3 and
+        数值.get('test_ticks_total{symbol="600000"}') == 2 and
+        数值.get("test_cash") == 1234.5 and
+        数值.get('test_cycles{state="交易中"}') == 2 and
+        数值.get('test_writer_queue_depth{writer="交易日志"}') == 7 and
+        "# TYPE test_ticks_total counter" in 文本 and
+        "# TYPE test_cash gauge" in 文本 and
+        "test_broken" not in 数值
+    )
+
+    测试通过 = 重复注册正确 and 标签校验正确 and 导出正确
+
+    if 测试通过:
+        logger.info("指标测试通过")
+    else:
+        logger.error("指标测试失败")
+
+    return {
+        "成功": 测试通过,
+        "重复注册正确": 重复注册正确,
+        "标签校验正确": 标签校验正确,
+        "导出正确": 导出正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试指标()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模拟交易所模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.模拟交易所 import 模拟交易所, 买入, 卖出, 状态_全部成交, 状态_部分成交, 状态_已撤销, 状态_拒单, 状态_提交中
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.模拟交易所 import 模拟交易所, 买入, 卖出, 状态_全部成交, 状态_部分成交, 状态_已撤销, 状态_拒单, 状态_提交中
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..模拟交易所 import 模拟交易所, 买入, 卖出, 状态_全部成交, 状态_部分成交, 状态_已撤销, 状态_拒单, 状态_提交中
+        from ..日志 import get_logger
+
+毫秒 = 1_000_000
+
+
+def _记录交易所(**参数):
+    """创建交易所并记录收到的委托回报和成交回报"""
+    委托记录, 成交记录 = [], []
+    交易所 = 模拟交易所(委托回调=委托记录.append, 成交回调=成交记录.append, 时钟=lambda: 0, **参数)
+    return 交易所, 委托记录, 成交记录
+
+
+def 测试模拟交易所() -> Dict:
+    """测试模拟交易所的撮合、队列位置、延迟、部分成交和撤单"""
+    logger = get_logger("测试_模拟交易所")
+    logger.info("开始测试模拟交易所功能")
+
+    买盘 = [(1000, 500), (999, 800)]
+    卖盘 = [(1001, 300), (1002, 1000)]
+
+    # 委托经过延迟到达后与外部卖盘按价格优先成交，回报再经过回报延迟送达
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=5, 回报延迟毫秒=1)
+    交易所.同步盘口("600000", 买盘, 卖盘, 当前时间=0)
+    委托号 = 交易所.提交委托("600000", 买入, 1002, 600, 当前时间=0)
+    交易所.推进(4 * 毫秒)
+    未到达 = 交易所.获取委托(委托号).状态 == 状态_提交中 and not 委托记录
+    交易所.推进(5 * 毫秒)
+    回报未到 = not 委托记录 and not 成交记录
+    交易所.推进(6 * 毫秒)
+    延迟正确 = 未到达 and 回报未到
+    主动成交正确 = (
+        [(成交.价格档, 成交.数量) for 成交 in 成交记录] == [(1001, 300), (1002, 300)] and
+        委托记录[-1].状态 == 状态_全部成交 and 成交记录[0].时间 == 5 * 毫秒
+    )
+
+    # 挂单以同价位外部委托量为队列前量；在挂单价成交时先消耗外部队列，再按时间顺序成交本方委托
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=0, 撤单延迟毫秒=0, 回报延迟毫秒=0)
+    交易所.同步盘口("600000", 买盘, 卖盘, 1000, 10000, 当前时间=0)
+    甲 = 交易所.提交委托("600000", 买入, 1000, 200, 当前时间=0)
+    乙 = 交易所.提交委托("600000", 买入, 1000, 200, 当前时间=0)
+    交易所.推进(0)
+    排队正确 = 交易所.队列位置(甲) == 500 and 交易所.队列位置(乙) == 700
+    交易所.同步盘口("600000", [(1000, 300), (999, 800)], 卖盘, 1000, 10600, 当前时间=1 * 毫秒)
+    价格时间优先正确 = (
+        排队正确 and
+        [(成交.委托号, 成交.数量) for 成交 in 成交记录] == [(甲, 100)] and
+        交易所.获取委托(甲).状态 == 状态_部分成交 and
+        交易所.队列位置(甲) == 0 and 交易所.队列位置(乙) == 100
+    )
+    # 同价位数量减少时队列前量不超过该价位数量；最新价越过挂单价时全部成交
+    交易所.同步盘口("600000", [(999, 800)], 卖盘, 999, 11000, 当前时间=2 * 毫秒)
+    穿越成交正确 = (
+        交易所.获取委托(甲).状态 == 状态_全部成交 and 交易所.获取委托(乙).状态 == 状态_全部成交 and
+        交易所.统计["成交量"] == 400 and 交易所.挂单("600000") == []
+    )
+
+    # 对手盘越过挂单价时按挂单价成交；本方委托之间按先挂单一方的价格成交
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=0, 撤单延迟毫秒=0, 回报延迟毫秒=0)
+    交易所.同步盘口("600000", 买盘, 卖盘, 当前时间=0)
+    卖一 = 交易所.提交委托("600000", 卖出, 1005, 100, 当前时间=0)
+    卖二 = 交易所.提交委托("600000", 卖出, 1005, 100, 当前时间=0)
+    买一 = 交易所.提交委托("600000", 买入, 1000, 100, 当前时间=0)
+    交易所.推进(0)
+    买二 = 交易所.提交委托("600000", 买入, 1005, 1400, 当前时间=1 * 毫秒)
+    交易所.推进(1 * 毫秒)
+    交易所.同步盘口("600000", 买盘, [(1000, 50), (1001, 300)], 当前时间=2 * 毫秒)
+    对手成交正确 = (
+        [(成交.委托号, 成交.价格档, 成交.数量) for 成交 in 成交记录] == [
+            (买二, 1001, 300), (买二, 1002, 1000),
+            (卖一, 1005, 100), (买二, 1005, 100),
+            (买一, 1000, 50)
+        ] and
+        交易所.获取委托(卖二).已成交 == 0 and 交易所.获取委托(买二).状态 == 状态_全部成交 and
+        交易所.获取委托(买一).状态 == 状态_部分成交
+    )
+
+    # 单笔成交量受限时按撮合间隔分批成交
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=0, 回报延迟毫秒=0, 最大单笔成交量=100, 撮合间隔毫秒=1)
+    交易所.同步盘口("600000", 买盘, 卖盘, 当前时间=0)
+    委托号 = 交易所.提交委托("600000", 买入, 1001, 250, 当前时间=0)
+    交易所.推进(0)
+    第一批 = 交易所.获取委托(委托号).状态 == 状态_部分成交
+    交易所.推进(1 * 毫秒)
+    交易所.推进(2 * 毫秒)
+    部分成交正确 = (
+        第一批 and [成交.数量 for 成交 in 成交记录] == [100, 100, 50] and
+        [回报.状态 for 回报 in 委托记录][-3:] == [状态_部分成交, 状态_部分成交, 状态_全部成交]
+    )
+
+    # 撤单在途时挂单已成交则撤单失败；撤单先到则挂单撤销，之后不再成交
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=0, 撤单延迟毫秒=5, 回报延迟毫秒=0)
+    交易所.同步盘口("600000", 买盘, 卖盘, 1000, 10000, 当前时间=0)
+    先成交 = 交易所.提交委托("600000", 买入, 998, 100, 当前时间=0)
+    先撤单 = 交易所.提交委托("600000", 卖出, 1003, 100, 当前时间=0)
+    交易所.推进(0)
+    交易所.撤销委托(先成交, 当前时间=1 * 毫秒)
+    交易所.撤销委托(先撤单, 当前时间=1 * 毫秒)
+    交易所.同步盘口("600000", 买盘, 卖盘, 997, 10500, 当前时间=3 * 毫秒)
+    交易所.同步盘口("600000", 买盘, 卖盘, 1004, 11000, 当前时间=8 * 毫秒)
+    撤单正确 = (
+        交易所.获取委托(先成交).状态 == 状态_全部成交 and 交易所.获取委托(先撤单).状态 == 状态_已撤销 and
+        交易所.统计["撤单"] == 1 and 交易所.统计["撤单失败"] == 1 and len(成交记录) == 1
+    )
+
+    # 价格或数量无效的委托被拒绝
+    交易所, 委托记录, 成交记录 = _记录交易所(委托延迟毫秒=0, 回报延迟毫秒=0)
+    委托号 = 交易所.提交委托("600000", 买入, 1000, 0, 当前时间=0)
+    交易所.推进(0)
+    拒单正确 = 委托记录[-1].状态 == 状态_拒单 and 委托记录[-1].原因 != "" and 交易所.统计["拒单"] == 1
+
+    测试通过 = 延迟正确 and 主动成交正确 and 价格时间优先正确 and 穿越成交正确 and 对手成交正确 and 部分成交正确 and 撤单正确 and 拒单正确
+
+    if 测试通过:
+        logger.info("模拟交易所测试通过")
+    else:
+        logger.error("模拟交易所测试失败")
+
+    return {
+        "成功": 测试通过,
+        "延迟正确": 延迟正确,
+        "主动成交正确": 主动成交正确,
+        "价格时间优先正确": 价格时间优先正确,
+        "穿越成交正确": 穿越成交正确,
+        "对手成交正确": 对手成交正确,
+        "部分成交正确": 部分成交正确,
+        "撤单正确": 撤单正确,
+        "拒单正确": 拒单正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试模拟交易所()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+状态快照模块的测试文件
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.状态快照 import 状态快照器, 读取快照
+    from modules.资金管理 import 资金管理器
+    from modules.风险控制 import 风险控制器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.状态快照 import 状态快照器, 读取快照
+        from 大象策略.modules.资金管理 import 资金管理器
+        from 大象策略.modules.风险控制 import 风险控制器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..状态快照 import 状态快照器, 读取快照
+        from ..资金管理 import 资金管理器
+        from ..风险控制 import 风险控制器
+        from ..日志 import get_logger
+
+def 测试状态快照() -> Dict:
+    """测试状态快照的保存恢复、无变化跳过写入、校验损坏、后台写入和大量品种的恢复耗时"""
+    logger = get_logger("测试_状态快照")
+    logger.info("开始测试状态快照功能")
+
+    目录 = tempfile.mkdtemp(prefix="状态快照测试_")
+    路径 = os.path.join(目录, "状态快照.bin")
+
+    # 交易状态、资金和风控保存后由新的实例恢复
+    交易状态 = {"600000": {"状态": "持有中", "买入订单ID": "SIM.1", "买入成交时间": datetime.now()}}
+    资金 = 资金管理器(初始资产=100000)
+    资金.更新持仓("600000", 1000, 10.0, True)
+    风控 = 风险控制器()
+    风控.日内总交易次数 = 7
+    风控.风控冷却期["600000"] = datetime.now() + timedelta(minutes=5)
+
+    快照 = 状态快照器(路径, 间隔秒=0)
+    快照.注册("交易状态", lambda: 交易状态, lambda 状态: None)
+    快照.注册("资金管理", 资金.导出状态, 资金.恢复状态)
+    快照.注册("风险控制", 风控.导出状态, 风控.恢复状态)
+    已写入 = 快照.保存()
+
+    恢复交易状态 = {}
+    新资金 = 资金管理器(初始资产=100000)
+    新风控 = 风险控制器()
+    新快照 = 状态快照器(路径, 间隔秒=0)
+    新快照.注册("交易状态", lambda: 恢复交易状态, 恢复交易状态.update)
+    新快照.注册("资金管理", 新资金.导出状态, 新资金.恢复状态)
+    新快照.注册("风险控制", 新风控.导出状态, 新风控.恢复状态)
+    结果 = 新快照.恢复()
+    恢复正确 = (
+        已写入 and 结果 is not None and 结果["序号"] == 1 and len(结果["模块"]) == 3
+        and 恢复交易状态 == 交易状态
+        and 新资金.获取持仓总数量("600000") == 1000 and abs(新资金.可用资金 - 资金.可用资金) < 1e-6
+        and 新风控.日内总交易次数 == 7 and "600000" in 新风控.风控冷却期
+    )
+
+    # 隔日的风控快照不恢复日内统计
+    旧状态 = 风控.导出状态()
+    旧状态["日期"] = (date.today() - timedelta(days=1)).isoformat()
+    隔日风控 = 风险控制器()
+    隔日风控.恢复状态(旧状态)
+    恢复正确 = 恢复正确 and 隔日风控.日内总交易次数 == 0 and "600000" in 隔日风控.风控冷却期
+
+    # 状态没有变化时不写文件，变化后序号递增
+    未变化 = not 快照.保存() and 快照.统计["写入"] == 1
+    交易状态["600000"]["状态"] = "卖出中"
+    未变化 = 未变化 and 快照.保存() and 读取快照(路径)[0]["序号"] == 2
+
+    # 分段内容损坏时校验失败，恢复返回None且不调用恢复函数
+    with open(路径, "rb") as f:
+        数据 = bytearray(f.read())
+    数据[-5] ^= 0xFF
+    损坏路径 = os.path.join(目录, "损坏.bin")
+    with open(损坏路径, "wb") as f:
+        f.write(数据)
+    try:
+        读取快照(损坏路径)
+        校验正确 = False
+    except ValueError:
+        校验正确 = True
+    恢复交易状态.clear()
+    校验正确 = 校验正确 and 新快照.恢复(损坏路径) is None and not 恢复交易状态
+
+    # 后台线程写入，到期判断按注入的时钟
+    时间 = [0.0]
+    计数 = {"值": 0}
+    后台路径 = os.path.join(目录, "后台.bin")
+    后台 = 状态快照器(后台路径, 间隔秒=1.0, 时钟=lambda: 时间[0])
+    后台.注册("计数", lambda: dict(计数), lambda 状态: None)
+    后台.启动()
+    到期正确 = not 后台.到期()
+    时间[0] = 1.0
+    到期正确 = 到期正确 and 后台.到期()
+    for i in range(50):
+        计数["值"] = i
+        后台.保存()
+    后台正确 = (
+        到期正确 and not 后台.到期() and 后台.刷新(2.0) and 后台.待写入数 == 0
+        and 读取快照(后台路径)[1]["计数"]["值"] == 49
+        and 后台.统计["写入"] + 后台.统计["覆盖"] == 50
+    )
+    后台.停止()
+    后台正确 = 后台正确 and 后台._线程 is None
+
+    # 大量品种的快照在1秒内恢复
+    大量状态 = {
+        f"{600000 + i}": {"状态": "持有中", "买入订单ID": f"SIM.{i}", "买入成交价格": 10.0 + i * 0.01,
+                          "买入成交时间": datetime.now(), "大象信息": {"价格档": 1000 + i, "委托金额": 2e6}}
+        for i in range(5000)
+    }
+    大量路径 = os.path.join(目录, "大量.bin")
+    大量快照 = 状态快照器(大量路径, 间隔秒=0)
+    大量快照.注册("交易状态", lambda: 大量状态, lambda 状态: None)
+    大量快照.保存()
+    恢复结果 = {}
+    大量恢复 = 状态快照器(大量路径, 间隔秒=0)
+    大量恢复.注册("交易状态", lambda: 恢复结果, 恢复结果.update)
+    开始 = time.perf_counter()
+    大量恢复.恢复()
+    耗时 = time.perf_counter() - 开始
+    logger.info(f"恢复 {len(恢复结果)} 个品种的状态快照耗时 {耗时 * 1000:.1f}ms")
+    恢复耗时正确 = len(恢复结果) == 5000 and 耗时 < 1.0
+    shutil.rmtree(目录, ignore_errors=True)
+
+    测试通过 = 恢复正确 and 未变化 and 校验正确 and 后台正确 and 恢复耗时正确
+
+    if 测试通过:
+        logger.info("状态快照测试通过")
+    else:
+        logger.error("状态快照测试失败")
+
+    return {
+        "成功": 测试通过,
+        "恢复正确": 恢复正确,
+        "未变化": 未变化,
+        "校验正确": 校验正确,
+        "后台正确": 后台正确,
+        "恢复耗时正确": 恢复耗时正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试状态快照()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+状态日志模块的测试文件
+"""
+import os
+import sys
+import shutil
+import tempfile
+import copy
+import pickle
+import struct
+import zlib
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.状态日志 import 状态日志器, 读取日志, 读取目录, 日志文件列表, 回放, 对比
+    from modules.状态快照 import 状态快照器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.状态日志 import 状态日志器, 读取日志, 读取目录, 日志文件列表, 回放, 对比
+        from 大象策略.modules.状态快照 import 状态快照器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..状态日志 import 状态日志器, 读取日志, 读取目录, 日志文件列表, 回放, 对比
+        from ..状态快照 import 状态快照器
+        from ..日志 import get_logger
+
+def _模拟交易周期(日志: 状态日志器, 交易状态: dict, 股票代码: str, 订单前缀: str):
+    """按下方大象策略的顺序改变交易状态，每步之后记录"""
+    交易状态[股票代码] = {"状态": "买入中", "大象信息": {"价格档": 1000, "类型": "买单大象"},
+                      "买入价格": 10.0, "买入订单ID": f"{订单前缀}.1"}
+    日志.记录(股票代码, "大象信号", 交易状态.get(股票代码))
+    交易状态[股票代码].update({"状态": "持有中", "买入成交价格": 10.0, "买入成交数量": 100})
+    日志.记录(股票代码, "订单回报", 交易状态.get(股票代码))
+    交易状态[股票代码].update({"状态": "卖出中", "卖出订单ID": f"{订单前缀}.2", "卖出价格": 10.02})
+    日志.记录(股票代码, "订单回报", 交易状态.get(股票代码))
+
+def 测试状态日志() -> Dict:
+    """测试状态日志的增量记录、成批提交、回放、不完整记录、快照加日志恢复和两次运行对比"""
+    logger = get_logger("测试_状态日志")
+    logger.info("开始测试状态日志功能")
+
+    目录 = tempfile.mkdtemp(prefix="状态日志测试_")
+    日志目录 = os.path.join(目录, "状态日志")
+
+    # 只记录变化的字段，没有变化时不追加记录
+    日志 = 状态日志器(日志目录, 同步=False)
+    交易状态 = {}
+    _模拟交易周期(日志, 交易状态, "600000", "SIM")
+    无变化 = not 日志.记录("600000", "订单回报", 交易状态["600000"])
+    日志.记录("600001", "订单回报", None)
+    日志.提交()
+    记录列表 = list(读取日志(日志文件列表(日志目录)[0]))
+    增量正确 = (
+        无变化 and [项[0] for 项 in 记录列表] == [1, 2, 3]
+        and set(记录列表[2][4]) == {"状态", "卖出订单ID", "卖出价格"}
+        and 回放(记录列表) == 交易状态
+    )
+
+    # 周期结束和字段删除可以回放，到序号可以回放到中间状态
+    del 交易状态["600000"]["卖出价格"]
+    日志.记录("600000", "大象消失", 交易状态["600000"])
+    del 交易状态["600000"]
+    日志.记录("600000", "订单回报", None)
+    日志.提交()
+    记录列表 = list(读取目录(日志目录))
+    回放正确 = (
+        回放(记录列表) == {} and 回放(记录列表, 到序号=4)["600000"].get("卖出价格") is None
+        and 回放(记录列表, 到序号=2)["600000"]["状态"] == "持有中"
+    )
+
+    # 后台线程把多次变化合并成少数几批提交
+    批量日志 = 状态日志器(os.path.join(目录, "批量"), 批量大小=1000, 提交间隔毫秒=50, 同步=False)
+    批量日志.启动()
+    批量状态 = {}
+    for i in range(200):
+        _模拟交易周期(批量日志, 批量状态, f"{600000 + i}", "SIM")
+    批量正确 = 批量日志.刷新(2.0) and 批量日志.待写入数 == 0
+    批量日志.停止()
+    批量正确 = (
+        批量正确 and 批量日志.统计["记录"] == 600 and 批量日志.统计["批次"] <= 5
+        and 回放(读取目录(批量日志.目录)) == 批量状态
+    )
+
+    # 末尾记录只写了一部分时读到前一条为止
+    路径 = 日志文件列表(批量日志.目录)[0]
+    with open(路径, "ab") as f:
+        f.write(b"\x30\x00\x00\x00\x01\x02")
+    不完整正确 = len(list(读取日志(路径))) == 600
+
+    # 快照记下状态日志序号，恢复时在快照上回放之后的记录
+    恢复目录 = os.path.join(目录, "恢复")
+    快照路径 = os.path.join(目录, "状态快照.bin")
+    运行状态 = {}
+    运行日志 = 状态日志器(恢复目录, 同步=False)
+    快照 = 状态快照器(快照路径, 间隔秒=0)
+    快照.注册("交易状态", lambda: 运行状态, lambda 状态: None)
+    快照.注册头部("状态日志序号", lambda: 运行日志.序号)
+    _模拟交易周期(运行日志, 运行状态, "600000", "SIM")
+    快照.保存()
+    _模拟交易周期(运行日志, 运行状态, "000001", "SIM")
+    运行状态["600000"]["状态"] = "持有中"
+    运行日志.记录("600000", "订单回报", 运行状态["600000"])
+    运行日志.停止()
+
+    恢复状态 = {}
+    新日志 = 状态日志器(恢复目录, 同步=False)
+    新快照 = 状态快照器(快照路径, 间隔秒=0)
+    新快照.注册("交易状态", lambda: 恢复状态, 恢复状态.update)
+    结果 = 新快照.恢复()
+    回放结果 = 新日志.恢复(恢复状态, 结果["附加"]["状态日志序号"])
+    恢复正确 = (
+        结果["附加"]["状态日志序号"] == 3 and 回放结果 == {"记录数": 4, "序号": 7}
+        and 恢复状态 == 运行状态 and 新日志.序号 == 7
+        and not 新日志.记录("000001", "订单回报", 运行状态["000001"])
+    )
+
+    # 对比两次运行：订单号不同视为一致，状态变化不同时报告
+    日志A = 状态日志器(os.path.join(目录, "A"), 同步=False)
+    日志B = 状态日志器(os.path.join(目录, "B"), 同步=False)
+    状态A = {}
+    状态B = {}
+    _模拟交易周期(日志A, 状态A, "600000", "SIM")
+    _模拟交易周期(日志B, 状态B, "600000", "LIVE")
+    日志A.停止()
+    日志B.停止()
+    一致 = 对比(读取目录(日志A.目录), 读取目录(日志B.目录)) == []
+    状态B = copy.deepcopy(状态B)
+    状态B["600000"]["状态"] = "止损中"
+    日志B.记录("600000", "大象消失", 状态B["600000"])
+    日志B.停止()
+    差异 = 对比(读取目录(日志A.目录), 读取目录(日志B.目录))
+    对比正确 = 一致 and len(差异) == 2 and "变化次数不同" in 差异[0] and "止损中" in 差异[1]
+
+    shutil.rmtree(目录, ignore_errors=True)
+
+    测试通过 = 增量正确 and 回放正确 and 批量正确 and 不完整正确 and 恢复正确 and 对比正确
+
+    if 测试通过:
+        logger.info("状态日志测试通过")
+    else:
+        logger.error("状态日志测试失败")
+
+    return {
+        "成功": 测试通过,
+        "增量正确": 增量正确,
+        "回放正确": 回放正确,
+        "批量正确": 批量正确,
+        "不完整正确": 不完整正确,
+        "恢复正确": 恢复正确,
+        "对比正确": 对比正确
+    }
+
+def 测试状态日志分段() -> Dict:
+    """测试状态日志随快照轮换分段、删除已包含在快照中的分段、恢复时跳过旧分段和嵌套字段的变化"""
+    logger = get_logger("测试_状态日志")
+    logger.info("开始测试状态日志分段功能")
+
+    目录 = tempfile.mkdtemp(prefix="状态日志分段测试_")
+    日志目录 = os.path.join(目录, "状态日志")
+    快照路径 = os.path.join(目录, "状态快照.bin")
+    try:
+        交易状态 = {}
+        日志 = 状态日志器(日志目录, 同步=False)
+        快照 = 状态快照器(快照路径, 间隔秒=0)
+        快照.注册("交易状态", lambda: 交易状态, lambda 状态: None)
+        快照.注册头部("状态日志序号", 日志.轮换)
+        快照.注册写入完成(lambda 附加: 日志.清理(附加["状态日志序号"]))
+
+        # 快照写入后删除已包含在快照中的分段，之后的记录写入新分段
+        _模拟交易周期(日志, 交易状态, "600000", "SIM")
+        日志.提交()
+        写入前分段 = 日志文件列表(日志目录)
+        快照.保存()
+        _模拟交易周期(日志, 交易状态, "000001", "SIM")
+        日志.提交()
+        分段正确 = (
+            len(写入前分段) == 1 and
+            [os.path.basename(路径)[-16:] for 路径 in 日志文件列表(日志目录)] == ["000000000004.wal"] and
+            [项[0] for 项 in 读取目录(日志目录)] == [4, 5, 6]
+        )
+
+        # 就地修改嵌套的大象信息也记为变化
+        交易状态["000001"]["大象信息"]["价格档"] = 999
+        嵌套变化正确 = (
+            日志.记录("000001", "大象消失", 交易状态["000001"]) and
+            not 日志.记录("000001", "大象消失", 交易状态["000001"])
+        )
+        日志.提交()
+        最后记录 = list(读取目录(日志目录))[-1]
+        嵌套变化正确 = 嵌套变化正确 and 最后记录[4] == {"大象信息": {"价格档": 999, "类型": "买单大象"}}
+
+        # 恢复时跳过最后一条记录不晚于快照序号的分段：旧分段中即使有更大的序号也不会读到
+        日志.轮换()
+        交易状态["000001"]["状态"] = "持有中"
+        日志.记录("000001", "订单回报", 交易状态["000001"])
+        日志.停止()
+        旧分段 = 日志文件列表(日志目录)[0]
+        内容 = pickle.dumps((99, 0.0, "600036", "大象信号", {"状态": "买入中"}, ()))
+        with open(旧分段, "ab") as f:
+            f.write(struct.pack("<II", len(内容), zlib.crc32(内容)) + 内容)
+        新日志 = 状态日志器(日志目录, 同步=False)
+        恢复状态 = {}
+        回放结果 = 新日志.恢复(恢复状态, 7)
+        跳过旧分段 = (
+            len(日志文件列表(日志目录)) == 2 and
+            回放结果 == {"记录数": 1, "序号": 8} and
+            恢复状态 == {"000001": {"状态": "持有中"}}
+        )
+    finally:
+        shutil.rmtree(目录, ignore_errors=True)
+
+    测试通过 = 分段正确 and 嵌套变化正确 and 跳过旧分段
+
+    if 测试通过:
+        logger.info("状态日志分段测试通过")
+    else:
+        logger.error("状态日志分段测试失败")
+
+    return {
+        "成功": 测试通过,
+        "分段正确": 分段正确,
+        "嵌套变化正确": 嵌套变化正确,
+        "跳过旧分段": 跳过旧分段
+    }
+
+if __name__ == "__main__":
+    结果 = 测试状态日志()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
+    结果 = 测试状态日志分段()
+    print(f"分段测试结果: {'通过' if 结果['成功'] else '失败'}")
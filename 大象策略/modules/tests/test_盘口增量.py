@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+盘口增量模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.盘口增量 import 盘口增量引擎, 事件名称, 方向_买, 方向_卖
+    from modules.大象识别 import 大象识别器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.盘口增量 import 盘口增量引擎, 事件名称, 方向_买, 方向_卖
+        from 大象策略.modules.大象识别 import 大象识别器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..盘口增量 import 盘口增量引擎, 事件名称, 方向_买, 方向_卖
+        from ..大象识别 import 大象识别器
+        from ..日志 import get_logger
+
+def _简化(事件列表: list) -> list:
+    """事件转为 (序号, 事件名称, 方向, 价格档, 变化量, 数量)，便于比较"""
+    return [(序号, 事件名称[类型], 方向, 价格档, 变化量, 数量) for 序号, _, 类型, 方向, 价格档, 变化量, 数量 in 事件列表]
+
+def 测试盘口增量() -> Dict:
+    """测试相邻盘口的增量事件生成、成交归因和订阅分发"""
+    logger = get_logger("测试_盘口增量")
+    logger.info("开始测试盘口增量功能")
+
+    引擎 = 盘口增量引擎()
+    收到 = []
+    引擎.订阅(lambda 股票代码, 时间戳, 事件列表: 收到.append((股票代码, 时间戳, len(事件列表))))
+
+    卖盘 = [(1010, 100), (1020, 200), (1030, 300), (1040, 400), (1050, 500)]
+    首笔正确 = 引擎.更新("600000", 1000, [(1000, 100), (990, 500), (980, 300), (970, 200), (960, 100)],
+                     卖盘, 1000, 0) == []
+
+    # 买一被成交60，买二补单，买三整档撤单，950滚入可见档位；卖盘插入新价格档，1050滚出可见档位
+    事件 = 引擎.更新("600000", 4000, [(1000, 40), (990, 800), (970, 200), (960, 100), (950, 50)],
+                 [(1010, 100), (1015, 70), (1020, 200), (1030, 300), (1040, 400)], 1000, 60)
+    增量正确 = _简化(事件) == [
+        (1, "成交减少", 方向_买, 1000, -60, 40),
+        (2, "补单增加", 方向_买, 990, 300, 800),
+        (3, "撤单减少", 方向_买, 980, -300, 0),
+        (4, "新增", 方向_卖, 1015, 70, 70)
+    ]
+
+    # 买一被吃光，最优价下移；成交量超过的部分记为撤单
+    事件 = 引擎.更新("600000", 7000, [(990, 800), (970, 200), (960, 100), (950, 50), (940, 10)],
+                 [(1010, 100), (1015, 70), (1020, 200), (1030, 300), (1040, 400)], 1000, 90)
+    价格移动正确 = _简化(事件) == [
+        (5, "价格移动", 方向_买, 990, -10, 800),
+        (6, "成交减少", 方向_买, 1000, -30, 10),
+        (7, "撤单减少", 方向_买, 1000, -10, 0)
+    ]
+
+    # 盘口不变时没有事件，也不回调
+    分发正确 = (
+        引擎.更新("600000", 10000, [(990, 800), (970, 200), (960, 100), (950, 50), (940, 10)],
+               [(1010, 100), (1015, 70), (1020, 200), (1030, 300), (1040, 400)], 1000, 90) == [] and
+        收到 == [("600000", 4000, 4), ("600000", 7000, 3)] and
+        引擎.序号 == 7 and list(引擎.事件统计) == [1, 2, 2, 1, 1]
+    )
+
+    # 识别器订阅事件：大象被成交后又补回数量，判定为疑似冰山
+    识别器 = 大象识别器(大象委托量阈值=500000.0, 确认次数=1, 大象稳定时间=0)
+    引擎.订阅(识别器.处理盘口事件)
+    买盘 = [(990, 800), (980, 10), (970, 200), (960, 100), (950, 50)]
+    卖盘 = [(1000, 100), (1010, 100), (1015, 70), (1020, 200), (1030, 300)]
+    识别器.检测大象("600000", 13000, 买盘, 卖盘)
+    引擎.更新("600000", 13000, 买盘, 卖盘, 990, 90)
+    引擎.更新("600000", 16000, [(990, 500)] + 买盘[1:], 卖盘, 990, 390)
+    引擎.更新("600000", 19000, 买盘, 卖盘, 990, 390)
+    大象 = 识别器.大象跟踪[("600000", 990)]
+    冰山正确 = (
+        大象["成交消耗"] == 300 and 大象["补单次数"] == 1 and 大象["疑似冰山"] and
+        识别器.计算消耗速度(大象, 19000) == 50.0
+    )
+
+    # 事件为普通元组；订阅者都不关注的品种只保存盘口，开始关注后与最近一笔盘口比较
+    关注引擎 = 盘口增量引擎()
+    关注 = set()
+    收到 = []
+    关注引擎.订阅(lambda 股票代码, 时间戳, 事件列表: 收到.extend(事件列表), 关注=关注.__contains__)
+    关注引擎.更新("600000", 1000, [(1000, 100)], [(1010, 100)], 1000, 0)
+    跳过结果 = 关注引擎.更新("600000", 4000, [(1000, 50)], [(1010, 100)], 1000, 50)
+    关注.add("600000")
+    关注结果 = 关注引擎.更新("600000", 7000, [(1000, 20)], [(1010, 100)], 1000, 80)
+    关注正确 = (
+        跳过结果 == [] and
+        关注结果 == [(1, "600000", 1, 方向_买, 1000, -30, 20)] and type(关注结果[0]) is tuple and
+        收到 == 关注结果 and 关注引擎.序号 == 1
+    )
+
+    # 识别器只关注有跟踪中大象的股票
+    关注正确 = 关注正确 and 识别器.有跟踪("600000") and not 识别器.有跟踪("000001")
+    识别器.移除大象("600000", 990)
+    识别器.重置("600000")
+    关注正确 = 关注正确 and not 识别器.有跟踪("600000")
+
+    测试通过 = 首笔正确 and 增量正确 and 价格移动正确 and 分发正确 and 冰山正确 and 关注正确
+
+    if 测试通过:
+        logger.info("盘口增量测试通过")
+    else:
+        logger.error("盘口增量测试失败")
+
+    return {
+        "成功": 测试通过,
+        "首笔正确": 首笔正确,
+        "增量正确": 增量正确,
+        "价格移动正确": 价格移动正确,
+        "分发正确": 分发正确,
+        "冰山正确": 冰山正确,
+        "关注正确": 关注正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试盘口增量()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+盘口适配模块的测试文件
+"""
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.盘口适配 import 盘口适配器
+    from modules.品种信息 import 品种信息
+    from modules.大象识别 import 大象识别器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.盘口适配 import 盘口适配器
+        from 大象策略.modules.品种信息 import 品种信息
+        from 大象策略.modules.大象识别 import 大象识别器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..盘口适配 import 盘口适配器
+        from ..品种信息 import 品种信息
+        from ..大象识别 import 大象识别器
+        from ..日志 import get_logger
+
+def _生成行情(档位数: int, 深档放入extra: bool = False, 委托笔数: bool = False):
+    """生成买一10.00元、卖一10.01元、每档数量为 档位序号×100 的合成行情"""
+    字段 = {}
+    for i in range(1, 档位数 + 1):
+        字段[f"bid_price_{i}"] = round(10.01 - i * 0.01, 2)
+        字段[f"bid_volume_{i}"] = i * 100.0
+        字段[f"ask_price_{i}"] = round(10.0 + i * 0.01, 2)
+        字段[f"ask_volume_{i}"] = i * 100.0
+        if 委托笔数:
+            字段[f"bid_order_count_{i}"] = i
+            字段[f"ask_order_count_{i}"] = i + 1
+    extra = {}
+    if 深档放入extra:
+        extra = {名: 字段.pop(名) for 名 in list(字段) if int(名.rsplit("_", 1)[1]) > 5}
+    return SimpleNamespace(datetime=datetime(2025, 3, 31, 10, 0, 0), last_price=10.0, extra=extra, **字段)
+
+def 测试盘口适配() -> Dict:
+    """测试任意档位数的盘口转换、委托笔数读取、盘口指纹和识别器的扫描范围"""
+    logger = get_logger("测试_盘口适配")
+    logger.info("开始测试盘口适配功能")
+
+    品种 = 品种信息(0, "600000", "SSE")
+
+    # 五档行情按属性读取，不读取委托笔数
+    盘口 = 盘口适配器(档位数=5).转换(_生成行情(5), 品种)
+    五档正确 = (
+        盘口["买盘"] == [(1000, 100), (999, 200), (998, 300), (997, 400), (996, 500)] and
+        盘口["卖盘"][0] == (1001, 100) and 盘口["最新价"] == 1000 and
+        "买盘笔数" not in 盘口
+    )
+
+    # 十档行情的深档在 extra 中，缺少的档位按空档补0
+    适配 = 盘口适配器(档位数=10)
+    盘口 = 适配.转换(_生成行情(10, 深档放入extra=True), 品种)
+    行情 = _生成行情(10, 深档放入extra=True)
+    del 行情.extra["bid_price_10"], 行情.extra["bid_volume_10"]
+    缺档盘口 = 适配.转换(行情, 品种)
+    深档正确 = (
+        len(盘口["买盘"]) == 10 and len(盘口["卖盘"]) == 10 and
+        盘口["买盘"][9] == (991, 1000) and 盘口["卖盘"][9] == (1010, 1000) and
+        缺档盘口["买盘"][9] == (0, 0) and 缺档盘口["买盘"][8] == (992, 900)
+    )
+
+    # 深档和委托笔数都以属性提供
+    盘口 = 盘口适配器(档位数=10, 读取委托笔数=True).转换(_生成行情(10, 委托笔数=True), 品种)
+    笔数正确 = (
+        盘口["买盘"][9] == (991, 1000) and
+        盘口["买盘笔数"] == tuple(range(1, 11)) and 盘口["卖盘笔数"] == tuple(range(2, 12))
+    )
+    # 行情没有委托笔数时为0
+    盘口 = 盘口适配器(档位数=5, 读取委托笔数=True).转换(_生成行情(5), 品种)
+    笔数正确 = 笔数正确 and 盘口["买盘笔数"] == (0,) * 5
+
+    # 只有时间戳变化的行情指纹相同，数量或委托笔数变化时指纹不同
+    适配 = 盘口适配器(档位数=10, 读取委托笔数=True)
+    行情 = _生成行情(10, 深档放入extra=True, 委托笔数=True)
+    指纹 = 适配.转换(行情, 品种)["指纹"]
+    行情.datetime = datetime(2025, 3, 31, 10, 0, 3)
+    指纹正确 = 适配.转换(行情, 品种)["指纹"] == 指纹
+    行情.extra["bid_volume_8"] = 1.0
+    新指纹 = 适配.转换(行情, 品种)["指纹"]
+    行情.extra["bid_order_count_1"] = 99
+    指纹正确 = 指纹正确 and 新指纹 != 指纹 and 适配.转换(行情, 品种)["指纹"] != 新指纹
+
+    # 识别器只扫描价差阈值以内的档位，十档盘口的第6档大象不识别
+    识别器 = 大象识别器(大象委托量阈值=1000000.0, 大象价差阈值=3, 确认次数=1, 大象稳定时间=0)
+    买盘 = [(1000 - i, 10) for i in range(10)]
+    买盘[6] = (994, 200000)
+    卖盘 = [(1001 + i, 10) for i in range(10)]
+    识别器.检测大象("600000", 0, 买盘, 卖盘)
+    范围正确 = not 识别器.大象跟踪
+    买盘[2] = (998, 200000)
+    识别器.检测大象("600000", 0, 买盘, 卖盘)
+    范围正确 = 范围正确 and list(识别器.大象跟踪) == [("600000", 998)]
+
+    # 多笔小单堆积的价格档不判定为大象，继续扫描到单笔大单所在档
+    识别器 = 大象识别器(大象委托量阈值=1000000.0, 大象价差阈值=3, 确认次数=1, 大象稳定时间=0,
+                   单笔委托金额阈值=500000.0)
+    买盘 = [(1000, 2000), (999, 1500), (998, 10), (997, 10), (996, 10)]
+    笔数 = [400, 2, 1, 1, 1]
+    识别器.检测大象("600000", 0, 买盘, 卖盘, None, 笔数)
+    单笔正确 = list(识别器.大象跟踪) == [("600000", 999)] and 识别器.大象跟踪[("600000", 999)]["委托笔数"] == 2
+    # 没有笔数时不检查
+    识别器.重置()
+    识别器.检测大象("600000", 0, 买盘, 卖盘)
+    单笔正确 = 单笔正确 and list(识别器.大象跟踪) == [("600000", 1000)] and 识别器.大象跟踪[("600000", 1000)]["委托笔数"] == 0
+
+    测试通过 = 五档正确 and 深档正确 and 笔数正确 and 指纹正确 and 范围正确 and 单笔正确
+
+    if 测试通过:
+        logger.info("盘口适配测试通过")
+    else:
+        logger.error("盘口适配测试失败")
+
+    return {
+        "成功": 测试通过,
+        "五档正确": 五档正确,
+        "深档正确": 深档正确,
+        "笔数正确": 笔数正确,
+        "指纹正确": 指纹正确,
+        "范围正确": 范围正确,
+        "单笔正确": 单笔正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试盘口适配()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
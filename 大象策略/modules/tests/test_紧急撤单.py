@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+紧急撤单模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.紧急撤单 import 紧急撤单器, 状态_空闲, 状态_撤单中, 状态_已清空, 状态_超时
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.紧急撤单 import 紧急撤单器, 状态_空闲, 状态_撤单中, 状态_已清空, 状态_超时
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..紧急撤单 import 紧急撤单器, 状态_空闲, 状态_撤单中, 状态_已清空, 状态_超时
+        from ..日志 import get_logger
+
+def 测试紧急撤单() -> Dict:
+    """测试紧急撤单分批发送、确认跟踪、超时重试和清空耗时"""
+    logger = get_logger("测试_紧急撤单")
+    logger.info("开始测试紧急撤单功能")
+
+    时间 = [0]
+    撤单记录 = []
+    毫秒 = 1_000_000
+    撤单器 = 紧急撤单器(撤单记录.append, 批量大小=2, 批次间隔毫秒=50, 确认超时毫秒=1000,
+                  最大重试次数=1, 时钟=lambda: 时间[0])
+
+    # 触发时立即发出第一批，批次间隔内不再发送
+    活跃订单 = {f"CTP.{i}": "600000" for i in range(5)}
+    新增 = 撤单器.触发("日内总亏损超限", 活跃订单)
+    时间[0] += 10 * 毫秒
+    撤单器.推进()
+    分批正确 = (
+        新增 == list(活跃订单) and 撤单记录 == ["CTP.0", "CTP.1"] and
+        撤单器.已触发 and 撤单器.状态 == 状态_撤单中
+    )
+
+    # 还没发出撤单就成交的订单直接确认，不再撤单；重复触发只加入新订单
+    撤单器.确认("CTP.3")
+    新增 = 撤单器.触发("网页触发", {"CTP.4": "600000", "CTP.5": "000001"})
+    时间[0] += 40 * 毫秒
+    撤单器.推进()
+    时间[0] += 50 * 毫秒
+    撤单器.推进()
+    确认正确 = (
+        新增 == ["CTP.5"] and 撤单记录 == ["CTP.0", "CTP.1", "CTP.2", "CTP.4", "CTP.5"] and
+        撤单器.获取报告()["原因"] == "日内总亏损超限" and 撤单器.获取报告()["订单数"] == 6
+    )
+
+    # 确认超时的订单重新撤单，重试次数用完后记为未确认
+    for 委托号 in ("CTP.0", "CTP.1", "CTP.2", "CTP.4"):
+        撤单器.确认(委托号)
+    时间[0] = 1100 * 毫秒
+    撤单器.推进()
+    重试正确 = 撤单记录[-1] == "CTP.5" and len(撤单记录) == 6 and 撤单器.获取报告()["重试数"] == 1
+    时间[0] = 2200 * 毫秒
+    撤单器.推进()
+    报告 = 撤单器.获取报告()
+    超时正确 = (
+        重试正确 and len(撤单记录) == 6 and 撤单器.状态 == 状态_超时 and
+        报告["未确认"] == ["CTP.5"] and 报告["清空耗时毫秒"] is None
+    )
+
+    # 迟到的确认使状态变为已清空，记录从触发到清空的耗时
+    撤单器.确认("CTP.5")
+    报告 = 撤单器.获取报告()
+    清空正确 = (
+        撤单器.状态 == 状态_已清空 and 报告["清空耗时毫秒"] == 2200.0 and
+        报告["已确认"] == 6 and 报告["等待确认"] == 0 and 撤单器.最近清空耗时毫秒 == 2200.0
+    )
+
+    # 复位后恢复空闲，报告进入历史；没有活跃订单时触发即清空
+    复位报告 = 撤单器.复位()
+    复位正确 = (
+        复位报告["状态"] == 状态_已清空 and 撤单器.历史 == [复位报告] and
+        not 撤单器.已触发 and 撤单器.状态 == 状态_空闲 and 撤单器.获取报告() is None
+    )
+    撤单器.触发("策略停止", {})
+    复位正确 = 复位正确 and 撤单器.状态 == 状态_已清空 and 撤单器.等待完成(0.1)
+
+    # 撤单函数出错不影响其他订单
+    def 出错撤单(委托号):
+        if 委托号 == "CTP.1":
+            raise RuntimeError("网关断开")
+        撤单记录.append(委托号)
+    撤单记录.clear()
+    撤单器 = 紧急撤单器(出错撤单, 批量大小=10, 时钟=lambda: 时间[0])
+    撤单器.触发("测试", {"CTP.1": "600000", "CTP.2": "600000"})
+    出错正确 = 撤单记录 == ["CTP.2"] and 撤单器.获取报告()["撤单数"] == 2
+
+    测试通过 = 分批正确 and 确认正确 and 超时正确 and 清空正确 and 复位正确 and 出错正确
+
+    if 测试通过:
+        logger.info("紧急撤单测试通过")
+    else:
+        logger.error("紧急撤单测试失败")
+
+    return {
+        "成功": 测试通过,
+        "分批正确": 分批正确,
+        "确认正确": 确认正确,
+        "超时正确": 超时正确,
+        "清空正确": 清空正确,
+        "复位正确": 复位正确,
+        "出错正确": 出错正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试紧急撤单()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+行情合并模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.行情合并 import 行情合并器, 事件队列积压探测
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.行情合并 import 行情合并器, 事件队列积压探测
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..行情合并 import 行情合并器, 事件队列积压探测
+        from ..日志 import get_logger
+
+def 测试行情合并() -> Dict:
+    """测试行情合并、轮转顺序和积压时的等待上限"""
+    logger = get_logger("测试_行情合并")
+    logger.info("开始测试行情合并功能")
+
+    # 没有积压探测时每笔行情立即处理
+    处理记录 = []
+    合并器 = 行情合并器()
+    合并器.放入("600000", 1)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    合并器.放入("600000", 2)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    立即处理正确 = 处理记录 == [("600000", 1), ("600000", 2)] and len(合并器) == 0
+
+    # 有积压时只合并不处理，同一品种只保留最新一笔，按首次进入顺序轮转
+    积压 = [3]
+    处理记录 = []
+    合并器 = 行情合并器(最大等待毫秒=60000, 积压探测=lambda: 积压[0])
+    for 代码, 行情 in (("600000", 1), ("000001", 1), ("600000", 2), ("600036", 1), ("600000", 3), ("000001", 2)):
+        合并器.放入(代码, 行情)
+        合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    合并正确 = (
+        处理记录 == [] and len(合并器) == 3 and
+        合并器.合并丢弃 == {"600000": 2, "000001": 1} and 合并器.合并丢弃总数 == 3
+    )
+    积压[0] = 0
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    轮转正确 = (
+        处理记录 == [("600000", 3), ("000001", 2), ("600036", 1)] and
+        合并器.导出() == {"接收数": 6, "处理数": 3, "合并丢弃": 3, "等待中": 0}
+    )
+
+    # 有积压时等待超过上限的品种必须处理
+    处理记录 = []
+    合并器 = 行情合并器(最大等待毫秒=0, 积压探测=lambda: 5)
+    合并器.放入("600000", 1)
+    合并器.放入("000001", 1)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    等待上限正确 = 处理记录 == [("600000", 1), ("000001", 1)]
+
+    # 指定全部时不看积压，处理全部等待中的品种
+    处理记录 = []
+    合并器 = 行情合并器(最大等待毫秒=60000, 积压探测=lambda: 5)
+    合并器.放入("600000", 1)
+    合并器.放入("000001", 1)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    全部处理数 = 合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)), 全部=True)
+    全部处理正确 = 全部处理数 == 2 and 处理记录 == [("600000", 1), ("000001", 1)] and len(合并器) == 0
+
+    # 处理函数出错时已取出的品种不再重复处理，其余品种保留到下次
+    def 出错处理(代码, 行情):
+        if 代码 == "600000":
+            raise ValueError("测试异常")
+        处理记录.append((代码, 行情))
+    处理记录 = []
+    合并器 = 行情合并器()
+    合并器.积压探测 = lambda: 1
+    合并器.放入("600000", 1)
+    合并器.放入("000001", 1)
+    合并器.积压探测 = None
+    try:
+        合并器.处理(出错处理)
+        异常正确 = False
+    except ValueError:
+        异常正确 = len(合并器) == 1 and "000001" in 合并器
+    合并器.处理(出错处理)
+    异常正确 = 异常正确 and 处理记录 == [("000001", 1)] and 合并器.清空() == 0
+
+    # 有积压时有持仓或委托的品种立即处理，空闲品种继续合并
+    处理记录 = []
+    活跃品种 = {"000001"}
+    合并器 = 行情合并器(最大等待毫秒=60000, 积压探测=lambda: 5, 活跃判断=lambda 代码: 代码 in 活跃品种)
+    合并器.放入("600000", 1)
+    合并器.放入("000001", 1)
+    合并器.放入("000001", 2)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    活跃处理 = list(处理记录)
+    合并器.放入("000001", 3)
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)))
+    活跃品种正确 = (
+        活跃处理 == [("000001", 2)] and
+        处理记录 == [("000001", 2), ("000001", 3)] and
+        len(合并器) == 1 and "600000" in 合并器
+    )
+    合并器.处理(lambda 代码, 行情: 处理记录.append((代码, 行情)), 全部=True)
+    活跃品种正确 = 活跃品种正确 and 处理记录[-1] == ("600000", 1) and 合并器.清空() == 0
+
+    # 积压探测取不到私有队列或调用出错时回退
+    class 队列:
+        def __init__(self):
+            self.出错 = False
+
+        def qsize(self):
+            if self.出错:
+                raise NotImplementedError
+            return 4
+
+    class 事件引擎:
+        def __init__(self, 队列对象):
+            self._queue = 队列对象
+
+    正常队列 = 队列()
+    探测 = 事件队列积压探测(事件引擎(正常队列))
+    出错队列 = 队列()
+    出错队列.出错 = True
+    探测回退正确 = 探测 is not None and 探测() == 4
+    正常队列.出错 = True
+    探测回退正确 = (
+        探测回退正确 and 探测() == 0 and
+        事件队列积压探测(None) is None and
+        事件队列积压探测(object()) is None and
+        事件队列积压探测(事件引擎(出错队列)) is None
+    )
+
+    测试通过 = 立即处理正确 and 合并正确 and 轮转正确 and 等待上限正确 and 全部处理正确 and 异常正确 and 活跃品种正确 and 探测回退正确
+
+    if 测试通过:
+        logger.info("行情合并测试通过")
+    else:
+        logger.error("行情合并测试失败")
+
+    return {
+        "成功": 测试通过,
+        "立即处理正确": 立即处理正确,
+        "合并正确": 合并正确,
+        "轮转正确": 轮转正确,
+        "等待上限正确": 等待上限正确,
+        "全部处理正确": 全部处理正确,
+        "异常正确": 异常正确,
+        "活跃品种正确": 活跃品种正确,
+        "探测回退正确": 探测回退正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试行情合并()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+行情生成和压力测试模块的测试文件
+"""
+import os
+import sys
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.行情生成 import 行情生成器
+    from modules.压力测试 import 压力测试器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.行情生成 import 行情生成器
+        from 大象策略.modules.压力测试 import 压力测试器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..行情生成 import 行情生成器
+        from ..压力测试 import 压力测试器
+        from ..日志 import get_logger
+
+股票列表 = ["600000", "000001", "600036"]
+
+
+def 测试行情生成() -> Dict:
+    """测试合成行情的盘口结构、大象和冰山单、开盘突发和可复现性"""
+    logger = get_logger("测试_行情生成")
+    logger.info("开始测试行情生成功能")
+
+    生成器 = 行情生成器(股票列表, 种子=7, 大象概率=0.05, 冰山概率=0.05)
+    事件列表 = list(生成器.事件(3000))
+
+    # 买盘从高到低、卖盘从低到高，买一低于卖一
+    盘口正确 = all(
+        len(事件.买盘) == 5 and len(事件.卖盘) == 5 and 事件.买盘[0][0] < 事件.卖盘[0][0] and
+        all(事件.买盘[i][0] > 事件.买盘[i + 1][0] and 事件.卖盘[i][0] < 事件.卖盘[i + 1][0] for i in range(4))
+        for 事件 in 事件列表
+    )
+
+    # 大象出现后撤单或被吃掉，冰山单被成交后补单
+    统计 = 生成器.统计
+    模式正确 = (
+        统计["行情"] == 3000 and 统计["大象出现"] > 0 and 统计["大象撤单"] > 0 and 统计["大象被吃"] > 0 and
+        统计["冰山出现"] > 0 and 统计["冰山补单"] > 0
+    )
+
+    # 集合竞价时所有品种同时发布，开盘后行情间隔缩短
+    步长 = 生成器.行情间隔秒 / len(股票列表)
+    开盘正确 = (
+        [事件.发送偏移 for 事件 in 事件列表[:3]] == [0.0, 0.0, 0.0] and
+        事件列表[0].时间.time().strftime("%H:%M") == "09:25" and
+        abs(事件列表[4].发送偏移 - 步长 / 生成器.开盘爆发倍数) < 1e-9 and
+        abs(事件列表[-1].发送偏移 - 事件列表[-2].发送偏移 - 步长) < 1e-9
+    )
+
+    # 同一种子生成的行情相同
+    复现正确 = list(行情生成器(股票列表, 种子=7, 大象概率=0.05, 冰山概率=0.05).事件(3000)) == 事件列表
+
+    # 转换为行情对象后价格与价格档一致
+    行情 = 生成器.转行情(事件列表[10])
+    转换正确 = (
+        行情.symbol == 事件列表[10].股票代码 and
+        round(行情.bid_price_1 * 100) == 事件列表[10].买盘[0][0] and
+        行情.ask_volume_5 == 事件列表[10].卖盘[4][1] and 行情.limit_up > 行情.pre_close
+    )
+
+    测试通过 = 盘口正确 and 模式正确 and 开盘正确 and 复现正确 and 转换正确
+
+    if 测试通过:
+        logger.info("行情生成测试通过")
+    else:
+        logger.error("行情生成测试失败")
+
+    return {
+        "成功": 测试通过,
+        "盘口正确": 盘口正确,
+        "模式正确": 模式正确,
+        "开盘正确": 开盘正确,
+        "复现正确": 复现正确,
+        "转换正确": 转换正确
+    }
+
+def 测试压力测试() -> Dict:
+    """测试压力测试器以低速率驱动模拟交易所时全部行情被处理且未饱和"""
+    logger = get_logger("测试_压力测试")
+    logger.info("开始测试压力测试功能")
+
+    测试器 = 压力测试器(股票列表, "撮合", 开盘集合竞价=False, 开盘爆发秒数=0.0)
+    结果 = 测试器.运行(200, 0.25)
+    运行正确 = (
+        结果["发送数"] == 结果["处理数"] and 45 <= 结果["发送数"] <= 55 and
+        not 结果["饱和"] and not 结果["未达目标"] and 结果["撮合"]["委托"] == 结果["处理数"] // 10
+    )
+
+    报告 = 测试器.生成报告([结果])
+    报告正确 = "未饱和" in 报告
+
+    try:
+        压力测试器(股票列表, "未知目标")
+        目标检查正确 = False
+    except ValueError:
+        目标检查正确 = True
+
+    测试通过 = 运行正确 and 报告正确 and 目标检查正确
+
+    if 测试通过:
+        logger.info("压力测试测试通过")
+    else:
+        logger.error("压力测试测试失败")
+
+    return {
+        "成功": 测试通过,
+        "运行正确": 运行正确,
+        "报告正确": 报告正确,
+        "目标检查正确": 目标检查正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试行情生成()
+    print(f"行情生成测试结果: {'通过' if 结果['成功'] else '失败'}")
+    结果 = 测试压力测试()
+    print(f"压力测试测试结果: {'通过' if 结果['成功'] else '失败'}")
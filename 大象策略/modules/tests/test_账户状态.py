@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+账户状态模块的测试文件
+"""
+import os
+import sys
+import time
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.账户状态 import 账户状态
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.账户状态 import 账户状态
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..账户状态 import 账户状态
+        from ..日志 import get_logger
+
+def 测试账户状态() -> Dict:
+    """测试账户状态增量更新、持仓市值、策略成交和后台对账"""
+    logger = get_logger("测试_账户状态")
+    logger.info("开始测试账户状态功能")
+
+    # 账户事件按账户覆盖，总资产为各账户合计
+    状态 = 账户状态()
+    状态.更新账户("CTP.A", 100000.0, 1000.0)
+    状态.更新账户("CTP.B", 50000.0)
+    状态.更新账户("CTP.A", 90000.0, 500.0)
+    账户正确 = 状态.总资产 == 140000.0 and 状态.冻结 == 500.0
+
+    # 持仓事件覆盖数量和成本价，持仓市值按最新价增量调整
+    def 行情(股票代码, 价格):
+        状态.价格表.更新(股票代码, 价格)
+        状态.更新价格(股票代码, 价格)
+
+    状态.更新持仓("600000", 1000, 10.0)
+    市值正确 = 状态.持仓市值 == 10000.0
+    行情("600000", 10.5)
+    行情("600036", 30.0)  # 未持仓的品种不影响市值
+    市值正确 = 市值正确 and abs(状态.持仓市值 - 10500.0) < 1e-6
+    状态.更新持仓("600036", 200, 29.0)  # 建仓时使用已有的最新价
+    市值正确 = 市值正确 and abs(状态.持仓市值 - 16500.0) < 1e-6
+    状态.更新持仓("600036", 0, 0.0)
+    市值正确 = 市值正确 and abs(状态.持仓市值 - 10500.0) < 1e-6 and "600036" not in 状态.持仓列表()
+
+    # 策略成交增量更新数量和加权成本，市值仍按最新价计算
+    状态.记录成交("600000", 1000, 11.0, True)
+    数量, 成本 = 状态.获取持仓("600000")
+    成交正确 = 数量 == 2000 and abs(成本 - 10.5) < 1e-6 and abs(状态.持仓市值 - 21000.0) < 1e-6
+    状态.记录成交("600000", 2000, 11.2, False)
+    成交正确 = 成交正确 and 状态.获取持仓("600000") == (0, 0.0) and 状态.持仓市值 == 0.0
+
+    # 对账修正遗漏的事件
+    状态.更新持仓("600000", 1000, 10.0)
+    快照 = ([("CTP.A", 90000.0, 500.0), ("CTP.B", 60000.0, 0.0)], [("600000", 1200, 10.0), ("000001", 500, 12.0)])
+    差异 = 状态.对账(lambda: 快照)
+    对账正确 = (len(差异) == 3 and 状态.总资产 == 150000.0 and 状态.获取持仓("600000") == (1200, 10.0)
+            and 状态.获取持仓("000001") == (500, 12.0) and 状态.统计["修正"] == 3)
+    对账正确 = 对账正确 and 状态.对账(lambda: 快照) == [] and 状态.对账(lambda: None) == []
+
+    # 获取快照期间收到事件的品种和账户以事件为准
+    def 期间有事件():
+        状态.更新持仓("600000", 1500, 10.0)
+        状态.更新账户("CTP.B", 70000.0)
+        return [("CTP.A", 90000.0, 500.0), ("CTP.B", 60000.0, 0.0)], [("600000", 1200, 10.0), ("000001", 400, 12.0)]
+    差异 = 状态.对账(期间有事件)
+    版本正确 = (状态.获取持仓("600000") == (1500, 10.0) and 状态.总资产 == 160000.0
+            and 状态.获取持仓("000001") == (400, 12.0) and len(差异) == 1)
+
+    # 后台对账线程
+    线程状态 = 账户状态()
+    线程状态.启动对账(lambda: ([("CTP.A", 1000.0, 0.0)], []), 间隔=0.01)
+    for _ in range(200):
+        if 线程状态.总资产 == 1000.0:
+            break
+        time.sleep(0.01)
+    线程正确 = 线程状态.对账中 and 线程状态.总资产 == 1000.0
+    线程状态.停止对账()
+    线程正确 = 线程正确 and not 线程状态.对账中
+
+    测试通过 = 账户正确 and 市值正确 and 成交正确 and 对账正确 and 版本正确 and 线程正确
+
+    if 测试通过:
+        logger.info("账户状态测试通过")
+    else:
+        logger.error("账户状态测试失败")
+
+    return {
+        "成功": 测试通过,
+        "账户正确": 账户正确,
+        "市值正确": 市值正确,
+        "成交正确": 成交正确,
+        "对账正确": 对账正确,
+        "版本正确": 版本正确,
+        "线程正确": 线程正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试账户状态()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
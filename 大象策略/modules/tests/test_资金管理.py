@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+资金管理模块的测试文件
+"""
+import os
+import sys
+from datetime import date, timedelta
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.资金管理 import 资金管理器
+    from modules.最新价 import 最新价表
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.资金管理 import 资金管理器
+        from 大象策略.modules.最新价 import 最新价表
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..资金管理 import 资金管理器
+        from ..最新价 import 最新价表
+        from ..日志 import get_logger
+
+def 测试持仓市值() -> Dict:
+    """测试最新价表和资金管理器按价格变化增量计算持仓市值和浮动盈亏"""
+    logger = get_logger("测试_持仓市值")
+    logger.info("开始测试持仓市值功能")
+
+    # 最新价表按品种分配固定索引，超过容量时扩容
+    价格表 = 最新价表(容量=2)
+    索引1, 原价 = 价格表.更新("600000", 10.0)
+    索引2, _ = 价格表.更新("600036", 30.0)
+    索引3, _ = 价格表.更新("000001", 12.0)
+    _, 原价2 = 价格表.更新("600000", 10.2)
+    价格表.更新("600000", 0)  # 0价格忽略
+    价格表正确 = (
+        (索引1, 索引2, 索引3) == (0, 1, 2) and 原价 == 0.0 and 原价2 == 10.0
+        and 价格表.获取("600000") == 10.2 and 价格表.获取("300750") == 0.0
+        and len(价格表) == 3 and 价格表.导出()["000001"] == 12.0
+    )
+
+    # 买入后按最新价计价，没有行情的品种按成本价计价
+    资金 = 资金管理器(初始资产=100000, 价格表=价格表)
+    资金.更新持仓("600000", 1000, 10.0, True)
+    资金.更新持仓("300750", 100, 200.0, True)
+    建仓正确 = (
+        abs(资金.持仓市值 - (1000 * 10.2 + 100 * 200.0)) < 1e-6
+        and abs(资金.浮动盈亏 - 200.0) < 1e-6
+        and 资金.获取持仓市值("300750") == 20000.0
+    )
+
+    # 价格变化按差价乘持仓数量调整，未持仓的品种不影响
+    def 行情(股票代码, 价格):
+        索引, _ = 价格表.更新(股票代码, 价格)
+        资金.更新价格(索引, 价格)
+
+    行情("600000", 10.5)
+    行情("300750", 198.0)
+    行情("600036", 31.0)
+    行情("300750", 201.0)
+    逐笔正确 = abs(资金.持仓市值 - (1000 * 10.5 + 100 * 201.0)) < 1e-6 and abs(资金.浮动盈亏 - 600.0) < 1e-6
+
+    # 卖出后按剩余数量计价，成本价不变
+    资金.交易日切换(date.today() + timedelta(days=1))
+    资金.更新持仓("600000", 400, 10.5, False)
+    行情("600000", 11.0)
+    卖出正确 = (
+        abs(资金.获取持仓市值("600000") - 600 * 11.0) < 1e-6
+        and abs(资金.浮动盈亏 - (600 * 1.0 + 100.0)) < 1e-6
+    )
+    统计 = 资金.获取每日统计()
+    统计正确 = 统计["持仓市值"] == 资金.持仓市值 and 统计["浮动盈亏"] == 资金.浮动盈亏
+
+    # 加载持仓状态后重新计算
+    新资金 = 资金管理器(价格表=价格表)
+    新资金.加载持仓状态(资金.保存持仓状态())
+    加载正确 = abs(新资金.持仓市值 - 资金.持仓市值) < 1e-6 and abs(新资金.浮动盈亏 - 资金.浮动盈亏) < 1e-6
+
+    测试通过 = 价格表正确 and 建仓正确 and 逐笔正确 and 卖出正确 and 统计正确 and 加载正确
+
+    if 测试通过:
+        logger.info("持仓市值测试通过")
+    else:
+        logger.error("持仓市值测试失败")
+
+    return {
+        "成功": 测试通过,
+        "价格表正确": 价格表正确,
+        "建仓正确": 建仓正确,
+        "逐笔正确": 逐笔正确,
+        "卖出正确": 卖出正确,
+        "统计正确": 统计正确,
+        "加载正确": 加载正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试持仓市值()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
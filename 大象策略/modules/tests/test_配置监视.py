@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+配置监视与参数热加载的测试文件
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.参数管理 import 参数管理器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.参数管理 import 参数管理器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..参数管理 import 参数管理器
+        from ..日志 import get_logger
+
+def _写入json(路径: str, 数据):
+    """写入JSON文件，并把修改时间往后推，避免文件系统时间精度导致漏检"""
+    with open(路径, "w", encoding="utf-8") as f:
+        json.dump(数据, f, ensure_ascii=False)
+    时间 = time.time() + 2
+    os.utime(路径, (时间, 时间))
+
+def _等待(条件, 超时: float = 3.0) -> bool:
+    """等待条件成立"""
+    截止 = time.time() + 超时
+    while time.time() < 截止:
+        if 条件():
+            return True
+        time.sleep(0.02)
+    return 条件()
+
+def 测试配置监视() -> Dict:
+    """测试配置文件热加载：校验、原子替换和新增股票通知"""
+    logger = get_logger("测试_配置监视")
+    logger.info("开始测试配置监视功能")
+
+    临时目录 = tempfile.mkdtemp(prefix="配置监视测试_")
+    try:
+        _写入json(os.path.join(临时目录, "global_params.json"), {"大象识别": {"大象委托量阈值": 100}})
+        _写入json(os.path.join(临时目录, "symbol_params.json"), {"600000": {"大象识别": {"大象委托量阈值": 300}}})
+        _写入json(os.path.join(临时目录, "stocks.json"), {"stocks": ["600000"]})
+
+        管理器 = 参数管理器(配置目录=临时目录)
+        初始版本 = 管理器.版本
+        初始读取正确 = (
+            管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 100 and
+            管理器.获取参数("600000", "大象识别", "大象委托量阈值") == 300 and
+            管理器.获取股票列表() == ["600000"]
+        )
+
+        变更记录 = []
+        管理器.添加变更监听(变更记录.append)
+        管理器.启动热加载(轮询间隔=0.05, 使用inotify=False)
+
+        # 合法修改：新参数生效，新增股票通知监听方
+        _写入json(os.path.join(临时目录, "global_params.json"), {"大象识别": {"大象委托量阈值": 200}})
+        _写入json(os.path.join(临时目录, "stocks.json"), {"stocks": ["600000", "000001"]})
+        热加载生效 = _等待(lambda: 管理器.获取股票列表() == ["600000", "000001"] and
+                          管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 200)
+        新增股票通知 = any(变更["新增股票"] == ["000001"] for 变更 in 变更记录)
+        品种参数保留 = 管理器.获取参数("600000", "大象识别", "大象委托量阈值") == 300
+
+        # 非法修改：JSON损坏或数值参数改成字符串，保留旧快照
+        合法版本 = 管理器.版本
+        with open(os.path.join(临时目录, "global_params.json"), "w", encoding="utf-8") as f:
+            f.write("{\"大象识别\": ")
+        损坏结果 = 管理器.重新加载([os.path.join(临时目录, "global_params.json")])
+        _写入json(os.path.join(临时目录, "symbol_params.json"), {"600000": {"大象识别": {"大象委托量阈值": "很多"}}})
+        类型错误结果 = 管理器.重新加载([os.path.join(临时目录, "symbol_params.json")])
+        非法修改被拒绝 = (
+            not 损坏结果["成功"] and not 类型错误结果["成功"] and
+            管理器.版本 == 合法版本 and
+            管理器.获取参数("000001", "大象识别", "大象委托量阈值") == 200 and
+            管理器.获取参数("600000", "大象识别", "大象委托量阈值") == 300
+        )
+
+        管理器.停止热加载()
+        版本递增 = 合法版本 > 初始版本
+    finally:
+        shutil.rmtree(临时目录, ignore_errors=True)
+
+    测试通过 = 初始读取正确 and 热加载生效 and 新增股票通知 and 品种参数保留 and 非法修改被拒绝 and 版本递增
+
+    if 测试通过:
+        logger.info("配置监视测试通过")
+    else:
+        logger.error(f"配置监视测试失败，变更记录: {变更记录}")
+
+    return {
+        "成功": 测试通过,
+        "初始读取正确": 初始读取正确,
+        "热加载生效": 热加载生效,
+        "新增股票通知": 新增股票通知,
+        "品种参数保留": 品种参数保留,
+        "非法修改被拒绝": 非法修改被拒绝,
+        "版本递增": 版本递增
+    }
+
+if __name__ == "__main__":
+    结果 = 测试配置监视()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
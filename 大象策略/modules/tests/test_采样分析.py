@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+采样分析模块的测试文件
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+项目根目录 = os.path.dirname(父目录)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+if 项目根目录 not in sys.path:
+    sys.path.append(项目根目录)
+
+# 灵活导入模块
+try:
+    # 当作为包导入时
+    from modules.采样分析 import 采样分析器
+    from modules.日志 import get_logger
+except ImportError:
+    try:
+        # 当直接运行时
+        from 大象策略.modules.采样分析 import 采样分析器
+        from 大象策略.modules.日志 import get_logger
+    except ImportError:
+        # 相对路径导入
+        from ..采样分析 import 采样分析器
+        from ..日志 import get_logger
+
+def _忙碌函数(停止事件: threading.Event):
+    """模拟占用CPU的工作线程"""
+    while not 停止事件.is_set():
+        sum(i * i for i in range(1000))
+
+def 测试采样分析() -> Dict:
+    """测试采样分析器的启动、停止和折叠栈输出"""
+    logger = get_logger("测试_采样分析")
+    logger.info("开始测试采样分析功能")
+
+    with tempfile.TemporaryDirectory() as 临时目录:
+        分析器 = 采样分析器(输出目录=临时目录)
+
+        停止事件 = threading.Event()
+        工作线程 = threading.Thread(target=_忙碌函数, args=(停止事件,), name="测试工作线程", daemon=True)
+        工作线程.start()
+
+        # 只采样工作线程，到时自动停止
+        启动结果 = 分析器.开始(时长=0.3, 采样间隔=0.002, 线程名=["测试工作线程"])
+        重复启动结果 = 分析器.开始(时长=0.3)
+        time.sleep(0.1)
+        运行中状态 = 分析器.获取状态()
+        分析器._线程.join(2)
+        停止事件.set()
+        工作线程.join(2)
+
+        结果 = 分析器.最近结果 or {}
+        文件内容 = ""
+        if 结果.get("文件") and os.path.exists(结果["文件"]):
+            with open(结果["文件"], encoding="utf-8") as f:
+                文件内容 = f.read()
+        logger.info(f"采样结果: {结果}")
+
+        # 每行都是 "栈 次数"，栈以线程名开头并包含工作函数
+        行列表 = [行 for 行 in 文件内容.splitlines() if 行]
+        格式正确 = bool(行列表) and all(
+            行.rsplit(" ", 1)[1].isdigit() and 行.startswith("测试工作线程;") for 行 in 行列表
+        )
+        包含工作函数 = "_忙碌函数" in 文件内容
+
+        # 停止未运行的分析器
+        停止结果 = 分析器.停止()
+
+        # 提前停止
+        分析器.开始(时长=10, 采样间隔=0.002)
+        time.sleep(0.05)
+        提前停止结果 = 分析器.停止()
+        提前停止正确 = 提前停止结果["成功"] and not 分析器.运行中 and 提前停止结果["结果"]["时长"] < 5
+
+    启停正确 = (
+        启动结果["成功"] and
+        not 重复启动结果["成功"] and
+        运行中状态["运行中"] and
+        停止结果["成功"]
+    )
+
+    测试通过 = 启停正确 and 格式正确 and 包含工作函数 and 提前停止正确
+
+    if 测试通过:
+        logger.info("采样分析测试通过")
+    else:
+        logger.error("采样分析测试失败")
+
+    return {
+        "成功": 测试通过,
+        "启停正确": 启停正确,
+        "格式正确": 格式正确,
+        "包含工作函数": 包含工作函数,
+        "提前停止正确": 提前停止正确
+    }
+
+if __name__ == "__main__":
+    结果 = 测试采样分析()
+    print(f"测试结果: {'通过' if 结果['成功'] else '失败'}")
@@ -15,6 +15,8 @@ import sys
 if 父目录 not in sys.path:
     sys.path.append(父目录)
 
+from vnpy.trader.constant import Direction, Status
+
 from .日志 import get_logger
 from .风险控制 import 风险控制器 as 风控器
 
@@ -67,6 +69,12 @@ class 交易执行器:
         self.最小止盈点数 = 最小止盈点数
         self.最小止损点数 = 最小止损点数
         
+        # 品种信息表，由策略设置；设置后按品种的最小变动价位计算价格
+        self.品种表 = None
+        
+        # 紧急撤单器，由策略设置；设置后全局风控触发时交给紧急撤单器分批撤单并跟踪确认
+        self.紧急撤单 = None
+        
         # 交易状态数据
         self.活跃订单 = {}  # {订单ID: 订单信息}
         self.订单历史 = []  # 已完成/取消的订单列表
@@ -183,6 +191,42 @@ class 交易执行器:
         self.交易接口.取消订单(订单ID)
         return None
 
+    def _最小变动价位(self, 大象信息: Dict) -> float:
+        """获取大象所在品种的最小变动价位，没有品种信息表时使用价格偏移量"""
+        if self.品种表 is not None and 大象信息.get("股票代码"):
+            return self.品种表.获取(大象信息["股票代码"]).最小变动价位
+        return self.价格偏移量
+
+    def _偏移价格(self, 大象信息: Dict, 偏移档数: float) -> float:
+        """在大象价格上偏移若干个最小变动价位，有品种信息时按整数价格档计算"""
+        if self.品种表 is not None and "价格档" in 大象信息:
+            品种 = self.品种表.获取(大象信息["股票代码"])
+            return 品种.转价格(大象信息["价格档"] + round(偏移档数))
+        return 大象信息["价格"] + (self._最小变动价位(大象信息) * 偏移档数)
+
+    def _按比例调整价格(self, 股票代码: str, 价格: float, 比例: float) -> float:
+        """
+        按比例调整价格，以整数价格档计算，至少调整一个价格档
+        
+        参数:
+            股票代码: 股票代码
+            价格: 原价格
+            比例: 调整比例，正数上调，负数下调
+        
+        返回:
+            调整后的价格
+        """
+        if self.品种表 is not None:
+            品种 = self.品种表.获取(股票代码)
+            价格档 = 品种.转价格档(价格)
+            调整档数 = max(1, round(价格档 * abs(比例)))
+            return 品种.转价格(价格档 + 调整档数 if 比例 > 0 else 价格档 - 调整档数)
+        
+        单位 = self.价格偏移量
+        价格档 = int(价格 / 单位 + 0.5)
+        调整档数 = max(1, round(价格档 * abs(比例)))
+        return round((价格档 + 调整档数 if 比例 > 0 else 价格档 - 调整档数) * 单位, 4)
+
     def 计算卖出价格(self, 大象信息: Dict) -> float:
         """
         计算卖出价格
@@ -193,7 +237,7 @@ class 交易执行器:
         返回:
             卖出价格
         """
-        return 大象信息["价格"] + (self.价格偏移量 * self.卖出偏移量倍数)
+        return self._偏移价格(大象信息, self.卖出偏移量倍数)
     
     def 计算买入价格(self, 大象信息: Dict) -> float:
         """
@@ -205,7 +249,7 @@ class 交易执行器:
         返回:
             买入价格
         """
-        return 大象信息["价格"] + (self.价格偏移量 * self.买入偏移量倍数)
+        return self._偏移价格(大象信息, self.买入偏移量倍数)
     
     def 计算止损价格(self, 大象信息: Dict) -> float:
         """
@@ -254,7 +298,8 @@ class 交易执行器:
                     "状态": "已提交",
                     "提交时间": 当前时间,
                     "超时时间": 当前时间 + timedelta(seconds=self.等待时间),
-                    "大象信息": 大象信息
+                    "大象信息": 大象信息,
+                    "下单信号强度": 大象信息.get("信号强度", 1.0) if 大象信息 else None
                 }
                 
                 self.活跃订单[订单ID] = 订单信息
@@ -299,7 +344,8 @@ class 交易执行器:
                     "状态": "已提交",
                     "提交时间": 当前时间,
                     "超时时间": 当前时间 + timedelta(seconds=self.等待时间),
-                    "大象信息": 大象信息
+                    "大象信息": 大象信息,
+                    "下单信号强度": 大象信息.get("信号强度", 1.0) if 大象信息 else None
                 }
                 
                 self.活跃订单[订单ID] = 订单信息
@@ -415,18 +461,19 @@ class 交易执行器:
                 订单信息["状态"] = "已成交"
                 订单信息["成交时间"] = datetime.now()
                 订单信息["成交价格"] = order.price
-                订单信息["成交数量"] = order.volume_traded
+                订单信息["成交数量"] = order.traded
                 
                 # 记录成交
                 self.订单历史.append(订单信息)
                 del self.活跃订单[订单ID]
                 
-                self.logger.info(f"订单成交: {订单ID}, {订单信息['方向']} {order.symbol} {order.volume_traded}股 @ {order.price}")
+                self.logger.info(f"订单成交: {订单ID}, {订单信息['方向']} {order.symbol} {order.traded}股 @ {order.price}")
                 
             elif order.status == Status.CANCELLED:
                 # 订单已取消
                 订单信息["状态"] = "已取消"
                 订单信息["取消时间"] = datetime.now()
+                订单信息["成交数量"] = order.traded
                 
                 # 记录取消
                 self.订单历史.append(订单信息)
@@ -476,6 +523,31 @@ class 交易执行器:
         当前时间 = datetime.now()
         return 当前时间 > self.冷却期[股票代码]
     
+    def 导出状态(self) -> Dict:
+        """
+        导出用于状态快照的冷却期、活跃订单和交易统计
+
+        返回:
+            交易执行状态字典
+        """
+        return {
+            "冷却期": self.冷却期,
+            "活跃订单": self.活跃订单,
+            "交易统计": self.交易统计
+        }
+
+    def 恢复状态(self, 状态: Dict):
+        """
+        从状态快照恢复，已过期的冷却期不恢复
+
+        参数:
+            状态: 导出状态 的返回值
+        """
+        当前时间 = datetime.now()
+        self.冷却期 = {股票代码: 结束时间 for 股票代码, 结束时间 in 状态.get("冷却期", {}).items() if 结束时间 > 当前时间}
+        self.活跃订单 = dict(状态.get("活跃订单", {}))
+        self.交易统计.update(状态.get("交易统计", {}))
+
     def 清理过期数据(self):
         """清理过期的交易数据和冷却期"""
         当前时间 = datetime.now()
@@ -578,7 +650,7 @@ class 交易执行器:
         
         参数:
             交易接口: 交易接口对象
-            大象信号: 当前大象信号状态 {股票代码: 信号强度}
+            大象信号: 当前大象信号状态 {股票代码: 信号强度}，可由 大象识别器.信号强度表 获取
             信号阈值: 信号强度低于此阈值视为消失
         
         返回:
@@ -592,7 +664,8 @@ class 交易执行器:
                 continue
                 
             股票代码 = 订单信息["股票代码"]
-            原信号强度 = 订单信息["大象信息"].get("信号强度", 1.0)
+            # 大象信息随行情更新，下单时的强度单独保存
+            原信号强度 = 订单信息.get("下单信号强度") or 订单信息["大象信息"].get("信号强度", 1.0)
             
             # 检查当前信号状态
             当前信号强度 = 大象信号.get(股票代码, 0)
@@ -619,6 +692,11 @@ class 交易执行器:
         
         # 检查全局风控状态
         if 风控状态.get("全局风控触发", False):
+            if self.紧急撤单 is not None:
+                return self.紧急撤单.触发("全局风控触发", {
+                    订单ID: 订单信息["股票代码"] for 订单ID, 订单信息 in self.活跃订单.items()
+                })
+            
             # 全局风控触发，撤销所有活跃订单
             for 订单ID in list(self.活跃订单.keys()):
                 if self.撤单处理(交易接口, 订单ID, "全局风控触发"):
@@ -723,7 +801,7 @@ class 交易执行器:
                 # 价格偏离撤单：考虑调整价格重新下单
                 if 方向 == "买入" and "重新下单" not in 撤单原因:
                     # 下调买入价格并重新下单
-                    新价格 = 价格 * 0.995  # 下调0.5%
+                    新价格 = self._按比例调整价格(股票代码, 价格, -0.005)  # 下调0.5%
                     新订单ID = self.发送买入订单(交易接口, 股票代码, 新价格, 数量, None, 大象信息)
                     if 新订单ID:
                         处理结果["重新下单数"] += 1
@@ -734,7 +812,7 @@ class 交易执行器:
                 
                 elif 方向 == "卖出" and "重新下单" not in 撤单原因:
                     # 上调卖出价格并重新下单
-                    新价格 = 价格 * 1.005  # 上调0.5%
+                    新价格 = self._按比例调整价格(股票代码, 价格, 0.005)  # 上调0.5%
                     新订单ID = self.发送卖出订单(交易接口, 股票代码, 新价格, 数量, 大象信息)
                     if 新订单ID:
                         处理结果["重新下单数"] += 1
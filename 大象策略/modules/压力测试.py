@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+压力测试模块 - 按设定速率向策略或模拟交易所推送合成行情，测量持续吞吐、队列深度和信号到下单延迟
+"""
+from collections import deque
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Sequence
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from .日志 import get_logger
+from .延迟统计 import 延迟直方图
+from .性能测试 import 桩CTA引擎, 跳过基准, 静默输出
+from .行情生成 import 行情生成器
+from .模拟交易所 import 模拟交易所, 买入
+
+# 处理速率低于发送速率的该比例视为饱和
+饱和比例 = 0.95
+
+
+class 压力CTA引擎(桩CTA引擎):
+    """
+    带事件队列的CTA引擎桩
+
+    事件队列供策略的行情合并器探测积压，与vnpy事件引擎的 _queue 相同；
+    委托发出时记录从触发本次处理的行情入队到发单的耗时，包含排队等待和策略处理。
+    """
+
+    def __init__(self, 事件队列: queue.Queue):
+        super().__init__()
+        self.event_engine = SimpleNamespace(_queue=事件队列)
+        self.当前入队时间 = 0
+        self.信号到下单 = 延迟直方图()
+
+    def send_order(self, strategy, direction, offset, price, volume, stop=False, lock=False, net=False):
+        if self.当前入队时间:
+            self.信号到下单.记录(time.perf_counter_ns() - self.当前入队时间)
+        return super().send_order(strategy, direction, offset, price, volume, stop, lock, net)
+
+
+class _撮合目标:
+    """行情同步到模拟交易所，每个品种每10笔行情在买一挂一笔买单，最多保留100笔挂单"""
+
+    def __init__(self, 生成器: 行情生成器, 事件队列: queue.Queue):
+        self.交易所 = 模拟交易所(委托延迟毫秒=0, 撤单延迟毫秒=0, 回报延迟毫秒=0)
+        self._挂单 = deque()
+        self._笔数 = 0
+
+    def 转换(self, 事件):
+        return 事件
+
+    def 处理(self, 事件, 入队时间: int):
+        交易所 = self.交易所
+        交易所.同步盘口(事件.股票代码, 事件.买盘, 事件.卖盘, 事件.最新价档, 事件.累计成交量)
+        self._笔数 += 1
+        if self._笔数 % 10 == 0:
+            self._挂单.append(交易所.提交委托(事件.股票代码, 买入, 事件.买盘[0][0], 100))
+            if len(self._挂单) > 100:
+                交易所.撤销委托(self._挂单.popleft())
+
+    def 汇总(self) -> Dict:
+        return {"撮合": dict(self.交易所.统计)}
+
+    def 清理(self):
+        pass
+
+
+class _策略目标:
+    """
+    行情经 on_tick 送入大象策略，策略使用压力CTA引擎；下单后清理交易状态、冷却期和委托限流队列，
+    使后续行情能继续走到下单路径
+
+    合成大象按策略实际使用的大象阈值放置，交易日落在周末时改为之前的周五，使大象信号能够通过交易时间检查并下单。
+    """
+
+    def __init__(self, 生成器: 行情生成器, 事件队列: queue.Queue):
+        try:
+            from 大象策略 import 大象策略
+        except ImportError as e:
+            raise 跳过基准(f"缺少vnpy: {e}")
+
+        self.生成器 = 生成器
+        self._原工作目录 = os.getcwd()
+        self._临时目录 = tempfile.TemporaryDirectory()
+        os.chdir(self._临时目录.name)
+        self.引擎 = 压力CTA引擎(事件队列)
+        with 静默输出():
+            self.策略 = 大象策略(cta_engine=self.引擎, strategy_name="压力测试", vt_symbol="", setting={})
+        self.策略.inited = True
+        self.策略.trading = True
+        self._已发送 = 0
+
+        阈值 = max(self.策略.大象识别.大象委托量阈值, self.策略.大象识别.卖单委托量阈值)
+        生成器.大象金额 = (阈值 * 1.5, 阈值 * 3)
+        if 生成器.交易日.weekday() >= 5:
+            生成器.交易日 -= timedelta(days=生成器.交易日.weekday() - 4)
+
+    def 转换(self, 事件):
+        return self.生成器.转行情(事件)
+
+    def 处理(self, tick, 入队时间: int):
+        self.引擎.当前入队时间 = 入队时间
+        self.策略.on_tick(tick)
+        if len(self.引擎.已发送订单) != self._已发送:
+            self._已发送 = len(self.引擎.已发送订单)
+            self.策略.交易状态.clear()
+            self.策略.交易执行.冷却期.clear()
+            self.策略.委托限流.清空委托()
+
+    def 汇总(self) -> Dict:
+        # 行情推送结束后由定时器处理合并器中剩余的品种
+        self.引擎.当前入队时间 = 0
+        with 静默输出():
+            self.策略.on_timer(1)
+        return {
+            "委托数": len(self.引擎.已发送订单),
+            "信号到下单": self.引擎.信号到下单.导出(),
+            "行情到下单": self.策略.延迟统计.导出(包含品种=False)["行情到下单"],
+            "行情合并": self.策略.行情合并.导出(),
+            "委托限流": self.策略.委托限流.导出()["统计"]
+        }
+
+    def 清理(self):
+        os.chdir(self._原工作目录)
+        self._临时目录.cleanup()
+
+
+测试目标 = {"撮合": _撮合目标, "策略": _策略目标}
+
+
+class 压力测试器:
+    """
+    压力测试器
+
+    生产线程按目标速率把合成行情放入队列(对应网关线程)，消费线程逐笔取出交给测试目标(对应vnpy事件引擎线程)。
+    行情按生成器的发送偏移排列，目标速率相对名义速率等比例压缩时间，开盘爆发期间的速率相应提高。
+    每个速率使用相同种子的新生成器，各档结果可以比较。
+    """
+
+    def __init__(self, 股票列表: Sequence[str], 目标: str = "撮合", 种子: int = 20250329, **生成参数):
+        """
+        初始化压力测试器
+
+        参数:
+            股票列表: 股票代码列表
+            目标: "策略"(大象策略，需要vnpy)或"撮合"(模拟交易所)
+            种子: 行情生成随机种子
+            生成参数: 传给行情生成器的其他参数
+        """
+        if 目标 not in 测试目标:
+            raise ValueError(f"未知的压力测试目标: {目标}")
+        self.股票列表 = list(股票列表)
+        self.目标 = 目标
+        self.种子 = 种子
+        self.生成参数 = 生成参数
+        self.logger = get_logger("压力测试")
+
+    def 运行(self, 速率: float, 时长秒: float) -> Dict:
+        """
+        按一个速率运行压力测试
+
+        参数:
+            速率: 目标行情速率(笔/秒，连续竞价的名义速率)
+            时长秒: 发送时长(秒)，结束后等待队列处理完
+
+        返回:
+            结果字典
+        """
+        生成器 = 行情生成器(self.股票列表, 种子=self.种子, **self.生成参数)
+        事件队列 = queue.Queue()
+        目标 = 测试目标[self.目标](生成器, 事件队列)
+        倍率 = 速率 / 生成器.名义速率
+        生产 = {"发送数": 0, "最大落后": 0.0, "深度": [], "耗时": 时长秒}
+
+        def 生产线程():
+            开始 = time.perf_counter()
+            try:
+                for 事件 in 生成器.事件():
+                    计划 = 事件.发送偏移 / 倍率
+                    if 计划 >= 时长秒:
+                        break
+                    等待 = 开始 + 计划 - time.perf_counter()
+                    if 等待 > 0.001:
+                        time.sleep(等待)
+                    elif 等待 < 0 and -等待 > 生产["最大落后"]:
+                        生产["最大落后"] = -等待
+                    事件队列.put((time.perf_counter_ns(), 目标.转换(事件)))
+                    生产["发送数"] += 1
+                    if 生产["发送数"] % 64 == 0:
+                        生产["深度"].append(事件队列.qsize())
+            finally:
+                生产["耗时"] = time.perf_counter() - 开始
+                事件队列.put(None)
+
+        排队等待 = 延迟直方图()
+        处理数 = 0
+        线程 = threading.Thread(target=生产线程, name="压力测试行情", daemon=True)
+        try:
+            with 静默输出():
+                开始 = time.perf_counter()
+                线程.start()
+                while True:
+                    项 = 事件队列.get()
+                    if 项 is None:
+                        break
+                    入队时间, 对象 = 项
+                    排队等待.记录(time.perf_counter_ns() - 入队时间)
+                    目标.处理(对象, 入队时间)
+                    处理数 += 1
+                总耗时 = time.perf_counter() - 开始
+            线程.join()
+            结果 = self._汇总(速率, 时长秒, 生产, 处理数, 总耗时, 排队等待)
+            结果.update(目标.汇总())
+            结果["行情生成"] = dict(生成器.统计)
+        finally:
+            目标.清理()
+
+        self.logger.info(f"压力测试 {self.目标} 目标 {速率:.0f}笔/秒: 处理 {结果['处理速率']:.0f}笔/秒, "
+                         f"队列最大深度 {结果['队列深度']['最大']}, 排队p99 {结果['排队等待']['p99微秒']:.0f}us"
+                         + (" 已饱和" if 结果["饱和"] else " 发送未达目标" if 结果["未达目标"] else ""))
+        return 结果
+
+    def 阶梯运行(self, 速率列表: Sequence[float], 时长秒: float) -> List[Dict]:
+        """
+        依次按多个速率运行，出现饱和或发送达不到目标速率后停止
+
+        参数:
+            速率列表: 目标速率列表，从低到高
+            时长秒: 每个速率的发送时长(秒)
+
+        返回:
+            各速率的结果列表
+        """
+        结果列表 = []
+        for 速率 in 速率列表:
+            结果 = self.运行(速率, 时长秒)
+            结果列表.append(结果)
+            if 结果["饱和"] or 结果["未达目标"]:
+                break
+        return 结果列表
+
+    @staticmethod
+    def _汇总(速率: float, 时长秒: float, 生产: Dict, 处理数: int, 总耗时: float, 排队等待: 延迟直方图) -> Dict:
+        发送速率 = 生产["发送数"] / max(生产["耗时"], 时长秒)
+        处理速率 = 处理数 / 总耗时 if 总耗时 > 0 else 0.0
+        深度 = 生产["深度"] or [0]
+        return {
+            "目标速率": 速率,
+            "时长秒": 时长秒,
+            "发送数": 生产["发送数"],
+            "处理数": 处理数,
+            "发送速率": 发送速率,
+            "处理速率": 处理速率,
+            "生成最大落后毫秒": round(生产["最大落后"] * 1000, 3),
+            "队列深度": {"最大": max(深度), "平均": round(sum(深度) / len(深度), 1)},
+            "排队等待": 排队等待.导出(),
+            "饱和": 处理速率 < 发送速率 * 饱和比例,
+            # 生产和消费在同一进程中争用解释器，发送达不到目标速率时整体也已到上限
+            "未达目标": 发送速率 < 速率 * 饱和比例
+        }
+
+    def 生成报告(self, 结果列表: List[Dict]) -> str:
+        """
+        生成压力测试报告
+
+        参数:
+            结果列表: 运行 或 阶梯运行 的结果
+
+        返回:
+            报告文本
+        """
+        报告 = f"大象策略压力测试报告 (目标: {self.目标}, 品种数: {len(self.股票列表)}, 种子: {self.种子})\n"
+        报告 += "=" * 86 + "\n"
+        报告 += (f"{'目标速率':>10}{'发送速率':>10}{'处理速率':>10}{'最大深度':>10}{'排队p99(us)':>14}"
+               f"{'信号到下单p99(us)':>20}{'状态':>8}\n")
+        报告 += "-" * 86 + "\n"
+        for 结果 in 结果列表:
+            信号 = 结果.get("信号到下单")
+            信号p99 = f"{信号['p99微秒']:.0f}" if 信号 and 信号["次数"] else "-"
+            报告 += (f"{结果['目标速率']:>10.0f}{结果['发送速率']:>10.0f}{结果['处理速率']:>10.0f}"
+                   f"{结果['队列深度']['最大']:>10}{结果['排队等待']['p99微秒']:>14.0f}{信号p99:>20}"
+                   f"{'饱和' if 结果['饱和'] else '未达目标' if 结果['未达目标'] else '正常':>8}\n")
+            if 结果["未达目标"]:
+                报告 += f"{'':>10}行情生成最多落后计划 {结果['生成最大落后毫秒']:.0f}ms，发送速率未达到目标\n"
+
+        饱和结果 = [结果 for 结果 in 结果列表 if 结果["饱和"] or 结果["未达目标"]]
+        报告 += "-" * 86 + "\n"
+        if 饱和结果:
+            报告 += f"饱和速率: {饱和结果[0]['目标速率']:.0f}笔/秒，最高持续处理速率: {max(结果['处理速率'] for 结果 in 结果列表):.0f}笔/秒\n"
+        else:
+            报告 += "测试的速率范围内未饱和\n"
+        return 报告
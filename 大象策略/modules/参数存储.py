@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+参数存储模块 - 基于SQLite的参数存储，适合品种数量很多的场景
+"""
+from typing import Dict, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+# 全局参数在参数表中的范围名，其余范围名为股票代码
+全局范围 = "global"
+
+_建表语句 = """
+CREATE TABLE IF NOT EXISTS params (
+    scope TEXT NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (scope, module, name)
+);
+CREATE TABLE IF NOT EXISTS param_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    version INTEGER NOT NULL,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_param_history_key ON param_history (scope, module, name);
+CREATE TABLE IF NOT EXISTS stocks (
+    position INTEGER PRIMARY KEY,
+    code TEXT NOT NULL
+);
+"""
+
+
+class SQLite参数存储:
+    """
+    SQLite参数存储
+
+    每个(范围, 模块, 参数名)一行，参数值以JSON文本保存以保留类型，
+    每次修改递增该行的版本号并记录修改时间，同时写入历史表。
+    数据库使用WAL模式，读取不会被写入阻塞。
+    内存中缓存已持久化的参数值，保存时只写入与缓存不同的行。
+    启动时只读取全局参数和范围列表，品种参数在第一次获取时读取并缓存。
+    """
+
+    def __init__(self, 数据库文件: str):
+        """
+        初始化SQLite参数存储
+
+        参数:
+            数据库文件: 数据库文件路径，不存在时自动创建
+        """
+        self.数据库文件 = 数据库文件
+        self._锁 = threading.Lock()
+        self._连接 = sqlite3.connect(数据库文件, check_same_thread=False)
+        self._连接.execute("PRAGMA journal_mode=WAL")
+        self._连接.execute("PRAGMA synchronous=NORMAL")
+        self._连接.executescript(_建表语句)
+        self._连接.commit()
+
+        # 已读取的参数 {范围: {(模块, 参数名): 值文本}}，品种范围在第一次获取时读取
+        self._缓存 = {}
+        # 数据库中有参数的所有范围
+        self._范围 = set()
+        self._股票列表 = []
+
+    def 是否为空(self) -> bool:
+        """
+        数据库中是否还没有任何参数和股票
+
+        返回:
+            是否为空
+        """
+        with self._锁:
+            参数行 = self._连接.execute("SELECT 1 FROM params LIMIT 1").fetchone()
+            股票行 = self._连接.execute("SELECT 1 FROM stocks LIMIT 1").fetchone()
+        return 参数行 is None and 股票行 is None
+
+    def 加载(self) -> Tuple[Dict, List[str], List[str]]:
+        """
+        加载全局参数、股票列表和有特定参数的品种，清空缓存；品种参数由 获取() 按需读取
+
+        返回:
+            (全局参数, 有特定参数的品种代码列表, 股票列表)，全局参数为JSON文件相同的嵌套字典结构
+        """
+        with self._锁:
+            范围列表 = [范围 for (范围,) in self._连接.execute("SELECT DISTINCT scope FROM params")]
+            股票列表 = [代码 for (代码,) in self._连接.execute("SELECT code FROM stocks ORDER BY position")]
+
+        self._缓存 = {}
+        self._范围 = set(范围列表)
+        self._股票列表 = 股票列表
+        品种列表 = sorted(范围 for 范围 in self._范围 if 范围 != 全局范围)
+        return self.获取(全局范围), 品种列表, list(股票列表)
+
+    def 获取(self, 范围: str) -> Dict:
+        """
+        获取一个范围的参数，第一次获取时从数据库读取并缓存
+
+        参数:
+            范围: 全局范围或股票代码
+
+        返回:
+            {模块: {参数名: 参数值}}，范围没有参数时返回空字典
+        """
+        参数表 = {}
+        for (模块, 参数名), 值文本 in self._读取范围(范围).items():
+            参数表.setdefault(模块, {})[参数名] = json.loads(值文本)
+        return 参数表
+
+    def _读取范围(self, 范围: str) -> Dict:
+        """
+        获取一个范围已持久化的值文本，不在缓存中时查询数据库
+
+        参数:
+            范围: 全局范围或股票代码
+
+        返回:
+            {(模块, 参数名): 值文本}
+        """
+        值表 = self._缓存.get(范围)
+        if 值表 is None:
+            值表 = {}
+            if 范围 in self._范围:
+                with self._锁:
+                    行列表 = self._连接.execute(
+                        "SELECT module, name, value FROM params WHERE scope = ?", (范围,)
+                    ).fetchall()
+                值表 = {(模块, 参数名): 值文本 for 模块, 参数名, 值文本 in 行列表}
+            self._缓存[范围] = 值表
+        return 值表
+
+    def 保存(self, 范围表: Dict[str, Dict], 股票列表: Optional[List[str]] = None) -> int:
+        """
+        保存指定范围的参数，只写入与缓存不同的行，范围内不再存在的参数会被删除
+
+        参数:
+            范围表: {范围: {模块: {参数名: 参数值}}}，全局参数的范围为 全局范围
+            股票列表: 新的股票列表，为None时不修改
+
+        返回:
+            写入或删除的参数行数
+        """
+        时间 = datetime.now().isoformat(timespec="seconds")
+        更新行 = []
+        删除行 = []
+        for 范围, 模块参数表 in 范围表.items():
+            新值 = {
+                (模块, 参数名): json.dumps(参数值, ensure_ascii=False, sort_keys=True)
+                for 模块, 模块参数 in 模块参数表.items()
+                for 参数名, 参数值 in 模块参数.items()
+            }
+            旧值 = self._读取范围(范围)
+            更新行.extend((范围, 模块, 参数名, 值文本) for (模块, 参数名), 值文本 in 新值.items()
+                       if 旧值.get((模块, 参数名)) != 值文本)
+            删除行.extend((范围, 模块, 参数名) for (模块, 参数名) in 旧值 if (模块, 参数名) not in 新值)
+
+        股票变化 = 股票列表 is not None and list(股票列表) != self._股票列表
+        if not 更新行 and not 删除行 and not 股票变化:
+            return 0
+
+        with self._锁, self._连接:
+            for 范围, 模块, 参数名, 值文本 in 更新行:
+                self._连接.execute(
+                    "INSERT INTO params (scope, module, name, value, version, updated_at) VALUES (?, ?, ?, ?, 1, ?) "
+                    "ON CONFLICT (scope, module, name) DO UPDATE SET "
+                    "value = excluded.value, version = params.version + 1, updated_at = excluded.updated_at",
+                    (范围, 模块, 参数名, 值文本, 时间)
+                )
+                self._连接.execute(
+                    "INSERT INTO param_history (scope, module, name, value, version, changed_at) "
+                    "SELECT scope, module, name, value, version, updated_at FROM params "
+                    "WHERE scope = ? AND module = ? AND name = ?",
+                    (范围, 模块, 参数名)
+                )
+            for 范围, 模块, 参数名 in 删除行:
+                self._连接.execute(
+                    "INSERT INTO param_history (scope, module, name, value, version, changed_at) "
+                    "SELECT scope, module, name, NULL, version + 1, ? FROM params "
+                    "WHERE scope = ? AND module = ? AND name = ?",
+                    (时间, 范围, 模块, 参数名)
+                )
+                self._连接.execute(
+                    "DELETE FROM params WHERE scope = ? AND module = ? AND name = ?",
+                    (范围, 模块, 参数名)
+                )
+            if 股票变化:
+                self._连接.execute("DELETE FROM stocks")
+                self._连接.executemany(
+                    "INSERT INTO stocks (position, code) VALUES (?, ?)", enumerate(股票列表)
+                )
+
+        # 事务提交后再更新缓存
+        for 范围, 模块, 参数名, 值文本 in 更新行:
+            self._缓存.setdefault(范围, {})[(模块, 参数名)] = 值文本
+            self._范围.add(范围)
+        for 范围, 模块, 参数名 in 删除行:
+            self._缓存[范围].pop((模块, 参数名), None)
+            if not self._缓存[范围]:
+                self._范围.discard(范围)
+        if 股票变化:
+            self._股票列表 = list(股票列表)
+        return len(更新行) + len(删除行)
+
+    def 所有范围(self) -> List[str]:
+        """
+        获取数据库中有参数的所有范围，包括还没有读取的品种
+
+        返回:
+            范围名列表
+        """
+        return list(self._范围)
+
+    def 获取版本(self, 范围: str, 模块: str, 参数名: str) -> Optional[Dict]:
+        """
+        获取参数当前的版本和修改时间
+
+        参数:
+            范围: 全局范围或股票代码
+            模块: 参数所属模块
+            参数名: 参数名称
+
+        返回:
+            {"值", "版本", "修改时间"}，参数不存在时返回None
+        """
+        with self._锁:
+            行 = self._连接.execute(
+                "SELECT value, version, updated_at FROM params WHERE scope = ? AND module = ? AND name = ?",
+                (范围, 模块, 参数名)
+            ).fetchone()
+        if 行 is None:
+            return None
+        return {"值": json.loads(行[0]), "版本": 行[1], "修改时间": 行[2]}
+
+    def 获取历史(self, 范围: str, 模块: str, 参数名: str, 数量: int = 50) -> List[Dict]:
+        """
+        获取参数的修改历史，最新的在前
+
+        参数:
+            范围: 全局范围或股票代码
+            模块: 参数所属模块
+            参数名: 参数名称
+            数量: 最多返回的条数
+
+        返回:
+            [{"值", "版本", "修改时间", "已删除"}, ...]
+        """
+        with self._锁:
+            行列表 = self._连接.execute(
+                "SELECT value, version, changed_at FROM param_history "
+                "WHERE scope = ? AND module = ? AND name = ? ORDER BY id DESC LIMIT ?",
+                (范围, 模块, 参数名, 数量)
+            ).fetchall()
+        return [
+            {
+                "值": json.loads(值文本) if 值文本 is not None else None,
+                "版本": 版本,
+                "修改时间": 时间,
+                "已删除": 值文本 is None
+            }
+            for 值文本, 版本, 时间 in 行列表
+        ]
+
+    def 关闭(self):
+        """关闭数据库连接"""
+        with self._锁:
+            self._连接.close()
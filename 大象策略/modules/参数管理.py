@@ -3,23 +3,172 @@
 """
 参数管理模块 - 支持每个品种单独设置参数
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Iterable
 import os
 import json
+import threading
 from datetime import datetime
 import copy
+import math
+from contextlib import contextmanager
+
+try:
+    from .文件工具 import 原子写入文本, 原子写入json, 序列化json
+except ImportError:
+    from 文件工具 import 原子写入文本, 原子写入json, 序列化json
+
+# 每个品种的参数表至少包含的模块
+基本模块 = ("大象识别", "交易执行", "风险控制", "资金管理")
+
+
+class 参数快照:
+    """
+    一次解析得到的参数表
+
+    热加载时整体替换，读取方拿到的始终是同一版本的全局参数、品种参数和股票列表。
+    快照中的参数表是参数管理器当前参数的副本，之后的修改只进入下一个快照，
+    持有旧快照的读取方在一笔行情中途不会看到新值。
+    新快照由上一个快照派生，只拷贝修改过的品种或全局参数层，未修改品种的参数表和解析结果与上一个快照共享。
+    SQLite存储中还没有读取的品种记在未加载品种中，读取时由参数管理器加载后派生新快照。
+    快照中的字典被所有读取方共享，只能读取，不能修改。
+    """
+
+    def __init__(self, 版本: int, 全局参数: Dict, 品种参数: Dict, 股票列表: List[str],
+                 未加载品种: Iterable[str] = ()):
+        """
+        初始化参数快照，预先解析每个品种合并后的参数表
+
+        参数:
+            版本: 快照版本号
+            全局参数: 全局参数
+            品种参数: 品种特定参数
+            股票列表: 交易股票列表
+            未加载品种: 有特定参数但还没有读取的品种
+        """
+        self.版本 = 版本
+        self.全局参数 = copy.deepcopy(全局参数)
+        self.品种参数 = copy.deepcopy(品种参数)
+        self.股票列表 = tuple(股票列表)
+        self.未加载品种 = frozenset(未加载品种)
+        self.生成时间 = datetime.now()
+        self.默认解析 = self._解析默认(self.全局参数, self.品种参数, self.未加载品种)
+        self.已解析 = {代码: self._解析品种(self.默认解析, 模块参数表) for 代码, 模块参数表 in self.品种参数.items()}
+
+    def 派生(self, 版本: int, 股票列表: List[str], 全局参数: Dict = None,
+           品种参数: Dict = None, 修改品种: Iterable[str] = (),
+           未加载品种: Iterable[str] = None) -> "参数快照":
+        """
+        在本快照的基础上生成新快照，只拷贝和重新解析修改过的部分
+
+        参数:
+            版本: 新快照版本号
+            股票列表: 交易股票列表
+            全局参数: 修改后的全局参数，为None表示全局参数没有修改
+            品种参数: 参数管理器当前的品种参数，从中拷贝修改过的品种
+            修改品种: 修改过参数的品种代码，品种参数中已不存在的视为删除
+            未加载品种: 有特定参数但还没有读取的品种，为None时与本快照相同
+
+        返回:
+            新的参数快照
+        """
+        新快照 = 参数快照.__new__(参数快照)
+        新快照.版本 = 版本
+        新快照.股票列表 = tuple(股票列表)
+        新快照.生成时间 = datetime.now()
+        新快照.全局参数 = self.全局参数 if 全局参数 is None else copy.deepcopy(全局参数)
+        新快照.未加载品种 = self.未加载品种 if 未加载品种 is None else frozenset(未加载品种)
+
+        新快照.品种参数 = dict(self.品种参数)
+        修改品种 = set(修改品种)
+        for 代码 in 修改品种:
+            if 品种参数 is not None and 代码 in 品种参数:
+                新快照.品种参数[代码] = copy.deepcopy(品种参数[代码])
+            else:
+                新快照.品种参数.pop(代码, None)
+
+        # 品种从未加载变为已加载时标记不变
+        标记变化 = (
+            (新快照.品种参数.keys() != self.品种参数.keys() or 新快照.未加载品种 != self.未加载品种) and
+            新快照.品种参数.keys() | 新快照.未加载品种 != self.默认解析["_品种特定参数标记"].keys()
+        )
+        if 全局参数 is None and not 标记变化:
+            新快照.默认解析 = self.默认解析
+        else:
+            新快照.默认解析 = self._解析默认(新快照.全局参数, 新快照.品种参数, 新快照.未加载品种)
+        # 全局参数层中变化的模块，未覆盖这些模块的品种直接引用新的默认解析
+        变化模块 = set() if 全局参数 is None else {
+            模块 for 模块 in set(self.默认解析) | set(新快照.默认解析)
+            if 模块 != "_品种特定参数标记" and self.默认解析.get(模块) != 新快照.默认解析.get(模块)
+        }
+
+        if 新快照.默认解析 is self.默认解析:
+            # 只修改了已有品种的参数，其余品种的解析结果原样共享
+            新快照.已解析 = dict(self.已解析)
+            for 代码 in 修改品种 & 新快照.品种参数.keys():
+                新快照.已解析[代码] = self._解析品种(新快照.默认解析, 新快照.品种参数[代码])
+            return 新快照
+
+        新快照.已解析 = {}
+        for 代码, 模块参数表 in 新快照.品种参数.items():
+            旧结果 = self.已解析.get(代码)
+            if 代码 in 修改品种 or 旧结果 is None:
+                新快照.已解析[代码] = self._解析品种(新快照.默认解析, 模块参数表)
+            else:
+                # 未修改的品种只替换标记和变化的模块，其余模块参数表继续共享
+                结果 = dict(旧结果)
+                结果["_品种特定参数标记"] = 新快照.默认解析["_品种特定参数标记"]
+                for 模块 in 变化模块:
+                    self._合并模块(结果, 新快照.默认解析, 模块参数表, 模块)
+                新快照.已解析[代码] = 结果
+        return 新快照
+
+    @staticmethod
+    def _解析默认(全局参数: Dict, 品种参数: Dict, 未加载品种: Iterable[str] = ()) -> Dict:
+        """没有品种特定参数的品种共用的解析结果"""
+        默认解析 = dict(全局参数)
+        for 模块 in 基本模块:
+            默认解析.setdefault(模块, {})
+        标记 = {代码: True for 代码 in 品种参数}
+        标记.update(dict.fromkeys(未加载品种, True))
+        默认解析["_品种特定参数标记"] = 标记
+        return 默认解析
+
+    @classmethod
+    def _解析品种(cls, 默认解析: Dict, 模块参数表: Dict) -> Dict:
+        """品种特定参数覆盖默认解析，未被覆盖的模块参数表在各品种之间共享，只拷贝被覆盖的模块"""
+        结果 = dict(默认解析)
+        for 模块 in 模块参数表:
+            cls._合并模块(结果, 默认解析, 模块参数表, 模块)
+        return 结果
+
+    @staticmethod
+    def _合并模块(结果: Dict, 默认解析: Dict, 模块参数表: Dict, 模块: str):
+        """重新合并一个模块的默认参数和品种特定参数"""
+        if 模块 in 模块参数表:
+            合并 = dict(默认解析.get(模块, {}))
+            合并.update(模块参数表[模块])
+            结果[模块] = 合并
+        elif 模块 in 默认解析:
+            结果[模块] = 默认解析[模块]
+        else:
+            结果.pop(模块, None)
 
 
 class 参数管理器:
     """参数管理器类，支持全局参数和品种特定参数"""
     
-    def __init__(self, 配置目录: str = "config"):
+    def __init__(self, 配置目录: str = "config", 写入延迟: float = 0.5, 存储: str = "json"):
         """
         初始化参数管理器
         
         参数:
             配置目录: 配置文件目录
+            写入延迟: 参数修改后延迟写入磁盘的时间(秒)，期间的修改合并为一次写入，0表示立即写入
+            存储: 参数存储方式，"json"为三个JSON文件，"sqlite"为配置目录下的params.db
         """
+        if 存储 not in ("json", "sqlite"):
+            raise ValueError(f"不支持的参数存储方式: {存储}")
+        
         # 获取当前文件所在目录
         当前目录 = os.path.dirname(os.path.abspath(__file__))
         
@@ -42,97 +191,471 @@ class 参数管理器:
         self.全局参数文件 = os.path.join(self.配置目录, "global_params.json")
         self.品种参数文件 = os.path.join(self.配置目录, "symbol_params.json")
         self.股票列表文件 = os.path.join(self.配置目录, "stocks.json")
+        self.数据库文件 = os.path.join(self.配置目录, "params.db")
+        self.存储 = 存储
         
         print(f"配置文件路径:")
         print(f" - 全局参数文件: {self.全局参数文件}")
         print(f" - 品种参数文件: {self.品种参数文件}")
         print(f" - 股票列表文件: {self.股票列表文件}")
         
+        # 参数快照，热加载时整体替换
+        self._锁 = threading.RLock()
+        self._快照 = None
+        self._股票列表 = []
+        self._变更监听 = []
+        self._监视器 = None
+        
+        # 延迟写入状态
+        self.写入延迟 = 写入延迟
+        self._待写入 = set()
+        self._已写入 = {}  # {文件路径: 上次写入或加载的文本}
+        self._写入定时器 = None
+        self._批量深度 = 0
+        self._批量暂存 = None
+        self._待写入品种 = set()
+        self._全部品种待写入 = False
+        
+        # 自上次重建快照以来修改过的参数，新快照只拷贝这些部分
+        self._全局参数已修改 = False
+        self._修改品种 = set()
+        self._全部品种已修改 = False
+        # SQLite存储中有特定参数但还没有读取的品种
+        self._未加载品种 = frozenset()
+        
         # 加载配置
-        self._加载配置()
+        self._数据库 = None
+        if 存储 == "sqlite":
+            self._重建快照(self._加载数据库())
+        else:
+            self._加载配置()
+            self._重建快照(self._读取股票列表文件())
+    
+    def _重建快照(self, 股票列表: List[str] = None):
+        """
+        根据当前参数重建快照并原子替换
+        
+        参数:
+            股票列表: 新的股票列表，为None时沿用当前快照的股票列表
+        """
+        with self._锁:
+            if 股票列表 is not None:
+                self._股票列表 = list(股票列表)
+            旧快照 = self._快照
+            if 旧快照 is None or self._全部品种已修改:
+                新快照 = 参数快照(旧快照.版本 + 1 if 旧快照 else 1, self.全局参数, self.品种参数,
+                              self._股票列表, self._未加载品种)
+            else:
+                新快照 = 旧快照.派生(
+                    旧快照.版本 + 1, self._股票列表,
+                    全局参数=self.全局参数 if self._全局参数已修改 else None,
+                    品种参数=self.品种参数,
+                    修改品种=self._修改品种,
+                    未加载品种=self._未加载品种
+                )
+            self._全局参数已修改 = False
+            self._修改品种 = set()
+            self._全部品种已修改 = False
+            # 读取方只通过这一个引用拿到快照，替换引用即发布新版本
+            self._快照 = 新快照
+    
+    def _加载品种(self, 品种代码: str) -> 参数快照:
+        """
+        SQLite存储第一次用到一个品种时读取它的特定参数，派生包含该品种的快照
+
+        参数:
+            品种代码: 股票代码
+
+        返回:
+            当前参数快照
+        """
+        with self._锁:
+            if 品种代码 in self._未加载品种:
+                self.品种参数[品种代码] = self._数据库.获取(品种代码)
+                self._未加载品种 = self._未加载品种 - {品种代码}
+                if self._批量暂存 is not None:
+                    # 加载的是已持久化的参数，批量修改出错时也保留
+                    self._批量暂存["品种参数"][品种代码] = self.品种参数[品种代码]
+                    self._批量暂存["未加载品种"] = self._批量暂存["未加载品种"] - {品种代码}
+                # 读取不是修改，版本号不变
+                快照 = self._快照
+                self._快照 = 快照.派生(快照.版本, 快照.股票列表, 品种参数=self.品种参数,
+                                     修改品种=(品种代码,), 未加载品种=self._未加载品种)
+            return self._快照
+    
+    def _加载全部品种(self):
+        """读取SQLite存储中所有还没有读取的品种，导出或整体写入前调用"""
+        with self._锁:
+            if not self._未加载品种:
+                return
+            已加载 = self._未加载品种
+            for 代码 in 已加载:
+                self.品种参数[代码] = self._数据库.获取(代码)
+                if self._批量暂存 is not None:
+                    self._批量暂存["品种参数"][代码] = self.品种参数[代码]
+            self._未加载品种 = frozenset()
+            if self._批量暂存 is not None:
+                self._批量暂存["未加载品种"] = self._未加载品种
+            快照 = self._快照
+            self._快照 = 快照.派生(快照.版本, 快照.股票列表, 品种参数=self.品种参数,
+                                 修改品种=已加载, 未加载品种=self._未加载品种)
+    
+    @property
+    def 版本(self) -> int:
+        """当前参数快照版本"""
+        return self._快照.版本
     
     def _加载配置(self):
         """加载全局和品种特定配置"""
-        # 加载全局参数
-        if os.path.exists(self.全局参数文件):
-            try:
-                with open(self.全局参数文件, "r", encoding="utf-8") as f:
-                    self.全局参数 = json.load(f)
-                print(f"成功加载全局参数: {self.全局参数}")
-            except Exception as e:
-                print(f"加载全局参数出错: {e}")
-                # 如果加载失败，使用空字典
-                self.全局参数 = {}
-        else:
-            # 文件不存在，初始化为空字典
-            self.全局参数 = {}
-            print(f"全局参数文件不存在，初始化为空")
-            # 创建配置文件
-            try:
-                with open(self.全局参数文件, "w", encoding="utf-8") as f:
-                    json.dump({}, f, indent=4, ensure_ascii=False)
-                print(f"已创建空的全局参数文件")
-            except Exception as e:
-                print(f"创建全局参数文件失败: {e}")
+        self.全局参数 = self._加载参数文件(self.全局参数文件, "全局参数")
+        self.品种参数 = self._加载参数文件(self.品种参数文件, "品种参数")
+    
+    def _加载参数文件(self, 文件路径: str, 名称: str) -> Dict:
+        """
+        加载一个参数文件，文件不存在时创建空文件
         
-        # 加载品种特定参数
-        if os.path.exists(self.品种参数文件):
+        参数:
+            文件路径: 参数文件路径
+            名称: 输出信息中的参数名称
+            
+        返回:
+            参数字典，加载失败时返回空字典
+        """
+        if os.path.exists(文件路径):
             try:
-                with open(self.品种参数文件, "r", encoding="utf-8") as f:
-                    self.品种参数 = json.load(f)
-                print(f"成功加载品种参数: {self.品种参数}")
+                with open(文件路径, "r", encoding="utf-8") as f:
+                    文本 = f.read()
+                参数 = json.loads(文本)
+                self._已写入[文件路径] = 文本
+                print(f"成功加载{名称}: {文件路径}")
+                return 参数
             except Exception as e:
-                print(f"加载品种参数出错: {e}")
+                print(f"加载{名称}出错: {e}")
                 # 如果加载失败，使用空字典
-                self.品种参数 = {}
-        else:
-            # 文件不存在，初始化为空字典
-            self.品种参数 = {}
-            print(f"品种参数文件不存在，初始化为空")
-            # 创建配置文件
+                return {}
+        
+        # 文件不存在，初始化为空字典并创建配置文件
+        print(f"{名称}文件不存在，初始化为空")
+        try:
+            原子写入json(文件路径, {})
+            self._已写入[文件路径] = 序列化json({})
+            print(f"已创建空的{名称}文件")
+        except Exception as e:
+            print(f"创建{名称}文件失败: {e}")
+        return {}
+    
+    # ===== 延迟写入 =====
+    
+    @contextmanager
+    def 批量修改(self):
+        """
+        批量修改参数，期间的修改只在结束时重建一次快照并合并写入
+        
+        用法:
+            with 参数管理.批量修改():
+                参数管理.设置品种参数("600000", "大象识别", "大象委托量阈值", 300)
+                参数管理.设置品种参数("600000", "交易执行", "等待时间", 5)
+        
+        批量修改可以嵌套，只有最外层结束时才生效。期间的修改写入暂存的参数副本，
+        全部成功才替换当前参数；任何一项出错（包括嵌套的批量修改中出错）则丢弃整批修改，
+        不重建快照，也不写入磁盘。
+        """
+        with self._锁:
+            if self._批量深度 == 0:
+                self._开始暂存()
+            self._批量深度 += 1
             try:
-                with open(self.品种参数文件, "w", encoding="utf-8") as f:
-                    json.dump({}, f, indent=4, ensure_ascii=False)
-                print(f"已创建空的品种参数文件")
-            except Exception as e:
-                print(f"创建品种参数文件失败: {e}")
+                yield self
+            except BaseException:
+                self._批量暂存["出错"] = True
+                raise
+            finally:
+                self._批量深度 -= 1
+                if self._批量深度 == 0:
+                    if self._批量暂存["出错"]:
+                        self._放弃暂存()
+                    else:
+                        self._批量暂存 = None
+                        self._重建快照()
+                        self._安排写入()
     
-    def _保存配置(self):
-        """保存参数配置到文件"""
-        # 保存全局参数
+    def _开始暂存(self):
+        """
+        开始批量修改，当前参数换成暂存副本
+
+        全局参数整体拷贝，品种参数只拷贝外层字典，各品种的参数表在第一次修改时才拷贝，
+        原参数表和修改记录保留到批量修改结束，出错时恢复。
+        """
+        self._批量暂存 = {
+            "出错": False,
+            "已拷贝品种": set(),
+            "全局参数": self.全局参数,
+            "品种参数": self.品种参数,
+            "股票列表": self._股票列表,
+            "未加载品种": self._未加载品种,
+            "修改记录": (set(self._待写入), set(self._待写入品种), self._全部品种待写入,
+                       self._全局参数已修改, set(self._修改品种), self._全部品种已修改)
+        }
+        self.全局参数 = copy.deepcopy(self.全局参数)
+        self.品种参数 = dict(self.品种参数)
+    
+    def _放弃暂存(self):
+        """丢弃批量修改中的所有修改，恢复批量修改开始时的参数和修改记录"""
+        暂存, self._批量暂存 = self._批量暂存, None
+        self.全局参数 = 暂存["全局参数"]
+        self.品种参数 = 暂存["品种参数"]
+        self._股票列表 = 暂存["股票列表"]
+        self._未加载品种 = 暂存["未加载品种"]
+        (self._待写入, self._待写入品种, self._全部品种待写入,
+         self._全局参数已修改, self._修改品种, self._全部品种已修改) = 暂存["修改记录"]
+        print("批量修改出错，已丢弃本批修改")
+    
+    def _可写品种参数(self, 品种代码: str) -> Dict:
+        """
+        获取可以直接修改的品种参数表，批量修改中第一次修改时拷贝，不影响原参数表
+
+        参数:
+            品种代码: 股票代码
+
+        返回:
+            {模块: {参数名: 参数值}}
+        """
+        暂存 = self._批量暂存
+        if 暂存 is not None and 品种代码 not in 暂存["已拷贝品种"]:
+            暂存["已拷贝品种"].add(品种代码)
+            if 品种代码 in self.品种参数:
+                self.品种参数[品种代码] = copy.deepcopy(self.品种参数[品种代码])
+        return self.品种参数.setdefault(品种代码, {})
+    
+    def _修改完成(self, *文件路径: str, 品种代码: str = None):
+        """
+        记录修改过的参数文件，不在批量修改中时立即重建快照并安排写入
+        
+        参数:
+            文件路径: 需要写回磁盘的文件
+            品种代码: 只修改了这个品种的参数，SQLite存储只写入该品种；为None时写入所有品种
+        """
+        self._待写入.update(文件路径)
+        if self.全局参数文件 in 文件路径:
+            self._全局参数已修改 = True
+        if self.品种参数文件 in 文件路径:
+            if 品种代码 is None:
+                self._全部品种待写入 = True
+                self._全部品种已修改 = True
+            else:
+                self._待写入品种.add(品种代码)
+                self._修改品种.add(品种代码)
+        if self._批量深度 == 0:
+            self._重建快照()
+            self._安排写入()
+    
+    def _安排写入(self):
+        """在写入延迟后合并写入所有待写入文件，延迟内的多次修改只写一次"""
+        if not self._待写入:
+            return
+        if self.写入延迟 <= 0:
+            self.刷新写入()
+            return
+        if self._写入定时器 is None:
+            self._写入定时器 = threading.Timer(self.写入延迟, self.刷新写入)
+            self._写入定时器.daemon = True
+            self._写入定时器.start()
+    
+    def 刷新写入(self) -> List[str]:
+        """
+        立即写入所有待写入文件，内容与上次写入相同的文件跳过
+        
+        返回:
+            实际写入的文件路径列表
+        """
+        with self._锁:
+            if self._写入定时器 is not None:
+                self._写入定时器.cancel()
+                self._写入定时器 = None
+            待写入, self._待写入 = self._待写入, set()
+            if self.存储 == "sqlite":
+                return self._写入数据库(待写入) if self._数据库 is not None else []
+            
+            内容表 = {
+                self.全局参数文件: self.全局参数,
+                self.品种参数文件: self.品种参数,
+                self.股票列表文件: {"stocks": self._股票列表}
+            }
+            已写入 = []
+            for 文件路径 in sorted(待写入):
+                文本 = 序列化json(内容表[文件路径])
+                if 文本 == self._已写入.get(文件路径):
+                    continue
+                try:
+                    原子写入文本(文件路径, 文本)
+                    self._已写入[文件路径] = 文本
+                    已写入.append(文件路径)
+                except Exception as e:
+                    print(f"保存参数文件出错 {文件路径}: {e}")
+                    self._待写入.add(文件路径)
+            return 已写入
+    
+    # ===== SQLite存储 =====
+    
+    def _加载数据库(self) -> List[str]:
+        """
+        打开SQLite参数存储并加载参数，数据库为空时从现有JSON文件迁移
+        
+        返回:
+            股票列表
+        """
         try:
-            with open(self.全局参数文件, "w", encoding="utf-8") as f:
-                json.dump(self.全局参数, f, indent=4, ensure_ascii=False)
-            print(f"已保存全局参数到 {self.全局参数文件}")
-        except Exception as e:
-            print(f"保存全局参数出错: {e}")
+            from .参数存储 import SQLite参数存储, 全局范围
+        except ImportError:
+            from 参数存储 import SQLite参数存储, 全局范围
+        
+        self._数据库 = SQLite参数存储(self.数据库文件)
+        if self._数据库.是否为空() and any(
+                os.path.exists(路径) for 路径 in (self.全局参数文件, self.品种参数文件, self.股票列表文件)):
+            全局参数, 品种参数, 股票列表 = self._读取json目录(self.配置目录)
+            范围表 = dict(品种参数)
+            范围表[全局范围] = 全局参数
+            self._数据库.保存(范围表, 股票列表)
+            print(f"已从JSON文件导入参数到 {self.数据库文件}")
+        
+        self.全局参数, 品种列表, 股票列表 = self._数据库.加载()
+        self.品种参数 = {}
+        self._未加载品种 = frozenset(品种列表)
+        print(f"成功加载SQLite参数: 全局参数{len(self.全局参数)}个模块，{len(品种列表)}个品种有特定参数，第一次读取时加载")
+        return 股票列表
+    
+    def _写入数据库(self, 待写入: set) -> List[str]:
+        """
+        把待写入的参数写入SQLite，只写入修改过的品种，由存储比较缓存后只写变化的行
+        
+        参数:
+            待写入: 待写入的文件路径集合
+            
+        返回:
+            有写入时返回[数据库文件]，否则返回空列表
+        """
+        try:
+            from .参数存储 import 全局范围
+        except ImportError:
+            from 参数存储 import 全局范围
+        
+        待写入品种, self._待写入品种 = self._待写入品种, set()
+        全部品种, self._全部品种待写入 = self._全部品种待写入, False
+        
+        范围表 = {}
+        if self.全局参数文件 in 待写入:
+            范围表[全局范围] = self.全局参数
+        if self.品种参数文件 in 待写入:
+            if 全部品种:
+                self._加载全部品种()
+                待写入品种 = (set(self.品种参数) | set(self._数据库.所有范围())) - {全局范围}
+            for 代码 in 待写入品种:
+                范围表[代码] = self.品种参数.get(代码, {})
+        股票列表 = self._股票列表 if self.股票列表文件 in 待写入 else None
         
-        # 保存品种特定参数
         try:
-            with open(self.品种参数文件, "w", encoding="utf-8") as f:
-                json.dump(self.品种参数, f, indent=4, ensure_ascii=False)
-            print(f"已保存品种参数到 {self.品种参数文件}")
+            行数 = self._数据库.保存(范围表, 股票列表)
         except Exception as e:
-            print(f"保存品种参数出错: {e}")
+            print(f"保存参数到数据库出错: {e}")
+            self._待写入.update(待写入)
+            self._待写入品种.update(待写入品种)
+            self._全部品种待写入 = self._全部品种待写入 or 全部品种
+            return []
+        return [self.数据库文件] if 行数 or 股票列表 is not None else []
+    
+    def 获取参数历史(self, 品种代码: str, 模块: str, 参数名: str, 数量: int = 50) -> List[Dict]:
+        """
+        获取参数的修改历史，仅SQLite存储支持
+        
+        参数:
+            品种代码: 股票代码，全局参数使用"global"
+            模块: 参数所属模块
+            参数名: 参数名称
+            数量: 最多返回的条数
+            
+        返回:
+            [{"值", "版本", "修改时间", "已删除"}, ...]，最新的在前；JSON存储返回空列表
+        """
+        if self._数据库 is None:
+            return []
+        with self._锁:
+            self.刷新写入()
+        return self._数据库.获取历史(品种代码, 模块, 参数名, 数量)
+    
+    def _读取json目录(self, 目录: str) -> tuple:
+        """
+        读取目录下的三个JSON配置文件，不存在的文件视为空
+        
+        参数:
+            目录: 配置文件目录
+            
+        返回:
+            (全局参数, 品种参数, 股票列表)
+        """
+        结果 = []
+        for 文件名, 默认值 in (("global_params.json", {}), ("symbol_params.json", {}), ("stocks.json", {"stocks": []})):
+            路径 = os.path.join(目录, 文件名)
+            if os.path.exists(路径):
+                with open(路径, "r", encoding="utf-8") as f:
+                    结果.append(json.load(f))
+            else:
+                结果.append(默认值)
+        return 结果[0], 结果[1], 结果[2].get("stocks", [])
+    
+    def 导出json(self, 目录: str = None) -> List[str]:
+        """
+        按JSON配置文件的格式导出全部参数，可用于从SQLite存储切回JSON存储
+        
+        参数:
+            目录: 导出目录，默认为配置目录
+            
+        返回:
+            写入的文件路径列表
+        """
+        目录 = 目录 or self.配置目录
+        with self._锁:
+            self._加载全部品种()
+            内容表 = {
+                "global_params.json": self.全局参数,
+                "symbol_params.json": self.品种参数,
+                "stocks.json": {"stocks": self._股票列表}
+            }
+            文件列表 = []
+            for 文件名, 内容 in 内容表.items():
+                路径 = os.path.join(目录, 文件名)
+                原子写入json(路径, 内容)
+                文件列表.append(路径)
+        return 文件列表
+    
+    def 导入json(self, 目录: str = None):
+        """
+        从JSON配置文件导入全部参数和股票列表，替换当前参数
+        
+        参数:
+            目录: 配置文件目录，默认为配置目录
+        """
+        全局参数, 品种参数, 股票列表 = self._读取json目录(目录 or self.配置目录)
+        with self.批量修改():
+            self.导入参数({"全局参数": 全局参数, "品种参数": 品种参数})
+            self.设置股票列表(股票列表)
     
     def 设置全局参数(self, 模块: str, 参数名: str, 参数值: Any):
         """
-        设置全局参数
+        设置全局参数，写入磁盘会延迟合并，需要立即落盘时调用 刷新写入()
         
         参数:
             模块: 参数所属模块，如'大象识别'、'交易执行'等
             参数名: 参数名称
             参数值: 参数值
         """
-        if 模块 not in self.全局参数:
-            self.全局参数[模块] = {}
-        
-        self.全局参数[模块][参数名] = 参数值
-        self._保存配置()
+        with self._锁:
+            参数值 = self._校验参数表({模块: {参数名: 参数值}}, self.全局参数, "全局参数")[模块][参数名]
+            self.全局参数.setdefault(模块, {})[参数名] = 参数值
+            self._修改完成(self.全局参数文件)
     
     def 设置品种参数(self, 品种代码: str, 模块: str, 参数名: str, 参数值: Any):
         """
-        设置品种特定参数
+        设置品种特定参数，写入磁盘会延迟合并，需要立即落盘时调用 刷新写入()
         
         参数:
             品种代码: 股票代码
@@ -140,20 +663,11 @@ class 参数管理器:
             参数名: 参数名称
             参数值: 参数值
         """
-        print(f"设置品种参数: {品种代码}, 模块: {模块}, 参数名: {参数名}, 参数值: {参数值}")
-        
-        if 品种代码 not in self.品种参数:
-            print(f"品种代码 {品种代码} 不存在于品种参数中，创建新条目")
-            self.品种参数[品种代码] = {}
-        
-        if 模块 not in self.品种参数[品种代码]:
-            print(f"模块 {模块} 不存在于品种 {品种代码} 参数中，创建新条目")
-            self.品种参数[品种代码][模块] = {}
-        
-        self.品种参数[品种代码][模块][参数名] = 参数值
-        print(f"更新后的品种参数: {self.品种参数}")
-        self._保存配置()
-        print("配置已保存")
+        with self._锁:
+            self._加载品种(品种代码)
+            参数值 = self._校验参数表({模块: {参数名: 参数值}}, self.全局参数, f"品种参数[{品种代码}]")[模块][参数名]
+            self._可写品种参数(品种代码).setdefault(模块, {})[参数名] = 参数值
+            self._修改完成(self.品种参数文件, 品种代码=品种代码)
     
     def 获取参数(self, 品种代码: str, 模块: str, 参数名: str, 默认值: Any = None) -> Any:
         """
@@ -168,18 +682,11 @@ class 参数管理器:
         返回:
             参数值
         """
-        # 检查是否有品种特定参数
-        if (品种代码 in self.品种参数 and
-            模块 in self.品种参数[品种代码] and
-            参数名 in self.品种参数[品种代码][模块]):
-            return self.品种参数[品种代码][模块][参数名]
-        
-        # 检查是否有全局参数
-        if 模块 in self.全局参数 and 参数名 in self.全局参数[模块]:
-            return self.全局参数[模块][参数名]
-        
-        # 返回默认值
-        return 默认值
+        # 已解析参数表中品种参数已覆盖全局参数
+        快照 = self._快照
+        if 品种代码 in 快照.未加载品种:
+            快照 = self._加载品种(品种代码)
+        return 快照.已解析.get(品种代码, 快照.默认解析).get(模块, {}).get(参数名, 默认值)
     
     def 获取品种所有参数(self, 品种代码: str) -> Dict:
         """
@@ -189,40 +696,13 @@ class 参数管理器:
             品种代码: 股票代码
             
         返回:
-            参数字典，包含一个特殊的_品种特定参数标记字段，指示哪些品种有特定参数
-        """
-        print(f"调用获取品种所有参数: {品种代码}")
-        print(f"全局参数: {self.全局参数}")
-        print(f"品种参数: {self.品种参数}")
-        
-        # 深拷贝全局参数作为基础
-        结果 = copy.deepcopy(self.全局参数)
-        
-        # 确保结果中至少包含基本模块结构
-        if "大象识别" not in 结果:
-            结果["大象识别"] = {}
-        if "交易执行" not in 结果:
-            结果["交易执行"] = {}
-        if "风险控制" not in 结果:
-            结果["风险控制"] = {}
-        if "资金管理" not in 结果:
-            结果["资金管理"] = {}
-        
-        # 添加一个特殊字段，标记哪些品种有特定参数
-        结果["_品种特定参数标记"] = {}
-        for 代码 in self.品种参数.keys():
-            结果["_品种特定参数标记"][代码] = True
-        
-        # 如果有品种特定参数，合并到结果中
-        if 品种代码 in self.品种参数:
-            print(f"存在品种特定参数: {self.品种参数[品种代码]}")
-            for 模块, 模块参数 in self.品种参数[品种代码].items():
-                if 模块 not in 结果:
-                    结果[模块] = {}
-                结果[模块].update(模块参数)
-        
-        print(f"返回参数: {结果}")
-        return 结果
+            参数字典，包含一个特殊的_品种特定参数标记字段，指示哪些品种有特定参数。
+            返回的是当前快照中预先解析好的共享字典，调用方不要修改，需要修改时先深拷贝
+        """
+        快照 = self._快照
+        if 品种代码 in 快照.未加载品种:
+            快照 = self._加载品种(品种代码)
+        return 快照.已解析.get(品种代码, 快照.默认解析)
     
     def 删除品种参数(self, 品种代码: str, 模块: str = None, 参数名: str = None):
         """
@@ -233,21 +713,24 @@ class 参数管理器:
             模块: 参数所属模块，如果为None则删除该品种所有参数
             参数名: 参数名称，如果为None则删除该模块所有参数
         """
-        if 品种代码 not in self.品种参数:
-            return
-        
-        if 模块 is None:
-            # 删除该品种所有参数
-            del self.品种参数[品种代码]
-        elif 模块 in self.品种参数[品种代码]:
-            if 参数名 is None:
-                # 删除该模块所有参数
-                del self.品种参数[品种代码][模块]
-            elif 参数名 in self.品种参数[品种代码][模块]:
-                # 删除特定参数
-                del self.品种参数[品种代码][模块][参数名]
-        
-        self._保存配置()
+        with self._锁:
+            self._加载品种(品种代码)
+            if 品种代码 not in self.品种参数:
+                return
+            
+            if 模块 is None:
+                # 删除该品种所有参数
+                del self.品种参数[品种代码]
+            elif 模块 in self.品种参数[品种代码]:
+                品种参数 = self._可写品种参数(品种代码)
+                if 参数名 is None:
+                    # 删除该模块所有参数
+                    del 品种参数[模块]
+                elif 参数名 in 品种参数[模块]:
+                    # 删除特定参数
+                    del 品种参数[模块][参数名]
+            
+            self._修改完成(self.品种参数文件, 品种代码=品种代码)
     
     def 导入参数(self, 参数数据: Dict):
         """
@@ -256,13 +739,16 @@ class 参数管理器:
         参数:
             参数数据: 包含全局参数和品种参数的字典
         """
-        if "全局参数" in 参数数据:
-            self.全局参数 = 参数数据["全局参数"]
-        
-        if "品种参数" in 参数数据:
-            self.品种参数 = 参数数据["品种参数"]
-        
-        self._保存配置()
+        with self._锁:
+            if "全局参数" in 参数数据:
+                self.全局参数 = 参数数据["全局参数"]
+                self._修改完成(self.全局参数文件)
+            
+            if "品种参数" in 参数数据:
+                self.品种参数 = 参数数据["品种参数"]
+                # 导入的是完整的品种参数表，数据库中其余品种的参数会被删除
+                self._未加载品种 = frozenset()
+                self._修改完成(self.品种参数文件)
     
     def 导出参数(self) -> Dict:
         """
@@ -271,6 +757,7 @@ class 参数管理器:
         返回:
             包含全局参数和品种参数的字典
         """
+        self._加载全部品种()
         return {
             "全局参数": self.全局参数,
             "品种参数": self.品种参数
@@ -285,12 +772,22 @@ class 参数管理器:
         """
         # 如果全局参数为空，设置默认值
         if not self.全局参数 and "全局参数" in 默认参数:
-            self.全局参数 = 默认参数["全局参数"]
-            self._保存配置()
+            with self._锁:
+                self.全局参数 = 默认参数["全局参数"]
+                self._修改完成(self.全局参数文件)
     
     def 获取股票列表(self) -> List[str]:
         """
-        获取交易股票列表
+        获取交易股票列表，读取内存中的快照，不访问磁盘
+        
+        返回:
+            股票代码列表
+        """
+        return list(self._快照.股票列表)
+    
+    def _读取股票列表文件(self) -> List[str]:
+        """
+        从文件读取股票列表，文件不存在时创建空文件
         
         返回:
             股票代码列表
@@ -298,18 +795,19 @@ class 参数管理器:
         if os.path.exists(self.股票列表文件):
             try:
                 with open(self.股票列表文件, "r", encoding="utf-8") as f:
-                    数据 = json.load(f)
-                    股票列表 = 数据.get("stocks", [])
-                    print(f"成功加载股票列表: {股票列表}")
-                    return 股票列表
+                    文本 = f.read()
+                股票列表 = json.loads(文本).get("stocks", [])
+                self._已写入[self.股票列表文件] = 文本
+                print(f"成功加载股票列表: {股票列表}")
+                return 股票列表
             except Exception as e:
                 print(f"加载股票列表出错: {e}")
                 return []
         else:
             # 文件不存在，创建空文件
             try:
-                with open(self.股票列表文件, "w", encoding="utf-8") as f:
-                    json.dump({"stocks": []}, f, indent=4, ensure_ascii=False)
+                原子写入json(self.股票列表文件, {"stocks": []})
+                self._已写入[self.股票列表文件] = 序列化json({"stocks": []})
                 print(f"已创建空的股票列表文件")
             except Exception as e:
                 print(f"创建股票列表文件失败: {e}")
@@ -322,10 +820,202 @@ class 参数管理器:
         参数:
             股票列表: 股票代码列表
         """
-        print(f"设置股票列表: {股票列表}")
+        with self._锁:
+            self._股票列表 = list(股票列表)
+            self._修改完成(self.股票列表文件)
+    
+    # ===== 热加载 =====
+    
+    def 添加变更监听(self, 回调: Callable[[Dict], None]):
+        """
+        添加参数变更监听，热加载成功且内容有变化时调用
+        
+        参数:
+            回调: 接受变更信息字典的函数，在监视线程中调用
+        """
+        self._变更监听.append(回调)
+    
+    def 启动热加载(self, 轮询间隔: float = 1.0, 使用inotify: bool = True):
+        """
+        启动配置文件监视，文件变化后在后台线程重新解析、校验并替换参数快照
+        
+        参数:
+            轮询间隔: 没有inotify时检查文件修改时间的间隔(秒)
+            使用inotify: 是否优先使用inotify
+        """
+        if self._监视器 is not None and self._监视器.运行中:
+            return
+        if self._数据库 is not None:
+            print("SQLite参数存储不监视配置文件，修改参数请使用参数管理器或网页管理")
+            return
+        
         try:
-            with open(self.股票列表文件, "w", encoding="utf-8") as f:
-                json.dump({"stocks": 股票列表}, f, indent=4, ensure_ascii=False)
-            print(f"已保存股票列表到 {self.股票列表文件}")
-        except Exception as e:
-            print(f"保存股票列表出错: {e}")
\ No newline at end of file
+            from .配置监视 import 配置监视器
+        except ImportError:
+            from 配置监视 import 配置监视器
+        
+        self._监视器 = 配置监视器(
+            [self.全局参数文件, self.品种参数文件, self.股票列表文件],
+            self.重新加载,
+            轮询间隔=轮询间隔,
+            使用inotify=使用inotify
+        )
+        self._监视器.启动()
+    
+    def 停止热加载(self):
+        """停止配置文件监视"""
+        if self._监视器 is not None:
+            self._监视器.停止()
+            self._监视器 = None
+    
+    def 关闭(self):
+        """停止配置文件监视，并把尚未写入的修改写回磁盘"""
+        self.停止热加载()
+        self.刷新写入()
+        if self._数据库 is not None:
+            self._数据库.关闭()
+            self._数据库 = None
+    
+    def 重新加载(self, 变化文件: List[str] = None) -> Dict:
+        """
+        重新解析配置文件，全部校验通过后原子替换参数快照；任何一个文件有误则保留旧参数
+        
+        参数:
+            变化文件: 发生变化的文件路径，为None时重新加载全部配置文件
+            
+        返回:
+            变更信息字典
+        """
+        with self._锁:
+            if 变化文件 is None:
+                变化文件 = [self.全局参数文件, self.品种参数文件, self.股票列表文件]
+            变化文件 = {os.path.abspath(路径) for 路径 in 变化文件}
+            # 还没写回磁盘的修改比文件内容新，这些文件等写入后再以内存为准；
+            # 读取待写入文件和替换参数都在锁内，不会与设置参数的线程交错
+            变化文件 -= {os.path.abspath(路径) for 路径 in self._待写入}
+            文本表 = {}
+            
+            旧快照 = self._快照
+            新全局参数 = 旧快照.全局参数
+            新品种参数 = 旧快照.品种参数
+            新股票列表 = list(旧快照.股票列表)
+            
+            try:
+                if os.path.abspath(self.全局参数文件) in 变化文件:
+                    新全局参数 = self._校验参数表(
+                        self._读取json(self.全局参数文件, 文本表), 旧快照.全局参数, "全局参数")
+                if os.path.abspath(self.品种参数文件) in 变化文件:
+                    新品种参数 = self._读取json(self.品种参数文件, 文本表)
+                    if not isinstance(新品种参数, dict):
+                        raise ValueError("品种参数必须是 {股票代码: {模块: {参数名: 参数值}}}")
+                    新品种参数 = {
+                        代码: self._校验参数表(模块参数表, 新全局参数, f"品种参数[{代码}]")
+                        for 代码, 模块参数表 in 新品种参数.items()
+                    }
+                if os.path.abspath(self.股票列表文件) in 变化文件:
+                    数据 = self._读取json(self.股票列表文件, 文本表)
+                    if not isinstance(数据, dict) or not isinstance(数据.get("stocks"), list) \
+                            or not all(isinstance(代码, str) for 代码 in 数据["stocks"]):
+                        raise ValueError("股票列表必须是 {\"stocks\": [股票代码, ...]}")
+                    新股票列表 = 数据["stocks"]
+            except Exception as e:
+                print(f"参数热加载失败，保留版本 {旧快照.版本} 的参数: {e}")
+                return {"成功": False, "错误": str(e), "版本": 旧快照.版本}
+            
+            变更 = {
+                "成功": True,
+                "全局参数变化": 新全局参数 != 旧快照.全局参数,
+                "品种参数变化": 新品种参数 != 旧快照.品种参数,
+                "新增股票": [代码 for 代码 in 新股票列表 if 代码 not in 旧快照.股票列表],
+                "移除股票": [代码 for 代码 in 旧快照.股票列表 if 代码 not in 新股票列表]
+            }
+            有变化 = (变更["全局参数变化"] or 变更["品种参数变化"] or
+                     变更["新增股票"] or 变更["移除股票"] or 新股票列表 != list(旧快照.股票列表))
+            if not 有变化:
+                变更["版本"] = 旧快照.版本
+                return 变更
+            
+            self._已写入.update(文本表)
+            # 只替换重新解析的参数表，快照中的副本不能成为可修改的当前参数
+            if 新全局参数 is not 旧快照.全局参数:
+                self.全局参数 = 新全局参数
+                self._全局参数已修改 = True
+            if 新品种参数 is not 旧快照.品种参数:
+                self.品种参数 = 新品种参数
+                self._修改品种.update(
+                    代码 for 代码 in set(新品种参数) | set(旧快照.品种参数)
+                    if 新品种参数.get(代码) != 旧快照.品种参数.get(代码)
+                )
+            self._重建快照(新股票列表)
+            变更["版本"] = self._快照.版本
+        print(f"参数热加载完成，版本 {变更['版本']}")
+        
+        for 回调 in list(self._变更监听):
+            try:
+                回调(变更)
+            except Exception as e:
+                print(f"参数变更监听出错: {e}")
+        return 变更
+    
+    def _读取json(self, 文件路径: str, 文本表: Dict) -> Any:
+        """读取JSON文件，原始文本记入文本表"""
+        with open(文件路径, "r", encoding="utf-8") as f:
+            文本 = f.read()
+        数据 = json.loads(文本)
+        文本表[文件路径] = 文本
+        return 数据
+    
+    def _校验参数表(self, 参数表: Any, 参考参数: Dict, 名称: str) -> Dict:
+        """
+        校验 {模块: {参数名: 参数值}} 结构，按全局参数中的同名参数检查类型和范围
+        
+        数值参数不能改成非数值，不能为负数、无穷大或NaN；整数参数的整数值浮点数转换为整数，
+        其余小数报错；开关参数只能是true或false。
+        
+        参数:
+            参数表: 待校验的参数表
+            参考参数: 当前生效的全局参数，用于检查参数类型
+            名称: 出错时提示的参数表名称
+            
+        返回:
+            转换后的参数表
+        """
+        if not isinstance(参数表, dict):
+            raise ValueError(f"{名称}必须是 {{模块: {{参数名: 参数值}}}}")
+        结果 = {}
+        for 模块, 模块参数 in 参数表.items():
+            if not isinstance(模块参数, dict):
+                raise ValueError(f"{名称}.{模块} 必须是 {{参数名: 参数值}}")
+            结果[模块] = {
+                参数名: self._校验参数值(参数值, 参考参数.get(模块, {}).get(参数名), f"{名称}.{模块}.{参数名}")
+                for 参数名, 参数值 in 模块参数.items()
+            }
+        return 结果
+    
+    def _校验参数值(self, 参数值: Any, 旧值: Any, 名称: str) -> Any:
+        """
+        按旧值的类型校验一个参数值
+
+        参数:
+            参数值: 待校验的参数值
+            旧值: 全局参数中的同名参数，为None时不检查
+            名称: 出错时提示的参数名称
+
+        返回:
+            转换后的参数值
+        """
+        if isinstance(旧值, bool):
+            if not isinstance(参数值, bool):
+                raise ValueError(f"{名称} 应为true或false，实际为 {参数值!r}")
+            return 参数值
+        if not isinstance(旧值, (int, float)):
+            return 参数值
+        if isinstance(参数值, bool) or not isinstance(参数值, (int, float)):
+            raise ValueError(f"{名称} 应为数值，实际为 {参数值!r}")
+        if not math.isfinite(参数值) or 参数值 < 0:
+            raise ValueError(f"{名称} 应为非负数，实际为 {参数值!r}")
+        if isinstance(旧值, int) and isinstance(参数值, float):
+            if not 参数值.is_integer():
+                raise ValueError(f"{名称} 应为整数，实际为 {参数值!r}")
+            return int(参数值)
+        return 参数值
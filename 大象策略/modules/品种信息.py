@@ -0,0 +1,410 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+品种信息模块 - 启动时建立的品种静态信息表(交易所、vt_symbol、最小变动价位、每手数量、涨跌停价)
+"""
+from typing import Dict, Iterable, List, Tuple
+import os
+import sys
+import json
+
+from .日志 import get_logger
+from .文件工具 import 原子写入json
+
+# vnpy为可选依赖，未安装时交易所以字符串表示
+try:
+    from vnpy.trader.constant import Exchange
+except ImportError:
+    Exchange = None
+
+# 每个品种缓存的浮点价格到价格档的换算数，超过后清空重建；正常交易日的价格落在涨跌停之间，远小于此数
+价格档缓存上限 = 4096
+
+
+class 品种信息:
+    """
+    单个品种的静态信息
+
+    vt_symbol 在创建时驻留(sys.intern)，下单、撤单路径直接使用，不再拼接字符串。
+    策略内部的价格以整数价格档(价格/最小变动价位)表示，只在与vnpy交互时换算为浮点价格。
+    盘口各档价格在相邻行情间大多重复，转盘口按浮点价格缓存换算结果，档位数增加时每档只多一次字典查找。
+    """
+    __slots__ = ("序号", "代码", "交易所", "交易所代码", "vt_symbol", "名称",
+                 "最小变动价位", "每手数量", "涨停价", "跌停价", "价格精度", "价格倍数", "_价格档缓存")
+
+    def __init__(self, 序号: int, 代码: str, 交易所代码: str, 最小变动价位: float = 0.01,
+                 每手数量: int = 100, 名称: str = ""):
+        """
+        初始化品种信息
+
+        参数:
+            序号: 品种在信息表中的序号
+            代码: 股票代码
+            交易所代码: 交易所代码，如SSE、SZSE
+            最小变动价位: 最小价格变动单位
+            每手数量: 最小交易数量
+            名称: 品种名称
+        """
+        self.序号 = 序号
+        self.代码 = sys.intern(代码)
+        self.交易所代码 = sys.intern(交易所代码)
+        self.交易所 = _转换交易所(self.交易所代码)
+        self.vt_symbol = sys.intern(f"{代码}.{交易所代码}")
+        self.名称 = 名称
+        self.最小变动价位 = 最小变动价位
+        self.每手数量 = 每手数量
+        self.涨停价 = 0.0
+        self.跌停价 = 0.0
+        self.价格精度 = _小数位数(最小变动价位)
+        self.价格倍数 = round(1 / 最小变动价位)  # 每元对应的价格档数，如0.01元为100
+        self._价格档缓存 = {}  # {浮点价格: 价格档}
+
+    def 规整价格(self, 价格: float) -> float:
+        """
+        将价格规整到最小变动价位，并限制在涨跌停价之间
+
+        参数:
+            价格: 原始价格
+
+        返回:
+            规整后的价格
+        """
+        价格 = round(round(价格 / self.最小变动价位) * self.最小变动价位, self.价格精度)
+        if self.涨停价 and 价格 > self.涨停价:
+            return self.涨停价
+        if self.跌停价 and 价格 < self.跌停价:
+            return self.跌停价
+        return 价格
+
+    def 转价格档(self, 价格: float) -> int:
+        """
+        将浮点价格换算为整数价格档，四舍五入消除浮点误差
+
+        参数:
+            价格: 浮点价格
+
+        返回:
+            价格档
+        """
+        return int(价格 * self.价格倍数 + 0.5)
+
+    def 转价格(self, 价格档: int) -> float:
+        """
+        将整数价格档换算为浮点价格
+
+        参数:
+            价格档: 价格档
+
+        返回:
+            浮点价格
+        """
+        return round(价格档 / self.价格倍数, self.价格精度)
+
+    def 转盘口(self, 价格列表: List[float], 数量列表: List[float]) -> List[Tuple[int, int]]:
+        """
+        将vnpy行情的各档价格和数量换算为整数盘口
+
+        参数:
+            价格列表: 各档浮点价格
+            数量列表: 各档委托数量
+
+        返回:
+            [(价格档, 数量), ...]
+        """
+        try:
+            return list(zip(map(self._价格档缓存.__getitem__, 价格列表), map(int, 数量列表)))
+        except KeyError:
+            pass
+        缓存 = self._价格档缓存
+        if len(缓存) > 价格档缓存上限:
+            缓存.clear()
+        倍数 = self.价格倍数
+        for 价格 in 价格列表:
+            if 价格 not in 缓存:
+                缓存[价格] = int(价格 * 倍数 + 0.5)
+        return list(zip(map(缓存.__getitem__, 价格列表), map(int, 数量列表)))
+
+    def 规整数量(self, 数量: float) -> int:
+        """
+        将数量向下规整到每手数量的整数倍
+
+        参数:
+            数量: 原始数量
+
+        返回:
+            规整后的数量
+        """
+        return int(数量 // self.每手数量) * self.每手数量
+
+    def 导出(self) -> Dict:
+        """
+        导出为字典
+
+        返回:
+            品种信息字典
+        """
+        return {
+            "交易所": self.交易所代码,
+            "名称": self.名称,
+            "最小变动价位": self.最小变动价位,
+            "每手数量": self.每手数量,
+            "涨停价": self.涨停价,
+            "跌停价": self.跌停价
+        }
+
+
+def _转换交易所(交易所代码: str):
+    """转换为vnpy的Exchange，vnpy未安装或不认识该交易所时保留字符串"""
+    if Exchange is None:
+        return 交易所代码
+    try:
+        return Exchange(交易所代码)
+    except ValueError:
+        return 交易所代码
+
+
+def _小数位数(数值: float) -> int:
+    """计算最小变动价位的小数位数"""
+    文本 = f"{数值:.10f}".rstrip("0")
+    return len(文本.split(".")[1]) if "." in 文本 else 0
+
+
+def 推断交易所(股票代码: str) -> str:
+    """
+    根据股票代码推断交易所
+
+    参数:
+        股票代码: 股票代码
+
+    返回:
+        交易所代码，SSE或SZSE
+    """
+    if 股票代码.startswith("6") or 股票代码.startswith("5"):
+        return "SSE"  # 上海交易所
+    return "SZSE"  # 深圳交易所
+
+
+def 推断交易规则(股票代码: str) -> Dict:
+    """
+    没有合约数据时按代码前缀推断最小变动价位、每手数量和涨跌幅限制
+
+    参数:
+        股票代码: 股票代码
+
+    返回:
+        {"最小变动价位", "每手数量", "涨跌幅"}
+    """
+    if 股票代码.startswith(("5", "15", "16", "18")):
+        # 基金/ETF 价格精确到0.001元
+        return {"最小变动价位": 0.001, "每手数量": 100, "涨跌幅": 0.10}
+    if 股票代码.startswith(("688", "689")):
+        # 科创板 单笔申报不少于200股
+        return {"最小变动价位": 0.01, "每手数量": 200, "涨跌幅": 0.20}
+    if 股票代码.startswith(("300", "301")):
+        # 创业板
+        return {"最小变动价位": 0.01, "每手数量": 100, "涨跌幅": 0.20}
+    return {"最小变动价位": 0.01, "每手数量": 100, "涨跌幅": 0.10}
+
+
+class 品种信息表:
+    """
+    品种信息表
+
+    启动时从vnpy合约数据建立，取不到合约时使用本地文件，仍然没有的品种按代码规则推断。
+    品种按序号存放在列表中，代码到序号的映射只在查表时用一次，之后各模块可以持有品种信息对象。
+    """
+
+    def __init__(self, 默认最小变动价位: float = 0.01):
+        """
+        初始化品种信息表
+
+        参数:
+            默认最小变动价位: 推断规则之外的兜底最小变动价位
+        """
+        self.默认最小变动价位 = 默认最小变动价位
+        self._序号 = {}  # {股票代码: 序号}
+        self._品种 = []  # [品种信息]
+        self.logger = get_logger("品种信息")
+
+    def __len__(self) -> int:
+        return len(self._品种)
+
+    def __contains__(self, 股票代码: str) -> bool:
+        return 股票代码 in self._序号
+
+    def 获取(self, 股票代码: str) -> 品种信息:
+        """
+        获取品种信息，表中没有时按代码规则推断并加入
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            品种信息
+        """
+        序号 = self._序号.get(股票代码)
+        if 序号 is not None:
+            return self._品种[序号]
+        规则 = 推断交易规则(股票代码)
+        return self.登记(股票代码, 推断交易所(股票代码), 规则["最小变动价位"], 规则["每手数量"])
+
+    def 序号(self, 股票代码: str) -> int:
+        """
+        获取品种序号
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            品种序号
+        """
+        return self.获取(股票代码).序号
+
+    def 按序号(self, 序号: int) -> 品种信息:
+        """
+        按序号获取品种信息
+
+        参数:
+            序号: 品种序号
+
+        返回:
+            品种信息
+        """
+        return self._品种[序号]
+
+    def 登记(self, 股票代码: str, 交易所代码: str, 最小变动价位: float = None,
+            每手数量: int = 100, 名称: str = "") -> 品种信息:
+        """
+        登记或更新品种信息
+
+        参数:
+            股票代码: 股票代码
+            交易所代码: 交易所代码
+            最小变动价位: 最小价格变动单位，为None时使用默认值
+            每手数量: 最小交易数量
+            名称: 品种名称
+
+        返回:
+            品种信息
+        """
+        最小变动价位 = 最小变动价位 or self.默认最小变动价位
+        序号 = self._序号.get(股票代码)
+        if 序号 is None:
+            序号 = len(self._品种)
+            信息 = 品种信息(序号, 股票代码, 交易所代码, 最小变动价位, 每手数量, 名称)
+            self._品种.append(信息)
+            self._序号[信息.代码] = 序号
+            return 信息
+
+        # 已有品种原地更新，各模块持有的对象引用保持有效
+        旧信息 = self._品种[序号]
+        新信息 = 品种信息(序号, 股票代码, 交易所代码, 最小变动价位, 每手数量, 名称 or 旧信息.名称)
+        for 属性 in 品种信息.__slots__:
+            if 属性 not in ("涨停价", "跌停价"):
+                setattr(旧信息, 属性, getattr(新信息, 属性))
+        return 旧信息
+
+    def 从合约加载(self, 合约列表: Iterable) -> int:
+        """
+        从vnpy合约数据(ContractData)加载品种信息
+
+        参数:
+            合约列表: 合约数据列表
+
+        返回:
+            加载的品种数
+        """
+        数量 = 0
+        for 合约 in 合约列表:
+            交易所 = getattr(合约.exchange, "value", 合约.exchange)
+            if 交易所 not in ("SSE", "SZSE", "BSE"):
+                continue
+            self.登记(
+                合约.symbol, 交易所,
+                最小变动价位=getattr(合约, "pricetick", 0) or None,
+                每手数量=int(getattr(合约, "min_volume", 0) or 推断交易规则(合约.symbol)["每手数量"]),
+                名称=getattr(合约, "name", "") or ""
+            )
+            数量 += 1
+        self.logger.info(f"从合约数据加载品种信息 {数量} 个")
+        return 数量
+
+    def 从文件加载(self, 文件路径: str) -> int:
+        """
+        从本地文件加载品种信息，文件格式与 保存到文件 相同
+
+        参数:
+            文件路径: 品种信息文件路径
+
+        返回:
+            加载的品种数，文件不存在或读取失败时返回0
+        """
+        if not os.path.exists(文件路径):
+            return 0
+        try:
+            with open(文件路径, "r", encoding="utf-8") as f:
+                数据 = json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取品种信息文件失败: {e}")
+            return 0
+
+        for 代码, 信息 in 数据.items():
+            self.登记(
+                代码, 信息.get("交易所") or 推断交易所(代码),
+                最小变动价位=信息.get("最小变动价位"),
+                每手数量=int(信息.get("每手数量") or 推断交易规则(代码)["每手数量"]),
+                名称=信息.get("名称", "")
+            )
+        self.logger.info(f"从文件加载品种信息 {len(数据)} 个: {文件路径}")
+        return len(数据)
+
+    def 保存到文件(self, 文件路径: str):
+        """
+        保存品种静态信息，作为下次取不到合约数据时的本地备份
+
+        参数:
+            文件路径: 品种信息文件路径
+        """
+        数据 = {}
+        for 信息 in self._品种:
+            记录 = 信息.导出()
+            del 记录["涨停价"], 记录["跌停价"]
+            数据[信息.代码] = 记录
+        原子写入json(文件路径, 数据)
+
+    def 更新涨跌停(self, 股票代码: str, 涨停价: float, 跌停价: float):
+        """
+        更新当日涨跌停价，通常取自行情的 limit_up/limit_down
+
+        参数:
+            股票代码: 股票代码
+            涨停价: 涨停价
+            跌停价: 跌停价
+        """
+        信息 = self.获取(股票代码)
+        信息.涨停价 = 涨停价 or 0.0
+        信息.跌停价 = 跌停价 or 0.0
+
+    def 按昨收估算涨跌停(self, 股票代码: str, 昨收价: float):
+        """
+        行情中没有涨跌停价时按昨收价和板块涨跌幅估算
+
+        参数:
+            股票代码: 股票代码
+            昨收价: 昨日收盘价
+        """
+        if not 昨收价:
+            return
+        信息 = self.获取(股票代码)
+        涨跌幅 = 推断交易规则(股票代码)["涨跌幅"]
+        信息.涨停价 = round(昨收价 * (1 + 涨跌幅), 信息.价格精度)
+        信息.跌停价 = round(昨收价 * (1 - 涨跌幅), 信息.价格精度)
+
+    def 全部(self) -> List[品种信息]:
+        """
+        获取所有品种信息，按序号排列
+
+        返回:
+            品种信息列表
+        """
+        return list(self._品种)
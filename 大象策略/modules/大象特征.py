@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大象特征模块 - 逐笔增量维护跟踪中大象的滚动特征和信号强度
+"""
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+
+from .日志 import get_logger
+
+# 特征列，每列是一个定长数组，按槽位存放
+特征列 = ("数量均值", "消耗速度", "驻留秒数", "对手盘比", "盘口占比", "信号强度")
+
+
+def 定位价格档(档位: Sequence[Tuple[int, int]], 价格档: int, 系数: int) -> int:
+    """
+    在一侧盘口中定位价格档
+
+    由最优价与目标价格档的档数差直接得到位置，连续报价时一次命中，有空档时向最优价方向回退。
+
+    参数:
+        档位: 一侧盘口 [(价格档, 数量), ...]
+        价格档: 目标价格档
+        系数: 买盘为1，卖盘为-1
+
+    返回:
+        所在档位索引；不在盘口中返回-1；在可见档位之外(价格已朝远离方向移动)返回-2
+    """
+    if not 档位 or not 档位[0][0]:
+        return -2
+    目标位置 = 系数 * 价格档
+    距离 = 系数 * 档位[0][0] - 目标位置
+    if 距离 < 0:
+        return -1
+    i = min(距离, len(档位) - 1)
+    while i > 0 and (not 档位[i][0] or 系数 * 档位[i][0] < 目标位置):
+        i -= 1
+    if 档位[i][0] == 价格档:
+        return i
+    if i + 1 < len(档位) and 档位[i + 1][0]:
+        return -1
+    return -2
+
+
+class 大象特征表:
+    """
+    大象特征表
+
+    每个跟踪中的大象占用一个槽位，特征存放在按槽位索引的定长数组中，每笔行情只更新该品种大象所在的槽位：
+    - 数量均值: 大象所在价格档数量的指数加权均值(按时间衰减)
+    - 消耗速度: 每秒被成交数量的指数加权均值
+    - 驻留秒数: 大象在该价格档停留的时间
+    - 对手盘比: 大象金额 / 对手盘可见档位总金额
+    - 盘口占比: 大象金额 / 同侧其余档位总金额
+    - 信号强度: 由以上特征合成，0到1之间，发现时为1，之后随数量被吃、被撤和盘口对比变化
+    """
+
+    def __init__(self, 容量: int = 1024, 半衰期: float = 3.0, 耗尽参考秒数: float = 10.0):
+        """
+        初始化大象特征表
+
+        参数:
+            容量: 最多同时跟踪的大象数量
+            半衰期: 指数加权均值的半衰期(秒)
+            耗尽参考秒数: 按当前消耗速度预计耗尽时间等于该值时，消耗因子为0.5
+        """
+        self.容量 = 容量
+        self.半衰期 = 半衰期
+        self.耗尽参考秒数 = 耗尽参考秒数
+
+        零 = bytes(8 * 容量)
+        self.数量均值 = array("d", 零)
+        self.消耗速度 = array("d", 零)
+        self.驻留秒数 = array("d", 零)
+        self.对手盘比 = array("d", 零)
+        self.盘口占比 = array("d", 零)
+        self.信号强度 = array("d", 零)
+        self._初始数量 = array("d", 零)
+        self._开始时间 = array("q", 零)
+        self._上次时间 = array("q", 零)
+        self._上次成交消耗 = array("q", 零)
+
+        self._记录 = [None] * 容量  # {槽位: 大象信息}
+        self._空闲 = list(range(容量 - 1, -1, -1))
+        self._品种槽位 = {}  # {股票代码: [槽位, ...]}
+        self._已告警 = False
+        self.logger = get_logger("大象特征")
+
+    def __len__(self) -> int:
+        return self.容量 - len(self._空闲)
+
+    def 登记(self, 大象: Dict) -> int:
+        """
+        为新发现的大象分配槽位，槽位号写入大象信息的 特征槽位
+
+        参数:
+            大象: 大象信息，需要包含股票代码、价格档、数量和首次发现时间
+
+        返回:
+            槽位号，槽位用完时返回-1，该大象不计算特征
+        """
+        if not self._空闲:
+            if not self._已告警:
+                self.logger.warning(f"大象特征槽位已用完(容量{self.容量})，新大象不计算特征")
+                self._已告警 = True
+            return -1
+
+        槽位 = self._空闲.pop()
+        数量 = float(大象["数量"])
+        self.数量均值[槽位] = 数量
+        self.消耗速度[槽位] = 0.0
+        self.驻留秒数[槽位] = 0.0
+        self.对手盘比[槽位] = 0.0
+        self.盘口占比[槽位] = 0.0
+        self.信号强度[槽位] = 1.0
+        self._初始数量[槽位] = 数量 or 1.0
+        self._开始时间[槽位] = 大象["首次发现时间"]
+        self._上次时间[槽位] = 大象["首次发现时间"]
+        self._上次成交消耗[槽位] = 大象.get("成交消耗", 0)
+        self._记录[槽位] = 大象
+        self._品种槽位.setdefault(大象["股票代码"], []).append(槽位)
+        大象["特征槽位"] = 槽位
+        大象["信号强度"] = 1.0
+        return 槽位
+
+    def 释放(self, 大象: Dict):
+        """
+        释放大象占用的槽位
+
+        参数:
+            大象: 大象信息
+        """
+        槽位 = 大象.get("特征槽位", -1)
+        if 槽位 < 0 or self._记录[槽位] is not 大象:
+            return
+        self._记录[槽位] = None
+        self._空闲.append(槽位)
+        大象["特征槽位"] = -1
+        槽位列表 = self._品种槽位.get(大象["股票代码"])
+        if 槽位列表 is not None:
+            槽位列表.remove(槽位)
+            if not 槽位列表:
+                del self._品种槽位[大象["股票代码"]]
+
+    def 更新(self, 股票代码: str, 时间戳: int, 买盘: Sequence[Tuple[int, int]], 卖盘: Sequence[Tuple[int, int]]):
+        """
+        用一笔盘口更新该品种所有大象的特征，并把信号强度写回大象信息
+
+        参数:
+            股票代码: 股票代码
+            时间戳: 行情时间戳(毫秒)
+            买盘: 买盘 [(价格档, 数量), ...]
+            卖盘: 卖盘 [(价格档, 数量), ...]
+        """
+        槽位列表 = self._品种槽位.get(股票代码)
+        if not 槽位列表:
+            return
+
+        买盘金额 = 0
+        for 价格档, 数量 in 买盘:
+            买盘金额 += 价格档 * 数量
+        卖盘金额 = 0
+        for 价格档, 数量 in 卖盘:
+            卖盘金额 += 价格档 * 数量
+
+        for 槽位 in 槽位列表:
+            大象 = self._记录[槽位]
+            是买单 = 大象["类型"] == "买单大象"
+            同侧, 同侧金额, 对手金额 = (买盘, 买盘金额, 卖盘金额) if 是买单 else (卖盘, 卖盘金额, 买盘金额)
+
+            间隔 = (时间戳 - self._上次时间[槽位]) / 1000
+            if 间隔 <= 0:
+                continue
+            self._上次时间[槽位] = 时间戳
+            衰减 = math.exp(-间隔 * 0.6931471805599453 / self.半衰期)
+
+            # 大象滚出可见档位时数量未知，只推进时间
+            位置 = 定位价格档(同侧, 大象["价格档"], 1 if 是买单 else -1)
+            if 位置 != -2:
+                数量 = 同侧[位置][1] if 位置 >= 0 else 0
+                self.数量均值[槽位] = 数量 + (self.数量均值[槽位] - 数量) * 衰减
+                大象金额 = 大象["价格档"] * 数量
+                其余金额 = 同侧金额 - 大象金额
+                self.对手盘比[槽位] = 大象金额 / 对手金额 if 对手金额 > 0 else 0.0
+                self.盘口占比[槽位] = 大象金额 / 其余金额 if 其余金额 > 0 else 0.0
+            else:
+                数量 = self.数量均值[槽位]
+
+            成交消耗 = 大象.get("成交消耗", 0)
+            本次速度 = (成交消耗 - self._上次成交消耗[槽位]) / 间隔
+            self._上次成交消耗[槽位] = 成交消耗
+            self.消耗速度[槽位] = 本次速度 + (self.消耗速度[槽位] - 本次速度) * 衰减
+            self.驻留秒数[槽位] = (时间戳 - self._开始时间[槽位]) / 1000
+
+            强度 = self._合成强度(槽位, 数量)
+            self.信号强度[槽位] = 强度
+            大象["信号强度"] = 强度
+
+    def _合成强度(self, 槽位: int, 数量: float) -> float:
+        """
+        合成信号强度 = 存量因子 × 消耗因子 × (0.5 + 0.25 × 盘口因子 + 0.25 × 对手因子)
+
+        存量因子为数量均值相对发现时数量(不超过1)，消耗因子按预计耗尽时间计算，
+        盘口因子和对手因子把比值 r 映射为 r / (1 + r)。
+        """
+        存量因子 = min(1.0, self.数量均值[槽位] / self._初始数量[槽位])
+        速度 = self.消耗速度[槽位]
+        if 速度 > 0:
+            耗尽秒数 = 数量 / 速度
+            消耗因子 = 耗尽秒数 / (耗尽秒数 + self.耗尽参考秒数)
+        else:
+            消耗因子 = 1.0
+        盘口占比 = self.盘口占比[槽位]
+        对手盘比 = self.对手盘比[槽位]
+        return 存量因子 * 消耗因子 * (0.5 + 0.25 * 盘口占比 / (1 + 盘口占比) + 0.25 * 对手盘比 / (1 + 对手盘比))
+
+    def 获取特征(self, 大象: Dict) -> Optional[Dict]:
+        """
+        获取大象的全部特征
+
+        参数:
+            大象: 大象信息
+
+        返回:
+            {特征名: 值}，大象没有槽位时返回None
+        """
+        槽位 = 大象.get("特征槽位", -1)
+        if 槽位 < 0:
+            return None
+        return {名称: getattr(self, 名称)[槽位] for 名称 in 特征列}
+
+    def 品种大象(self, 股票代码: str) -> List[Dict]:
+        """
+        获取品种所有有槽位的大象
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            大象信息列表
+        """
+        return [self._记录[槽位] for 槽位 in self._品种槽位.get(股票代码, ())]
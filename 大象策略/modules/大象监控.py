@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+大象监控模块 - 持仓期间逐笔监视大象所在的价格档，大象撤单或被吃掉时立即通知策略
+"""
+from typing import Dict, Optional
+
+from .日志 import get_logger
+from .盘口增量 import 事件_成交减少, 事件_撤单减少, 方向_买, 方向_卖
+
+
+class 监控项:
+    """单个品种的大象监控记录"""
+    __slots__ = ("股票代码", "盘口方向", "方向", "方向系数", "价格档", "基准数量", "最低数量",
+                 "成交消耗", "撤单数量")
+
+    def __init__(self, 股票代码: str, 盘口方向: str, 价格档: int, 基准数量: int, 消失比例: float):
+        """
+        初始化监控项
+
+        参数:
+            股票代码: 股票代码
+            盘口方向: 大象所在的盘口方向，"买盘"或"卖盘"
+            价格档: 大象所在的价格档
+            基准数量: 登记时大象的委托数量
+            消失比例: 数量相对基准数量下降超过该比例视为大象消失
+        """
+        self.股票代码 = 股票代码
+        self.盘口方向 = 盘口方向
+        self.方向 = 方向_买 if 盘口方向 == "买盘" else 方向_卖
+        # 买盘价格从高到低排列，卖盘从低到高；乘以方向系数后两侧都按从高到低比较
+        self.方向系数 = 1 if 盘口方向 == "买盘" else -1
+        self.价格档 = 价格档
+        self.基准数量 = 基准数量
+        self.最低数量 = 基准数量 * (1 - 消失比例)
+        # 由盘口增量事件累计，区分大象是被吃掉还是撤单
+        self.成交消耗 = 0
+        self.撤单数量 = 0
+
+
+class 大象消失监控器:
+    """
+    大象消失监控器
+
+    交易进入持仓阶段(持有中/已卖出待买回)时登记大象所在的价格档，之后每笔行情只检查该价格档：
+    由最优价与大象价格档的档数差直接定位大象在盘口中的位置，连续报价的盘口一次命中，
+    不再扫描整个盘口和识别器的跟踪记录。大象消失时返回消失原因并移除监控，每个监控项只触发一次。
+    """
+
+    def __init__(self, 消失比例: float = 0.8):
+        """
+        初始化大象消失监控器
+
+        参数:
+            消失比例: 大象数量相对登记时下降超过该比例视为消失
+        """
+        self.消失比例 = 消失比例
+        self._监控 = {}  # {股票代码: 监控项}
+        self.统计 = {"登记": 0, "价格穿越": 0, "价格档消失": 0, "数量下降": 0}
+        self.logger = get_logger("大象监控")
+
+    def __len__(self) -> int:
+        return len(self._监控)
+
+    def __contains__(self, 股票代码: str) -> bool:
+        return 股票代码 in self._监控
+
+    def 登记(self, 大象信息: Dict) -> Optional[监控项]:
+        """
+        登记需要监控的大象，同一品种重复登记时覆盖
+
+        参数:
+            大象信息: 大象识别器返回的大象信息，需要包含股票代码、类型、价格档和数量
+
+        返回:
+            监控项，大象信息不完整时返回None
+        """
+        股票代码 = 大象信息.get("股票代码")
+        价格档 = 大象信息.get("价格档")
+        if not 股票代码 or not 价格档:
+            return None
+
+        盘口方向 = "卖盘" if 大象信息.get("类型") == "卖单大象" else "买盘"
+        项 = 监控项(股票代码, 盘口方向, 价格档, 大象信息.get("数量", 0), self.消失比例)
+        self._监控[股票代码] = 项
+        self.统计["登记"] += 1
+        self.logger.debug(f"开始监控大象: {股票代码} {盘口方向} 价格档:{价格档} 数量:{项.基准数量}")
+        return 项
+
+    def 移除(self, 股票代码: str) -> Optional[监控项]:
+        """
+        移除品种的监控
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            被移除的监控项，没有监控时返回None
+        """
+        return self._监控.pop(股票代码, None)
+
+    def 获取(self, 股票代码: str) -> Optional[监控项]:
+        """
+        获取品种的监控项
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            监控项，没有监控时返回None
+        """
+        return self._监控.get(股票代码)
+
+    def 处理盘口事件(self, 股票代码: str, 时间戳: int, 事件列表: list):
+        """
+        处理盘口增量事件，累计监控价格档的成交消耗和撤单数量
+
+        参数:
+            股票代码: 股票代码
+            时间戳: 行情时间戳(毫秒)
+            事件列表: 盘口增量引擎生成的事件列表
+        """
+        项 = self._监控.get(股票代码)
+        if 项 is None:
+            return
+        for _, _, 类型, 方向, 价格档, 变化量, _ in 事件列表:
+            if 价格档 != 项.价格档 or 方向 != 项.方向:
+                continue
+            if 类型 == 事件_成交减少:
+                项.成交消耗 -= 变化量
+            elif 类型 == 事件_撤单减少:
+                项.撤单数量 -= 变化量
+
+    def 检查(self, 股票代码: str, 盘口数据: Dict) -> Optional[str]:
+        """
+        检查监控的大象是否消失，消失时移除监控
+
+        参数:
+            股票代码: 股票代码
+            盘口数据: 盘口数据 {"买盘": [(价格档, 数量), ...], "卖盘": [(价格档, 数量), ...]}
+
+        返回:
+            消失原因("价格穿越"、"价格档消失"、"数量下降")，未监控或大象仍在时返回None
+        """
+        项 = self._监控.get(股票代码)
+        if 项 is None:
+            return None
+
+        档位 = 盘口数据[项.盘口方向]
+        if not 档位 or not 档位[0][0]:
+            return None  # 没有报价(停牌、集合竞价)，无法判断
+
+        系数 = 项.方向系数
+        大象位置 = 系数 * 项.价格档
+        距离 = 系数 * 档位[0][0] - 大象位置
+        if 距离 < 0:
+            原因 = "价格穿越"  # 最优价已越过大象价格，大象被吃掉或撤单
+        else:
+            # 连续报价时大象位于第 距离 档；中间有空档时向最优价方向回退
+            i = min(距离, len(档位) - 1)
+            while i > 0 and (not 档位[i][0] or 系数 * 档位[i][0] < 大象位置):
+                i -= 1
+            价格档, 数量 = 档位[i]
+            if 价格档 == 项.价格档:
+                if 数量 >= 项.最低数量:
+                    return None
+                原因 = "数量下降"
+            elif i + 1 < len(档位) and 档位[i + 1][0]:
+                原因 = "价格档消失"  # 大象两侧的价格档都在，大象所在档已不在盘口中
+            else:
+                return None  # 大象价格在可见档位之外，价格已朝有利方向移动
+
+        del self._监控[股票代码]
+        self.统计[原因] += 1
+        self.logger.info(f"监控的大象已消失: {股票代码} {项.盘口方向} 价格档:{项.价格档} 原因:{原因} "
+                         f"成交消耗:{项.成交消耗} 撤单数量:{项.撤单数量}")
+        return 原因
@@ -2,11 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 大象识别模块 - 识别盘口中的大额买单和卖单
+
+盘口价格为整数价格档(价格/最小变动价位)，数量为整数手数。
 """
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime
 
 from .日志 import get_logger
+from .大象特征 import 大象特征表
+from .盘口增量 import 事件_成交减少, 事件_撤单减少, 事件_补单增加, 方向_买
+
+# 没有品种信息表时使用的最小变动价位
+默认最小变动价位 = 0.01
 
 class 大象识别器:
     """大象识别器类，用于识别盘口中的大单买盘和卖盘"""
@@ -23,6 +30,7 @@ class 大象识别器:
         跳过买一价: bool = False,
         远距大象委托量倍数: float = 1.5,
         价差分界点: int = 1,
+        单笔委托金额阈值: float = 0.0,
     ):
         """
         初始化大象识别器
@@ -30,14 +38,15 @@ class 大象识别器:
         参数:
             大象委托量阈值: 判定为买单大象的最小委托量(元)
             大象价差阈值: 买单大象与卖一价的最大档位数量
-            确认次数: 确认大象存在的检测次数
-            大象稳定时间: 大象稳定存在的最小秒数
+            确认次数: 确认大象存在的检测次数，按识别器实际处理的盘口计数，行情合并时被覆盖的中间盘口不计入
+            大象稳定时间: 大象稳定存在的最小秒数，按行情时间戳计算，不受行情合并影响
             启用卖单识别: 是否启用卖单大象识别
             卖单委托量阈值: 判定为卖单大象的最小委托量(元)
             卖单价差阈值: 卖单大象与买一价的最大档位数量
             跳过买一价: 是否跳过买一价搜索大象
             远距大象委托量倍数: 远距大象委托量阈值倍数
             价差分界点: 近距和远距大象的档位分界点
+            单笔委托金额阈值: 有委托笔数时，平均每笔金额低于该值的价格档视为多笔小单堆积，不判定为大象；为0时不检查
         """
         self.大象委托量阈值 = 大象委托量阈值
         self.大象价差阈值 = 大象价差阈值
@@ -49,23 +58,52 @@ class 大象识别器:
         self.跳过买一价 = 跳过买一价
         self.远距大象委托量倍数 = 远距大象委托量倍数
         self.价差分界点 = 价差分界点
+        self.单笔委托金额阈值 = 单笔委托金额阈值
+        
+        # 品种信息表，由策略设置；用于价格档与浮点价格的换算
+        self.品种表 = None
         
-        # 大象跟踪记录
+        # 大象跟踪记录 {(股票代码, 价格档): 大象信息}
         self.大象跟踪 = {}
         self.卖单大象跟踪 = {}
         
+        # 各股票上一次扫描命中的大象及当时的确认条件 {股票代码: (大象信息, 确认次数, 大象稳定时间)}，
+        # 盘口未变化时由 重复盘口 直接推进
+        self._买单命中 = {}
+        self._卖单命中 = {}
+        
+        # 跟踪中大象的滚动特征和信号强度
+        self.特征 = 大象特征表()
+        # 各股票跟踪中的买卖大象数 {股票代码: 数量}，没有跟踪的股票不需要盘口增量事件
+        self._跟踪数 = {}
+        
+        # 事件统计，供指标导出 {方向: {事件: 次数}}
+        self.事件统计 = {
+            "买单": {"候选": 0, "确认": 0, "消失": 0},
+            "卖单": {"候选": 0, "确认": 0, "消失": 0}
+        }
+        
         # 日志记录器
         self.logger = get_logger("大象识别器")
     
-    def 检测大象(self, 股票代码: str, 时间戳: int, 买盘: list, 卖盘: list, 最新价: float = None) -> dict:
+    def _价格换算(self, 股票代码: str) -> Tuple[float, int, int]:
+        """获取品种的最小变动价位、每元价格档数和价格精度"""
+        if self.品种表 is not None:
+            品种 = self.品种表.获取(股票代码)
+            return 品种.最小变动价位, 品种.价格倍数, 品种.价格精度
+        return 默认最小变动价位, 100, 2
+    
+    def 检测大象(self, 股票代码: str, 时间戳: int, 买盘: list, 卖盘: list, 最新价: float = None,
+             买盘笔数: list = None) -> dict:
         """检测大象订单
         
         参数:
             股票代码: 股票代码
             时间戳: 当前时间戳
-            买盘: 买盘深度数据, 格式 [(价格, 数量), ...]
-            卖盘: 卖盘深度数据, 格式 [(价格, 数量), ...]
-            最新价: 最新成交价格
+            买盘: 买盘深度数据, 格式 [(价格档, 数量), ...]
+            卖盘: 卖盘深度数据, 格式 [(价格档, 数量), ...]
+            最新价: 最新成交价格档
+            买盘笔数: 买盘各档委托笔数(Level-2行情)，为None或某档为0时不检查单笔金额
             
         返回:
             大象信息字典或None
@@ -73,58 +111,73 @@ class 大象识别器:
         if not 买盘 or not 卖盘:
             return None
             
-        卖一价 = 卖盘[0][0]
+        # 每档每手对应的金额，委托金额 = 价格档 * 数量 * 每档金额
+        最小变动价位, 价格倍数, 价格精度 = self._价格换算(股票代码)
+        每档金额 = 最小变动价位 * 100
         
         # 确定扫描起始索引
         起始索引 = 1 if self.跳过买一价 else 0
         
-        # 遍历买盘寻找大象
-        for i in range(起始索引, len(买盘)):
+        self._买单命中.pop(股票代码, None)
+        
+        # 遍历买盘寻找大象，只扫描价差阈值以内的档位，与盘口总档位数无关
+        扫描档数 = min(len(买盘), int(self.大象价差阈值) + 1)
+        for i in range(起始索引, 扫描档数):
             买单价格 = 买盘[i][0]
             买单数量 = 买盘[i][1]
             
             # 使用档位数量作为价差
             档位数 = i
-            
-            # 超出最大档位数量，提前终止扫描
-            if 档位数 > self.大象价差阈值:
-                break
                 
             # 根据档位确定委托量阈值
             委托量阈值 = self.大象委托量阈值
             if 档位数 > self.价差分界点:
                 委托量阈值 *= self.远距大象委托量倍数
                 
-            # 计算委托金额
-            委托金额 = 买单价格 * 买单数量 * 100
-            
-            # 检查是否满足大象条件
-            if 委托金额 >= 委托量阈值 and 档位数 <= self.大象价差阈值:
+            # 以整数价格档乘数量与折算后的阈值比较
+            if 买单价格 * 买单数量 >= 委托量阈值 / 每档金额:
+                # 有委托笔数时区分单笔大单和多笔小单堆积
+                委托笔数 = 买盘笔数[i] if 买盘笔数 is not None and i < len(买盘笔数) else 0
+                if 委托笔数 and 买单价格 * 买单数量 < self.单笔委托金额阈值 / 每档金额 * 委托笔数:
+                    continue
+                
                 # 符合大象定义
-                大象ID = f"{股票代码}_{买单价格}"
+                委托金额 = round(买单价格 * 买单数量 * 每档金额, 2)
+                大象ID = (股票代码, 买单价格)
                 
                 if 大象ID not in self.大象跟踪:
                     # 新发现的大象
                     self.大象跟踪[大象ID] = {
                         "股票代码": 股票代码,
-                        "价格": 买单价格,
+                        "价格档": 买单价格,
+                        "价格": round(买单价格 / 价格倍数, 价格精度),
                         "数量": 买单数量,
                         "委托金额": 委托金额,
                         "档位数": 档位数,
                         "深度位置": i,
+                        "委托笔数": 委托笔数,
                         "首次发现时间": 时间戳,
                         "最后更新时间": 时间戳,
                         "确认次数": 1,
-                        "类型": "买单大象"
+                        "类型": "买单大象",
+                        "成交消耗": 0,
+                        "撤单数量": 0,
+                        "补单次数": 0,
+                        "疑似冰山": False
                     }
-                    self.logger.debug(f"发现疑似大象: {股票代码} 价格:{买单价格} 数量:{买单数量} 委托金额:{委托金额} 档位:{档位数}")
+                    self._登记跟踪(self.大象跟踪[大象ID])
+                    self._买单命中[股票代码] = (self.大象跟踪[大象ID], self.确认次数, self.大象稳定时间)
+                    self.事件统计["买单"]["候选"] += 1
+                    self.logger.debug(f"发现疑似大象: {股票代码} 价格:{self.大象跟踪[大象ID]['价格']} 数量:{买单数量} 委托金额:{委托金额} 档位:{档位数}")
                 else:
                     # 已经在跟踪的大象
                     大象 = self.大象跟踪[大象ID]
+                    self._买单命中[股票代码] = (大象, self.确认次数, self.大象稳定时间)
                     大象["数量"] = 买单数量
                     大象["委托金额"] = 委托金额
                     大象["档位数"] = 档位数
                     大象["深度位置"] = i
+                    大象["委托笔数"] = 委托笔数
                     大象["最后更新时间"] = 时间戳
                     大象["确认次数"] += 1
                     
@@ -133,7 +186,8 @@ class 大象识别器:
                     
                     if 大象["确认次数"] >= self.确认次数 and 存在时长 >= self.大象稳定时间:
                         # 确认为大象
-                        self.logger.info(f"确认大象: {股票代码} 价格:{买单价格} 数量:{买单数量} 委托金额:{委托金额} 档位:{档位数} 确认次数:{大象['确认次数']} 存在时长:{存在时长}秒")
+                        self.事件统计["买单"]["确认"] += 1
+                        self.logger.info(f"确认大象: {股票代码} 价格:{大象['价格']} 数量:{买单数量} 委托金额:{委托金额} 档位:{档位数} 确认次数:{大象['确认次数']} 存在时长:{存在时长}秒")
                         return 大象
                         
                 # 找到一个符合条件的大象后就停止扫描
@@ -144,15 +198,17 @@ class 大象识别器:
         
         return None
     
-    def 检测卖单大象(self, 股票代码: str, 时间戳: int, 买盘: list, 卖盘: list, 最新价: float = None) -> dict:
+    def 检测卖单大象(self, 股票代码: str, 时间戳: int, 买盘: list, 卖盘: list, 最新价: float = None,
+               卖盘笔数: list = None) -> dict:
         """检测卖单大象订单
         
         参数:
             股票代码: 股票代码
             时间戳: 当前时间戳
-            买盘: 买盘深度数据, 格式 [(价格, 数量), ...]
-            卖盘: 卖盘深度数据, 格式 [(价格, 数量), ...]
-            最新价: 最新成交价格
+            买盘: 买盘深度数据, 格式 [(价格档, 数量), ...]
+            卖盘: 卖盘深度数据, 格式 [(价格档, 数量), ...]
+            最新价: 最新成交价格档
+            卖盘笔数: 卖盘各档委托笔数(Level-2行情)，为None或某档为0时不检查单笔金额
             
         返回:
             卖单大象信息字典或None
@@ -160,55 +216,70 @@ class 大象识别器:
         if not self.启用卖单识别 or not 买盘 or not 卖盘:
             return None
             
-        买一价 = 买盘[0][0]
+        # 每档每手对应的金额，委托金额 = 价格档 * 数量 * 每档金额
+        最小变动价位, 价格倍数, 价格精度 = self._价格换算(股票代码)
+        每档金额 = 最小变动价位 * 100
+        
+        self._卖单命中.pop(股票代码, None)
         
-        # 遍历卖盘寻找卖单大象(不跳过卖一价)
-        for i in range(len(卖盘)):
+        # 遍历卖盘寻找卖单大象(不跳过卖一价)，只扫描价差阈值以内的档位
+        扫描档数 = min(len(卖盘), int(self.卖单价差阈值) + 1)
+        for i in range(扫描档数):
             卖单价格 = 卖盘[i][0]
             卖单数量 = 卖盘[i][1]
             
             # 使用档位数量作为价差
             档位数 = i
-            
-            # 超出最大档位数量，提前终止扫描
-            if 档位数 > self.卖单价差阈值:
-                break
                 
             # 根据档位确定委托量阈值
             委托量阈值 = self.卖单委托量阈值
             if 档位数 > self.价差分界点:
                 委托量阈值 *= self.远距大象委托量倍数
                 
-            # 计算委托金额
-            委托金额 = 卖单价格 * 卖单数量 * 100
-            
-            # 检查是否满足卖单大象条件
-            if 委托金额 >= 委托量阈值 and 档位数 <= self.卖单价差阈值:
+            # 以整数价格档乘数量与折算后的阈值比较
+            if 卖单价格 * 卖单数量 >= 委托量阈值 / 每档金额:
+                # 有委托笔数时区分单笔大单和多笔小单堆积
+                委托笔数 = 卖盘笔数[i] if 卖盘笔数 is not None and i < len(卖盘笔数) else 0
+                if 委托笔数 and 卖单价格 * 卖单数量 < self.单笔委托金额阈值 / 每档金额 * 委托笔数:
+                    continue
+                
                 # 符合卖单大象定义
-                大象ID = f"{股票代码}_卖_{卖单价格}"
+                委托金额 = round(卖单价格 * 卖单数量 * 每档金额, 2)
+                大象ID = (股票代码, 卖单价格)
                 
                 if 大象ID not in self.卖单大象跟踪:
                     # 新发现的卖单大象
                     self.卖单大象跟踪[大象ID] = {
                         "股票代码": 股票代码,
-                        "价格": 卖单价格,
+                        "价格档": 卖单价格,
+                        "价格": round(卖单价格 / 价格倍数, 价格精度),
                         "数量": 卖单数量,
                         "委托金额": 委托金额,
                         "档位数": 档位数,
                         "深度位置": i,
+                        "委托笔数": 委托笔数,
                         "首次发现时间": 时间戳,
                         "最后更新时间": 时间戳,
                         "确认次数": 1,
-                        "类型": "卖单大象"
+                        "类型": "卖单大象",
+                        "成交消耗": 0,
+                        "撤单数量": 0,
+                        "补单次数": 0,
+                        "疑似冰山": False
                     }
-                    self.logger.debug(f"发现疑似卖单大象: {股票代码} 价格:{卖单价格} 数量:{卖单数量} 委托金额:{委托金额} 档位:{档位数}")
+                    self._登记跟踪(self.卖单大象跟踪[大象ID])
+                    self._卖单命中[股票代码] = (self.卖单大象跟踪[大象ID], self.确认次数, self.大象稳定时间)
+                    self.事件统计["卖单"]["候选"] += 1
+                    self.logger.debug(f"发现疑似卖单大象: {股票代码} 价格:{self.卖单大象跟踪[大象ID]['价格']} 数量:{卖单数量} 委托金额:{委托金额} 档位:{档位数}")
                 else:
                     # 已经在跟踪的卖单大象
                     大象 = self.卖单大象跟踪[大象ID]
+                    self._卖单命中[股票代码] = (大象, self.确认次数, self.大象稳定时间)
                     大象["数量"] = 卖单数量
                     大象["委托金额"] = 委托金额
                     大象["档位数"] = 档位数
                     大象["深度位置"] = i
+                    大象["委托笔数"] = 委托笔数
                     大象["最后更新时间"] = 时间戳
                     大象["确认次数"] += 1
                     
@@ -217,7 +288,8 @@ class 大象识别器:
                     
                     if 大象["确认次数"] >= self.确认次数 and 存在时长 >= self.大象稳定时间:
                         # 确认为卖单大象
-                        self.logger.info(f"确认卖单大象: {股票代码} 价格:{卖单价格} 数量:{卖单数量} 委托金额:{委托金额} 档位:{档位数} 确认次数:{大象['确认次数']} 存在时长:{存在时长}秒")
+                        self.事件统计["卖单"]["确认"] += 1
+                        self.logger.info(f"确认卖单大象: {股票代码} 价格:{大象['价格']} 数量:{卖单数量} 委托金额:{委托金额} 档位:{档位数} 确认次数:{大象['确认次数']} 存在时长:{存在时长}秒")
                         return 大象
                         
                 # 找到一个符合条件的卖单大象后就停止扫描
@@ -228,6 +300,43 @@ class 大象识别器:
         
         return None
     
+    def 重复盘口(self, 股票代码: str, 时间戳: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """盘口与上一次检测完全相同时代替 检测大象 和 检测卖单大象
+        
+        相同的盘口扫描结果也相同，这里直接取上一次扫描命中的大象，按时间推进确认次数和最后更新时间，
+        确认条件使用上一次检测时的确认次数和稳定时间，结果与完整检测一致；不扫描盘口，也不清理过期记录。
+        
+        参数:
+            股票代码: 股票代码
+            时间戳: 当前时间戳
+            
+        返回:
+            (买单大象信息, 卖单大象信息)，未确认的一侧为None
+        """
+        买单大象 = self._推进命中(self._买单命中, self.大象跟踪, 股票代码, 时间戳, "买单")
+        卖单大象 = None
+        if self.启用卖单识别:
+            卖单大象 = self._推进命中(self._卖单命中, self.卖单大象跟踪, 股票代码, 时间戳, "卖单")
+        return 买单大象, 卖单大象
+    
+    def _推进命中(self, 命中表: Dict, 跟踪表: Dict, 股票代码: str, 时间戳: int, 方向: str) -> Optional[Dict]:
+        """推进上一次扫描命中的大象，大象已被移除时清除命中记录"""
+        命中 = 命中表.get(股票代码)
+        if 命中 is None:
+            return None
+        大象, 确认次数, 稳定时间 = 命中
+        if 跟踪表.get((股票代码, 大象["价格档"])) is not 大象:
+            del 命中表[股票代码]
+            return None
+        
+        大象["最后更新时间"] = 时间戳
+        大象["确认次数"] += 1
+        存在时长 = (时间戳 - 大象["首次发现时间"]) / 1000  # 转为秒
+        if 大象["确认次数"] >= 确认次数 and 存在时长 >= 稳定时间:
+            self.事件统计[方向]["确认"] += 1
+            return 大象
+        return None
+    
     def 检查大象稳定性(self, 股票代码: str, 类型: str = "买单", 当前时间: datetime = None) -> bool:
         """检查指定股票的大象是否稳定存在
         
@@ -276,7 +385,7 @@ class 大象识别器:
         
         参数:
             股票代码: 股票代码
-            盘口数据: 当前盘口数据 {"买盘": [(价格, 数量), ...], "卖盘": [(价格, 数量), ...]}
+            盘口数据: 当前盘口数据 {"买盘": [(价格档, 数量), ...], "卖盘": [(价格档, 数量), ...]}
             类型: 大象类型，"买单"或"卖单"
             
         返回:
@@ -289,15 +398,15 @@ class 大象识别器:
         if not 大象:
             return True  # 没有大象，视为已消失
         
-        大象价格 = 大象["价格"]
+        大象价格档 = 大象["价格档"]
         大象数量 = 大象["数量"]
         
-        # 检查当前盘口中是否还存在相同价格的大象
+        # 检查当前盘口中是否还存在相同价格档的大象，价格档为整数，可以直接比较
         价格匹配 = False
         数量下降百分比 = 0
         
-        for 价格, 数量 in 目标盘口数据:
-            if 价格 == 大象价格:
+        for 价格档, 数量 in 目标盘口数据:
+            if 价格档 == 大象价格档:
                 价格匹配 = True
                 
                 # 计算数量下降百分比
@@ -305,11 +414,7 @@ class 大象识别器:
                     数量下降百分比 = (大象数量 - 数量) / 大象数量 * 100
                 
                 # 更新大象数量
-                if 价格匹配:
-                    for 大象ID, 记录 in list(目标大象跟踪.items()):
-                        if 记录["股票代码"] == 股票代码 and 记录["价格"] == 大象价格:
-                            记录["数量"] = 数量
-                
+                大象["数量"] = 数量
                 break
         
         # 判断大象是否消失的条件：
@@ -317,21 +422,123 @@ class 大象识别器:
         # 2. 数量下降超过80%
         if not 价格匹配 or 数量下降百分比 > 80:
             # 大象已消失，从跟踪列表中移除
-            self.logger.info(f"{类型}大象已消失: {股票代码} 价格:{大象价格} 原数量:{大象数量}")
+            self.logger.info(f"{类型}大象已消失: {股票代码} 价格:{大象['价格']} 原数量:{大象数量}")
+            self.事件统计[类型]["消失"] += 1
+            self._释放跟踪(目标大象跟踪.pop((股票代码, 大象价格档)))
+            return True
             
-            # 删除对应的大象记录
-            要删除的ID = []
-            for 大象ID, 记录 in list(目标大象跟踪.items()):
-                if 记录["股票代码"] == 股票代码 and 记录["价格"] == 大象价格:
-                    要删除的ID.append(大象ID)
+        return False
+        
+    def 有跟踪(self, 股票代码: str) -> bool:
+        """股票是否有跟踪中的大象，作为盘口增量订阅的关注条件
+        
+        参数:
+            股票代码: 股票代码
             
-            for ID in 要删除的ID:
-                if ID in 目标大象跟踪:
-                    del 目标大象跟踪[ID]
+        返回:
+            有跟踪中的买单或卖单大象时为True
+        """
+        return 股票代码 in self._跟踪数
+    
+    def _登记跟踪(self, 大象: Dict):
+        """新大象加入跟踪表后登记特征槽位和股票的跟踪数"""
+        self.特征.登记(大象)
+        股票代码 = 大象["股票代码"]
+        self._跟踪数[股票代码] = self._跟踪数.get(股票代码, 0) + 1
+    
+    def _释放跟踪(self, 大象: Dict):
+        """大象移出跟踪表后释放特征槽位并减少股票的跟踪数"""
+        self.特征.释放(大象)
+        股票代码 = 大象["股票代码"]
+        数量 = self._跟踪数.get(股票代码, 0) - 1
+        if 数量 > 0:
+            self._跟踪数[股票代码] = 数量
+        else:
+            self._跟踪数.pop(股票代码, None)
+    
+    def 处理盘口事件(self, 股票代码: str, 时间戳: int, 事件列表: list):
+        """处理盘口增量事件，累计跟踪中大象的成交消耗、撤单和补单
+        
+        参数:
+            股票代码: 股票代码
+            时间戳: 行情时间戳(毫秒)
+            事件列表: 盘口增量引擎生成的事件列表
+        """
+        for _, _, 类型, 方向, 价格档, 变化量, _ in 事件列表:
+            if 类型 != 事件_成交减少 and 类型 != 事件_撤单减少 and 类型 != 事件_补单增加:
+                continue
+            目标大象跟踪 = self.大象跟踪 if 方向 == 方向_买 else self.卖单大象跟踪
+            大象 = 目标大象跟踪.get((股票代码, 价格档))
+            if 大象 is None:
+                continue
+            if 类型 == 事件_成交减少:
+                大象["成交消耗"] -= 变化量
+            elif 类型 == 事件_撤单减少:
+                大象["撤单数量"] -= 变化量
+            else:
+                # 被成交消耗后又补回数量，说明是分批显示的冰山单，而不是新挂出的委托
+                大象["补单次数"] += 1
+                if 大象["成交消耗"] > 0:
+                    大象["疑似冰山"] = True
+    
+    def 更新特征(self, 股票代码: str, 时间戳: int, 买盘: list, 卖盘: list):
+        """用一笔盘口增量更新该股票跟踪中大象的特征和信号强度
+        
+        参数:
+            股票代码: 股票代码
+            时间戳: 当前时间戳(毫秒)
+            买盘: 买盘深度数据, 格式 [(价格档, 数量), ...]
+            卖盘: 卖盘深度数据, 格式 [(价格档, 数量), ...]
+        """
+        self.特征.更新(股票代码, 时间戳, 买盘, 卖盘)
+    
+    def 信号强度表(self) -> Dict[str, float]:
+        """获取各股票已确认大象的信号强度，同一股票有多个大象时取最大值
+        
+        返回:
+            {股票代码: 信号强度}
+        """
+        结果 = {}
+        for 目标大象跟踪 in (self.大象跟踪, self.卖单大象跟踪):
+            for 大象 in 目标大象跟踪.values():
+                if 大象["确认次数"] >= self.确认次数:
+                    股票代码 = 大象["股票代码"]
+                    结果[股票代码] = max(结果.get(股票代码, 0.0), 大象.get("信号强度", 1.0))
+        return 结果
+    
+    def 计算消耗速度(self, 大象: Dict, 当前时间戳: int) -> float:
+        """计算大象被成交消耗的速度
+        
+        参数:
+            大象: 大象信息
+            当前时间戳: 当前时间戳(毫秒)
             
-            return True
+        返回:
+            每秒被成交的数量
+        """
+        存在时长 = (当前时间戳 - 大象["首次发现时间"]) / 1000
+        if 存在时长 <= 0:
+            return 0.0
+        return 大象.get("成交消耗", 0) / 存在时长
+    
+    def 移除大象(self, 股票代码: str, 价格档: int, 类型: str = "买单") -> bool:
+        """移除已确认消失的大象跟踪记录
+        
+        参数:
+            股票代码: 股票代码
+            价格档: 大象所在的价格档
+            类型: 大象类型，"买单"或"卖单"
             
-        return False
+        返回:
+            是否存在并移除了跟踪记录
+        """
+        目标大象跟踪 = self.大象跟踪 if 类型 == "买单" else self.卖单大象跟踪
+        大象 = 目标大象跟踪.pop((股票代码, 价格档), None)
+        if 大象 is None:
+            return False
+        self._释放跟踪(大象)
+        self.事件统计[类型]["消失"] += 1
+        return True
         
     def _清理过期大象(self, 当前时间戳: int, 超时时间: int = 10000):
         """清理过期的大象跟踪记录
@@ -347,7 +554,7 @@ class 大象识别器:
                 
         for ID in 要删除的ID:
             if ID in self.大象跟踪:
-                del self.大象跟踪[ID]
+                self._释放跟踪(self.大象跟踪.pop(ID))
     
     def _清理过期卖单大象(self, 当前时间戳: int, 超时时间: int = 10000):
         """清理过期的卖单大象跟踪记录
@@ -363,7 +570,7 @@ class 大象识别器:
                 
         for ID in 要删除的ID:
             if ID in self.卖单大象跟踪:
-                del self.卖单大象跟踪[ID]
+                self._释放跟踪(self.卖单大象跟踪.pop(ID))
     
     def 重置(self, 股票代码: str = None):
         """重置大象跟踪状态
@@ -373,8 +580,12 @@ class 大象识别器:
         """
         if 股票代码 is None:
             # 重置所有
+            for 大象 in list(self.大象跟踪.values()) + list(self.卖单大象跟踪.values()):
+                self._释放跟踪(大象)
             self.大象跟踪.clear()
             self.卖单大象跟踪.clear()
+            self._买单命中.clear()
+            self._卖单命中.clear()
             self.logger.info("已重置所有大象跟踪状态")
         else:
             # 重置指定股票
@@ -385,7 +596,7 @@ class 大象识别器:
             
             for ID in 要删除的ID:
                 if ID in self.大象跟踪:
-                    del self.大象跟踪[ID]
+                    self._释放跟踪(self.大象跟踪.pop(ID))
             
             要删除的ID = []
             for 大象ID, 大象 in list(self.卖单大象跟踪.items()):
@@ -394,6 +605,9 @@ class 大象识别器:
             
             for ID in 要删除的ID:
                 if ID in self.卖单大象跟踪:
-                    del self.卖单大象跟踪[ID]
+                    self._释放跟踪(self.卖单大象跟踪.pop(ID))
+            
+            self._买单命中.pop(股票代码, None)
+            self._卖单命中.pop(股票代码, None)
                     
             self.logger.info(f"已重置股票 {股票代码} 的大象跟踪状态")
\ No newline at end of file
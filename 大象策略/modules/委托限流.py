@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+委托限流模块 - 按令牌桶限制全局委托速率、撤单速率和单品种委托速率，超出的请求按优先级排队发送
+"""
+from typing import Any, Callable, Dict, Optional
+import heapq
+import time
+
+from .日志 import get_logger
+from .延迟统计 import 延迟直方图
+
+# 优先级，数值越小越先发送
+优先级_止损 = 0  # 大象消失后的止损卖出、紧急买回和止损撤单
+优先级_平仓 = 1  # 止盈卖出和买回
+优先级_开仓 = 2  # 新开仓
+
+
+class 令牌桶:
+    """
+    令牌桶
+
+    令牌按速率连续补充，最多积累到容量；取用时才按经过的时间补充，不需要定时器。
+    """
+
+    def __init__(self, 速率: float, 容量: float, 现在: int):
+        """
+        初始化令牌桶
+
+        参数:
+            速率: 每秒补充的令牌数
+            容量: 最多积累的令牌数，即允许的突发量
+            现在: 当前时间(纳秒)
+        """
+        self.速率 = 速率
+        self.容量 = 容量
+        self.令牌 = 容量
+        self._时间 = 现在
+
+    def 可用(self, 现在: int) -> bool:
+        """
+        补充令牌并检查是否至少有一个令牌
+
+        参数:
+            现在: 当前时间(纳秒)
+
+        返回:
+            是否有可用令牌
+        """
+        if 现在 > self._时间:
+            self.令牌 = min(self.容量, self.令牌 + (现在 - self._时间) * self.速率 / 1e9)
+            self._时间 = 现在
+        return self.令牌 >= 1
+
+    def 取用(self):
+        """取用一个令牌，调用前须已确认可用"""
+        self.令牌 -= 1
+
+
+class _排队请求:
+    """限流队列中的一个委托或撤单请求"""
+
+    __slots__ = ("编号", "股票代码", "发送函数", "回调", "入队时间", "同步", "已发送", "结果")
+
+    def __init__(self, 编号: str, 股票代码: str, 发送函数: Callable[[], Any], 回调: Optional[Callable[[Any], None]], 入队时间: int):
+        self.编号 = 编号
+        self.股票代码 = 股票代码
+        self.发送函数 = 发送函数
+        self.回调 = 回调
+        self.入队时间 = 入队时间
+        self.同步 = True  # 提交时当场发送的请求直接返回结果，不调用回调
+        self.已发送 = False
+        self.结果 = None
+
+
+class 委托限流器:
+    """
+    委托限流器
+
+    委托同时受全局委托桶和所在品种的委托桶限制，撤单只受全局撤单桶限制。
+    请求先进入按(优先级, 提交顺序)排列的队列，再按令牌发送：有令牌且前面没有更高优先级的请求时当场发送；
+    否则留在队列中，由之后的 处理 调用在令牌补充后发送，发送结果交给提交时的回调。
+    被单品种委托桶挡住的请求不阻塞其他品种的请求。速率为0表示不限制。
+    """
+
+    def __init__(self, 委托每秒: float = 20.0, 撤单每秒: float = 20.0, 单品种委托每秒: float = 5.0,
+                 突发秒数: float = 1.0, 时钟: Callable[[], int] = time.perf_counter_ns):
+        """
+        初始化委托限流器
+
+        参数:
+            委托每秒: 全局委托速率上限
+            撤单每秒: 全局撤单速率上限
+            单品种委托每秒: 单个品种的委托速率上限
+            突发秒数: 令牌桶容量按几秒的速率计算，空闲后允许的突发量
+            时钟: 返回纳秒时间的函数
+        """
+        self.委托每秒 = 委托每秒
+        self.撤单每秒 = 撤单每秒
+        self.单品种委托每秒 = 单品种委托每秒
+        self.突发秒数 = 突发秒数
+        self.时钟 = 时钟
+
+        现在 = 时钟()
+        self._委托桶 = self._创建桶(委托每秒, 现在)
+        self._撤单桶 = self._创建桶(撤单每秒, 现在)
+        self._品种桶 = {}  # {股票代码: 令牌桶}
+
+        self._委托队列 = []  # [(优先级, 序号, _排队请求)]
+        self._撤单队列 = []
+        self._排队 = {}  # {编号: _排队请求}，只含尚未发送的委托
+        self._序号 = 0
+        self._处理中 = False
+
+        self.委托排队延迟 = 延迟直方图()
+        self.撤单排队延迟 = 延迟直方图()
+        self.统计 = {"委托": 0, "撤单": 0, "委托排队": 0, "撤单排队": 0, "排队撤销": 0}
+        self.logger = get_logger("委托限流")
+
+    def _创建桶(self, 速率: float, 现在: int) -> Optional[令牌桶]:
+        if 速率 <= 0:
+            return None
+        return 令牌桶(速率, max(1.0, 速率 * self.突发秒数), 现在)
+
+    def 排队数(self, 撤单: bool = False) -> int:
+        """
+        获取等待发送的请求数
+
+        参数:
+            撤单: 为True时返回撤单数，否则返回委托数
+
+        返回:
+            等待发送的请求数
+        """
+        return len(self._撤单队列 if 撤单 else self._委托队列)
+
+    def 提交委托(self, 股票代码: str, 优先级: int, 发送函数: Callable[[], Any],
+             回调: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        提交一笔委托
+
+        参数:
+            股票代码: 股票代码
+            优先级: 优先级_止损、优先级_平仓 或 优先级_开仓
+            发送函数: 实际发送委托的函数，返回委托号
+            回调: 排队后发送时以发送函数的返回值调用
+
+        返回:
+            当场发送时返回发送函数的返回值，排队时返回以"排队."开头的排队编号
+        """
+        return self._提交(self._委托队列, 股票代码, 优先级, 发送函数, 回调)
+
+    def 提交撤单(self, 股票代码: str, 优先级: int, 撤单函数: Callable[[], Any],
+             回调: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        提交一笔撤单
+
+        参数:
+            股票代码: 股票代码
+            优先级: 优先级_止损、优先级_平仓 或 优先级_开仓
+            撤单函数: 实际发送撤单的函数
+            回调: 排队后发送时以撤单函数的返回值调用
+
+        返回:
+            当场发送时返回撤单函数的返回值，排队时返回排队编号
+        """
+        return self._提交(self._撤单队列, 股票代码, 优先级, 撤单函数, 回调)
+
+    def _提交(self, 队列: list, 股票代码: str, 优先级: int, 发送函数: Callable[[], Any],
+            回调: Optional[Callable[[Any], None]]) -> Any:
+        self._序号 += 1
+        请求 = _排队请求(f"排队.{self._序号}", 股票代码, 发送函数, 回调, self.时钟())
+        heapq.heappush(队列, (优先级, self._序号, 请求))
+        if 队列 is self._委托队列:
+            self._排队[请求.编号] = 请求
+        self.处理()
+        请求.同步 = False
+        if 请求.已发送:
+            return 请求.结果
+        self.统计["撤单排队" if 队列 is self._撤单队列 else "委托排队"] += 1
+        return 请求.编号
+
+    def 撤销排队(self, 编号: str) -> bool:
+        """
+        从队列中撤销一笔尚未发送的委托
+
+        参数:
+            编号: 提交委托返回的排队编号
+
+        返回:
+            是否撤销成功，已发送或编号不存在时返回False
+        """
+        请求 = self._排队.pop(编号, None)
+        if 请求 is None:
+            return False
+        self._委托队列 = [项 for 项 in self._委托队列 if 项[2] is not 请求]
+        heapq.heapify(self._委托队列)
+        self.统计["排队撤销"] += 1
+        return True
+
+    def 撤销品种(self, 股票代码: str) -> int:
+        """
+        从队列中撤销一个品种全部尚未发送的委托，撤单不受影响
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            撤销的委托数
+        """
+        编号列表 = [编号 for 编号, 请求 in self._排队.items() if 请求.股票代码 == 股票代码]
+        if 编号列表:
+            for 编号 in 编号列表:
+                del self._排队[编号]
+            self._委托队列 = [项 for 项 in self._委托队列 if 项[2].编号 in self._排队]
+            heapq.heapify(self._委托队列)
+            self.统计["排队撤销"] += len(编号列表)
+        return len(编号列表)
+
+    def 清空委托(self) -> int:
+        """
+        丢弃全部尚未发送的委托
+
+        返回:
+            丢弃的委托数
+        """
+        数量 = len(self._排队)
+        self._委托队列.clear()
+        self._排队.clear()
+        self.统计["排队撤销"] += 数量
+        return 数量
+
+    def 处理(self, 不限流: bool = False) -> int:
+        """
+        按优先级发送令牌允许的排队请求，撤单先于委托
+
+        参数:
+            不限流: 为True时忽略令牌桶发送全部排队请求，用于策略停止时
+
+        返回:
+            本次发送的请求数
+        """
+        if self._处理中 or not (self._委托队列 or self._撤单队列):
+            return 0
+        self._处理中 = True
+        try:
+            现在 = self.时钟()
+            数量 = 0
+            while self._撤单队列 and (不限流 or self._撤单桶 is None or self._撤单桶.可用(现在)):
+                请求 = heapq.heappop(self._撤单队列)[2]
+                if self._撤单桶 is not None and not 不限流:
+                    self._撤单桶.取用()
+                self.统计["撤单"] += 1
+                self._发送(请求, 现在, self.撤单排队延迟)
+                数量 += 1
+
+            跳过 = []  # 被单品种委托桶挡住的请求，处理完再放回队列
+            while self._委托队列 and (不限流 or self._委托桶 is None or self._委托桶.可用(现在)):
+                项 = heapq.heappop(self._委托队列)
+                请求 = 项[2]
+                if not 不限流:
+                    品种桶 = self._获取品种桶(请求.股票代码, 现在)
+                    if 品种桶 is not None:
+                        if not 品种桶.可用(现在):
+                            跳过.append(项)
+                            continue
+                        品种桶.取用()
+                    if self._委托桶 is not None:
+                        self._委托桶.取用()
+                self._排队.pop(请求.编号, None)
+                self.统计["委托"] += 1
+                self._发送(请求, 现在, self.委托排队延迟)
+                数量 += 1
+            for 项 in 跳过:
+                if 项[2].编号 in self._排队:  # 发送回调中可能已撤销
+                    heapq.heappush(self._委托队列, 项)
+            return 数量
+        finally:
+            self._处理中 = False
+
+    def _获取品种桶(self, 股票代码: str, 现在: int) -> Optional[令牌桶]:
+        if self.单品种委托每秒 <= 0:
+            return None
+        桶 = self._品种桶.get(股票代码)
+        if 桶 is None:
+            桶 = self._品种桶[股票代码] = self._创建桶(self.单品种委托每秒, 现在)
+        return 桶
+
+    def _发送(self, 请求: _排队请求, 现在: int, 延迟: 延迟直方图):
+        延迟.记录(现在 - 请求.入队时间)
+        try:
+            请求.结果 = 请求.发送函数()
+        except Exception as e:
+            self.logger.error(f"发送{请求.股票代码}的排队请求出错: {e}")
+            请求.结果 = None
+        请求.已发送 = True
+        if 请求.回调 is not None and not 请求.同步:
+            try:
+                请求.回调(请求.结果)
+            except Exception as e:
+                self.logger.error(f"处理{请求.股票代码}的排队请求回调出错: {e}")
+
+    def 导出(self) -> Dict:
+        """
+        导出统计信息
+
+        返回:
+            {"统计", "等待中", "委托排队延迟", "撤单排队延迟"}
+        """
+        return {
+            "统计": dict(self.统计),
+            "等待中": {"委托": len(self._委托队列), "撤单": len(self._撤单队列)},
+            "委托排队延迟": self.委托排队延迟.导出(),
+            "撤单排队延迟": self.撤单排队延迟.导出()
+        }
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+延迟统计模块 - 记录行情到下单各阶段的耗时分布
+"""
+from typing import Dict, List
+import time
+
+# 行情处理阶段，索引即阶段编号
+阶段名称 = ["收到行情", "合并等待", "盘口构建", "参数解析", "大象检测", "风控检查", "订单发送"]
+阶段_收到行情 = 0
+阶段_合并等待 = 1
+阶段_盘口构建 = 2
+阶段_参数解析 = 3
+阶段_大象检测 = 4
+阶段_风控检查 = 5
+阶段_订单发送 = 6
+
+
+class 延迟直方图:
+    """
+    固定分桶的延迟直方图（HDR风格的对数-线性分桶）
+
+    每个2的幂次量级再等分为 2^子桶位数 个子桶，相对误差不超过 1/2^子桶位数。
+    桶数组在创建时一次性分配，记录一次只需一次下标计算和一次整数自增。
+    """
+
+    def __init__(self, 子桶位数: int = 3, 最大位数: int = 40):
+        """
+        初始化延迟直方图
+
+        参数:
+            子桶位数: 每个量级的子桶位数，3表示每个量级8个子桶
+            最大位数: 可记录的最大值位数，40位纳秒约18分钟，超出部分计入最后一个桶
+        """
+        self.子桶位数 = 子桶位数
+        self.子桶数 = 1 << 子桶位数
+        self.子桶掩码 = self.子桶数 - 1
+        self.最大位数 = 最大位数
+        self.桶数 = (最大位数 - 子桶位数 + 1) * self.子桶数
+        self.计数 = [0] * self.桶数
+        self.总次数 = 0
+        self.总和 = 0
+        self.最大值 = 0
+
+    def _下标(self, 值: int) -> int:
+        """计算值所在的桶下标"""
+        if 值 < self.子桶数:
+            return 值 if 值 > 0 else 0
+        位移 = 值.bit_length() - self.子桶位数 - 1
+        下标 = (位移 + 1) * self.子桶数 + ((值 >> 位移) & self.子桶掩码)
+        return 下标 if 下标 < self.桶数 else self.桶数 - 1
+
+    def 桶上界(self, 下标: int) -> int:
+        """
+        获取桶的上界值(包含)
+
+        参数:
+            下标: 桶下标
+
+        返回:
+            该桶可容纳的最大值
+        """
+        if 下标 < self.子桶数:
+            return 下标
+        位移 = 下标 // self.子桶数 - 1
+        尾数 = 下标 % self.子桶数 + self.子桶数
+        return ((尾数 + 1) << 位移) - 1
+
+    def 记录(self, 值: int):
+        """
+        记录一个延迟值
+
+        参数:
+            值: 延迟(纳秒)
+        """
+        self.计数[self._下标(值)] += 1
+        self.总次数 += 1
+        self.总和 += 值
+        if 值 > self.最大值:
+            self.最大值 = 值
+
+    def 分位数(self, 分位: float) -> int:
+        """
+        获取分位数(桶上界)
+
+        参数:
+            分位: 分位点，取值0~1
+
+        返回:
+            分位数值(纳秒)
+        """
+        if self.总次数 == 0:
+            return 0
+        目标 = max(1, int(self.总次数 * 分位 + 0.5))
+        累计 = 0
+        for 下标, 次数 in enumerate(self.计数):
+            累计 += 次数
+            if 累计 >= 目标:
+                return min(self.桶上界(下标), self.最大值)
+        return self.最大值
+
+    def 合并(self, 其他: "延迟直方图"):
+        """
+        合并另一个相同分桶的直方图
+
+        参数:
+            其他: 另一个延迟直方图
+        """
+        for 下标, 次数 in enumerate(其他.计数):
+            if 次数:
+                self.计数[下标] += 次数
+        self.总次数 += 其他.总次数
+        self.总和 += 其他.总和
+        self.最大值 = max(self.最大值, 其他.最大值)
+
+    def 重置(self):
+        """清空所有计数"""
+        for 下标 in range(self.桶数):
+            self.计数[下标] = 0
+        self.总次数 = 0
+        self.总和 = 0
+        self.最大值 = 0
+
+    def 导出(self, 包含分桶: bool = False) -> Dict:
+        """
+        导出统计摘要，时间单位为微秒
+
+        参数:
+            包含分桶: 是否导出非空分桶明细
+
+        返回:
+            统计字典
+        """
+        结果 = {
+            "次数": self.总次数,
+            "平均微秒": round(self.总和 / self.总次数 / 1000, 3) if self.总次数 else 0.0,
+            "p50微秒": round(self.分位数(0.50) / 1000, 3),
+            "p90微秒": round(self.分位数(0.90) / 1000, 3),
+            "p99微秒": round(self.分位数(0.99) / 1000, 3),
+            "p999微秒": round(self.分位数(0.999) / 1000, 3),
+            "最大微秒": round(self.最大值 / 1000, 3)
+        }
+        if 包含分桶:
+            结果["分桶"] = [
+                [round(self.桶上界(下标) / 1000, 3), 次数]
+                for 下标, 次数 in enumerate(self.计数) if 次数
+            ]
+        return 结果
+
+
+class 延迟统计器:
+    """
+    行情到下单的分阶段延迟统计器
+
+    在单一策略线程中使用：收到() 在行情进入合并器前标记收到时间，开始() 标记开始处理该品种，
+    两者之间的耗时记为合并等待；之后每经过一个阶段调用 打点()，记录与上一阶段之间的耗时；
+    订单发送时额外记录从收到行情起整条链路的总耗时。
+    """
+
+    def __init__(self, 启用: bool = True):
+        """
+        初始化延迟统计器
+
+        参数:
+            启用: 是否启用统计，关闭后开始()和打点()立即返回
+        """
+        self.启用 = 启用
+        self._时钟 = time.perf_counter_ns
+
+        # 阶段直方图，收到行情阶段没有前序阶段，不记录
+        self.阶段直方图 = [延迟直方图() for _ in 阶段名称]
+        self.总延迟直方图 = 延迟直方图()
+
+        # 品种直方图 {股票代码: [阶段直方图..., 总延迟直方图]}
+        self.品种直方图 = {}
+
+        # 等待处理的品种最早收到行情的时间 {股票代码: 纳秒}
+        self._收到时间 = {}
+
+        # 当前行情的上下文
+        self._当前品种 = None
+        self._开始时间 = 0
+        self._上次时间 = 0
+
+    def _获取品种直方图(self, 股票代码: str) -> List[延迟直方图]:
+        """获取或创建品种的直方图组"""
+        直方图组 = self.品种直方图.get(股票代码)
+        if 直方图组 is None:
+            直方图组 = [延迟直方图() for _ in range(len(阶段名称) + 1)]
+            self.品种直方图[股票代码] = 直方图组
+        return 直方图组
+
+    def 收到(self, 股票代码: str):
+        """
+        标记收到一笔行情，品种已有等待处理的行情时保留最早的收到时间
+
+        参数:
+            股票代码: 股票代码
+        """
+        if self.启用 and 股票代码 not in self._收到时间:
+            self._收到时间[股票代码] = self._时钟()
+
+    def 开始(self, 股票代码: str):
+        """
+        标记开始处理一个品种的行情，之前调用过 收到() 时从收到时间起计并记录合并等待
+
+        参数:
+            股票代码: 股票代码
+        """
+        if not self.启用:
+            return
+        self._当前品种 = self._获取品种直方图(股票代码)
+        现在 = self._时钟()
+        收到时间 = self._收到时间.pop(股票代码, 0)
+        if 收到时间:
+            self._记录两处(self.阶段直方图[阶段_合并等待], self._当前品种[阶段_合并等待], 现在 - 收到时间)
+            self._开始时间 = 收到时间
+        else:
+            self._开始时间 = 现在
+        self._上次时间 = 现在
+
+    def 打点(self, 阶段: int):
+        """
+        标记当前行情完成某个阶段
+
+        参数:
+            阶段: 阶段编号，见 阶段_* 常量
+        """
+        if not self._开始时间:
+            return
+        现在 = self._时钟()
+        self._记录两处(self.阶段直方图[阶段], self._当前品种[阶段], 现在 - self._上次时间)
+        self._上次时间 = 现在
+
+        if 阶段 == 阶段_订单发送:
+            self._记录两处(self.总延迟直方图, self._当前品种[-1], 现在 - self._开始时间)
+
+    @staticmethod
+    def _记录两处(全局: 延迟直方图, 品种: 延迟直方图, 值: int):
+        """同一个值同时记入全局和品种直方图，分桶结构相同，下标只算一次"""
+        下标 = 全局._下标(值)
+        全局.计数[下标] += 1
+        全局.总次数 += 1
+        全局.总和 += 值
+        if 值 > 全局.最大值:
+            全局.最大值 = 值
+        品种.计数[下标] += 1
+        品种.总次数 += 1
+        品种.总和 += 值
+        if 值 > 品种.最大值:
+            品种.最大值 = 值
+
+    def 结束(self):
+        """结束当前行情的统计"""
+        self._开始时间 = 0
+        self._当前品种 = None
+
+    def 重置(self):
+        """清空所有统计"""
+        for 直方图 in self.阶段直方图:
+            直方图.重置()
+        self.总延迟直方图.重置()
+        self.品种直方图.clear()
+        self._收到时间.clear()
+
+    def 导出(self, 包含品种: bool = True, 包含分桶: bool = False) -> Dict:
+        """
+        导出延迟统计
+
+        参数:
+            包含品种: 是否导出各品种的统计
+            包含分桶: 是否导出非空分桶明细
+
+        返回:
+            统计字典
+        """
+        结果 = {
+            "阶段": {
+                阶段名称[i]: self.阶段直方图[i].导出(包含分桶)
+                for i in range(1, len(阶段名称))
+            },
+            "行情到下单": self.总延迟直方图.导出(包含分桶)
+        }
+
+        if 包含品种:
+            品种结果 = {}
+            for 股票代码, 直方图组 in self.品种直方图.items():
+                品种结果[股票代码] = {
+                    阶段名称[i]: 直方图组[i].导出(包含分桶)
+                    for i in range(1, len(阶段名称)) if 直方图组[i].总次数
+                }
+                if 直方图组[-1].总次数:
+                    品种结果[股票代码]["行情到下单"] = 直方图组[-1].导出(包含分桶)
+            结果["品种"] = 品种结果
+
+        return 结果
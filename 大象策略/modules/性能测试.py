@@ -0,0 +1,795 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+性能测试模块 - 对策略热点路径进行基准测试，记录并比对性能基线
+"""
+from typing import Dict, List, Optional, Any, Callable, Tuple
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import logging
+import contextlib
+import subprocess
+import importlib.util
+from datetime import datetime, timedelta
+
+# 添加父目录到系统路径，解决导入问题
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+父目录 = os.path.dirname(当前路径)
+if 父目录 not in sys.path:
+    sys.path.append(父目录)
+
+from .日志 import get_logger
+
+# 默认基线文件路径
+默认基线路径 = os.path.join(父目录, "data", "基准测试基线.json")
+
+
+class 跳过基准(Exception):
+    """基准测试的运行条件不满足（如缺少vnpy）时抛出"""
+
+
+def 计算分位数(已排序数据: List[int], 分位: float) -> float:
+    """
+    计算已排序数据的分位数
+
+    参数:
+        已排序数据: 升序排列的数据
+        分位: 分位点，取值0~1
+
+    返回:
+        分位数值
+    """
+    if not 已排序数据:
+        return 0.0
+    索引 = int(round(分位 * (len(已排序数据) - 1)))
+    return float(已排序数据[索引])
+
+
+def 计时运行(操作: Callable[[], Any], 次数: int, 预热次数: int = 0,
+         后处理: Callable[[], Any] = None) -> Dict:
+    """
+    重复执行操作并统计每次耗时
+
+    参数:
+        操作: 被测操作，无参数
+        次数: 计时次数
+        预热次数: 不计时的预热次数
+        后处理: 每次操作后执行的清理函数，不计入耗时
+
+    返回:
+        统计结果字典
+    """
+    计时器 = time.perf_counter_ns
+
+    for _ in range(预热次数):
+        操作()
+        if 后处理:
+            后处理()
+
+    耗时列表 = [0] * 次数
+    总开始 = 计时器()
+    计时总和 = 0
+    for i in range(次数):
+        开始 = 计时器()
+        操作()
+        耗时 = 计时器() - 开始
+        耗时列表[i] = 耗时
+        计时总和 += 耗时
+        if 后处理:
+            后处理()
+    总耗时 = 计时器() - 总开始
+
+    耗时列表.sort()
+    return {
+        "次数": 次数,
+        "每秒操作数": 次数 / (计时总和 / 1e9) if 计时总和 > 0 else 0.0,
+        "平均微秒": 计时总和 / 次数 / 1000 if 次数 else 0.0,
+        "p50微秒": 计算分位数(耗时列表, 0.50) / 1000,
+        "p99微秒": 计算分位数(耗时列表, 0.99) / 1000,
+        "最大微秒": 耗时列表[-1] / 1000 if 耗时列表 else 0.0,
+        "总耗时秒": 总耗时 / 1e9
+    }
+
+
+# ===== 合成数据 =====
+
+def 生成盘口(随机数: random.Random, 基准价: float, 档位数: int = 5,
+         大象档位: int = None, 大象方向: str = "买盘", 大象数量: int = 0) -> Tuple[list, list]:
+    """
+    生成一份合成的多档盘口
+
+    参数:
+        随机数: 随机数生成器，保证结果可复现
+        基准价: 买一价
+        档位数: 每侧档位数量
+        大象档位: 放置大象的档位索引，None表示没有大象
+        大象方向: "买盘"或"卖盘"
+        大象数量: 大象委托数量(手)
+
+    返回:
+        (买盘, 卖盘)，格式均为 [(价格, 数量), ...]
+    """
+    买盘 = []
+    卖盘 = []
+    for i in range(档位数):
+        买盘.append((round(基准价 - i * 0.01, 2), 随机数.randint(10, 800)))
+        卖盘.append((round(基准价 + (i + 1) * 0.01, 2), 随机数.randint(10, 800)))
+
+    if 大象档位 is not None:
+        目标 = 买盘 if 大象方向 == "买盘" else 卖盘
+        价格, _ = 目标[大象档位]
+        目标[大象档位] = (价格, 大象数量)
+
+    return 买盘, 卖盘
+
+
+def 生成盘口序列(种子: int, 数量: int, 大象比例: float = 0.3, 档位数: int = 5,
+           大象数量: int = 8000) -> List[Tuple[list, list]]:
+    """
+    生成可复现的盘口序列，部分盘口带有买单或卖单大象
+
+    参数:
+        种子: 随机种子
+        数量: 盘口数量
+        大象比例: 带大象的盘口比例
+        档位数: 每侧档位数量
+        大象数量: 大象委托数量(手)
+
+    返回:
+        盘口列表
+    """
+    随机数 = random.Random(种子)
+    序列 = []
+    for _ in range(数量):
+        基准价 = round(随机数.uniform(5, 50), 2)
+        if 随机数.random() < 大象比例:
+            方向 = "买盘" if 随机数.random() < 0.5 else "卖盘"
+            序列.append(生成盘口(随机数, 基准价, 档位数, 随机数.randint(0, min(3, 档位数 - 1)), 方向, 大象数量))
+        else:
+            序列.append(生成盘口(随机数, 基准价, 档位数))
+    return 序列
+
+
+def 生成股票代码(数量: int) -> List[str]:
+    """生成一组沪深股票代码"""
+    代码列表 = []
+    for i in range(数量):
+        前缀 = "600" if i % 2 == 0 else "000"
+        代码列表.append(f"{前缀}{i:03d}")
+    return 代码列表
+
+
+class 桩CTA引擎:
+    """
+    CTA引擎桩对象，只记录策略发出的委托和日志，不连接任何网关
+    """
+
+    def __init__(self):
+        self.main_engine = None
+        self.订单序号 = 0
+        self.已发送订单 = []
+        self.已撤销订单 = []
+        self.已订阅 = []
+        self.日志数量 = 0
+
+    def send_order(self, strategy, direction, offset, price, volume, stop=False, lock=False, net=False):
+        self.订单序号 += 1
+        vt_orderid = f"STUB.{self.订单序号}"
+        self.已发送订单.append((vt_orderid, direction, price, volume))
+        return [vt_orderid]
+
+    def cancel_order(self, strategy, vt_orderid):
+        self.已撤销订单.append(vt_orderid)
+
+    def cancel_all(self, strategy):
+        pass
+
+    def subscribe(self, vt_symbol):
+        self.已订阅.append(vt_symbol)
+
+    def write_log(self, msg, strategy=None):
+        self.日志数量 += 1
+
+    def put_strategy_event(self, strategy):
+        pass
+
+    def sync_strategy_data(self, strategy):
+        pass
+
+    def get_engine_type(self):
+        return None
+
+    def get_pricetick(self, strategy):
+        return 0.01
+
+
+@contextlib.contextmanager
+def 静默输出():
+    """屏蔽被测代码的print输出和INFO级别日志，避免终端IO干扰计时"""
+    with open(os.devnull, "w", encoding="utf-8") as 空设备:
+        with contextlib.redirect_stdout(空设备):
+            logging.disable(logging.INFO)
+            try:
+                yield
+            finally:
+                logging.disable(logging.NOTSET)
+
+
+class 基准测试器:
+    """基准测试器，管理基准用例、运行计时、保存和比对基线"""
+
+    def __init__(self, 种子: int = 20250329, 次数: int = 20000, 预热次数: int = 500):
+        """
+        初始化基准测试器
+
+        参数:
+            种子: 合成数据随机种子
+            次数: 每个基准的默认计时次数
+            预热次数: 每个基准的预热次数
+        """
+        self.种子 = 种子
+        self.次数 = 次数
+        self.预热次数 = 预热次数
+        self.基准用例 = {}  # {名称: {"准备": 函数, "说明": 说明, "次数": 次数}}
+        self.基准结果 = {}  # {名称: 结果字典}
+        self.logger = get_logger("性能测试")
+
+    def 添加基准(self, 名称: str, 准备函数: Callable, 说明: str = "", 次数: int = None, 预热次数: int = None):
+        """
+        添加基准用例
+
+        参数:
+            名称: 基准名称
+            准备函数: 接受基准测试器，返回 (操作, 后处理, 清理) 三元组；后处理和清理可以为None
+            说明: 基准说明
+            次数: 计时次数，默认使用测试器设置
+            预热次数: 预热次数，默认使用测试器设置
+        """
+        self.基准用例[名称] = {
+            "准备": 准备函数,
+            "说明": 说明,
+            "次数": 次数,
+            "预热次数": 预热次数
+        }
+
+    def 运行(self, 名称: str = None) -> Dict:
+        """
+        运行基准用例
+
+        参数:
+            名称: 要运行的基准名称，如果为None则运行所有基准
+
+        返回:
+            基准结果字典
+        """
+        名称列表 = [名称] if 名称 is not None else list(self.基准用例.keys())
+
+        for 基准名称 in 名称列表:
+            if 基准名称 not in self.基准用例:
+                self.logger.error(f"基准用例 {基准名称} 不存在")
+                continue
+
+            用例 = self.基准用例[基准名称]
+            次数 = 用例["次数"] or self.次数
+            预热次数 = 用例["预热次数"] if 用例["预热次数"] is not None else min(self.预热次数, 次数)
+            清理 = None
+            try:
+                with 静默输出():
+                    操作, 后处理, 清理 = 用例["准备"](self)
+                    结果 = 计时运行(操作, 次数, 预热次数, 后处理)
+                结果["说明"] = 用例["说明"]
+                self.logger.info(f"基准 {基准名称}: {结果['每秒操作数']:.0f} ops/s, p50 {结果['p50微秒']:.1f}us, p99 {结果['p99微秒']:.1f}us")
+            except 跳过基准 as e:
+                结果 = {"跳过": True, "原因": str(e), "说明": 用例["说明"]}
+                self.logger.warning(f"跳过基准 {基准名称}: {e}")
+            except Exception as e:
+                结果 = {"错误": str(e), "说明": 用例["说明"]}
+                self.logger.error(f"基准 {基准名称} 执行出错: {e}")
+            finally:
+                if 清理:
+                    清理()
+
+            self.基准结果[基准名称] = 结果
+
+        return self.基准结果
+
+    def 保存基线(self, 路径: str = 默认基线路径):
+        """
+        将本次结果保存为基线
+
+        参数:
+            路径: 基线文件路径
+        """
+        os.makedirs(os.path.dirname(路径), exist_ok=True)
+        数据 = {
+            "生成时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "种子": self.种子,
+            "Python版本": sys.version.split()[0],
+            "结果": {k: v for k, v in self.基准结果.items() if "每秒操作数" in v}
+        }
+        with open(路径, "w", encoding="utf-8") as f:
+            json.dump(数据, f, indent=4, ensure_ascii=False)
+        self.logger.info(f"已保存基线到 {路径}")
+
+    def 对比基线(self, 路径: str = 默认基线路径, 阈值: float = 0.2) -> List[Dict]:
+        """
+        将本次结果与基线比对，找出性能回退的基准
+
+        参数:
+            路径: 基线文件路径
+            阈值: 允许的回退比例，0.2表示吞吐下降或p99上升超过20%视为回退
+
+        返回:
+            回退记录列表
+        """
+        if not os.path.exists(路径):
+            self.logger.warning(f"基线文件不存在: {路径}")
+            return []
+
+        with open(路径, "r", encoding="utf-8") as f:
+            基线 = json.load(f).get("结果", {})
+
+        回退列表 = []
+        for 名称, 结果 in self.基准结果.items():
+            if 名称 not in 基线 or "每秒操作数" not in 结果:
+                continue
+            旧结果 = 基线[名称]
+
+            if 结果["每秒操作数"] < 旧结果["每秒操作数"] * (1 - 阈值):
+                回退列表.append({
+                    "名称": 名称,
+                    "指标": "每秒操作数",
+                    "基线": 旧结果["每秒操作数"],
+                    "当前": 结果["每秒操作数"]
+                })
+            if 结果["p99微秒"] > 旧结果["p99微秒"] * (1 + 阈值):
+                回退列表.append({
+                    "名称": 名称,
+                    "指标": "p99微秒",
+                    "基线": 旧结果["p99微秒"],
+                    "当前": 结果["p99微秒"]
+                })
+
+        return 回退列表
+
+    def 出错基准(self) -> List[str]:
+        """
+        获取执行出错的基准，出错的基准没有计时结果，不能与基线比对，应视为失败
+
+        返回:
+            出错的基准名称列表
+        """
+        return [名称 for 名称, 结果 in self.基准结果.items() if "错误" in 结果]
+
+    def 生成报告(self, 回退列表: List[Dict] = None) -> str:
+        """
+        生成基准测试报告
+
+        参数:
+            回退列表: 对比基线得到的回退记录
+
+        返回:
+            报告文本
+        """
+        报告 = "大象策略性能基准报告\n"
+        报告 += f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        报告 += f"随机种子: {self.种子}\n"
+        报告 += "=" * 78 + "\n"
+        报告 += f"{'基准名称':<24}{'ops/s':>12}{'平均(us)':>10}{'p50(us)':>10}{'p99(us)':>10}{'最大(us)':>12}\n"
+        报告 += "-" * 78 + "\n"
+
+        for 名称, 结果 in self.基准结果.items():
+            if "每秒操作数" in 结果:
+                报告 += (f"{名称:<24}{结果['每秒操作数']:>12.0f}{结果['平均微秒']:>10.2f}"
+                       f"{结果['p50微秒']:>10.2f}{结果['p99微秒']:>10.2f}{结果['最大微秒']:>12.2f}\n")
+            elif 结果.get("跳过"):
+                报告 += f"{名称:<24}跳过: {结果['原因']}\n"
+            else:
+                报告 += f"{名称:<24}错误: {结果.get('错误', '未知')}\n"
+
+        if 回退列表:
+            报告 += "-" * 78 + "\n"
+            报告 += "性能回退:\n"
+            for 记录 in 回退列表:
+                报告 += f"  {记录['名称']} {记录['指标']}: 基线 {记录['基线']:.2f} -> 当前 {记录['当前']:.2f}\n"
+
+        return 报告
+
+
+# ===== 基准用例 =====
+
+def _准备检测大象(测试器: 基准测试器, 卖单: bool = False, 档位数: int = 5):
+    """准备大象识别基准"""
+    from .大象识别 import 大象识别器
+
+    识别器 = 大象识别器(
+        大象委托量阈值=5000000.0,
+        大象价差阈值=3,
+        确认次数=3,
+        大象稳定时间=5,
+        卖单委托量阈值=5000000.0,
+        卖单价差阈值=3
+    )
+    # 识别器的盘口价格为整数价格档，与策略在行情入口换算后的格式一致
+    盘口序列 = [
+        tuple([(int(价格 * 100 + 0.5), 数量) for 价格, 数量 in 档位] for 档位 in 盘口)
+        for 盘口 in 生成盘口序列(测试器.种子, 1024, 档位数=档位数)
+    ]
+    股票列表 = 生成股票代码(64)
+    状态 = {"序号": 0, "时间戳": 1_700_000_000_000}
+    检测 = 识别器.检测卖单大象 if 卖单 else 识别器.检测大象
+
+    def 操作():
+        序号 = 状态["序号"]
+        买盘, 卖盘 = 盘口序列[序号 & 1023]
+        状态["时间戳"] += 500
+        检测(股票列表[序号 & 63], 状态["时间戳"], 买盘, 卖盘)
+        状态["序号"] = 序号 + 1
+
+    return 操作, None, None
+
+
+def _准备重复盘口(测试器: 基准测试器):
+    """准备盘口未变化时的确认推进基准，与检测大象使用相同的盘口，每个品种先完整检测一次"""
+    from .大象识别 import 大象识别器
+
+    识别器 = 大象识别器(大象委托量阈值=5000000.0, 卖单委托量阈值=5000000.0)
+    盘口序列 = [
+        tuple([(int(价格 * 100 + 0.5), 数量) for 价格, 数量 in 档位] for 档位 in 盘口)
+        for 盘口 in 生成盘口序列(测试器.种子, 64)
+    ]
+    股票列表 = 生成股票代码(64)
+    for 代码, (买盘, 卖盘) in zip(股票列表, 盘口序列):
+        识别器.检测大象(代码, 1_700_000_000_000, 买盘, 卖盘)
+        识别器.检测卖单大象(代码, 1_700_000_000_000, 买盘, 卖盘)
+    状态 = {"序号": 0, "时间戳": 1_700_000_000_000}
+
+    def 操作():
+        序号 = 状态["序号"]
+        状态["时间戳"] += 500
+        识别器.重复盘口(股票列表[序号 & 63], 状态["时间戳"])
+        状态["序号"] = 序号 + 1
+
+    return 操作, None, None
+
+
+def _准备盘口适配(测试器: 基准测试器, 档位数: int = 5):
+    """准备行情到整数盘口的转换基准，第6档起的深档放在 extra 中，与Level-2接口一致"""
+    from types import SimpleNamespace
+    from .盘口适配 import 盘口适配器
+    from .品种信息 import 品种信息
+
+    适配 = 盘口适配器(档位数=档位数, 读取委托笔数=档位数 > 5)
+    品种 = 品种信息(0, "600000", "SSE")
+    随机数 = random.Random(测试器.种子)
+    开始时间 = datetime(2025, 3, 31, 10, 0, 0)
+    行情序列 = []
+    for i, (买盘, 卖盘) in enumerate(生成盘口序列(测试器.种子, 256, 档位数=档位数)):
+        字段 = {}
+        for j in range(档位数):
+            字段[f"bid_price_{j + 1}"], 字段[f"bid_volume_{j + 1}"] = 买盘[j]
+            字段[f"ask_price_{j + 1}"], 字段[f"ask_volume_{j + 1}"] = 卖盘[j]
+            字段[f"bid_order_count_{j + 1}"] = 随机数.randint(1, 50)
+            字段[f"ask_order_count_{j + 1}"] = 随机数.randint(1, 50)
+        extra = {名: 字段.pop(名) for 名 in list(字段) if 名.startswith(("bid_order", "ask_order"))
+                 or int(名.rsplit("_", 1)[1]) > 5}
+        行情序列.append(SimpleNamespace(datetime=开始时间 + timedelta(seconds=3 * i), last_price=买盘[0][0],
+                                    extra=extra, **字段))
+    状态 = {"序号": 0}
+
+    def 操作():
+        适配.转换(行情序列[状态["序号"] & 255], 品种)
+        状态["序号"] += 1
+
+    return 操作, None, None
+
+
+def _准备行情合并(测试器: 基准测试器):
+    """准备行情合并基准，模拟突发行情：每8笔中有7笔到达时事件队列仍有积压"""
+    from .行情合并 import 行情合并器
+
+    状态 = {"序号": 0}
+    合并器 = 行情合并器(最大等待毫秒=200.0, 积压探测=lambda: 状态["序号"] & 7)
+    股票列表 = 生成股票代码(64)
+    随机数 = random.Random(测试器.种子)
+    代码序列 = [随机数.choice(股票列表) for _ in range(1024)]
+
+    def 处理函数(股票代码, 行情):
+        pass
+
+    def 操作():
+        序号 = 状态["序号"]
+        合并器.放入(代码序列[序号 & 1023], 序号)
+        合并器.处理(处理函数)
+        状态["序号"] = 序号 + 1
+
+    return 操作, None, None
+
+
+def _准备大象监控(测试器: 基准测试器):
+    """准备大象消失监控基准，每笔行情检查一个已登记的品种"""
+    from .大象监控 import 大象消失监控器
+
+    监控 = 大象消失监控器()
+    股票列表 = 生成股票代码(64)
+    随机数 = random.Random(测试器.种子)
+    盘口列表 = []
+    for 代码 in 股票列表:
+        基准档 = 随机数.randint(500, 5000)
+        监控.登记({"股票代码": 代码, "类型": "买单大象", "价格档": 基准档 - 1, "数量": 8000})
+        买盘 = [(基准档 - i, 随机数.randint(10, 800)) for i in range(5)]
+        买盘[1] = (基准档 - 1, 8000)
+        卖盘 = [(基准档 + i + 1, 随机数.randint(10, 800)) for i in range(5)]
+        盘口列表.append({"买盘": 买盘, "卖盘": 卖盘})
+    状态 = {"序号": 0}
+
+    def 操作():
+        序号 = 状态["序号"] & 63
+        监控.检查(股票列表[序号], 盘口列表[序号])
+        状态["序号"] += 1
+
+    return 操作, None, None
+
+
+def _准备盘口增量(测试器: 基准测试器):
+    """准备盘口增量基准，64个品种轮流输入随机游走的盘口"""
+    from .盘口增量 import 盘口增量引擎
+
+    引擎 = 盘口增量引擎()
+    引擎.订阅(lambda 股票代码, 时间戳, 事件列表: None)
+    股票列表 = 生成股票代码(64)
+    随机数 = random.Random(测试器.种子)
+    盘口序列 = []
+    基准档 = 1000
+    for _ in range(1024):
+        基准档 += 随机数.choice((-1, 0, 0, 1))
+        买盘 = [(基准档 - i, 随机数.randint(10, 800)) for i in range(5)]
+        卖盘 = [(基准档 + i + 1, 随机数.randint(10, 800)) for i in range(5)]
+        盘口序列.append((买盘, 卖盘, 基准档))
+    状态 = {"序号": 0, "时间戳": 1_700_000_000_000, "成交量": 0}
+
+    def 操作():
+        序号 = 状态["序号"]
+        买盘, 卖盘, 最新价档 = 盘口序列[序号 & 1023]
+        状态["时间戳"] += 500
+        状态["成交量"] += 100
+        引擎.更新(股票列表[序号 & 63], 状态["时间戳"], 买盘, 卖盘, 最新价档, 状态["成交量"])
+        状态["序号"] = 序号 + 1
+
+    return 操作, None, None
+
+
+def _准备获取品种参数(测试器: 基准测试器):
+    """准备参数管理基准，使用临时配置目录"""
+    from .参数管理 import 参数管理器
+
+    临时目录 = tempfile.TemporaryDirectory()
+    管理器 = 参数管理器(配置目录=临时目录.name, 写入延迟=0)
+    股票列表 = 生成股票代码(200)
+    随机数 = random.Random(测试器.种子)
+    # 经设置接口修改参数，批量修改结束时重建快照，计时读取的是生效的参数
+    with 管理器.批量修改():
+        管理器.导入参数({"全局参数": {
+            "大象识别": {"大象委托量阈值": 5000000, "大象价差阈值": 3, "大象确认次数": 3, "大象稳定时间": 5},
+            "交易执行": {"价格偏移量": 0.01, "等待时间": 10, "冷却时间": 60, "调戏交易量": 100},
+            "风险控制": {"单笔最大亏损比例": 0.01, "单股最大交易次数": 10},
+            "资金管理": {"单股最大仓位比例": 0.1}
+        }})
+        for 代码 in 股票列表[::4]:
+            管理器.设置品种参数(代码, "大象识别", "大象委托量阈值", 随机数.randint(1, 9) * 1000000)
+    状态 = {"序号": 0}
+
+    def 操作():
+        管理器.获取品种所有参数(股票列表[状态["序号"] % 200])
+        状态["序号"] += 1
+
+    return 操作, None, 临时目录.cleanup
+
+
+def _准备检查风控(测试器: 基准测试器):
+    """准备风险控制基准"""
+    from .风险控制 import 风险控制器
+
+    风控 = 风险控制器(单股最大交易次数=10 ** 9, 总交易次数限制=10 ** 9, 最大连续亏损次数=10 ** 9)
+    风控.更新总资产(1000000.0)
+    股票列表 = 生成股票代码(200)
+    随机数 = random.Random(测试器.种子)
+    for 代码 in 股票列表:
+        风控.股票盈亏[代码] = 随机数.uniform(-1000, 1000)
+        风控.股票交易次数[代码] = 随机数.randint(0, 5)
+    盈亏序列 = [随机数.uniform(-500, 500) for _ in range(1024)]
+    状态 = {"序号": 0}
+
+    def 操作():
+        序号 = 状态["序号"]
+        风控.检查风控(股票列表[序号 % 200], 盈亏序列[序号 & 1023])
+        状态["序号"] = 序号 + 1
+
+    return 操作, None, None
+
+
+def _准备更新订单状态(测试器: 基准测试器):
+    """准备订单状态更新基准，需要vnpy"""
+    try:
+        from vnpy.trader.constant import Direction, Exchange, Status
+        from vnpy.trader.object import OrderData
+        from .交易执行 import 交易执行器
+        from .风险控制 import 风险控制器
+    except ImportError as e:
+        raise 跳过基准(f"缺少vnpy: {e}")
+
+    执行器 = 交易执行器(交易接口=桩CTA引擎(), 风控=风险控制器())
+    股票列表 = 生成股票代码(64)
+    随机数 = random.Random(测试器.种子)
+    订单序列 = []
+    for i in range(2048):
+        代码 = 股票列表[i % 64]
+        订单 = OrderData(
+            gateway_name="STUB",
+            symbol=代码,
+            exchange=Exchange.SSE if 代码.startswith("6") else Exchange.SZSE,
+            orderid=str(i),
+            direction=Direction.LONG if 随机数.random() < 0.5 else Direction.SHORT,
+            price=round(随机数.uniform(5, 50), 2),
+            volume=100
+        )
+        # 每个订单依次经历 未成交 -> 全部成交/部分成交后撤销，成交数量与状态一致
+        订单序列.append((订单, Status.NOTTRADED, 0))
+        if 随机数.random() < 0.7:
+            订单序列.append((订单, Status.ALLTRADED, 订单.volume))
+        else:
+            订单序列.append((订单, Status.CANCELLED, 随机数.choice((0, 订单.volume // 2))))
+    状态 = {"序号": 0}
+
+    def 操作():
+        订单, 订单状态, 已成交 = 订单序列[状态["序号"] & 4095]
+        订单.status = 订单状态
+        订单.traded = 已成交
+        执行器.更新订单状态(订单)
+        状态["序号"] += 1
+
+    def 后处理():
+        # 控制订单历史的增长，避免内存占用影响后续计时
+        if len(执行器.订单历史) > 4096:
+            执行器.订单历史.clear()
+
+    return 操作, 后处理, None
+
+
+def _准备完整行情路径(测试器: 基准测试器):
+    """准备 on_tick -> 下单 的端到端基准，使用桩CTA引擎，需要vnpy"""
+    try:
+        from vnpy.trader.constant import Exchange
+        from vnpy.trader.object import TickData
+        from 大象策略 import 大象策略
+    except ImportError as e:
+        raise 跳过基准(f"缺少vnpy: {e}")
+
+    原工作目录 = os.getcwd()
+    临时目录 = tempfile.TemporaryDirectory()
+    os.chdir(临时目录.name)
+
+    引擎 = 桩CTA引擎()
+    策略 = 大象策略(cta_engine=引擎, strategy_name="基准测试", vt_symbol="", setting={})
+    策略.inited = True
+    策略.trading = True
+
+    # 合成数据按策略实际使用的阈值放置大象
+    阈值 = max(策略.大象识别.大象委托量阈值, 策略.大象识别.卖单委托量阈值)
+    股票列表 = 生成股票代码(50)
+    随机数 = random.Random(测试器.种子)
+    开始时间 = datetime(2025, 3, 31, 10, 0, 0)
+    行情序列 = []
+    for i in range(4096):
+        代码 = 股票列表[i % 50]
+        基准价 = 10.0 + (i % 50) * 0.1
+        大象数量 = int(阈值 * 2 / 100 / 基准价) + 1
+        方向 = "买盘" if (i // 50) % 2 == 0 else "卖盘"
+        买盘, 卖盘 = 生成盘口(随机数, round(基准价, 2), 5, 1, 方向, 大象数量)
+        字段 = {}
+        for j in range(5):
+            字段[f"bid_price_{j + 1}"], 字段[f"bid_volume_{j + 1}"] = 买盘[j]
+            字段[f"ask_price_{j + 1}"], 字段[f"ask_volume_{j + 1}"] = 卖盘[j]
+        行情序列.append(TickData(
+            gateway_name="STUB",
+            symbol=代码,
+            exchange=Exchange.SSE if 代码.startswith("6") else Exchange.SZSE,
+            datetime=开始时间 + timedelta(seconds=3 * (i // 50)),
+            last_price=买盘[0][0],
+            **字段
+        ))
+    状态 = {"序号": 0, "已发送": 0}
+
+    def 操作():
+        策略.on_tick(行情序列[状态["序号"] & 4095])
+        状态["序号"] += 1
+
+    def 后处理():
+        # 下单后清理交易状态和冷却期，使后续行情能继续走到下单路径
+        if len(引擎.已发送订单) != 状态["已发送"]:
+            状态["已发送"] = len(引擎.已发送订单)
+            策略.交易状态.clear()
+            策略.交易执行.冷却期.clear()
+
+    def 清理():
+        os.chdir(原工作目录)
+        临时目录.cleanup()
+
+    return 操作, 后处理, 清理
+
+
+# 冷启动脚本：导入策略、创建实例并完成 on_init，与崩溃后重启的路径一致
+_冷启动脚本 = """
+import sys
+sys.path.insert(0, {根目录!r})
+from 大象策略 import 大象策略
+from modules.性能测试 import 桩CTA引擎
+策略 = 大象策略(cta_engine=桩CTA引擎(), strategy_name="冷启动", vt_symbol="", setting={{}})
+策略.on_init()
+"""
+
+# 纯Python模块的导入脚本，不依赖vnpy
+_模块导入脚本 = """
+import sys
+sys.path.insert(0, {根目录!r})
+import modules.资金管理, modules.大象识别, modules.风险控制, modules.参数管理, modules.延迟统计, modules.指标
+"""
+
+
+def _准备子进程(脚本: str):
+    """在临时工作目录中以全新解释器执行脚本，每次操作即一次冷启动"""
+    临时目录 = tempfile.TemporaryDirectory()
+    命令 = [sys.executable, "-c", 脚本.format(根目录=父目录)]
+
+    def 操作():
+        结果 = subprocess.run(命令, cwd=临时目录.name, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if 结果.returncode != 0:
+            raise RuntimeError(结果.stderr.decode("utf-8", "replace").strip().splitlines()[-1])
+
+    return 操作, None, 临时目录.cleanup
+
+
+def _准备冷启动(测试器: 基准测试器):
+    """准备策略冷启动基准，需要vnpy"""
+    if importlib.util.find_spec("vnpy") is None or importlib.util.find_spec("vnpy_ctastrategy") is None:
+        raise 跳过基准("缺少vnpy")
+    return _准备子进程(_冷启动脚本)
+
+
+def _准备模块导入(测试器: 基准测试器):
+    """准备策略纯Python模块的冷导入基准"""
+    return _准备子进程(_模块导入脚本)
+
+
+def 创建默认基准测试器(种子: int = 20250329, 次数: int = 20000) -> 基准测试器:
+    """
+    创建包含全部热点路径基准的测试器
+
+    参数:
+        种子: 合成数据随机种子
+        次数: 每个基准的计时次数
+
+    返回:
+        基准测试器
+    """
+    测试器 = 基准测试器(种子=种子, 次数=次数)
+    测试器.添加基准("检测大象", lambda t: _准备检测大象(t), "大象识别器.检测大象")
+    测试器.添加基准("检测卖单大象", lambda t: _准备检测大象(t, 卖单=True), "大象识别器.检测卖单大象")
+    测试器.添加基准("检测大象10档", lambda t: _准备检测大象(t, 档位数=10), "大象识别器.检测大象，Level-2十档盘口")
+    测试器.添加基准("重复盘口", _准备重复盘口, "大象识别器.重复盘口，盘口未变化时代替两侧检测")
+    测试器.添加基准("盘口适配", lambda t: _准备盘口适配(t), "盘口适配器.转换，五档行情")
+    测试器.添加基准("盘口适配10档", lambda t: _准备盘口适配(t, 档位数=10), "盘口适配器.转换，十档行情和委托笔数")
+    测试器.添加基准("大象消失监控", _准备大象监控, "大象消失监控器.检查")
+    测试器.添加基准("行情合并", _准备行情合并, "行情合并器.放入和处理，突发行情")
+    测试器.添加基准("盘口增量", _准备盘口增量, "盘口增量引擎.更新")
+    测试器.添加基准("获取品种所有参数", _准备获取品种参数, "参数管理器.获取品种所有参数")
+    测试器.添加基准("检查风控", _准备检查风控, "风险控制器.检查风控")
+    测试器.添加基准("更新订单状态", _准备更新订单状态, "交易执行器.更新订单状态")
+    测试器.添加基准("完整行情路径", _准备完整行情路径, "大象策略.on_tick 到下单")
+    测试器.添加基准("模块冷导入", _准备模块导入, "新解释器导入策略纯Python模块", 次数=10, 预热次数=1)
+    测试器.添加基准("冷启动", _准备冷启动, "新解释器导入大象策略、创建实例并完成on_init", 次数=10, 预热次数=1)
+    return 测试器
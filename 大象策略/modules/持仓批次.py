@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+持仓批次模块 - 按买入批次记录持仓，卖出先进先出，按交易日判断T+1可卖数量
+"""
+from array import array
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+# 头部已消耗的批次超过该数量且超过一半时压缩数组
+压缩阈值 = 32
+
+
+class _品种批次:
+    """一个品种的未平批次，数量、价格和交易日分别存放在并行数组中"""
+
+    __slots__ = ("数量", "价格", "交易日", "头", "总数量", "成本总额", "当日数量", "当日")
+
+    def __init__(self):
+        self.数量 = array("q")
+        self.价格 = array("d")
+        self.交易日 = array("l")  # date.toordinal()
+        self.头 = 0  # 第一个未消耗的批次
+        self.总数量 = 0
+        self.成本总额 = 0.0
+        self.当日数量 = 0  # 当日买入的数量，当日 等于当前交易日时冻结
+        self.当日 = 0
+
+
+class 持仓批次账本:
+    """
+    持仓批次账本
+
+    每笔买入追加一个批次(数量、价格、交易日)，同一交易日同一价格的连续买入合并到上一个批次；
+    卖出从最早的批次开始消耗，返回按批次成本计算的已实现盈亏。消耗完的批次从数组头部压缩掉，
+    清仓的品种整体删除，占用的内存只与未平批次数有关，与成交笔数无关。
+
+    每个品种单独累计当日买入数量，可卖数量 = 总数量 - 当日买入数量，查询为O(1)；
+    交易日切换只改变当前交易日，旧交易日的当日买入数量在下次访问时视为已解冻，不需要遍历品种。
+    """
+
+    def __init__(self, 当前交易日: Optional[date] = None):
+        """
+        初始化持仓批次账本
+
+        参数:
+            当前交易日: 当前交易日，默认为当天
+        """
+        self._品种 = {}  # {股票代码: _品种批次}
+        self._当前 = (当前交易日 or date.today()).toordinal()
+
+    def __len__(self) -> int:
+        return len(self._品种)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._品种))
+
+    def __contains__(self, 股票代码: str) -> bool:
+        return 股票代码 in self._品种
+
+    @property
+    def 当前交易日(self) -> date:
+        """当前交易日"""
+        return date.fromordinal(self._当前)
+
+    def 切换交易日(self, 新交易日: date):
+        """
+        切换交易日，此前买入的批次全部变为可卖
+
+        参数:
+            新交易日: 新的交易日
+        """
+        self._当前 = 新交易日.toordinal()
+
+    def 买入(self, 股票代码: str, 数量: int, 价格: float):
+        """
+        追加一个买入批次，当日不可卖出
+
+        参数:
+            股票代码: 股票代码
+            数量: 买入数量，vnpy的浮点成交数量按整数处理
+            价格: 买入价格
+        """
+        数量 = int(数量)
+        if 数量 <= 0:
+            return
+        批次 = self._品种.get(股票代码)
+        if 批次 is None:
+            批次 = self._品种[股票代码] = _品种批次()
+
+        末尾 = len(批次.数量) - 1
+        if 末尾 >= 批次.头 and 批次.交易日[末尾] == self._当前 and 批次.价格[末尾] == 价格:
+            批次.数量[末尾] += 数量
+        else:
+            批次.数量.append(数量)
+            批次.价格.append(价格)
+            批次.交易日.append(self._当前)
+
+        批次.总数量 += 数量
+        批次.成本总额 += 数量 * 价格
+        if 批次.当日 != self._当前:
+            批次.当日 = self._当前
+            批次.当日数量 = 0
+        批次.当日数量 += 数量
+
+    def 卖出(self, 股票代码: str, 数量: int, 价格: float) -> float:
+        """
+        从最早的批次开始消耗
+
+        参数:
+            股票代码: 股票代码
+            数量: 卖出数量
+            价格: 卖出价格
+
+        返回:
+            按批次成本计算的已实现盈亏
+
+        异常:
+            ValueError: 可卖数量不足
+        """
+        数量 = int(数量)
+        可卖 = self.可卖数量(股票代码)
+        if 可卖 < 数量:
+            raise ValueError(f"可交易数量不足: 需要{数量}, 实际{可卖}")
+        if 数量 <= 0:
+            return 0.0
+
+        批次 = self._品种[股票代码]
+        剩余 = 数量
+        成本 = 0.0
+        头 = 批次.头
+        while 剩余:
+            批次数量 = 批次.数量[头]
+            if 批次数量 <= 剩余:
+                成本 += 批次数量 * 批次.价格[头]
+                剩余 -= 批次数量
+                头 += 1
+            else:
+                成本 += 剩余 * 批次.价格[头]
+                批次.数量[头] = 批次数量 - 剩余
+                剩余 = 0
+
+        批次.总数量 -= 数量
+        if 批次.总数量 == 0:
+            del self._品种[股票代码]
+        else:
+            批次.成本总额 -= 成本
+            if 头 > 压缩阈值 and 头 * 2 > len(批次.数量):
+                del 批次.数量[:头]
+                del 批次.价格[:头]
+                del 批次.交易日[:头]
+                头 = 0
+            批次.头 = 头
+        return 数量 * 价格 - 成本
+
+    def 总数量(self, 股票代码: str) -> int:
+        """
+        获取总持仓数量
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            总持仓数量
+        """
+        批次 = self._品种.get(股票代码)
+        return 批次.总数量 if 批次 else 0
+
+    def 冻结数量(self, 股票代码: str) -> int:
+        """
+        获取当日买入、不可卖出的数量
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            冻结数量
+        """
+        批次 = self._品种.get(股票代码)
+        if 批次 is None or 批次.当日 != self._当前:
+            return 0
+        return 批次.当日数量
+
+    def 可卖数量(self, 股票代码: str) -> int:
+        """
+        获取可卖数量
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            可卖数量
+        """
+        批次 = self._品种.get(股票代码)
+        if 批次 is None:
+            return 0
+        return 批次.总数量 - (批次.当日数量 if 批次.当日 == self._当前 else 0)
+
+    def 成本价(self, 股票代码: str) -> float:
+        """
+        获取未平批次的平均成本价
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            成本价，没有持仓时为0
+        """
+        批次 = self._品种.get(股票代码)
+        return 批次.成本总额 / 批次.总数量 if 批次 else 0.0
+
+    def 批次数(self, 股票代码: Optional[str] = None) -> int:
+        """
+        获取未平批次数
+
+        参数:
+            股票代码: 股票代码，为None时返回全部品种合计
+
+        返回:
+            未平批次数
+        """
+        if 股票代码 is not None:
+            批次 = self._品种.get(股票代码)
+            return len(批次.数量) - 批次.头 if 批次 else 0
+        return sum(len(批次.数量) - 批次.头 for 批次 in self._品种.values())
+
+    def 导出(self) -> Dict[str, List[List]]:
+        """
+        导出全部未平批次，用于序列化
+
+        返回:
+            {股票代码: [[数量, 价格, 交易日(ISO格式)], ...]}，按买入先后排列
+        """
+        结果 = {}
+        for 代码, 批次 in self._品种.items():
+            结果[代码] = [
+                [批次.数量[i], 批次.价格[i], date.fromordinal(批次.交易日[i]).isoformat()]
+                for i in range(批次.头, len(批次.数量))
+            ]
+        return 结果
+
+    def 加载(self, 数据: Dict[str, List[List]]):
+        """
+        从导出的批次恢复，替换现有内容
+
+        参数:
+            数据: 导出 的返回值
+        """
+        self._品种 = {}
+        for 代码, 批次列表 in 数据.items():
+            for 数量, 价格, 交易日 in 批次列表:
+                if int(数量) <= 0:
+                    continue
+                序数 = date.fromisoformat(交易日).toordinal()
+                批次 = self._品种.get(代码)
+                if 批次 is None:
+                    批次 = self._品种[代码] = _品种批次()
+                批次.数量.append(int(数量))
+                批次.价格.append(float(价格))
+                批次.交易日.append(序数)
+                批次.总数量 += int(数量)
+                批次.成本总额 += int(数量) * float(价格)
+                if 序数 >= self._当前:
+                    if 批次.当日 != self._当前:
+                        批次.当日 = self._当前
+                        批次.当日数量 = 0
+                    批次.当日数量 += int(数量)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+指标模块 - 轻量的计数器/仪表注册表，导出Prometheus文本格式
+"""
+from typing import Callable, Dict, List, Tuple, Union
+import math
+import threading
+
+# Prometheus文本格式的Content-Type
+文本格式类型 = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _格式化数值(值: float) -> str:
+    """按Prometheus文本格式输出数值"""
+    if isinstance(值, bool):
+        return "1" if 值 else "0"
+    if isinstance(值, int):
+        return str(值)
+    if math.isnan(值):
+        return "NaN"
+    if math.isinf(值):
+        return "+Inf" if 值 > 0 else "-Inf"
+    return repr(float(值))
+
+
+def _转义标签值(值) -> str:
+    """转义标签值中的反斜杠、双引号和换行"""
+    return str(值).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _转义说明(说明: str) -> str:
+    """转义HELP说明中的反斜杠和换行"""
+    return 说明.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+class 指标值:
+    """
+    单个时间序列的值
+
+    由计数器/仪表的 标签() 创建并缓存，调用方应持有返回的对象，
+    行情路径上的一次自增只是一次属性加法。
+    """
+    __slots__ = ("值",)
+
+    def __init__(self):
+        self.值 = 0
+
+    def 增加(self, 数量: Union[int, float] = 1):
+        """
+        增加数值
+
+        参数:
+            数量: 增加量
+        """
+        self.值 += 数量
+
+    def 设置(self, 值: Union[int, float]):
+        """
+        设置数值
+
+        参数:
+            值: 新数值
+        """
+        self.值 = 值
+
+
+class _指标:
+    """带标签的指标基类"""
+
+    类型 = "untyped"
+
+    def __init__(self, 名称: str, 说明: str, 标签名: Tuple[str, ...] = ()):
+        """
+        初始化指标
+
+        参数:
+            名称: 指标名，需符合Prometheus命名规则
+            说明: 指标说明
+            标签名: 标签名元组
+        """
+        self.名称 = 名称
+        self.说明 = 说明
+        self.标签名 = tuple(标签名)
+        self._序列 = {}  # {标签值元组: 指标值}
+        self._锁 = threading.Lock()
+        if not self.标签名:
+            self._序列[()] = 指标值()
+
+    def 标签(self, *标签值) -> 指标值:
+        """
+        获取(必要时创建)指定标签值的时间序列
+
+        参数:
+            标签值: 与标签名一一对应的标签值
+
+        返回:
+            时间序列的值对象，可缓存后反复使用
+        """
+        序列 = self._序列.get(标签值)
+        if 序列 is None:
+            if len(标签值) != len(self.标签名):
+                raise ValueError(f"指标 {self.名称} 需要 {len(self.标签名)} 个标签值，实际 {len(标签值)} 个")
+            with self._锁:
+                序列 = self._序列.setdefault(标签值, 指标值())
+        return 序列
+
+    def 增加(self, 数量: Union[int, float] = 1):
+        """无标签指标增加数值"""
+        self._序列[()].值 += 数量
+
+    def 设置(self, 值: Union[int, float]):
+        """无标签指标设置数值"""
+        self._序列[()].值 = 值
+
+    def 收集(self) -> List[Tuple[Tuple, float]]:
+        """
+        收集所有时间序列
+
+        返回:
+            [(标签值元组, 数值), ...]
+        """
+        return [(标签值, 序列.值) for 标签值, 序列 in list(self._序列.items())]
+
+
+class 计数器(_指标):
+    """只增不减的计数器"""
+    类型 = "counter"
+
+
+class 仪表(_指标):
+    """可任意设置的仪表"""
+    类型 = "gauge"
+
+
+class 回调指标(_指标):
+    """
+    抓取时才计算数值的指标
+
+    回调返回单个数值(无标签)或 {标签值元组: 数值} 字典，
+    适合导出其他模块已有的状态，行情路径上没有任何额外开销。
+    """
+
+    def __init__(self, 名称: str, 说明: str, 回调: Callable, 标签名: Tuple[str, ...] = (), 类型: str = "gauge"):
+        """
+        初始化回调指标
+
+        参数:
+            名称: 指标名
+            说明: 指标说明
+            回调: 计算数值的回调函数
+            标签名: 标签名元组
+            类型: 导出的指标类型，gauge或counter
+        """
+        super().__init__(名称, 说明, 标签名)
+        self.回调 = 回调
+        self.类型 = 类型
+
+    def 收集(self) -> List[Tuple[Tuple, float]]:
+        结果 = self.回调()
+        if isinstance(结果, dict):
+            return [(标签值 if isinstance(标签值, tuple) else (标签值,), 值) for 标签值, 值 in 结果.items()]
+        return [((), 结果)]
+
+
+class 指标注册表:
+    """指标注册表，负责注册指标并导出Prometheus文本格式"""
+
+    文本格式类型 = 文本格式类型
+
+    def __init__(self, 前缀: str = ""):
+        """
+        初始化指标注册表
+
+        参数:
+            前缀: 所有指标名的前缀
+        """
+        self.前缀 = 前缀
+        self._指标 = {}  # {名称: 指标}
+        self._锁 = threading.Lock()
+
+        # 后台写入器队列深度 {写入器名称: 深度回调}
+        self._写入队列 = {}
+        self.回调指标("writer_queue_depth", "后台写入器队列深度", self._收集写入队列, ("writer",))
+
+    def _注册(self, 指标: _指标) -> _指标:
+        """注册指标，同名指标只保留第一次注册的实例"""
+        with self._锁:
+            已有 = self._指标.get(指标.名称)
+            if 已有 is not None:
+                if type(已有) is not type(指标) or 已有.标签名 != 指标.标签名:
+                    raise ValueError(f"指标 {指标.名称} 已以不同类型或标签注册")
+                if isinstance(指标, 回调指标):
+                    已有.回调 = 指标.回调
+                return 已有
+            self._指标[指标.名称] = 指标
+            return 指标
+
+    def 计数器(self, 名称: str, 说明: str, 标签名: Tuple[str, ...] = ()) -> 计数器:
+        """
+        注册计数器
+
+        参数:
+            名称: 指标名(不含前缀)
+            说明: 指标说明
+            标签名: 标签名元组
+
+        返回:
+            计数器
+        """
+        return self._注册(计数器(self.前缀 + 名称, 说明, 标签名))
+
+    def 仪表(self, 名称: str, 说明: str, 标签名: Tuple[str, ...] = ()) -> 仪表:
+        """
+        注册仪表
+
+        参数:
+            名称: 指标名(不含前缀)
+            说明: 指标说明
+            标签名: 标签名元组
+
+        返回:
+            仪表
+        """
+        return self._注册(仪表(self.前缀 + 名称, 说明, 标签名))
+
+    def 回调指标(self, 名称: str, 说明: str, 回调: Callable, 标签名: Tuple[str, ...] = (), 类型: str = "gauge") -> 回调指标:
+        """
+        注册回调指标
+
+        参数:
+            名称: 指标名(不含前缀)
+            说明: 指标说明
+            回调: 抓取时调用的回调函数
+            标签名: 标签名元组
+            类型: gauge或counter
+
+        返回:
+            回调指标
+        """
+        return self._注册(回调指标(self.前缀 + 名称, 说明, 回调, 标签名, 类型))
+
+    def 注册写入队列(self, 写入器: str, 深度回调: Callable[[], int]):
+        """
+        登记一个后台写入器的队列深度，统一导出为 writer_queue_depth{writer=...}
+
+        参数:
+            写入器: 写入器名称
+            深度回调: 返回当前队列深度的函数
+        """
+        with self._锁:
+            self._写入队列[写入器] = 深度回调
+
+    def _收集写入队列(self) -> Dict:
+        """收集所有写入器的队列深度"""
+        return {(名称,): 回调() for 名称, 回调 in list(self._写入队列.items())}
+
+    def 获取(self, 名称: str):
+        """
+        按名称(不含前缀)获取已注册的指标
+
+        参数:
+            名称: 指标名
+
+        返回:
+            指标对象，不存在时返回None
+        """
+        return self._指标.get(self.前缀 + 名称)
+
+    def 导出文本(self) -> str:
+        """
+        导出Prometheus文本格式
+
+        返回:
+            文本格式的全部指标
+        """
+        行列表 = []
+        for 指标 in list(self._指标.values()):
+            # 单个指标收集失败不影响其他指标导出
+            try:
+                序列行 = []
+                for 标签值, 值 in 指标.收集():
+                    if 标签值:
+                        标签文本 = ",".join(
+                            f"{名}=\"{_转义标签值(值_)}\"" for 名, 值_ in zip(指标.标签名, 标签值)
+                        )
+                        序列行.append(f"{指标.名称}{{{标签文本}}} {_格式化数值(值)}")
+                    else:
+                        序列行.append(f"{指标.名称} {_格式化数值(值)}")
+            except Exception as e:
+                行列表.append(f"# 指标 {指标.名称} 收集失败: {_转义说明(str(e))}")
+                continue
+
+            行列表.append(f"# HELP {指标.名称} {_转义说明(指标.说明)}")
+            行列表.append(f"# TYPE {指标.名称} {指标.类型}")
+            行列表.extend(序列行)
+        return "\n".join(行列表) + "\n"
+
+
+def 解析文本(文本: str) -> Dict[str, float]:
+    """
+    解析Prometheus文本格式，主要供测试和简单客户端使用
+
+    参数:
+        文本: 导出的文本
+
+    返回:
+        {"名称{标签}": 数值}
+    """
+    结果 = {}
+    for 行 in 文本.splitlines():
+        if not 行 or 行.startswith("#"):
+            continue
+        键, _, 值 = 行.rpartition(" ")
+        结果[键] = float(值)
+    return 结果
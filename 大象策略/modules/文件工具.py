@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+文件工具模块 - 原子写入文件，避免进程中途退出留下写了一半的文件
+"""
+from typing import Any
+import os
+import json
+import tempfile
+
+
+def 原子写入文本(文件路径: str, 文本: str, 编码: str = "utf-8"):
+    """
+    原子写入文本文件
+
+    先写入同目录下的临时文件并fsync，再用os.replace替换目标文件，
+    读取方看到的要么是旧文件，要么是完整的新文件。
+
+    参数:
+        文件路径: 目标文件路径
+        文本: 文件内容
+        编码: 文件编码
+    """
+    原子写入字节(文件路径, 文本.encode(编码))
+
+
+def 原子写入字节(文件路径: str, 数据: bytes):
+    """
+    原子写入二进制文件，方式同 原子写入文本
+
+    参数:
+        文件路径: 目标文件路径
+        数据: 文件内容
+    """
+    目录 = os.path.dirname(os.path.abspath(文件路径))
+    os.makedirs(目录, exist_ok=True)
+    描述符, 临时路径 = tempfile.mkstemp(prefix=f".{os.path.basename(文件路径)}.", suffix=".tmp", dir=目录)
+    try:
+        with os.fdopen(描述符, "wb") as f:
+            f.write(数据)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(临时路径, 文件路径)
+    except BaseException:
+        try:
+            os.unlink(临时路径)
+        except OSError:
+            pass
+        raise
+
+    # 同步目录项，保证改名本身落盘；部分平台不支持打开目录，忽略即可
+    try:
+        目录描述符 = os.open(目录, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(目录描述符)
+    except OSError:
+        pass
+    finally:
+        os.close(目录描述符)
+
+
+def 序列化json(数据: Any) -> str:
+    """
+    按配置文件的格式序列化JSON
+
+    参数:
+        数据: 要序列化的数据
+
+    返回:
+        JSON文本
+    """
+    return json.dumps(数据, indent=4, ensure_ascii=False)
+
+
+def 原子写入json(文件路径: str, 数据: Any):
+    """
+    原子写入JSON文件
+
+    参数:
+        文件路径: 目标文件路径
+        数据: 要写入的数据
+    """
+    原子写入文本(文件路径, 序列化json(数据))
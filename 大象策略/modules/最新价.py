@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+最新价模块 - 按品种索引存放最新价的共享价格表，供资金管理和账户状态增量计算持仓市值
+"""
+from array import array
+from typing import Dict, List, Tuple
+
+
+class 最新价表:
+    """
+    最新价表
+
+    每个品种第一次出现时分配一个固定索引，最新价存放在按索引排列的定长数组中。
+    行情路径上一次字典查找得到索引后只读写数组元素；资金管理器按同一索引存放持仓数量，
+    价格变化时用返回的索引直接调整该品种的持仓市值。
+    """
+
+    def __init__(self, 容量: int = 256):
+        """
+        初始化最新价表
+
+        参数:
+            容量: 初始容量，品种数超过时数组按倍数扩容
+        """
+        self._索引 = {}  # {股票代码: 索引}
+        self.代码列表: List[str] = []  # 按索引排列的股票代码
+        self.价格 = array("d", bytes(8 * 容量))
+        self.更新次数 = 0
+
+    def __len__(self) -> int:
+        return len(self.代码列表)
+
+    def __contains__(self, 股票代码: str) -> bool:
+        return 股票代码 in self._索引
+
+    def 索引(self, 股票代码: str) -> int:
+        """
+        获取品种索引，第一次出现时分配
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            品种索引
+        """
+        索引 = self._索引.get(股票代码)
+        if 索引 is None:
+            索引 = self._索引[股票代码] = len(self.代码列表)
+            self.代码列表.append(股票代码)
+            if 索引 >= len(self.价格):
+                self.价格.extend(array("d", bytes(8 * len(self.价格))))
+        return 索引
+
+    def 更新(self, 股票代码: str, 价格: float) -> Tuple[int, float]:
+        """
+        更新品种最新价
+
+        参数:
+            股票代码: 股票代码
+            价格: 最新价，为0时忽略
+
+        返回:
+            (索引, 原价格)，原价格为0表示此前没有价格
+        """
+        索引 = self._索引.get(股票代码)
+        if 索引 is None:
+            索引 = self.索引(股票代码)
+        原价格 = self.价格[索引]
+        if 价格:
+            self.价格[索引] = 价格
+            self.更新次数 += 1
+        return 索引, 原价格
+
+    def 获取(self, 股票代码: str) -> float:
+        """
+        获取品种最新价
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            最新价，没有价格时为0.0
+        """
+        索引 = self._索引.get(股票代码)
+        return self.价格[索引] if 索引 is not None else 0.0
+
+    def 导出(self) -> Dict[str, float]:
+        """
+        导出全部有价格的品种
+
+        返回:
+            {股票代码: 最新价}
+        """
+        return {代码: self.价格[i] for i, 代码 in enumerate(self.代码列表) if self.价格[i]}
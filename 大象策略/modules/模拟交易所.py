@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模拟交易所模块 - 本地撮合引擎，按价格时间优先撮合本方委托与回放或合成的盘口流动性
+
+价格为整数价格档，时间为纳秒。委托、撤单和回报按设定的延迟生效，通过 推进 在指定时间处理到期的动作，
+不依赖vnpy，可以直接用于测试；vnpy网关见 模拟网关 模块。
+"""
+from collections import deque, namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import bisect
+import heapq
+import time
+
+from .日志 import get_logger
+
+# 委托方向
+买入 = "买入"
+卖出 = "卖出"
+
+# 委托状态
+状态_提交中 = "提交中"
+状态_未成交 = "未成交"
+状态_部分成交 = "部分成交"
+状态_全部成交 = "全部成交"
+状态_已撤销 = "已撤销"
+状态_拒单 = "拒单"
+
+活跃状态 = (状态_提交中, 状态_未成交, 状态_部分成交)
+
+# 回报，均为发生时刻的快照
+委托回报 = namedtuple("委托回报", ["委托号", "股票代码", "方向", "价格档", "数量", "已成交", "状态", "时间", "原因"])
+成交回报 = namedtuple("成交回报", ["成交号", "委托号", "股票代码", "方向", "价格档", "数量", "时间"])
+
+# 延迟动作类型
+_动作_委托 = 0
+_动作_撤单 = 1
+_动作_撮合 = 2
+_动作_委托回报 = 3
+_动作_成交回报 = 4
+
+
+class _委托:
+    """交易所内部的委托记录"""
+    __slots__ = ("委托号", "股票代码", "方向", "系数", "价格档", "数量", "已成交", "状态", "队列前量", "原因")
+
+    def __init__(self, 委托号: str, 股票代码: str, 方向: str, 价格档: int, 数量: int):
+        self.委托号 = 委托号
+        self.股票代码 = 股票代码
+        self.方向 = 方向
+        # 买入价格越高越优先，卖出越低越优先；乘以系数后两侧都按从大到小比较
+        self.系数 = 1 if 方向 == 买入 else -1
+        self.价格档 = 价格档
+        self.数量 = 数量
+        self.已成交 = 0
+        self.状态 = 状态_提交中
+        self.队列前量 = 0  # 同价位排在本委托之前的外部委托量(估计)
+        self.原因 = ""
+
+    @property
+    def 剩余(self) -> int:
+        return self.数量 - self.已成交
+
+    def 快照(self, 时间: int) -> 委托回报:
+        return 委托回报(self.委托号, self.股票代码, self.方向, self.价格档, self.数量,
+                     self.已成交, self.状态, 时间, self.原因)
+
+
+class _品种簿:
+    """单个品种的本方挂单和最近一笔外部盘口"""
+    __slots__ = ("买价", "卖价", "买单", "卖单", "外部买盘", "外部卖盘", "最新价档", "累计成交量")
+
+    def __init__(self):
+        self.买价 = []  # 有本方买单的价格档，升序，最优价在末尾
+        self.卖价 = []  # 有本方卖单的价格档，升序，最优价在开头
+        self.买单 = {}  # {价格档: deque[_委托]}
+        self.卖单 = {}
+        self.外部买盘 = []  # [[价格档, 数量], ...]，最优价在前，撮合时原地扣减
+        self.外部卖盘 = []
+        self.最新价档 = 0
+        self.累计成交量 = 0
+
+    def 挂单侧(self, 方向: str) -> Tuple[List[int], Dict[int, deque]]:
+        return (self.买价, self.买单) if 方向 == 买入 else (self.卖价, self.卖单)
+
+    def 外部量(self, 方向: str, 价格档: int) -> int:
+        """外部盘口同侧某价格档的数量，不在盘口中时为0"""
+        for 档位 in (self.外部买盘 if 方向 == 买入 else self.外部卖盘):
+            if 档位[0] == 价格档:
+                return 档位[1]
+        return 0
+
+
+class 模拟交易所:
+    """
+    模拟交易所
+
+    每个品种维护本方委托的限价订单簿和最近一笔外部盘口(回放或合成的行情)：
+    - 委托到达后按价格时间优先撮合：先与对手方外部盘口和本方对手挂单成交，同价位外部盘口在先，剩余部分挂单
+    - 挂单时以同价位的外部委托量作为队列前量，之后的盘口中该价位数量减少时队列前量相应减少
+    - 新盘口的对手价越过挂单价、最新价越过挂单价，或在挂单价成交且成交量超过队列前量时，挂单成交
+    - 委托、撤单、回报分别按设定的延迟生效；设置 最大单笔成交量 时每次撮合最多成交该数量，剩余部分按撮合间隔继续撮合
+    """
+
+    def __init__(self, 委托延迟毫秒: float = 5.0, 撤单延迟毫秒: float = 5.0, 回报延迟毫秒: float = 1.0,
+                 最大单笔成交量: int = 0, 撮合间隔毫秒: float = 1.0,
+                 委托回调: Callable[[委托回报], None] = None, 成交回调: Callable[[成交回报], None] = None,
+                 时钟: Callable[[], int] = time.perf_counter_ns):
+        """
+        初始化模拟交易所
+
+        参数:
+            委托延迟毫秒: 委托从发出到交易所受理的延迟
+            撤单延迟毫秒: 撤单从发出到交易所处理的延迟
+            回报延迟毫秒: 委托和成交回报从交易所发出到收到的延迟
+            最大单笔成交量: 每次撮合的最大成交数量，0为不限制
+            撮合间隔毫秒: 受单笔成交量限制时，剩余部分再次撮合的间隔
+            委托回调: 收到委托回报时调用
+            成交回调: 收到成交回报时调用
+            时钟: 返回当前时间(纳秒)的函数，各方法未指定时间时使用
+        """
+        self.委托延迟 = int(委托延迟毫秒 * 1_000_000)
+        self.撤单延迟 = int(撤单延迟毫秒 * 1_000_000)
+        self.回报延迟 = int(回报延迟毫秒 * 1_000_000)
+        self.最大单笔成交量 = 最大单笔成交量
+        self.撮合间隔 = int(撮合间隔毫秒 * 1_000_000)
+        self.委托回调 = 委托回调
+        self.成交回调 = 成交回调
+        self.时钟 = 时钟
+
+        self._品种 = {}  # {股票代码: _品种簿}
+        self._委托 = {}  # {委托号: _委托}
+        self._动作 = []  # [(生效时间, 序号, 动作类型, 参数)]
+        self._序号 = 0
+        self._委托序号 = 0
+        self._成交序号 = 0
+        self.统计 = {"委托": 0, "成交": 0, "成交量": 0, "撤单": 0, "撤单失败": 0, "拒单": 0}
+        self.logger = get_logger("模拟交易所")
+
+    # ===== 对外接口 =====
+
+    def 提交委托(self, 股票代码: str, 方向: str, 价格档: int, 数量: int, 当前时间: int = None) -> str:
+        """
+        提交限价委托，经过委托延迟后由交易所受理
+
+        参数:
+            股票代码: 股票代码
+            方向: 买入 或 卖出
+            价格档: 委托价格档
+            数量: 委托数量
+            当前时间: 发出时间(纳秒)，为None时取时钟
+
+        返回:
+            委托号
+        """
+        当前时间 = self.时钟() if 当前时间 is None else 当前时间
+        self._委托序号 += 1
+        委托号 = str(self._委托序号)
+        self._委托[委托号] = _委托(委托号, 股票代码, 方向, 价格档, 数量)
+        self.统计["委托"] += 1
+        self._安排(当前时间 + self.委托延迟, _动作_委托, 委托号)
+        return 委托号
+
+    def 撤销委托(self, 委托号: str, 当前时间: int = None) -> bool:
+        """
+        撤销委托，经过撤单延迟后由交易所处理；处理时委托已全部成交的撤单失败
+
+        参数:
+            委托号: 委托号
+            当前时间: 发出时间(纳秒)，为None时取时钟
+
+        返回:
+            委托是否存在
+        """
+        if 委托号 not in self._委托:
+            return False
+        当前时间 = self.时钟() if 当前时间 is None else 当前时间
+        self._安排(当前时间 + self.撤单延迟, _动作_撤单, 委托号)
+        return True
+
+    def 同步盘口(self, 股票代码: str, 买盘: Sequence[Tuple[int, int]], 卖盘: Sequence[Tuple[int, int]],
+              最新价档: int = 0, 累计成交量: int = 0, 当前时间: int = None):
+        """
+        输入一笔外部盘口，更新挂单的队列位置并撮合被越过的挂单，之后送达到期的回报
+
+        参数:
+            股票代码: 股票代码
+            买盘: 买盘 [(价格档, 数量), ...]，价格从高到低
+            卖盘: 卖盘 [(价格档, 数量), ...]，价格从低到高
+            最新价档: 最新成交价格档
+            累计成交量: 当日累计成交量，与上一笔的差值为本笔成交量
+            当前时间: 盘口时间(纳秒)，为None时取时钟
+        """
+        当前时间 = self.时钟() if 当前时间 is None else 当前时间
+        self.推进(当前时间)
+
+        簿 = self._获取品种(股票代码)
+        成交量 = 累计成交量 - 簿.累计成交量 if 簿.累计成交量 and 最新价档 else 0
+        簿.外部买盘 = [[价格档, 数量] for 价格档, 数量 in 买盘 if 价格档 and 数量 > 0]
+        簿.外部卖盘 = [[价格档, 数量] for 价格档, 数量 in 卖盘 if 价格档 and 数量 > 0]
+        簿.最新价档 = 最新价档
+        簿.累计成交量 = 累计成交量
+
+        # 同一价格档上的成交量先消耗外部队列，再按时间顺序分给本方委托
+        已分配 = {}  # {(方向, 价格档): 已分给本方委托的成交量}
+        for 价格列表, 挂单表 in ((簿.买价[::-1], 簿.买单), (簿.卖价[:], 簿.卖单)):
+            for 价格档 in 价格列表:
+                for 委托 in list(挂单表.get(价格档, ())):
+                    if 委托.状态 in 活跃状态:
+                        self._更新挂单(簿, 委托, 成交量, 已分配, 当前时间)
+        self.推进(当前时间)
+
+    def 推进(self, 当前时间: int = None) -> int:
+        """
+        处理到期的委托、撤单、撮合和回报
+
+        参数:
+            当前时间: 当前时间(纳秒)，为None时取时钟
+
+        返回:
+            处理的动作数
+        """
+        当前时间 = self.时钟() if 当前时间 is None else 当前时间
+        数量 = 0
+        动作 = self._动作
+        while 动作 and 动作[0][0] <= 当前时间:
+            生效时间, _, 类型, 参数 = heapq.heappop(动作)
+            数量 += 1
+            if 类型 == _动作_委托回报:
+                if self.委托回调:
+                    self.委托回调(参数)
+            elif 类型 == _动作_成交回报:
+                if self.成交回调:
+                    self.成交回调(参数)
+            elif 类型 == _动作_委托:
+                self._受理委托(self._委托[参数], 生效时间)
+            elif 类型 == _动作_撤单:
+                self._处理撤单(self._委托[参数], 生效时间)
+            elif 类型 == _动作_撮合:
+                委托 = self._委托[参数]
+                if 委托.状态 in 活跃状态 and self._撮合(self._获取品种(委托.股票代码), 委托, 生效时间, 被动=True):
+                    self._安排(生效时间 + self.撮合间隔, _动作_撮合, 参数)
+        return 数量
+
+    def 获取委托(self, 委托号: str) -> Optional[委托回报]:
+        """
+        获取委托的当前状态
+
+        参数:
+            委托号: 委托号
+
+        返回:
+            委托快照，委托不存在时返回None
+        """
+        委托 = self._委托.get(委托号)
+        return 委托.快照(self.时钟()) if 委托 is not None else None
+
+    def 队列位置(self, 委托号: str) -> Optional[int]:
+        """
+        估计挂单前面还有多少数量：同价位的外部委托量加上先到的本方委托剩余量
+
+        参数:
+            委托号: 委托号
+
+        返回:
+            排在前面的数量，委托不在挂单中时返回None
+        """
+        委托 = self._委托.get(委托号)
+        if 委托 is None or 委托.状态 not in (状态_未成交, 状态_部分成交):
+            return None
+        _, 挂单表 = self._获取品种(委托.股票代码).挂单侧(委托.方向)
+        前量 = 委托.队列前量
+        for 其他 in 挂单表.get(委托.价格档, ()):
+            if 其他 is 委托:
+                break
+            前量 += 其他.剩余
+        return 前量
+
+    def 挂单(self, 股票代码: str) -> List[委托回报]:
+        """
+        获取品种的全部本方挂单，按价格时间优先排列
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            委托快照列表，买单在前
+        """
+        簿 = self._品种.get(股票代码)
+        if 簿 is None:
+            return []
+        时间 = self.时钟()
+        结果 = [委托.快照(时间) for 价格档 in reversed(簿.买价) for 委托 in 簿.买单[价格档]]
+        结果 += [委托.快照(时间) for 价格档 in 簿.卖价 for 委托 in 簿.卖单[价格档]]
+        return 结果
+
+    @property
+    def 待处理动作数(self) -> int:
+        """尚未到期的委托、撤单、撮合和回报数"""
+        return len(self._动作)
+
+    # ===== 内部处理 =====
+
+    def _获取品种(self, 股票代码: str) -> _品种簿:
+        簿 = self._品种.get(股票代码)
+        if 簿 is None:
+            簿 = self._品种[股票代码] = _品种簿()
+        return 簿
+
+    def _安排(self, 生效时间: int, 类型: int, 参数):
+        self._序号 += 1
+        heapq.heappush(self._动作, (生效时间, self._序号, 类型, 参数))
+
+    def _回报(self, 委托: _委托, 时间: int):
+        self._安排(时间 + self.回报延迟, _动作_委托回报, 委托.快照(时间))
+
+    def _受理委托(self, 委托: _委托, 时间: int):
+        """委托到达交易所：校验、撮合，剩余部分挂单"""
+        if 委托.状态 != 状态_提交中:
+            return  # 到达前已被撤销
+        if 委托.数量 <= 0 or 委托.价格档 <= 0 or 委托.方向 not in (买入, 卖出):
+            委托.状态 = 状态_拒单
+            委托.原因 = "价格或数量无效"
+            self.统计["拒单"] += 1
+            self._回报(委托, 时间)
+            return
+
+        委托.状态 = 状态_未成交
+        self._回报(委托, 时间)
+        簿 = self._获取品种(委托.股票代码)
+        已撮合 = self._撮合(簿, 委托, 时间, 被动=False)
+        if 委托.剩余 > 0:
+            委托.队列前量 = 簿.外部量(委托.方向, 委托.价格档)
+            self._挂入(簿, 委托)
+            if 已撮合 and self._可成交(簿, 委托):
+                # 受单笔成交量限制，剩余部分按撮合间隔继续撮合
+                self._安排(时间 + self.撮合间隔, _动作_撮合, 委托.委托号)
+
+    def _处理撤单(self, 委托: _委托, 时间: int):
+        if 委托.状态 not in 活跃状态:
+            self.统计["撤单失败"] += 1
+            return
+        if 委托.状态 != 状态_提交中:
+            self._移出(self._获取品种(委托.股票代码), 委托)
+        委托.状态 = 状态_已撤销
+        self.统计["撤单"] += 1
+        self._回报(委托, 时间)
+
+    def _挂入(self, 簿: _品种簿, 委托: _委托):
+        价格列表, 挂单表 = 簿.挂单侧(委托.方向)
+        队列 = 挂单表.get(委托.价格档)
+        if 队列 is None:
+            队列 = 挂单表[委托.价格档] = deque()
+            bisect.insort(价格列表, 委托.价格档)
+        队列.append(委托)
+
+    def _移出(self, 簿: _品种簿, 委托: _委托):
+        价格列表, 挂单表 = 簿.挂单侧(委托.方向)
+        队列 = 挂单表.get(委托.价格档)
+        if 队列 is None or 委托 not in 队列:
+            return
+        队列.remove(委托)
+        if not 队列:
+            del 挂单表[委托.价格档]
+            del 价格列表[bisect.bisect_left(价格列表, 委托.价格档)]
+
+    def _可成交(self, 簿: _品种簿, 委托: _委托) -> bool:
+        """委托价格是否越过外部或本方的对手最优价"""
+        系数 = 委托.系数
+        外部对手 = 簿.外部卖盘 if 委托.方向 == 买入 else 簿.外部买盘
+        if any(系数 * 档位[0] <= 系数 * 委托.价格档 for 档位 in 外部对手 if 档位[1] > 0):
+            return True
+        对手价格 = 簿.卖价 if 委托.方向 == 买入 else 簿.买价
+        if 对手价格:
+            最优 = 对手价格[0] if 委托.方向 == 买入 else 对手价格[-1]
+            return 系数 * 最优 <= 系数 * 委托.价格档
+        return False
+
+    def _撮合(self, 簿: _品种簿, 委托: _委托, 时间: int, 被动: bool) -> bool:
+        """
+        按价格时间优先撮合委托，同价位外部盘口在先；被动为True时(挂单被越过)按挂单价成交
+
+        返回:
+            是否因单笔成交量限制而停止
+        """
+        系数 = 委托.系数
+        外部对手 = 簿.外部卖盘 if 委托.方向 == 买入 else 簿.外部买盘
+        对手价格, 对手挂单 = 簿.挂单侧(卖出 if 委托.方向 == 买入 else 买入)
+        上限 = self.最大单笔成交量 or 委托.剩余
+        本次 = 0
+
+        while 委托.剩余 > 0 and 本次 < 上限:
+            外部档 = next((档位 for 档位 in 外部对手 if 档位[1] > 0), None)
+            if 外部档 is not None and 系数 * 外部档[0] > 系数 * 委托.价格档:
+                外部档 = None
+            内部价 = None
+            if 对手价格:
+                内部价 = 对手价格[0] if 委托.方向 == 买入 else 对手价格[-1]
+                if 系数 * 内部价 > 系数 * 委托.价格档:
+                    内部价 = None
+            if 外部档 is None and 内部价 is None:
+                break
+
+            数量上限 = min(委托.剩余, 上限 - 本次)
+            if 外部档 is not None and (内部价 is None or 系数 * 外部档[0] <= 系数 * 内部价):
+                数量 = min(数量上限, 外部档[1])
+                外部档[1] -= 数量
+                self._成交(委托, 委托.价格档 if 被动 else 外部档[0], 数量, 时间)
+            else:
+                对手 = 对手挂单[内部价][0]
+                数量 = min(数量上限, 对手.剩余)
+                # 本方委托之间成交，按先挂单一方的价格
+                self._成交(对手, 内部价, 数量, 时间)
+                self._成交(委托, 内部价, 数量, 时间)
+                if 对手.剩余 == 0:
+                    self._移出(簿, 对手)
+            本次 += 数量
+
+        return 委托.剩余 > 0 and 本次 >= 上限
+
+    def _更新挂单(self, 簿: _品种簿, 委托: _委托, 成交量: int, 已分配: Dict[Tuple[str, int], int], 时间: int):
+        """新盘口到达后更新一笔挂单：被越过时成交，否则按成交量和同价位数量推进队列位置"""
+        系数 = 委托.系数
+        if self._可成交(簿, 委托):
+            if self._撮合(簿, 委托, 时间, 被动=True):
+                self._安排(时间 + self.撮合间隔, _动作_撮合, 委托.委托号)
+        elif 成交量 > 0 and 系数 * 簿.最新价档 < 系数 * 委托.价格档:
+            # 最新价越过挂单价，挂单价位的委托已全部成交
+            self._被动成交(簿, 委托, 委托.剩余, 时间)
+        elif 成交量 > 0 and 簿.最新价档 == 委托.价格档:
+            # 在挂单价成交：成交量先消耗排在前面的外部委托，剩余部分成交本委托
+            键 = (委托.方向, 委托.价格档)
+            可用 = 成交量 - 已分配.get(键, 0)
+            消耗前量 = min(委托.队列前量, 可用)
+            委托.队列前量 -= 消耗前量
+            可用 -= 消耗前量
+            if 可用 > 0 and 委托.队列前量 == 0:
+                数量 = min(可用, 委托.剩余, self.最大单笔成交量 or 可用)
+                已分配[键] = 已分配.get(键, 0) + 数量
+                self._被动成交(簿, 委托, 数量, 时间)
+
+        if 委托.状态 in (状态_未成交, 状态_部分成交):
+            # 同价位数量减少(成交或撤单)时，排在前面的数量不会超过该价位的剩余数量
+            委托.队列前量 = min(委托.队列前量, 簿.外部量(委托.方向, 委托.价格档))
+
+    def _被动成交(self, 簿: _品种簿, 委托: _委托, 数量: int, 时间: int):
+        数量 = min(数量, self.最大单笔成交量 or 数量)
+        if 数量 <= 0:
+            return
+        self._成交(委托, 委托.价格档, 数量, 时间)
+        if 委托.剩余 == 0:
+            self._移出(簿, 委托)
+
+    def _成交(self, 委托: _委托, 价格档: int, 数量: int, 时间: int):
+        委托.已成交 += 数量
+        委托.状态 = 状态_全部成交 if 委托.剩余 == 0 else 状态_部分成交
+        self._成交序号 += 1
+        self.统计["成交"] += 1
+        self.统计["成交量"] += 数量
+        self._安排(时间 + self.回报延迟, _动作_成交回报,
+                 成交回报(str(self._成交序号), 委托.委托号, 委托.股票代码, 委托.方向, 价格档, 数量, 时间))
+        self._回报(委托, 时间)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+模拟网关模块 - 以本地模拟交易所代替CTP的vnpy网关，委托和成交回报经正常的vnpy事件路径送达策略
+
+行情可以由网关按随机游走合成，也可以由回放脚本通过 推送行情 逐笔输入；
+两种方式的行情都先同步到模拟交易所，再作为TickData推送给策略。
+"""
+from copy import copy
+from datetime import datetime
+from typing import Dict
+import random
+import threading
+import time
+
+from vnpy.event import EventEngine
+from vnpy.trader.constant import Direction, Exchange, Product, Status
+from vnpy.trader.gateway import BaseGateway
+from vnpy.trader.object import (
+    AccountData, CancelRequest, ContractData, OrderRequest, PositionData,
+    SubscribeRequest, TickData, TradeData
+)
+
+from .日志 import get_logger
+from .品种信息 import 品种信息表
+from .盘口适配 import 盘口适配器
+from .模拟交易所 import (
+    模拟交易所, 委托回报, 成交回报, 买入, 卖出,
+    状态_提交中, 状态_未成交, 状态_部分成交, 状态_全部成交, 状态_已撤销, 状态_拒单
+)
+
+状态映射 = {
+    状态_提交中: Status.SUBMITTING,
+    状态_未成交: Status.NOTTRADED,
+    状态_部分成交: Status.PARTTRADED,
+    状态_全部成交: Status.ALLTRADED,
+    状态_已撤销: Status.CANCELLED,
+    状态_拒单: Status.REJECTED,
+}
+
+
+class 模拟交易所网关(BaseGateway):
+    """
+    模拟交易所网关
+
+    后台线程约每毫秒推进一次模拟交易所，处理到期的委托、撤单和回报；开启合成行情时按行情间隔
+    为每个订阅的品种生成一笔五档行情。网关维护简单的持仓和资金，成交后推送持仓和账户。
+    """
+
+    default_name = "MOCK"
+
+    default_setting = {
+        "委托延迟毫秒": 5.0,
+        "撤单延迟毫秒": 5.0,
+        "回报延迟毫秒": 1.0,
+        "最大单笔成交量": 0,
+        "合成行情": True,
+        "行情间隔毫秒": 500.0,
+        "初始价格": 10.0,
+        "初始资金": 1_000_000.0,
+        "股票列表": [],
+    }
+
+    exchanges = [Exchange.SSE, Exchange.SZSE, Exchange.BSE]
+
+    def __init__(self, event_engine: EventEngine, gateway_name: str = "MOCK"):
+        super().__init__(event_engine, gateway_name)
+        self.品种信息 = 品种信息表()
+        self.盘口适配 = 盘口适配器(档位数=5)
+        self.交易所 = None
+        self.资金 = 0.0
+        self.合成行情 = True
+        self.行情间隔 = 0.5
+        self.初始价格 = 10.0
+
+        self._锁 = threading.Lock()
+        self._线程 = None
+        self._运行 = False
+        self._委托 = {}  # {委托号: OrderData}
+        self._持仓 = {}  # {股票代码: 数量}
+        self._合成状态 = {}  # {股票代码: [买一价格档, 累计成交量]}
+        self._随机 = random.Random()
+        self.logger = get_logger("模拟网关")
+
+    def connect(self, setting: Dict):
+        """创建模拟交易所并启动后台线程"""
+        设置 = dict(self.default_setting)
+        设置.update(setting or {})
+        self.交易所 = 模拟交易所(
+            委托延迟毫秒=float(设置["委托延迟毫秒"]),
+            撤单延迟毫秒=float(设置["撤单延迟毫秒"]),
+            回报延迟毫秒=float(设置["回报延迟毫秒"]),
+            最大单笔成交量=int(设置["最大单笔成交量"]),
+            委托回调=self._处理委托回报,
+            成交回调=self._处理成交回报
+        )
+        self.资金 = float(设置["初始资金"])
+        self.合成行情 = bool(设置["合成行情"])
+        self.行情间隔 = float(设置["行情间隔毫秒"]) / 1000
+        self.初始价格 = float(设置["初始价格"])
+
+        self._运行 = True
+        self._线程 = threading.Thread(target=self._运行循环, name="模拟交易所", daemon=True)
+        self._线程.start()
+        self.write_log("模拟交易所已启动")
+        for 股票代码 in 设置["股票列表"]:
+            品种 = self.品种信息.获取(股票代码)
+            self.subscribe(SubscribeRequest(symbol=品种.代码, exchange=品种.交易所))
+        self.query_account()
+
+    def close(self):
+        """停止后台线程"""
+        self._运行 = False
+        if self._线程 is not None:
+            self._线程.join()
+            self._线程 = None
+
+    def subscribe(self, req: SubscribeRequest):
+        """订阅行情，同时推送合约信息；开启合成行情时开始为该品种生成行情"""
+        品种 = self.品种信息.获取(req.symbol)
+        self.on_contract(ContractData(
+            symbol=品种.代码,
+            exchange=品种.交易所,
+            name=品种.名称 or 品种.代码,
+            product=Product.EQUITY,
+            size=1,
+            pricetick=品种.最小变动价位,
+            min_volume=品种.每手数量,
+            gateway_name=self.gateway_name
+        ))
+        with self._锁:
+            self._合成状态.setdefault(品种.代码, [品种.转价格档(self.初始价格), 0])
+
+    def send_order(self, req: OrderRequest) -> str:
+        """提交委托，立即推送提交中状态"""
+        品种 = self.品种信息.获取(req.symbol)
+        方向 = 买入 if req.direction == Direction.LONG else 卖出
+        with self._锁:
+            委托号 = self.交易所.提交委托(req.symbol, 方向, 品种.转价格档(req.price), int(req.volume))
+            委托 = req.create_order_data(委托号, self.gateway_name)
+            委托.datetime = datetime.now()
+            self._委托[委托号] = 委托
+        self.on_order(copy(委托))
+        return 委托.vt_orderid
+
+    def cancel_order(self, req: CancelRequest):
+        """撤销委托，撤单结果由委托回报送达"""
+        with self._锁:
+            self.交易所.撤销委托(req.orderid)
+
+    def query_account(self):
+        """推送账户资金"""
+        self.on_account(AccountData(
+            accountid=self.gateway_name,
+            balance=self.资金,
+            frozen=0.0,
+            gateway_name=self.gateway_name
+        ))
+
+    def query_position(self):
+        """推送全部持仓"""
+        for 股票代码 in list(self._持仓):
+            self._推送持仓(股票代码)
+
+    def 推送行情(self, tick: TickData):
+        """
+        输入一笔回放的行情：先同步到模拟交易所撮合挂单，再推送给策略
+
+        参数:
+            tick: 行情数据
+        """
+        品种 = self.品种信息.获取(tick.symbol)
+        盘口数据 = self.盘口适配.转换(tick, 品种)
+        with self._锁:
+            self.交易所.同步盘口(tick.symbol, 盘口数据["买盘"], 盘口数据["卖盘"],
+                            盘口数据["最新价"], int(tick.volume))
+        self.on_tick(tick)
+
+    def _运行循环(self):
+        下次行情 = time.monotonic()
+        while self._运行:
+            with self._锁:
+                self.交易所.推进()
+            if self.合成行情 and time.monotonic() >= 下次行情:
+                下次行情 += self.行情间隔
+                with self._锁:
+                    合成列表 = list(self._合成状态.items())
+                for 股票代码, 状态 in 合成列表:
+                    self.推送行情(self._合成(股票代码, 状态))
+            time.sleep(0.001)
+
+    def _合成(self, 股票代码: str, 状态: list) -> TickData:
+        """
+        按随机游走合成一笔五档行情，状态为[买一价格档, 累计成交量]
+
+        盘口挂单量和累计成交量与行情生成一样以手为单位，大象识别按 价格 × 数量 × 100 计算金额
+        """
+        品种 = self.品种信息.获取(股票代码)
+        随机 = self._随机
+        买一 = 状态[0] = max(状态[0] + 随机.choice((-1, 0, 0, 1)), 5)
+        状态[1] += 随机.randint(0, 50)
+        字段 = {}
+        for i in range(1, 6):
+            字段[f"bid_price_{i}"] = 品种.转价格(买一 - i + 1)
+            字段[f"bid_volume_{i}"] = 随机.randint(1, 100)
+            字段[f"ask_price_{i}"] = 品种.转价格(买一 + i)
+            字段[f"ask_volume_{i}"] = 随机.randint(1, 100)
+        return TickData(
+            symbol=股票代码,
+            exchange=品种.交易所,
+            datetime=datetime.now(),
+            name=品种.名称 or 股票代码,
+            volume=状态[1],
+            last_price=品种.转价格(随机.choice((买一, 买一 + 1))),
+            gateway_name=self.gateway_name,
+            **字段
+        )
+
+    def _处理委托回报(self, 回报: 委托回报):
+        委托 = self._委托.get(回报.委托号)
+        if 委托 is None:
+            return
+        委托.traded = 回报.已成交
+        委托.status = 状态映射[回报.状态]
+        委托.datetime = datetime.now()
+        if 回报.原因:
+            self.write_log(f"委托{回报.委托号}被拒绝: {回报.原因}")
+        self.on_order(copy(委托))
+
+    def _处理成交回报(self, 回报: 成交回报):
+        委托 = self._委托.get(回报.委托号)
+        if 委托 is None:
+            return
+        品种 = self.品种信息.获取(回报.股票代码)
+        价格 = 品种.转价格(回报.价格档)
+        self.on_trade(TradeData(
+            symbol=委托.symbol,
+            exchange=委托.exchange,
+            orderid=回报.委托号,
+            tradeid=回报.成交号,
+            direction=委托.direction,
+            offset=委托.offset,
+            price=价格,
+            volume=回报.数量,
+            datetime=datetime.now(),
+            gateway_name=self.gateway_name
+        ))
+
+        系数 = 1 if 回报.方向 == 买入 else -1
+        self._持仓[回报.股票代码] = self._持仓.get(回报.股票代码, 0) + 系数 * 回报.数量
+        self.资金 -= 系数 * 价格 * 回报.数量
+        self._推送持仓(回报.股票代码)
+        self.query_account()
+
+    def _推送持仓(self, 股票代码: str):
+        品种 = self.品种信息.获取(股票代码)
+        self.on_position(PositionData(
+            symbol=股票代码,
+            exchange=品种.交易所,
+            direction=Direction.LONG,
+            volume=self._持仓.get(股票代码, 0),
+            gateway_name=self.gateway_name
+        ))
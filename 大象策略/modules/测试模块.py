@@ -6,6 +6,7 @@
 from typing import Dict, List, Optional, Any, Callable
 import time
 import random
+import importlib
 import os
 import sys
 from datetime import datetime
@@ -32,83 +33,125 @@ except ImportError:
             # 最后尝试从项目根目录导入
             from 大象策略.modules.日志 import get_logger
 
-# 导入各测试文件中的测试函数
-# 放在函数内部避免导入错误终止程序
-def 加载测试函数():
-    """加载测试函数"""
-    全局测试大象识别 = None  
-    全局测试大象消失检测 = None
-    全局测试风险控制 = None
-    全局测试资金风险控制 = None
+# 测试表: (测试名称, 测试文件, 测试函数名, 说明)
+# 新增测试只需在这里登记；运行测试.py 的 -m 参数按测试文件名(去掉 test_ 前缀)筛选
+测试表 = [
+    ("大象识别", "test_大象识别", "测试大象识别", "测试大象识别功能"),
+    ("大象消失检测", "test_大象识别", "测试大象消失检测", "测试大象消失检测功能"),
+    ("重复盘口", "test_大象识别", "测试重复盘口", "测试盘口未变化时跳过检测并按时间推进确认"),
+    ("风险控制", "test_风险控制", "测试风险控制", "测试风险控制功能"),
+    ("资金风险控制", "test_风险控制", "测试资金风险控制", "测试资金风险控制功能"),
+    ("延迟统计", "test_延迟统计", "测试延迟统计", "测试延迟统计功能"),
+    ("指标", "test_指标", "测试指标", "测试指标功能"),
+    ("采样分析", "test_采样分析", "测试采样分析", "测试采样分析功能"),
+    ("配置监视", "test_配置监视", "测试配置监视", "测试参数热加载功能"),
+    ("参数写入", "test_参数管理", "测试参数写入", "测试参数批量修改和延迟写入功能"),
+    ("SQLite参数存储", "test_参数管理", "测试SQLite参数存储", "测试SQLite参数存储功能"),
+    ("批量修改出错", "test_参数管理", "测试批量修改出错", "测试批量修改出错时丢弃整批修改"),
+    ("参数快照增量", "test_参数管理", "测试快照增量", "测试参数快照只重建修改过的部分"),
+    ("品种信息", "test_品种信息", "测试品种信息", "测试品种信息表功能"),
+    ("大象监控", "test_大象监控", "测试大象监控", "测试持仓期间大象消失监控功能"),
+    ("盘口增量", "test_盘口增量", "测试盘口增量", "测试盘口增量事件功能"),
+    ("大象特征", "test_大象特征", "测试大象特征", "测试大象滚动特征和信号强度功能"),
+    ("盘口适配", "test_盘口适配", "测试盘口适配", "测试多档盘口转换和委托笔数功能"),
+    ("行情合并", "test_行情合并", "测试行情合并", "测试行情合并和品种轮转功能"),
+    ("模拟交易所", "test_模拟交易所", "测试模拟交易所", "测试模拟交易所撮合、队列位置和延迟功能"),
+    ("行情生成", "test_行情生成", "测试行情生成", "测试合成行情的大象、冰山单和开盘突发"),
+    ("压力测试", "test_行情生成", "测试压力测试", "测试按设定速率驱动模拟交易所的压力测试"),
+    ("委托限流", "test_委托限流", "测试委托限流", "测试委托和撤单限流及优先级排队功能"),
+    ("紧急撤单", "test_紧急撤单", "测试紧急撤单", "测试紧急撤单分批发送、确认跟踪和超时重试功能"),
+    ("账户状态", "test_账户状态", "测试账户状态", "测试账户状态增量更新、持仓市值和后台对账功能"),
+    ("持仓市值", "test_资金管理", "测试持仓市值", "测试最新价表和资金管理器增量计算持仓市值、浮动盈亏功能"),
+    ("持仓批次", "test_持仓批次", "测试持仓批次", "测试持仓批次T+1冻结、先进先出卖出和交易日切换功能"),
+    ("状态快照", "test_状态快照", "测试状态快照", "测试状态快照保存恢复、校验损坏和后台写入功能"),
+    ("状态日志", "test_状态日志", "测试状态日志", "测试状态日志增量记录、成批提交、回放和对比功能"),
+    ("状态日志分段", "test_状态日志", "测试状态日志分段", "测试状态日志随快照分段、清理和恢复时跳过旧分段"),
+    ("订单回报", "test_大象策略", "测试订单回报", "测试策略按订单成交数量推进交易状态，包括部分成交后撤单"),
+    ("止损重发", "test_大象策略", "测试止损重发", "测试止损和紧急买回未全部成交时重发剩余数量、部分成交记入平仓"),
+    ("行情排空", "test_大象策略", "测试行情排空", "测试定时器和策略停止时处理合并器中等待的行情"),
+    ("参数变更", "test_大象策略", "测试参数变更", "测试热加载的参数变更由策略线程应用并订阅新增股票"),
+    ("网页紧急撤单", "test_大象策略", "测试网页紧急撤单", "测试网页线程请求的紧急撤单由策略线程执行并经委托回报确认"),
+]
+
+# 测试文件所在包的候选路径，依次尝试
+_测试包候选 = list(dict.fromkeys([
+    f"{__package__}.tests" if __package__ else "tests",
+    "tests",
+    "modules.tests",
+    "大象策略.modules.tests"
+]))
+
+def _导入测试文件(文件名: str):
+    """
+    按候选包路径导入测试文件
     
-    try:
-        # 当作为包导入时的相对导入
-        from .tests.test_大象识别 import 测试大象识别, 测试大象消失检测
-        from .tests.test_风险控制 import 测试风险控制, 测试资金风险控制
-        全局测试大象识别 = 测试大象识别  
-        全局测试大象消失检测 = 测试大象消失检测
-        全局测试风险控制 = 测试风险控制
-        全局测试资金风险控制 = 测试资金风险控制
-    except ImportError:
+    参数:
+        文件名: 测试文件名(不含.py)
+        
+    返回:
+        测试文件模块
+    """
+    最后错误 = None
+    for 包 in _测试包候选:
         try:
-            # 直接运行文件时的绝对导入
-            from tests.test_大象识别 import 测试大象识别, 测试大象消失检测
-            from tests.test_风险控制 import 测试风险控制, 测试资金风险控制
-            全局测试大象识别 = 测试大象识别  
-            全局测试大象消失检测 = 测试大象消失检测
-            全局测试风险控制 = 测试风险控制
-            全局测试资金风险控制 = 测试资金风险控制
-        except ImportError:
+            return importlib.import_module(f"{包}.{文件名}")
+        except ImportError as e:
+            最后错误 = e
+    raise ImportError(f"无法导入测试文件 {文件名}: {最后错误}")
+
+def _缺失测试(函数名: str) -> Callable:
+    """生成测试文件未找到时的默认测试函数"""
+    def 测试():
+        logger = get_logger("测试管理器")
+        logger.error(f"{函数名}函数未找到")
+        return {"成功": False, "错误": "测试文件未找到"}
+    return 测试
+
+def 加载测试函数(模块名: Optional[str] = None) -> List[tuple]:
+    """
+    按测试表加载测试函数，只导入用到的测试文件
+    
+    参数:
+        模块名: 只加载该模块的测试(测试文件名去掉 test_ 前缀)，为None时加载全部
+        
+    返回:
+        [(测试名称, 测试函数, 说明), ...]
+    """
+    logger = get_logger("测试管理器")
+    已导入 = {}
+    结果 = []
+    
+    for 测试名称, 文件名, 函数名, 说明 in 测试表:
+        if 模块名 is not None and 文件名 != f"test_{模块名}":
+            continue
+        
+        if 文件名 not in 已导入:
             try:
-                # 尝试从模块路径导入
-                from modules.tests.test_大象识别 import 测试大象识别, 测试大象消失检测
-                from modules.tests.test_风险控制 import 测试风险控制, 测试资金风险控制
-                全局测试大象识别 = 测试大象识别  
-                全局测试大象消失检测 = 测试大象消失检测
-                全局测试风险控制 = 测试风险控制
-                全局测试资金风险控制 = 测试资金风险控制
-            except ImportError:
-                try:
-                    # 最后尝试从项目导入
-                    from 大象策略.modules.tests.test_大象识别 import 测试大象识别, 测试大象消失检测
-                    from 大象策略.modules.tests.test_风险控制 import 测试风险控制, 测试资金风险控制
-                    全局测试大象识别 = 测试大象识别  
-                    全局测试大象消失检测 = 测试大象消失检测
-                    全局测试风险控制 = 测试风险控制
-                    全局测试资金风险控制 = 测试资金风险控制
-                except ImportError:
-                    # 提供默认实现，以防测试文件未找到
-                    logger = get_logger("测试管理器")
-                    logger.warning("无法导入测试函数，将使用默认实现")
-                    
-                    def 测试大象识别():
-                        logger = get_logger("测试管理器")
-                        logger.error("测试大象识别函数未找到")
-                        return {"成功": False, "错误": "测试文件未找到"}
-                    
-                    def 测试大象消失检测():
-                        logger = get_logger("测试管理器")
-                        logger.error("测试大象消失检测函数未找到")
-                        return {"成功": False, "错误": "测试文件未找到"}
-                        
-                    def 测试风险控制():
-                        logger = get_logger("测试管理器")
-                        logger.error("测试风险控制函数未找到")
-                        return {"成功": False, "错误": "测试文件未找到"}
-                        
-                    def 测试资金风险控制():
-                        logger = get_logger("测试管理器")
-                        logger.error("测试资金风险控制函数未找到")
-                        return {"成功": False, "错误": "测试文件未找到"}
-                    
-                    全局测试大象识别 = 测试大象识别  
-                    全局测试大象消失检测 = 测试大象消失检测
-                    全局测试风险控制 = 测试风险控制
-                    全局测试资金风险控制 = 测试资金风险控制
+                已导入[文件名] = _导入测试文件(文件名)
+            except ImportError as e:
+                logger.warning(str(e))
+                已导入[文件名] = None
+        
+        测试函数 = getattr(已导入[文件名], 函数名, None) if 已导入[文件名] else None
+        结果.append((测试名称, 测试函数 or _缺失测试(函数名), 说明))
     
-    return 全局测试大象识别, 全局测试大象消失检测, 全局测试风险控制, 全局测试资金风险控制
+    return 结果
 
-测试大象识别, 测试大象消失检测, 测试风险控制, 测试资金风险控制 = 加载测试函数()
+def 添加测试表(测试器: "测试管理器", 模块名: Optional[str] = None) -> int:
+    """
+    将测试表中的测试添加到测试管理器
+    
+    参数:
+        测试器: 测试管理器
+        模块名: 只添加该模块的测试，为None时添加全部
+        
+    返回:
+        添加的测试数量
+    """
+    测试列表 = 加载测试函数(模块名)
+    for 测试名称, 测试函数, 说明 in 测试列表:
+        测试器.添加测试(测试名称, lambda _, 函数=测试函数: 函数(), 说明)
+    return len(测试列表)
 
 class 测试管理器:
     """测试管理器，用于管理和执行测试用例"""
@@ -281,10 +324,7 @@ def 运行所有测试():
     测试器 = 测试管理器()
     
     # 添加测试用例
-    测试器.添加测试("大象识别", lambda _: 测试大象识别(), "测试大象识别功能")
-    测试器.添加测试("大象消失检测", lambda _: 测试大象消失检测(), "测试大象消失检测功能")
-    测试器.添加测试("风险控制", lambda _: 测试风险控制(), "测试风险控制功能")
-    测试器.添加测试("资金风险控制", lambda _: 测试资金风险控制(), "测试资金风险控制功能")
+    添加测试表(测试器)
     
     # 运行测试
     结果 = 测试器.运行测试()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+状态快照模块 - 定期把各模块的运行状态写成二进制快照，进程异常退出后重启时恢复
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from .日志 import get_logger
+from .文件工具 import 原子写入字节
+
+# 文件格式: 魔数 | 头部长度(u32) | 头部 | 各分段数据
+# 头部为pickle的 {"序号", "时间", "分段": [(名称, 长度, crc32), ...], "附加": {名称: 值}}，分段数据按头部顺序紧接排列
+快照魔数 = b"ELSNAP01"
+_长度格式 = struct.Struct("<I")
+
+
+def 读取快照(文件路径: str) -> Tuple[Dict, Dict[str, Any]]:
+    """
+    读取并校验快照文件
+
+    参数:
+        文件路径: 快照文件路径
+
+    返回:
+        (头部, {名称: 状态})，头部包含序号、时间和分段信息
+
+    异常:
+        FileNotFoundError: 文件不存在
+        ValueError: 文件格式错误或校验失败
+    """
+    with open(文件路径, "rb") as f:
+        数据 = f.read()
+    if not 数据.startswith(快照魔数):
+        raise ValueError(f"不是状态快照文件: {文件路径}")
+    位置 = len(快照魔数)
+    if len(数据) < 位置 + _长度格式.size:
+        raise ValueError(f"状态快照文件不完整: {文件路径}")
+    头部长度, = _长度格式.unpack_from(数据, 位置)
+    位置 += _长度格式.size
+    头部 = pickle.loads(数据[位置:位置 + 头部长度])
+    位置 += 头部长度
+
+    状态 = {}
+    for 名称, 长度, 校验 in 头部["分段"]:
+        分段 = 数据[位置:位置 + 长度]
+        位置 += 长度
+        if len(分段) != 长度 or zlib.crc32(分段) != 校验:
+            raise ValueError(f"状态快照分段 {名称} 校验失败: {文件路径}")
+        状态[名称] = pickle.loads(分段)
+    return 头部, 状态
+
+
+class 状态快照器:
+    """
+    状态快照器
+
+    各模块登记导出和恢复函数。保存 在策略线程中调用各导出函数并立即pickle，得到同一时刻的一致状态；
+    与上次的字节比较，没有分段变化时不写文件，有变化时只替换变化的分段，交给后台线程原子写入。
+    后台线程只保留最新一份待写快照，写盘慢时中间的快照被后来的覆盖，不会积压。
+    """
+
+    def __init__(self, 文件路径: str, 间隔秒: float = 1.0, 时钟: Callable[[], float] = time.monotonic):
+        """
+        初始化状态快照器
+
+        参数:
+            文件路径: 快照文件路径
+            间隔秒: 定期保存的间隔，为0时只在显式调用 保存 时保存
+            时钟: 返回秒数的单调时钟
+        """
+        self.文件路径 = 文件路径
+        self.间隔秒 = 间隔秒
+        self.时钟 = 时钟
+
+        self._模块 = {}  # {名称: (导出函数, 恢复函数)}
+        self._附加 = {}  # {名称: 导出函数}，写入头部的小字段
+        self._写入完成回调 = []  # 快照写入磁盘后以头部字段调用，在写入线程中执行
+        self._分段 = {}  # {名称: (pickle数据, crc32)}，最近一次保存的分段
+        self._序号 = 0
+        self._下次保存 = 时钟() + 间隔秒 if 间隔秒 > 0 else float("inf")
+
+        self._条件 = threading.Condition()
+        self._待写入 = None  # (序号, 头部, 分段数据列表)
+        self._已写序号 = 0
+        self._停止 = False
+        self._线程 = None
+
+        self.统计 = {"保存": 0, "未变化": 0, "写入": 0, "覆盖": 0, "写入失败": 0}
+        self.最近写入字节 = 0
+        self.最近写入耗时毫秒 = 0.0
+        self.最近保存耗时毫秒 = 0.0
+        self.logger = get_logger("状态快照")
+
+    def 注册(self, 名称: str, 导出: Callable[[], Any], 恢复: Callable[[Any], None]):
+        """
+        登记一个模块的状态
+
+        参数:
+            名称: 分段名称
+            导出: 返回可pickle状态的函数，在策略线程中调用
+            恢复: 以导出的状态恢复模块的函数
+        """
+        self._模块[名称] = (导出, 恢复)
+
+    def 注册头部(self, 名称: str, 导出: Callable[[], Any]):
+        """
+        登记写入头部的字段，与分段在同一时刻导出，只随分段的变化写入
+
+        参数:
+            名称: 字段名称
+            导出: 返回字段值的函数，如状态日志的序号
+        """
+        self._附加[名称] = 导出
+
+    def 注册写入完成(self, 回调: Callable[[Dict[str, Any]], None]):
+        """
+        登记快照写入磁盘后的回调，如删除已包含在快照中的状态日志分段
+
+        参数:
+            回调: 接受该快照头部字段的函数，在写入线程中调用
+        """
+        self._写入完成回调.append(回调)
+
+    def 到期(self) -> bool:
+        """是否到了定期保存的时间"""
+        return self.时钟() >= self._下次保存
+
+    def 保存(self, 强制: bool = False) -> bool:
+        """
+        导出全部模块的状态，有变化时交给后台线程写入
+
+        参数:
+            强制: 没有变化时也写入
+
+        返回:
+            是否提交了写入
+        """
+        开始 = time.perf_counter()
+        if self.间隔秒 > 0:
+            self._下次保存 = self.时钟() + self.间隔秒
+        self.统计["保存"] += 1
+
+        变化 = False
+        for 名称, (导出, _) in self._模块.items():
+            try:
+                数据 = pickle.dumps(导出(), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                self.logger.error(f"导出状态 {名称} 出错: {e}")
+                continue
+            原 = self._分段.get(名称)
+            if 原 is None or 原[0] != 数据:
+                self._分段[名称] = (数据, zlib.crc32(数据))
+                变化 = True
+
+        附加 = {}
+        for 名称, 导出 in self._附加.items():
+            try:
+                附加[名称] = 导出()
+            except Exception as e:
+                self.logger.error(f"导出头部字段 {名称} 出错: {e}")
+
+        self.最近保存耗时毫秒 = (time.perf_counter() - 开始) * 1000
+        if not (变化 or 强制):
+            self.统计["未变化"] += 1
+            return False
+
+        self._序号 += 1
+        头部 = {
+            "序号": self._序号,
+            "时间": time.time(),
+            "分段": [(名称, len(数据), 校验) for 名称, (数据, 校验) in self._分段.items()],
+            "附加": 附加
+        }
+        分段数据 = [数据 for 数据, _ in self._分段.values()]
+        with self._条件:
+            if self._待写入 is not None:
+                self.统计["覆盖"] += 1
+            self._待写入 = (self._序号, 头部, 分段数据)
+            self._条件.notify()
+        if self._线程 is None:
+            # 没有启动后台线程时当场写入
+            self._写入待写()
+        return True
+
+    @property
+    def 待写入数(self) -> int:
+        """等待后台线程写入的快照数，0或1"""
+        return 0 if self._待写入 is None else 1
+
+    def _写入待写(self):
+        with self._条件:
+            项 = self._待写入
+            self._待写入 = None
+        if 项 is None:
+            return
+        序号, 头部, 分段数据 = 项
+        开始 = time.perf_counter()
+        头部数据 = pickle.dumps(头部, protocol=pickle.HIGHEST_PROTOCOL)
+        数据 = b"".join([快照魔数, _长度格式.pack(len(头部数据)), 头部数据] + 分段数据)
+        try:
+            原子写入字节(self.文件路径, 数据)
+        except Exception as e:
+            self.统计["写入失败"] += 1
+            self.logger.error(f"写入状态快照出错: {e}")
+            return
+        finally:
+            with self._条件:
+                self._已写序号 = 序号
+                self._条件.notify_all()
+        self.统计["写入"] += 1
+        self.最近写入字节 = len(数据)
+        self.最近写入耗时毫秒 = (time.perf_counter() - 开始) * 1000
+        for 回调 in self._写入完成回调:
+            try:
+                回调(头部["附加"])
+            except Exception as e:
+                self.logger.error(f"状态快照写入完成回调出错: {e}")
+
+    def 启动(self):
+        """启动后台写入线程"""
+        if self._线程 is not None and self._线程.is_alive():
+            return
+        self._停止 = False
+
+        def 写入循环():
+            while True:
+                with self._条件:
+                    while self._待写入 is None and not self._停止:
+                        self._条件.wait()
+                    if self._待写入 is None:
+                        return
+                self._写入待写()
+
+        self._线程 = threading.Thread(target=写入循环, name="状态快照", daemon=True)
+        self._线程.start()
+
+    def 刷新(self, 超时秒: float = 2.0) -> bool:
+        """
+        等待已提交的快照处理完，写入失败的快照计入统计的 写入失败
+
+        参数:
+            超时秒: 最长等待时间
+
+        返回:
+            是否已全部处理完
+        """
+        截止 = time.monotonic() + 超时秒
+        with self._条件:
+            while self._已写序号 < self._序号:
+                剩余 = 截止 - time.monotonic()
+                if 剩余 <= 0:
+                    return False
+                self._条件.wait(剩余)
+        return True
+
+    def 停止(self, 等待: float = 2.0):
+        """
+        写完待写快照后停止后台线程
+
+        参数:
+            等待: 等待线程退出的最长时间(秒)
+        """
+        with self._条件:
+            self._停止 = True
+            self._条件.notify_all()
+        if self._线程 is not None:
+            self._线程.join(等待)
+            self._线程 = None
+
+    def 恢复(self, 文件路径: Optional[str] = None) -> Optional[Dict]:
+        """
+        读取快照并调用各模块的恢复函数
+
+        快照中没有的模块保持原状；单个模块恢复出错时记录错误并继续恢复其他模块。
+
+        参数:
+            文件路径: 快照文件路径，默认为初始化时的路径
+
+        返回:
+            {"序号", "时间", "模块": [已恢复的名称], "附加": 头部字段, "耗时毫秒"}，文件不存在或无法读取时返回None
+        """
+        开始 = time.perf_counter()
+        文件路径 = 文件路径 or self.文件路径
+        if not os.path.exists(文件路径):
+            return None
+        try:
+            头部, 状态 = 读取快照(文件路径)
+        except Exception as e:
+            self.logger.error(f"读取状态快照出错: {e}")
+            return None
+
+        已恢复 = []
+        for 名称, 数据 in 状态.items():
+            模块 = self._模块.get(名称)
+            if 模块 is None:
+                continue
+            try:
+                模块[1](数据)
+                已恢复.append(名称)
+            except Exception as e:
+                self.logger.error(f"恢复状态 {名称} 出错: {e}")
+
+        # 后续保存的序号接在快照之后
+        self._序号 = max(self._序号, 头部["序号"])
+        self._已写序号 = max(self._已写序号, 头部["序号"])
+        结果 = {
+            "序号": 头部["序号"],
+            "时间": 头部["时间"],
+            "模块": 已恢复,
+            "附加": 头部.get("附加", {}),
+            "耗时毫秒": round((time.perf_counter() - 开始) * 1000, 3)
+        }
+        self.logger.info(f"已恢复状态快照 #{结果['序号']}: {已恢复}，耗时 {结果['耗时毫秒']}ms")
+        return 结果
+
+    def 导出(self) -> Dict:
+        """
+        导出统计信息
+
+        返回:
+            {"统计", "序号", "最近写入字节", "最近写入耗时毫秒", "最近保存耗时毫秒"}
+        """
+        return {
+            "统计": dict(self.统计),
+            "序号": self._序号,
+            "最近写入字节": self.最近写入字节,
+            "最近写入耗时毫秒": round(self.最近写入耗时毫秒, 3),
+            "最近保存耗时毫秒": round(self.最近保存耗时毫秒, 3)
+        }
@@ -0,0 +1,510 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+状态日志模块 - 把交易周期的每次状态变化顺序追加到预写日志，后台线程成批提交，用于重启恢复、回放和对比
+"""
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import copy
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+
+from .日志 import get_logger
+
+# 每条记录: 长度(u32) | crc32(u32) | pickle的 (序号, 时间, 股票代码, 事件, 变化, 删除键)
+# 变化为None表示交易周期结束、删除该股票的交易状态；否则为与上一条记录相比新增或改变的字段
+_记录头格式 = struct.Struct("<II")
+
+# 分段文件名 状态日志_YYYYMMDD_起始序号.wal，旧版按交易日命名的 状态日志_YYYYMMDD.wal 没有起始序号
+_分段序号格式 = re.compile(r"_(\d{12})\.wal$")
+
+# 对比两次运行时默认忽略的字段，每次运行都不同
+默认忽略字段 = ("开始时间", "买入成交时间", "卖出成交时间", "结束时间", "买入订单ID", "卖出订单ID", "止损撤单ID")
+
+记录 = Tuple[int, float, str, str, Optional[Dict[str, Any]], Tuple[str, ...]]
+
+
+def _复制状态(状态: Dict) -> Dict:
+    """复制交易状态作为比较基线，嵌套的字典和列表深拷贝，其余字段直接引用"""
+    return {键: copy.deepcopy(值) if isinstance(值, (dict, list, set)) else 值 for 键, 值 in 状态.items()}
+
+
+def 读取日志(文件路径: str) -> Iterator[记录]:
+    """
+    按顺序读取日志文件中的记录
+
+    进程异常退出时最后一批可能只写了一部分，读到不完整或校验失败的记录时停止。
+
+    参数:
+        文件路径: 日志文件路径
+
+    返回:
+        (序号, 时间, 股票代码, 事件, 变化, 删除键) 的迭代器
+    """
+    logger = get_logger("状态日志")
+    with open(文件路径, "rb") as f:
+        数据 = f.read()
+    位置 = 0
+    while 位置 < len(数据):
+        if len(数据) - 位置 < _记录头格式.size:
+            logger.warning(f"日志末尾记录不完整，已忽略: {文件路径} 位置{位置}")
+            return
+        长度, 校验 = _记录头格式.unpack_from(数据, 位置)
+        开始 = 位置 + _记录头格式.size
+        内容 = 数据[开始:开始 + 长度]
+        if len(内容) != 长度 or zlib.crc32(内容) != 校验:
+            logger.warning(f"日志记录校验失败，停止读取: {文件路径} 位置{位置}")
+            return
+        yield pickle.loads(内容)
+        位置 = 开始 + 长度
+
+
+def 日志文件列表(目录: str) -> List[str]:
+    """
+    获取目录下的日志文件，按记录先后排列
+
+    参数:
+        目录: 日志目录
+
+    返回:
+        日志文件路径列表
+    """
+    return [路径 for _, 路径 in _分段列表(目录)]
+
+
+def _分段列表(目录: str) -> List[Tuple[Optional[int], str]]:
+    """
+    获取目录下的日志分段及其起始序号，旧版没有起始序号的文件排在最前
+
+    参数:
+        目录: 日志目录
+
+    返回:
+        [(起始序号或None, 文件路径), ...]
+    """
+    if not os.path.isdir(目录):
+        return []
+    分段 = []
+    for 名称 in os.listdir(目录):
+        if not 名称.endswith(".wal"):
+            continue
+        匹配 = _分段序号格式.search(名称)
+        分段.append((int(匹配.group(1)) if 匹配 else None, os.path.join(目录, 名称)))
+    分段.sort(key=lambda 项: (项[0] or 0, 项[1]))
+    return 分段
+
+
+def 读取目录(目录: str, 起始序号: int = 0) -> Iterator[记录]:
+    """
+    按顺序读取目录下日志文件中序号大于起始序号的记录
+
+    下一个分段的起始序号不大于 起始序号+1 时，该分段的记录全部不晚于起始序号，直接跳过不读。
+
+    参数:
+        目录: 日志目录
+        起始序号: 只返回序号大于该值的记录
+
+    返回:
+        记录迭代器
+    """
+    分段 = _分段列表(目录)
+    for 位置, (_, 路径) in enumerate(分段):
+        if 位置 + 1 < len(分段):
+            下一起始 = 分段[位置 + 1][0]
+            if 下一起始 is not None and 下一起始 - 1 <= 起始序号:
+                continue
+        for 项 in 读取日志(路径):
+            if 项[0] > 起始序号:
+                yield 项
+
+
+def 回放(记录列表: Iterable[记录], 初始状态: Optional[Dict[str, Dict]] = None,
+       到序号: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    按顺序应用记录重建交易状态
+
+    参数:
+        记录列表: 记录迭代器
+        初始状态: 起点的交易状态，直接在其上修改；为None时从空状态开始
+        到序号: 只应用序号不大于该值的记录，为None时应用全部
+
+    返回:
+        交易状态 {股票代码: 状态字典}
+    """
+    状态 = {} if 初始状态 is None else 初始状态
+    for 序号, _, 股票代码, _, 变化, 删除键 in 记录列表:
+        if 到序号 is not None and 序号 > 到序号:
+            break
+        if 变化 is None:
+            状态.pop(股票代码, None)
+            continue
+        项 = 状态.setdefault(股票代码, {})
+        for 键 in 删除键:
+            项.pop(键, None)
+        项.update(变化)
+    return 状态
+
+
+def 状态轨迹(记录列表: Iterable[记录]) -> Dict[str, List[Tuple[str, Optional[str]]]]:
+    """
+    提取每只股票交易状态的变化轨迹
+
+    参数:
+        记录列表: 记录迭代器
+
+    返回:
+        {股票代码: [(事件, 状态), ...]}，交易周期结束时状态为None
+    """
+    当前 = {}
+    轨迹 = {}
+    for _, _, 股票代码, 事件, 变化, _ in 记录列表:
+        if 变化 is None:
+            当前.pop(股票代码, None)
+            新状态 = None
+        else:
+            新状态 = 变化.get("状态", 当前.get(股票代码))
+            当前[股票代码] = 新状态
+        轨迹.setdefault(股票代码, []).append((事件, 新状态))
+    return 轨迹
+
+
+def 对比(记录A: Iterable[记录], 记录B: Iterable[记录], 忽略字段: Iterable[str] = 默认忽略字段) -> List[str]:
+    """
+    对比两次运行的状态日志，序号、时间和订单号等每次运行都不同的字段不参与比较
+
+    参数:
+        记录A: 第一次运行的记录
+        记录B: 第二次运行的记录
+        忽略字段: 最终状态中不参与比较的字段
+
+    返回:
+        差异描述列表，相同时为空
+    """
+    记录A = list(记录A)
+    记录B = list(记录B)
+    差异 = []
+
+    轨迹A = 状态轨迹(记录A)
+    轨迹B = 状态轨迹(记录B)
+    for 股票代码 in sorted(set(轨迹A) | set(轨迹B)):
+        甲 = 轨迹A.get(股票代码, [])
+        乙 = 轨迹B.get(股票代码, [])
+        for i, (项甲, 项乙) in enumerate(zip(甲, 乙)):
+            if 项甲 != 项乙:
+                差异.append(f"{股票代码} 第{i + 1}次变化不同: {项甲} / {项乙}")
+                break
+        else:
+            if len(甲) != len(乙):
+                差异.append(f"{股票代码} 变化次数不同: {len(甲)} / {len(乙)}")
+
+    忽略 = set(忽略字段)
+    状态A = 回放(记录A)
+    状态B = 回放(记录B)
+    for 股票代码 in sorted(set(状态A) | set(状态B)):
+        甲 = {键: 值 for 键, 值 in 状态A.get(股票代码, {}).items() if 键 not in 忽略}
+        乙 = {键: 值 for 键, 值 in 状态B.get(股票代码, {}).items() if 键 not in 忽略}
+        for 键 in sorted(set(甲) | set(乙)):
+            if 甲.get(键) != 乙.get(键):
+                差异.append(f"{股票代码} 最终状态 {键}: {甲.get(键)} / {乙.get(键)}")
+    return 差异
+
+
+class 状态日志器:
+    """
+    交易状态预写日志
+
+    策略线程在每次处理完信号、委托回报或大象消失后调用 记录，与上次记录的该股票状态比较，
+    只把变化的字段序列化成一条记录放入内存队列，不做任何磁盘操作。
+    后台线程等到凑满一批或第一条记录等待超过提交间隔后，一次写入整批记录并fsync，
+    多次状态变化共用一次磁盘同步。
+    日志按状态快照分段：每次保存快照时 轮换，之后的记录写入以下一个序号命名的新分段，
+    快照写入磁盘后 清理 删除全部记录都已包含在快照中的分段，目录中只保留最近快照之后的记录。
+    """
+
+    def __init__(self, 目录: str, 批量大小: int = 256, 提交间隔毫秒: float = 20.0,
+                 同步: bool = True, 时钟: Callable[[], float] = time.time):
+        """
+        初始化状态日志器
+
+        参数:
+            目录: 日志目录，每个分段一个 状态日志_YYYYMMDD_起始序号.wal 文件
+            批量大小: 待写记录达到该数量时立即提交
+            提交间隔毫秒: 第一条待写记录最长等待的时间
+            同步: 每批写入后是否fsync
+            时钟: 记录时间戳使用的时钟
+        """
+        self.目录 = 目录
+        self.批量大小 = max(1, 批量大小)
+        self.提交间隔 = 提交间隔毫秒 / 1000
+        self.同步 = 同步
+        self.时钟 = 时钟
+
+        self._已记录 = {}  # {股票代码: 上次记录后的状态副本}
+        self.序号 = 0
+        self._当前分段 = None  # 新记录写入的分段文件，轮换后在下一条记录时创建
+        self._分段起始 = None  # 最近一次轮换后新分段的起始序号
+        self._已打开分段 = set()  # 本进程写过的分段，第一次写入时覆盖同名的残留文件
+
+        self._条件 = threading.Condition()
+        self._待写入 = []  # [(序号, 编码后的记录)]
+        self._首条时间 = 0.0
+        self._已写序号 = 0
+        self._写锁 = threading.Lock()
+        self._停止 = False
+        self._线程 = None
+
+        self.统计 = {"记录": 0, "批次": 0, "字节": 0, "最大批量": 0, "写入失败": 0}
+        self.最近提交耗时毫秒 = 0.0
+        self.logger = get_logger("状态日志")
+
+    @property
+    def 待写入数(self) -> int:
+        """等待提交的记录数"""
+        return len(self._待写入)
+
+    def 设置基线(self, 交易状态: Dict[str, Dict], 序号: int = 0):
+        """
+        恢复后以当前交易状态作为比较基线，后续记录只包含相对它的变化
+
+        参数:
+            交易状态: 恢复后的交易状态
+            序号: 恢复到的序号，后续记录从其后编号
+        """
+        self._已记录 = {股票代码: _复制状态(状态) for 股票代码, 状态 in 交易状态.items()}
+        self.序号 = max(self.序号, 序号)
+        with self._条件:
+            self._已写序号 = max(self._已写序号, self.序号)
+
+    def 记录(self, 股票代码: str, 事件: str, 状态: Optional[Dict]) -> bool:
+        """
+        记录一只股票交易状态的变化
+
+        参数:
+            股票代码: 股票代码
+            事件: 引起变化的事件，如 大象信号、订单回报、大象消失
+            状态: 该股票当前的交易状态，交易周期已结束时为None
+
+        返回:
+            是否有变化并追加了记录
+        """
+        原 = self._已记录.get(股票代码)
+        if 状态 is None:
+            if 原 is None:
+                return False
+            del self._已记录[股票代码]
+            变化 = None
+            删除键 = ()
+        else:
+            if 原 is None:
+                变化 = dict(状态)
+                删除键 = ()
+            else:
+                变化 = {键: 值 for 键, 值 in 状态.items() if 键 not in 原 or 原[键] != 值}
+                删除键 = tuple(键 for 键 in 原 if 键 not in 状态)
+                if not 变化 and not 删除键:
+                    return False
+            # 大象信息等嵌套字段会被原地修改，比较基线必须是独立的副本
+            self._已记录[股票代码] = _复制状态(状态)
+
+        if self._当前分段 is None:
+            self._当前分段 = os.path.join(self.目录, f"状态日志_{date.today():%Y%m%d}_{self.序号 + 1:012d}.wal")
+        self.序号 += 1
+        内容 = pickle.dumps((self.序号, self.时钟(), 股票代码, 事件, 变化, 删除键), protocol=pickle.HIGHEST_PROTOCOL)
+        数据 = _记录头格式.pack(len(内容), zlib.crc32(内容)) + 内容
+        with self._条件:
+            if not self._待写入:
+                self._首条时间 = time.monotonic()
+            self._待写入.append((self.序号, 数据, self._当前分段))
+            if len(self._待写入) >= self.批量大小:
+                self._条件.notify()
+        self.统计["记录"] += 1
+        return True
+
+    def 提交(self) -> int:
+        """
+        在当前线程写入全部待写记录
+
+        返回:
+            写入的记录数
+        """
+        with self._写锁:
+            with self._条件:
+                批 = self._待写入
+                self._待写入 = []
+            if not 批:
+                return 0
+            开始 = time.perf_counter()
+            # 一批记录可能跨过轮换，按分段分组，每个分段写入一次
+            分组 = {}
+            for _, 记录数据, 路径 in 批:
+                分组.setdefault(路径, []).append(记录数据)
+            数据 = b"".join(项[1] for 项 in 批)
+            try:
+                os.makedirs(self.目录, exist_ok=True)
+                for 路径, 记录数据 in 分组.items():
+                    # 同名的残留文件只可能是上次运行写坏的分段，第一次写入时覆盖
+                    模式 = "ab" if 路径 in self._已打开分段 else "wb"
+                    with open(路径, 模式) as f:
+                        f.write(b"".join(记录数据))
+                        f.flush()
+                        if self.同步:
+                            os.fsync(f.fileno())
+                    self._已打开分段.add(路径)
+            except Exception as e:
+                self.统计["写入失败"] += len(批)
+                self.logger.error(f"写入状态日志出错，丢弃 {len(批)} 条记录: {e}")
+            else:
+                self.统计["批次"] += 1
+                self.统计["字节"] += len(数据)
+                self.统计["最大批量"] = max(self.统计["最大批量"], len(批))
+                self.最近提交耗时毫秒 = (time.perf_counter() - 开始) * 1000
+            finally:
+                with self._条件:
+                    self._已写序号 = max(self._已写序号, 批[-1][0])
+                    self._条件.notify_all()
+            return len(批)
+
+    def 轮换(self) -> int:
+        """
+        保存状态快照时调用，之后的记录写入新的分段
+
+        返回:
+            当前序号，即快照已包含的最后一条记录的序号
+        """
+        self._当前分段 = None
+        self._分段起始 = self.序号 + 1
+        return self.序号
+
+    def 清理(self, 快照序号: int) -> int:
+        """
+        状态快照写入磁盘后调用，删除全部记录都不晚于快照序号的分段
+
+        分段的最后一条记录早于下一个分段的起始序号；最后一个分段早于最近一次轮换时，
+        它的记录早于轮换后新分段的起始序号。
+
+        参数:
+            快照序号: 已写入磁盘的快照包含的最后一条记录的序号
+
+        返回:
+            删除的文件数
+        """
+        with self._写锁:
+            分段 = _分段列表(self.目录)
+            已删除 = 0
+            for 位置, (起始, 路径) in enumerate(分段):
+                if 位置 + 1 < len(分段):
+                    下一起始 = 分段[位置 + 1][0]
+                elif self._分段起始 is not None and (起始 is None or 起始 < self._分段起始):
+                    下一起始 = self._分段起始
+                else:
+                    下一起始 = None
+                if 下一起始 is None or 下一起始 - 1 > 快照序号:
+                    continue
+                try:
+                    os.remove(路径)
+                    已删除 += 1
+                except OSError as e:
+                    self.logger.warning(f"删除状态日志分段出错 {路径}: {e}")
+                self._已打开分段.discard(路径)
+        return 已删除
+
+    def 启动(self):
+        """启动后台提交线程"""
+        if self._线程 is not None and self._线程.is_alive():
+            return
+        self._停止 = False
+
+        def 提交循环():
+            while True:
+                with self._条件:
+                    while not self._停止:
+                        if self._待写入:
+                            剩余 = self._首条时间 + self.提交间隔 - time.monotonic()
+                            if 剩余 <= 0 or len(self._待写入) >= self.批量大小:
+                                break
+                            self._条件.wait(剩余)
+                        else:
+                            self._条件.wait()
+                    if self._停止 and not self._待写入:
+                        return
+                self.提交()
+
+        self._线程 = threading.Thread(target=提交循环, name="状态日志", daemon=True)
+        self._线程.start()
+
+    def 刷新(self, 超时秒: float = 2.0) -> bool:
+        """
+        等待已记录的变化全部提交，没有后台线程时当场提交
+
+        参数:
+            超时秒: 最长等待时间
+
+        返回:
+            是否已全部提交
+        """
+        if self._线程 is None:
+            self.提交()
+            return True
+        截止 = time.monotonic() + 超时秒
+        with self._条件:
+            self._首条时间 = 0.0
+            self._条件.notify()
+            while self._已写序号 < self.序号:
+                剩余 = 截止 - time.monotonic()
+                if 剩余 <= 0:
+                    return False
+                self._条件.wait(剩余)
+        return True
+
+    def 停止(self, 等待: float = 2.0):
+        """
+        提交全部待写记录后停止后台线程
+
+        参数:
+            等待: 等待线程退出的最长时间(秒)
+        """
+        with self._条件:
+            self._停止 = True
+            self._条件.notify_all()
+        if self._线程 is not None:
+            self._线程.join(等待)
+            self._线程 = None
+        self.提交()
+
+    def 恢复(self, 交易状态: Dict[str, Dict], 起始序号: int = 0) -> Dict:
+        """
+        在快照恢复的交易状态上回放之后的日志记录，并以结果作为新的比较基线
+
+        参数:
+            交易状态: 快照恢复的交易状态，直接在其上修改
+            起始序号: 快照包含的最后一条记录的序号
+
+        返回:
+            {"记录数": 回放的记录数, "序号": 回放到的序号}
+        """
+        尾部 = list(读取目录(self.目录, 起始序号))
+        回放(尾部, 交易状态)
+        序号 = 尾部[-1][0] if 尾部 else 起始序号
+        self.设置基线(交易状态, 序号)
+        if 尾部:
+            self.logger.info(f"回放状态日志 {len(尾部)} 条记录，#{起始序号 + 1} 至 #{序号}")
+        return {"记录数": len(尾部), "序号": 序号}
+
+    def 导出(self) -> Dict:
+        """
+        导出统计信息
+
+        返回:
+            {"统计", "序号", "待写入", "最近提交耗时毫秒"}
+        """
+        return {
+            "统计": dict(self.统计),
+            "序号": self.序号,
+            "待写入": self.待写入数,
+            "最近提交耗时毫秒": round(self.最近提交耗时毫秒, 3)
+        }
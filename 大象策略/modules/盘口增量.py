@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+盘口增量模块 - 比较相邻两笔盘口，生成价格档新增、成交减少、撤单减少、补单增加和最优价移动事件
+"""
+from array import array
+from collections import namedtuple
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .日志 import get_logger
+
+# 事件类型
+事件_新增 = 0  # 可见范围内出现新的价格档
+事件_成交减少 = 1  # 价格档数量因成交减少
+事件_撤单减少 = 2  # 价格档数量因撤单减少，包括整档消失
+事件_补单增加 = 3  # 已有价格档数量增加，如冰山单补单
+事件_价格移动 = 4  # 最优价变化
+
+事件名称 = ("新增", "成交减少", "撤单减少", "补单增加", "价格移动")
+
+# 盘口方向
+方向_买 = 0
+方向_卖 = 1
+
+# 事件为普通元组 (序号, 股票代码, 类型, 方向, 价格档, 变化量, 数量)，不为每个事件创建对象；
+# 需要按字段名访问时可用 盘口事件._make(事件)。
+# 价格移动事件的 价格档 为新的最优价档，变化量 为移动的价格档数(带符号)，数量 为新最优价的数量；
+# 其余事件的 变化量 为数量变化(带符号)，数量 为变化后的数量
+盘口事件 = namedtuple("盘口事件", ["序号", "股票代码", "类型", "方向", "价格档", "变化量", "数量"])
+
+# 订阅回调: (股票代码, 时间戳, 事件列表)
+事件回调 = Callable[[str, int, List[Tuple]], None]
+
+
+class _品种盘口:
+    """单个品种上一笔盘口，直接保存输入的档位序列，下一笔行情与之比较"""
+    __slots__ = ("档位", "档数", "累计成交量")
+
+    def __init__(self):
+        self.档位 = [(), ()]  # 各方向上一笔的 [(价格档, 数量), ...]
+        self.档数 = [0, 0]  # 各方向有报价的档数
+        self.累计成交量 = 0
+
+
+class 盘口增量引擎:
+    """
+    盘口增量引擎
+
+    按品种保存上一笔盘口，新盘口到达时按价格归并比较两侧各档，生成带序号的增量事件并分发给订阅者。
+    两笔盘口都满档时只比较共同覆盖的价格区间，因价格移动滚出或滚入可见档位的价格档不产生事件。
+    数量减少按本笔成交量归因：最新价所及范围内的减少先记为成交，超出成交量的部分记为撤单。
+
+    一侧盘口与上一笔相同时整侧跳过归并。订阅时可以指定关注条件，所有订阅者都不关注的品种只保存盘口、
+    不生成事件(也不计入序号和事件统计)，之后开始关注时与最近一笔盘口比较。
+    盘口按引用保存，调用方不要原地修改已经传入的档位列表。
+    """
+
+    def __init__(self, 档位数: int = 5):
+        """
+        初始化盘口增量引擎
+
+        参数:
+            档位数: 每侧盘口档位数
+        """
+        self.档位数 = 档位数
+        self._盘口 = {}  # {股票代码: _品种盘口}
+        self._订阅者 = []  # [(回调, 关注条件)]
+        self._序号 = 0
+        self.事件统计 = array("q", bytes(8 * len(事件名称)))  # 按事件类型计数
+        self.logger = get_logger("盘口增量")
+
+    @property
+    def 序号(self) -> int:
+        """最近一个事件的序号"""
+        return self._序号
+
+    def 订阅(self, 回调: 事件回调, 关注: Optional[Callable[[str], bool]] = None):
+        """
+        订阅盘口事件，每笔行情有事件时回调一次
+
+        参数:
+            回调: 回调函数，参数为(股票代码, 时间戳, 事件列表)
+            关注: 判断是否需要该品种事件的函数，为None时关注全部品种
+        """
+        if all(已订阅 != 回调 for 已订阅, _ in self._订阅者):
+            self._订阅者.append((回调, 关注))
+
+    def 取消订阅(self, 回调: 事件回调):
+        """
+        取消订阅盘口事件
+
+        参数:
+            回调: 订阅时的回调函数
+        """
+        self._订阅者 = [(已订阅, 关注) for 已订阅, 关注 in self._订阅者 if 已订阅 != 回调]
+
+    def 重置(self, 股票代码: str = None):
+        """
+        清除保存的盘口，下一笔盘口重新作为基准
+
+        参数:
+            股票代码: 指定股票代码，为None时清除全部
+        """
+        if 股票代码 is None:
+            self._盘口.clear()
+        else:
+            self._盘口.pop(股票代码, None)
+
+    def 更新(self, 股票代码: str, 时间戳: int, 买盘: Sequence[Tuple[int, int]], 卖盘: Sequence[Tuple[int, int]],
+           最新价档: int = 0, 累计成交量: int = 0) -> List[Tuple]:
+        """
+        输入一笔盘口，与上一笔比较生成增量事件并分发给订阅者
+
+        参数:
+            股票代码: 股票代码
+            时间戳: 行情时间戳(毫秒)
+            买盘: 买盘 [(价格档, 数量), ...]，价格从高到低
+            卖盘: 卖盘 [(价格档, 数量), ...]，价格从低到高
+            最新价档: 最新成交价档，为0时数量减少全部记为撤单
+            累计成交量: 当日累计成交量，与上一笔的差值为本笔成交量
+
+        返回:
+            事件列表，品种的第一笔盘口和没有订阅者关注的品种返回空列表
+        """
+        状态 = self._盘口.get(股票代码)
+        if 状态 is None:
+            状态 = self._盘口[股票代码] = _品种盘口()
+            self._保存(状态, 方向_买, 买盘)
+            self._保存(状态, 方向_卖, 卖盘)
+            状态.累计成交量 = 累计成交量
+            return []
+
+        订阅者 = self._订阅者
+        if 订阅者 and all(关注 is not None and not 关注(股票代码) for _, 关注 in 订阅者):
+            self._保存(状态, 方向_买, 买盘)
+            self._保存(状态, 方向_卖, 卖盘)
+            状态.累计成交量 = 累计成交量
+            return []
+
+        事件列表 = []
+        剩余成交 = 累计成交量 - 状态.累计成交量 if 最新价档 else 0
+        状态.累计成交量 = 累计成交量
+        剩余成交 = self._比较(股票代码, 状态, 方向_买, 买盘, 最新价档, 剩余成交, 事件列表)
+        self._比较(股票代码, 状态, 方向_卖, 卖盘, 最新价档, 剩余成交, 事件列表)
+
+        if 事件列表:
+            统计 = self.事件统计
+            for 事件 in 事件列表:
+                统计[事件[2]] += 1
+            for 回调, _ in 订阅者:
+                try:
+                    回调(股票代码, 时间戳, 事件列表)
+                except Exception as e:
+                    self.logger.error(f"盘口事件回调出错: {e}")
+        return 事件列表
+
+    def _有效档数(self, 档位: Sequence[Tuple[int, int]]) -> int:
+        """可见范围内连续有报价的档数"""
+        上限 = min(len(档位), self.档位数)
+        档数 = 0
+        while 档数 < 上限 and 档位[档数][0]:
+            档数 += 1
+        return 档数
+
+    def _保存(self, 状态: _品种盘口, 方向: int, 档位: Sequence[Tuple[int, int]]):
+        """保存一侧盘口，作为下一笔比较的基准"""
+        状态.档位[方向] = 档位
+        状态.档数[方向] = self._有效档数(档位)
+
+    def _比较(self, 股票代码: str, 状态: _品种盘口, 方向: int, 档位: Sequence[Tuple[int, int]],
+            最新价档: int, 剩余成交: int, 事件列表: List[Tuple]) -> int:
+        """
+        按价格归并比较一侧的新旧盘口，事件追加到事件列表
+
+        返回:
+            归因后剩余的成交量
+        """
+        旧档位 = 状态.档位[方向]
+        if 档位 == 旧档位:
+            # 整侧未变化，没有事件
+            状态.档位[方向] = 档位
+            return 剩余成交
+        旧档数 = 状态.档数[方向]
+        新档数 = self._有效档数(档位)
+
+        # 买盘价格从高到低，卖盘从低到高；乘以系数后两侧都按从大到小归并
+        系数 = 1 if 方向 == 方向_买 else -1
+        # 满档时最后一档之外的价格档不可见，只比较可见范围内的变化
+        旧边界 = 系数 * 旧档位[旧档数 - 1][0] if 旧档数 == self.档位数 else None
+        新边界 = 系数 * 档位[新档数 - 1][0] if 新档数 == self.档位数 else None
+        成交边界 = 系数 * 最新价档
+
+        if 旧档数 and 新档数 and 旧档位[0][0] != 档位[0][0]:
+            self._序号 += 1
+            事件列表.append((self._序号, 股票代码, 事件_价格移动, 方向, 档位[0][0],
+                         档位[0][0] - 旧档位[0][0], 档位[0][1]))
+
+        i = j = 0
+        while i < 旧档数 or j < 新档数:
+            旧位置 = 系数 * 旧档位[i][0] if i < 旧档数 else None
+            新位置 = 系数 * 档位[j][0] if j < 新档数 else None
+            if 新位置 is None or (旧位置 is not None and 旧位置 > 新位置):
+                # 旧价格档不在新盘口中
+                if 新边界 is None or 旧位置 >= 新边界:
+                    旧价, 旧量 = 旧档位[i]
+                    剩余成交 = self._记录减少(股票代码, 方向, 旧价, 旧量, 0,
+                                       旧位置 >= 成交边界, 剩余成交, 事件列表)
+                i += 1
+            elif 旧位置 is None or 新位置 > 旧位置:
+                # 新出现的价格档
+                if 旧边界 is None or 新位置 >= 旧边界:
+                    新价, 新量 = 档位[j]
+                    self._序号 += 1
+                    事件列表.append((self._序号, 股票代码, 事件_新增, 方向, 新价, 新量, 新量))
+                j += 1
+            else:
+                新价, 新量 = 档位[j]
+                变化量 = 新量 - 旧档位[i][1]
+                if 变化量 > 0:
+                    self._序号 += 1
+                    事件列表.append((self._序号, 股票代码, 事件_补单增加, 方向, 新价, 变化量, 新量))
+                elif 变化量 < 0:
+                    剩余成交 = self._记录减少(股票代码, 方向, 新价, -变化量, 新量,
+                                       旧位置 >= 成交边界, 剩余成交, 事件列表)
+                i += 1
+                j += 1
+
+        状态.档位[方向] = 档位
+        状态.档数[方向] = 新档数
+        return 剩余成交
+
+    def _记录减少(self, 股票代码: str, 方向: int, 价格档: int, 减少量: int, 剩余数量: int,
+              可成交: bool, 剩余成交: int, 事件列表: List[Tuple]) -> int:
+        """将数量减少拆分为成交和撤单事件，返回剩余的成交量"""
+        成交量 = min(减少量, 剩余成交) if 可成交 else 0
+        if 成交量 > 0:
+            self._序号 += 1
+            事件列表.append((self._序号, 股票代码, 事件_成交减少, 方向, 价格档,
+                         -成交量, 剩余数量 + 减少量 - 成交量))
+        if 减少量 > 成交量:
+            self._序号 += 1
+            事件列表.append((self._序号, 股票代码, 事件_撤单减少, 方向, 价格档,
+                         成交量 - 减少量, 剩余数量))
+        return 剩余成交 - 成交量
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+盘口适配模块 - 将vnpy行情(TickData)转换为任意档位数的整数盘口，可选读取Level-2各档委托笔数
+"""
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .日志 import get_logger
+
+# vnpy的TickData只有五档字段，更深的档位和委托笔数由Level-2接口以同名属性或 extra 字典提供
+基本档位数 = 5
+
+# 四组字段依次为买价、买量、卖价、卖量
+盘口字段 = ("bid_price", "bid_volume", "ask_price", "ask_volume")
+笔数字段 = ("bid_order_count", "ask_order_count")
+
+
+def _字段名(前缀列表: Sequence[str], 起始档: int, 结束档: int) -> List[str]:
+    """按组生成字段名，如 bid_price_1..bid_price_N, bid_volume_1..bid_volume_N, ..."""
+    return [f"{前缀}_{i}" for 前缀 in 前缀列表 for i in range(起始档, 结束档 + 1)]
+
+
+def _属性取值器(字段列表: Sequence[str]) -> Callable:
+    """一次取出多个属性，返回元组；只有一个字段时也返回元组"""
+    if not 字段列表:
+        return lambda 对象: ()
+    取值 = attrgetter(*字段列表)
+    if len(字段列表) == 1:
+        return lambda 对象: (取值(对象),)
+    return 取值
+
+
+def _键取值器(键列表: Sequence[str]) -> Callable:
+    """一次取出字典中的多个键，返回元组；只有一个键时也返回元组"""
+    if not 键列表:
+        return lambda 字典: ()
+    取值 = itemgetter(*键列表)
+    if len(键列表) == 1:
+        return lambda 字典: (取值(字典),)
+    return 取值
+
+
+def _分组切片(每组: int, 组数: int) -> Tuple[slice, ...]:
+    """按组排列的数值中各组的切片"""
+    return tuple(slice(k * 每组, (k + 1) * 每组) for k in range(组数))
+
+
+class 盘口适配器:
+    """
+    盘口适配器
+
+    创建时按档位数预先生成字段名和取值器，每笔行情用一次 attrgetter 调用取出全部字段，
+    档位数变大时只增加C层的取值，不增加Python层的循环。
+    第一笔行情确定读取方式：行情对象直接带有深档或委托笔数属性时按属性读取，
+    否则从 extra 字典读取，字典中缺少的档位价格和数量为0，与五档行情的空档一致。
+
+    盘口指纹是取出的原始价格、数量(和委托笔数)元组的哈希值，只有时间戳变化的行情指纹相同，
+    策略据此跳过对未变化盘口的重复检测。
+    """
+
+    def __init__(self, 档位数: int = 5, 读取委托笔数: bool = False):
+        """
+        初始化盘口适配器
+
+        参数:
+            档位数: 每侧盘口档位数，五档行情为5，Level-2行情通常为10
+            读取委托笔数: 是否读取各档委托笔数(bid_order_count_i/ask_order_count_i)
+        """
+        if 档位数 < 1:
+            raise ValueError(f"盘口档位数必须大于0: {档位数}")
+        self.档位数 = 档位数
+        self.读取委托笔数 = 读取委托笔数
+        self.logger = get_logger("盘口适配")
+
+        基本档数 = min(档位数, 基本档位数)
+        self._全部字段 = _字段名(盘口字段, 1, 档位数)
+        self._扩展字段 = _字段名(盘口字段, 基本档数 + 1, 档位数)
+        self._全部笔数字段 = _字段名(笔数字段, 1, 档位数)
+        self._取全部 = _属性取值器(self._全部字段)
+        self._取基本 = _属性取值器(_字段名(盘口字段, 1, 基本档数))
+        self._取笔数 = _属性取值器(self._全部笔数字段)
+        self._取扩展 = _键取值器(self._扩展字段)
+        self._取扩展笔数 = _键取值器(self._全部笔数字段)
+        self._全部切片 = _分组切片(档位数, 4)
+        self._基本切片 = _分组切片(基本档数, 4)
+        self._扩展切片 = _分组切片(档位数 - 基本档数, 4)
+
+        # 第一笔行情时确定
+        self._读取盘口 = None
+        self._读取笔数 = None
+
+    def 转换(self, tick, 品种) -> Dict:
+        """
+        将一笔行情转换为盘口数据
+
+        参数:
+            tick: vnpy行情(TickData)或具有相同字段的对象
+            品种: 品种信息，用于价格档换算
+
+        返回:
+            {"时间戳", "买盘", "卖盘", "最新价", "指纹"}，读取委托笔数时另有 "买盘笔数"、"卖盘笔数"(各档笔数元组)
+        """
+        if self._读取盘口 is None:
+            self._选择读取方式(tick)
+
+        买价, 买量, 卖价, 卖量, 指纹 = self._读取盘口(tick)
+        盘口数据 = {
+            "时间戳": int(tick.datetime.timestamp() * 1000),
+            "买盘": 品种.转盘口(买价, 买量),
+            "卖盘": 品种.转盘口(卖价, 卖量),
+            "最新价": 品种.转价格档(tick.last_price),
+            "指纹": 指纹
+        }
+        if self.读取委托笔数:
+            买笔数, 卖笔数 = 盘口数据["买盘笔数"], 盘口数据["卖盘笔数"] = self._读取笔数(tick)
+            盘口数据["指纹"] = hash((指纹, 买笔数, 卖笔数))
+        return 盘口数据
+
+    def _选择读取方式(self, tick):
+        """按第一笔行情的字段确定深档和委托笔数的读取方式"""
+        if self.档位数 <= 基本档位数 or all(hasattr(tick, 名) for 名 in self._扩展字段):
+            self._读取盘口 = self._按属性读取盘口
+            来源 = "属性"
+        else:
+            self._读取盘口 = self._按扩展读取盘口
+            来源 = "extra"
+
+        if all(hasattr(tick, 名) for 名 in self._全部笔数字段):
+            self._读取笔数 = self._按属性读取笔数
+            笔数来源 = "属性"
+        else:
+            self._读取笔数 = self._按扩展读取笔数
+            笔数来源 = "extra"
+
+        self.logger.info(f"盘口档位数: {self.档位数} 深档来源: {来源}"
+                         + (f" 委托笔数来源: {笔数来源}" if self.读取委托笔数 else ""))
+
+    def _按属性读取盘口(self, tick) -> Tuple:
+        """全部档位按属性读取，返回(买价, 买量, 卖价, 卖量, 指纹)"""
+        值 = self._取全部(tick)
+        买价, 买量, 卖价, 卖量 = self._全部切片
+        return 值[买价], 值[买量], 值[卖价], 值[卖量], hash(值)
+
+    def _按扩展读取盘口(self, tick) -> Tuple:
+        """前五档按属性、其余档位从 extra 读取，返回(买价, 买量, 卖价, 卖量, 指纹)"""
+        扩展 = tick.extra or {}
+        try:
+            扩展值 = self._取扩展(扩展)
+        except KeyError:
+            # 行情源本笔缺少部分深档
+            扩展值 = tuple(扩展.get(名, 0) for 名 in self._扩展字段)
+        基本值 = self._取基本(tick)
+        买价, 买量, 卖价, 卖量 = self._基本切片
+        扩买价, 扩买量, 扩卖价, 扩卖量 = self._扩展切片
+        return (基本值[买价] + 扩展值[扩买价], 基本值[买量] + 扩展值[扩买量],
+                基本值[卖价] + 扩展值[扩卖价], 基本值[卖量] + 扩展值[扩卖量], hash((基本值, 扩展值)))
+
+    def _按属性读取笔数(self, tick) -> Tuple[Sequence, Sequence]:
+        """按属性读取各档委托笔数，返回(买盘笔数, 卖盘笔数)"""
+        笔数 = self._取笔数(tick)
+        n = self.档位数
+        return 笔数[:n], 笔数[n:]
+
+    def _按扩展读取笔数(self, tick) -> Tuple[Sequence, Sequence]:
+        """从 extra 读取各档委托笔数，缺少的为0"""
+        扩展 = getattr(tick, "extra", None) or {}
+        try:
+            笔数 = self._取扩展笔数(扩展)
+        except KeyError:
+            笔数 = tuple(扩展.get(名, 0) for 名 in self._全部笔数字段)
+        n = self.档位数
+        return 笔数[:n], 笔数[n:]
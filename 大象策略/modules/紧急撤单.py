@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+紧急撤单模块 - 风控触发或策略停止时分批撤销全部活跃订单，跟踪撤单确认、重试超时订单并统计清空耗时
+"""
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import threading
+import time
+
+from .日志 import get_logger
+
+# 紧急撤单状态
+状态_空闲 = "空闲"
+状态_撤单中 = "撤单中"
+状态_已清空 = "已清空"
+状态_超时 = "超时"
+
+
+class 紧急撤单器:
+    """
+    紧急撤单器
+
+    触发后按批发送撤单：一批内的撤单连续发出、不等待回报，批次之间按间隔发送，避免超出柜台撤单流控。
+    委托回报到达终态(成交、撤销、拒单)即视为确认；超过确认超时仍未确认的订单重新撤单，
+    重试次数用完仍未确认的订单记为未确认。全部订单确认后记录从触发到清空的耗时。
+    触发后保持已触发状态直到复位，策略据此停止发送新委托。
+
+    撤单可能来自事件线程(风控触发)、网页线程或停止策略的线程，内部操作都在锁内进行。
+    """
+
+    def __init__(self, 撤单函数: Callable[[str], None], 批量大小: int = 20, 批次间隔毫秒: float = 50.0,
+                 确认超时毫秒: float = 1000.0, 最大重试次数: int = 3, 时钟: Callable[[], int] = time.perf_counter_ns):
+        """
+        初始化紧急撤单器
+
+        参数:
+            撤单函数: 发送撤单的函数，参数为委托号
+            批量大小: 每批发送的撤单数
+            批次间隔毫秒: 两批撤单之间的最短间隔
+            确认超时毫秒: 撤单发出后等待确认的时间，超时后重新撤单
+            最大重试次数: 每笔订单最多重新撤单的次数
+            时钟: 返回纳秒时间的函数
+        """
+        self.撤单函数 = 撤单函数
+        self.批量大小 = max(1, 批量大小)
+        self.批次间隔 = int(批次间隔毫秒 * 1_000_000)
+        self.确认超时 = int(确认超时毫秒 * 1_000_000)
+        self.最大重试次数 = 最大重试次数
+        self.时钟 = 时钟
+
+        self._锁 = threading.RLock()
+        self._待发送 = deque()  # 等待发送撤单的委托号
+        self._待确认 = {}  # {委托号: [股票代码, 撤单次数, 最近撤单时间，排队中为None]}
+        self._下批时间 = 0
+        self._报告 = None
+        self.历史 = []  # 复位前的报告
+        self.最近清空耗时毫秒 = None
+        self.logger = get_logger("紧急撤单")
+
+    @property
+    def 已触发(self) -> bool:
+        """是否已触发且尚未复位"""
+        return self._报告 is not None
+
+    @property
+    def 状态(self) -> str:
+        """当前状态：空闲、撤单中、已清空或超时"""
+        return self._报告["状态"] if self._报告 else 状态_空闲
+
+    def 触发(self, 原因: str, 活跃订单: Dict[str, str]) -> List[str]:
+        """
+        触发紧急撤单，立即发送第一批撤单
+
+        已触发时再次触发只加入新的订单，原因和开始时间不变。
+
+        参数:
+            原因: 触发原因
+            活跃订单: {委托号: 股票代码}
+
+        返回:
+            本次加入撤单的委托号列表
+        """
+        with self._锁:
+            现在 = self.时钟()
+            if self._报告 is None:
+                self._报告 = {
+                    "状态": 状态_撤单中,
+                    "原因": 原因,
+                    "触发时间": time.time(),
+                    "订单数": 0,
+                    "已确认": 0,
+                    "批次数": 0,
+                    "撤单数": 0,
+                    "重试数": 0,
+                    "未确认": [],
+                    "清空耗时毫秒": None,
+                    "_开始": 现在
+                }
+                self.logger.warning(f"触发紧急撤单({原因})，活跃订单 {len(活跃订单)} 个")
+
+            新增 = [委托号 for 委托号 in 活跃订单 if 委托号 not in self._待确认]
+            for 委托号 in 新增:
+                self._待确认[委托号] = [活跃订单[委托号], 0, None]
+                self._待发送.append(委托号)
+            self._报告["订单数"] += len(新增)
+            if 新增:
+                self._报告["状态"] = 状态_撤单中
+                self._报告["清空耗时毫秒"] = None
+            self._推进(现在)
+            return 新增
+
+    def 确认(self, 委托号: str) -> bool:
+        """
+        委托到达终态时确认
+
+        参数:
+            委托号: 委托号
+
+        返回:
+            是否是等待确认的订单
+        """
+        with self._锁:
+            项 = self._待确认.pop(委托号, None)
+            if 项 is None:
+                return False
+            if 项[2] is None:
+                # 还没有发出撤单就已经成交或撤销
+                try:
+                    self._待发送.remove(委托号)
+                except ValueError:
+                    pass
+            self._报告["已确认"] += 1
+            if self._报告["状态"] == 状态_超时:
+                # 超时后迟到的确认，重新判断是否已清空
+                self._报告["状态"] = 状态_撤单中
+                self._报告["未确认"] = []
+            self._检查完成(self.时钟())
+            return True
+
+    def 推进(self) -> int:
+        """
+        发送到期的批次并重试确认超时的订单
+
+        返回:
+            本次发送的撤单数
+        """
+        if self._报告 is None or self._报告["状态"] != 状态_撤单中:
+            return 0
+        with self._锁:
+            return self._推进(self.时钟())
+
+    def _推进(self, 现在: int) -> int:
+        for 委托号, 项 in self._待确认.items():
+            if 项[2] is not None and 现在 - 项[2] >= self.确认超时:
+                if 项[1] > self.最大重试次数:
+                    continue  # 已放弃，等完成检查统计
+                项[2] = None
+                self._待发送.append(委托号)
+                self._报告["重试数"] += 1
+
+        数量 = 0
+        if self._待发送 and 现在 >= self._下批时间:
+            while self._待发送 and 数量 < self.批量大小:
+                委托号 = self._待发送.popleft()
+                项 = self._待确认.get(委托号)
+                if 项 is None:
+                    continue
+                项[1] += 1
+                项[2] = 现在
+                try:
+                    self.撤单函数(委托号)
+                except Exception as e:
+                    self.logger.error(f"紧急撤单 {委托号} 出错: {e}")
+                数量 += 1
+            self._下批时间 = 现在 + self.批次间隔
+            self._报告["批次数"] += 1
+            self._报告["撤单数"] += 数量
+
+        self._检查完成(现在)
+        return 数量
+
+    def _检查完成(self, 现在: int):
+        报告 = self._报告
+        if 报告["状态"] != 状态_撤单中 or self._待发送:
+            return
+        未确认 = [
+            委托号 for 委托号, 项 in self._待确认.items()
+            if 项[1] > self.最大重试次数 and 现在 - 项[2] >= self.确认超时
+        ]
+        if len(未确认) != len(self._待确认):
+            return
+        耗时 = round((现在 - 报告["_开始"]) / 1_000_000, 3)
+        if 未确认:
+            报告["状态"] = 状态_超时
+            报告["未确认"] = 未确认
+            self.logger.error(f"紧急撤单超时，{耗时}ms 后仍有 {len(未确认)} 个订单未确认: {未确认}")
+        else:
+            报告["状态"] = 状态_已清空
+            报告["清空耗时毫秒"] = 耗时
+            self.最近清空耗时毫秒 = 耗时
+            self.logger.warning(f"紧急撤单完成，{报告['订单数']} 个订单在 {耗时}ms 内全部确认")
+
+    def 等待完成(self, 超时秒: float, 间隔秒: float = 0.01) -> bool:
+        """
+        阻塞等待全部订单确认，期间按时推进批次和重试
+
+        委托回报须由其他线程(vnpy事件引擎)送达，不能在事件线程中调用。
+
+        参数:
+            超时秒: 最长等待时间
+            间隔秒: 推进间隔
+
+        返回:
+            是否已清空
+        """
+        截止 = time.monotonic() + 超时秒
+        while self.状态 == 状态_撤单中 and time.monotonic() < 截止:
+            self.推进()
+            time.sleep(间隔秒)
+        return self.状态 == 状态_已清空
+
+    def 复位(self) -> Optional[Dict]:
+        """
+        复位为空闲，允许策略重新下单；未确认的订单不再跟踪
+
+        返回:
+            复位前的报告，未触发时返回None
+        """
+        with self._锁:
+            报告 = self.获取报告()
+            if 报告 is not None:
+                self.历史.append(报告)
+                self.logger.info(f"紧急撤单复位: {报告['状态']}")
+            self._报告 = None
+            self._待发送.clear()
+            self._待确认.clear()
+            self._下批时间 = 0
+            return 报告
+
+    def 获取报告(self) -> Optional[Dict]:
+        """
+        获取本次触发的报告
+
+        返回:
+            报告字典，包含状态、原因、订单数、已确认、批次数、撤单数、重试数、未确认和清空耗时毫秒；
+            未触发时返回None
+        """
+        with self._锁:
+            if self._报告 is None:
+                return None
+            报告 = {键: 值 for 键, 值 in self._报告.items() if not 键.startswith("_")}
+            报告["未确认"] = list(报告["未确认"])
+            报告["等待确认"] = len(self._待确认)
+            return 报告
@@ -6,6 +6,7 @@
 from typing import Dict, List, Any, Optional, Union, Callable
 import os
 import json
+import copy
 import time
 import threading
 from datetime import datetime, timezone, timedelta
@@ -15,10 +16,15 @@ from functools import wraps
 import webbrowser
 
 # Flask相关导入
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, send_from_directory
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    from .采样分析 import 采样分析器
+except ImportError:
+    from 采样分析 import 采样分析器
+
 # 设置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -100,6 +106,9 @@ class 网页管理器:
         # 服务器相关
         self.服务器线程 = None
         
+        # 按需启动的采样分析器，未启动时没有开销
+        self.采样分析 = 采样分析器(输出目录="logs")
+        
         # 数据存储
         self.日志 = []
         self.最大日志数量 = 500
@@ -283,7 +292,8 @@ class 网页管理器:
                 
                 # 获取品种特定参数
                 self.记录日志(f"开始获取品种参数: {symbol}")
-                品种参数 = self.参数管理器.获取品种所有参数(symbol)
+                # 快照中的参数表是共享的，修改前先拷贝
+                品种参数 = copy.deepcopy(self.参数管理器.获取品种所有参数(symbol))
                 
                 # 确保价差阈值参数为整数类型
                 if "大象识别" in 品种参数:
@@ -312,6 +322,46 @@ class 网页管理器:
                 self.记录日志(f"错误详情: {traceback.format_exc()}")
                 return jsonify({"error": f"获取品种参数出错: {str(e)}"}), 500
         
+        @app.route('/save_symbol_params/<symbol>', methods=['POST'])
+        def save_symbol_params(symbol):
+            if self.认证需要 and not current_user.is_authenticated:
+                return jsonify({"error": "需要登录"}), 401
+            
+            if not self.参数管理器:
+                return jsonify({"error": "参数管理器未初始化"}), 500
+            
+            参数 = request.get_json(silent=True)
+            if not isinstance(参数, dict) or not all(isinstance(模块参数, dict) for 模块参数 in 参数.values()):
+                return jsonify({"error": "参数格式错误"}), 400
+            
+            try:
+                # 一次保存的所有参数合并为一次快照重建和一次文件写入；
+                # 设置参数时按全局参数校验类型和范围，任何一项无效则整批不生效
+                with self.参数管理器.批量修改():
+                    for 模块, 模块参数 in 参数.items():
+                        for 参数名, 参数值 in 模块参数.items():
+                            self.参数管理器.设置品种参数(symbol, 模块, 参数名, 参数值)
+                self.记录日志(f"保存品种参数: {symbol}, 共{sum(len(模块参数) for 模块参数 in 参数.values())}项")
+                return jsonify({"success": True, "版本": self.参数管理器.版本})
+            except ValueError as e:
+                self.记录日志(f"保存品种参数无效: {symbol}, 错误: {str(e)}")
+                return jsonify({"error": f"参数无效: {str(e)}"}), 400
+            except Exception as e:
+                self.记录日志(f"保存品种参数出错: {symbol}, 错误: {str(e)}")
+                return jsonify({"error": f"保存品种参数出错: {str(e)}"}), 500
+        
+        @app.route('/reset_symbol_params/<symbol>', methods=['POST'])
+        def reset_symbol_params(symbol):
+            if self.认证需要 and not current_user.is_authenticated:
+                return jsonify({"error": "需要登录"}), 401
+            
+            if not self.参数管理器:
+                return jsonify({"error": "参数管理器未初始化"}), 500
+            
+            self.参数管理器.删除品种参数(symbol)
+            self.记录日志(f"重置品种参数: {symbol}")
+            return jsonify({"success": True, "版本": self.参数管理器.版本})
+        
         @app.route('/add_stock', methods=['POST'])
         def add_stock():
             if self.认证需要 and not current_user.is_authenticated:
@@ -450,6 +500,64 @@ class 网页管理器:
             
             资产数据 = self.策略.get_assets() if hasattr(self.策略, 'get_assets') else {}
             return jsonify(资产数据)
+
+        @app.route('/api/metrics')
+        @login_required
+        def api_metrics():
+            if not self.策略:
+                return jsonify({"error": "策略未连接"})
+
+            延迟统计 = getattr(self.策略, '延迟统计', None)
+            if 延迟统计 is None:
+                return jsonify({"error": "延迟统计未启用"})
+
+            包含品种 = request.args.get('symbols', '1') != '0'
+            包含分桶 = request.args.get('buckets', '0') == '1'
+            return jsonify({"延迟统计": 延迟统计.导出(包含品种, 包含分桶)})
+
+        @app.route('/metrics')
+        def metrics():
+            # 本机抓取(如本地Prometheus)免登录，其他来源需要登录
+            if request.remote_addr not in ('127.0.0.1', '::1') and not current_user.is_authenticated:
+                return Response("需要登录\n", status=401, mimetype='text/plain')
+
+            指标 = getattr(self.策略, '指标', None) if self.策略 else None
+            if 指标 is None:
+                return Response("# 策略未连接\n", status=503, mimetype='text/plain')
+
+            return Response(指标.导出文本(), content_type=指标.文本格式类型)
+
+        @app.route('/api/profiler/start', methods=['POST'])
+        @login_required
+        def api_profiler_start():
+            参数 = request.get_json(silent=True) or request.form
+            try:
+                时长 = float(参数.get('seconds', 10))
+                间隔毫秒 = float(参数.get('interval_ms', 5))
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "message": "无效的采样参数"}), 400
+            
+            线程名 = 参数.get('threads')
+            if isinstance(线程名, str):
+                线程名 = [名 for 名 in 线程名.split(',') if 名]
+            
+            结果 = self.采样分析.开始(时长, 间隔毫秒 / 1000, 线程名 or None)
+            if 结果["成功"]:
+                self.记录日志(f"通过Web界面启动采样分析，时长:{结果['时长']}秒")
+            return jsonify({"success": 结果["成功"], "message": 结果["消息"], "详情": 结果})
+        
+        @app.route('/api/profiler/stop', methods=['POST'])
+        @login_required
+        def api_profiler_stop():
+            结果 = self.采样分析.停止()
+            if 结果["成功"]:
+                self.记录日志("通过Web界面停止采样分析")
+            return jsonify({"success": 结果["成功"], "message": 结果["消息"], "详情": 结果})
+        
+        @app.route('/api/profiler/status')
+        @login_required
+        def api_profiler_status():
+            return jsonify(self.采样分析.获取状态())
         
         @app.route('/api/control', methods=['POST'])
         @login_required
@@ -483,8 +591,33 @@ class 网页管理器:
                     self.记录日志("通过Web界面恢复策略")
                     return jsonify({"success": True, "message": "策略已恢复"})
             
+            elif action == 'kill':
+                # 紧急撤单访问策略的限流队列和交易状态，交给策略线程执行
+                if hasattr(self.策略, '请求紧急撤单') and callable(self.策略.请求紧急撤单):
+                    self.策略.请求紧急撤单("网页触发")
+                    self.记录日志("通过Web界面请求紧急撤单")
+                    return jsonify({"success": True, "message": "紧急撤单已提交，策略线程将在1秒内执行，进度见 /api/kill_switch"})
+            
+            elif action == 'kill_reset':
+                if hasattr(self.策略, '复位紧急撤单') and callable(self.策略.复位紧急撤单):
+                    self.策略.复位紧急撤单()
+                    self.记录日志("通过Web界面复位紧急撤单")
+                    return jsonify({"success": True, "message": "紧急撤单已复位"})
+            
             return jsonify({"success": False, "message": f"不支持的操作: {action}"})
         
+        @app.route('/api/kill_switch')
+        @login_required
+        def api_kill_switch():
+            紧急撤单 = getattr(self.策略, '紧急撤单', None) if self.策略 else None
+            if 紧急撤单 is None:
+                return jsonify({"状态": "未连接"})
+            return jsonify({
+                "状态": 紧急撤单.状态,
+                "报告": 紧急撤单.获取报告(),
+                "历史": 紧急撤单.历史[-10:]
+            })
+        
         @app.route('/api/logs')
         def api_logs():
             if self.认证需要 and not current_user.is_authenticated:
@@ -523,7 +656,7 @@ class 网页管理器:
         
         try:
             # 在单独的线程中启动服务器
-            self.服务器线程 = threading.Thread(target=self._运行服务器)
+            self.服务器线程 = threading.Thread(target=self._运行服务器, name="网页管理")
             self.服务器线程.daemon = True
             self.服务器线程.start()
             
@@ -546,6 +679,10 @@ class 网页管理器:
             return
         
         try:
+            # 停止未结束的采样分析，写出已采集的结果
+            if self.采样分析.运行中:
+                self.采样分析.停止()
+            
             # 关闭服务器
             self.运行中 = False
             self.记录日志("网页管理服务已停止")
@@ -731,4 +868,5 @@ if __name__ == "__main__":
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
+        参数管理实例.关闭()
         print("退出程序")
\ No newline at end of file
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+行情合并模块 - 行情突发时每个品种只保留最新一笔，按品种轮转处理，避免策略处理过时的盘口
+"""
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+import time
+
+from .日志 import get_logger
+
+
+def 事件队列积压探测(事件引擎: Any) -> Optional[Callable[[], int]]:
+    """
+    取vnpy事件引擎尚未分发的事件数作为积压探测
+
+    vnpy没有公开事件队列的长度，这里读取私有的 _queue。取不到队列或试探调用出错时返回None，
+    合并器按没有积压处理；之后调用出错时该次返回0，不会中断行情处理。
+
+    参数:
+        事件引擎: vnpy事件引擎，回测时为None
+
+    返回:
+        返回积压事件数的函数，取不到时为None
+    """
+    队列长度 = getattr(getattr(事件引擎, "_queue", None), "qsize", None)
+    if not callable(队列长度):
+        return None
+    try:
+        int(队列长度())
+    except Exception:
+        return None
+
+    def 探测() -> int:
+        try:
+            return 队列长度()
+        except Exception:
+            return 0
+
+    return 探测
+
+
+class 行情合并器:
+    """
+    行情合并器
+
+    行情先放入合并器，品种已在等待处理时新行情覆盖旧行情，被覆盖的中间行情计为合并丢弃。
+    等待处理的品种按首次进入的顺序排成轮转队列，被覆盖时保留原来的位置，
+    行情密集的品种不会挤占其他品种，每个品种的等待时间都有上限。
+
+    处理时通过积压探测函数(如vnpy事件队列的qsize)判断后面是否还有事件：
+    没有积压时处理全部等待中的品种；有积压时只处理等待超过 最大等待毫秒 的品种，
+    其余品种继续合并后面到达的行情。不设置积压探测时每笔行情到达后立即处理，与不合并相同。
+    行情到达时活跃判断为真的品种(有持仓或挂单)不参与合并，有积压时也在下一次处理时立即处理。
+    """
+
+    def __init__(self, 最大等待毫秒: float = 200.0, 积压探测: Optional[Callable[[], int]] = None,
+                 活跃判断: Optional[Callable[[str], bool]] = None):
+        """
+        初始化行情合并器
+
+        参数:
+            最大等待毫秒: 有积压时品种最多等待多久必须处理
+            积压探测: 返回尚未分发的事件数的函数，为None时视为没有积压
+            活跃判断: 判断品种是否有进行中的交易的函数，为None时所有品种都参与合并
+        """
+        self.最大等待毫秒 = 最大等待毫秒
+        self.积压探测 = 积压探测
+        self.活跃判断 = 活跃判断
+        self._待处理 = {}  # {股票代码: [行情, 进入时间(纳秒)]}
+        # 等待处理的 (股票代码, 待处理项)，按首次进入排序；项已被取出的是失效条目，遇到时跳过
+        self._队列 = deque()
+        self._活跃队列 = deque()  # 行情到达时处于活跃状态的 (股票代码, 待处理项)，有积压时优先处理
+        self.接收数 = 0
+        self.处理数 = 0
+        self.合并丢弃 = {}  # {股票代码: 被覆盖的行情数}
+        self.logger = get_logger("行情合并")
+
+    def __len__(self) -> int:
+        return len(self._待处理)
+
+    def __contains__(self, 股票代码: str) -> bool:
+        return 股票代码 in self._待处理
+
+    @property
+    def 合并丢弃总数(self) -> int:
+        """被覆盖的中间行情总数"""
+        return sum(self.合并丢弃.values())
+
+    def 放入(self, 股票代码: str, 行情: Any) -> bool:
+        """
+        放入一笔行情
+
+        参数:
+            股票代码: 股票代码
+            行情: 行情数据
+
+        返回:
+            是否覆盖了该品种尚未处理的行情
+        """
+        self.接收数 += 1
+        项 = self._待处理.get(股票代码)
+        if 项 is not None:
+            项[0] = 行情
+            self.合并丢弃[股票代码] = self.合并丢弃.get(股票代码, 0) + 1
+            覆盖 = True
+        else:
+            项 = self._待处理[股票代码] = [行情, time.perf_counter_ns()]
+            self._队列.append((股票代码, 项))
+            覆盖 = False
+        # 没有积压探测时行情总是立即处理，不需要判断
+        if self.积压探测 is not None and self.活跃判断 is not None and self.活跃判断(股票代码):
+            self._活跃队列.append((股票代码, 项))
+        return 覆盖
+
+    def 取出(self) -> Optional[Tuple[str, Any]]:
+        """
+        按轮转顺序取出队首品种的最新行情
+
+        返回:
+            (股票代码, 行情)，没有等待中的品种时返回None
+        """
+        if self._队首() is None:
+            return None
+        股票代码, 项 = self._队列.popleft()
+        del self._待处理[股票代码]
+        self.处理数 += 1
+        return 股票代码, 项[0]
+
+    def _队首(self) -> Optional[Tuple[str, list]]:
+        """跳过队首已被优先处理的失效条目，返回队首的 (股票代码, 待处理项)"""
+        while self._队列:
+            股票代码, 项 = self._队列[0]
+            if self._待处理.get(股票代码) is 项:
+                return 股票代码, 项
+            self._队列.popleft()
+        return None
+
+    def 处理(self, 处理函数: Callable[[str, Any], None], 全部: bool = False) -> int:
+        """
+        按轮转顺序处理等待中的品种
+
+        参数:
+            处理函数: 处理单个品种最新行情的函数，参数为(股票代码, 行情)
+            全部: 不看积压，处理全部等待中的品种，停止前清空队列时使用
+
+        返回:
+            本次处理的品种数
+        """
+        if not 全部 and self.积压探测 is not None and self.积压探测() > 0:
+            截止 = time.perf_counter_ns() - int(self.最大等待毫秒 * 1_000_000)
+        else:
+            截止 = None
+
+        数量 = 0
+        if 截止 is not None:
+            # 有进行中交易的品种不等待，止损和平仓依赖最新盘口
+            while self._活跃队列:
+                股票代码, 项 = self._活跃队列.popleft()
+                if self._待处理.get(股票代码) is not 项:
+                    continue
+                del self._待处理[股票代码]
+                self.处理数 += 1
+                数量 += 1
+                处理函数(股票代码, 项[0])
+
+        while True:
+            队首 = self._队首()
+            if 队首 is None:
+                break
+            if 截止 is not None and 队首[1][1] > 截止:
+                break  # 队列按进入时间排序，后面的品种等待时间更短
+            股票代码, 行情 = self.取出()
+            数量 += 1
+            处理函数(股票代码, 行情)
+        if not self._待处理:
+            self._活跃队列.clear()
+        return 数量
+
+    def 清空(self) -> int:
+        """
+        丢弃全部等待中的行情
+
+        返回:
+            丢弃的品种数
+        """
+        数量 = len(self._待处理)
+        self._待处理.clear()
+        self._队列.clear()
+        self._活跃队列.clear()
+        return 数量
+
+    def 导出(self) -> Dict:
+        """
+        导出统计信息
+
+        返回:
+            {"接收数", "处理数", "合并丢弃", "等待中"}
+        """
+        return {
+            "接收数": self.接收数,
+            "处理数": self.处理数,
+            "合并丢弃": self.合并丢弃总数,
+            "等待中": len(self._待处理)
+        }
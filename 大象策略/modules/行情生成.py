@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+行情生成模块 - 为压力测试生成多品种的合成五档行情，包含大象的出现、驻留、消失，冰山单补单和开盘集合竞价突发
+"""
+from collections import namedtuple
+from datetime import date, datetime, time as 时刻, timedelta
+from types import SimpleNamespace
+from typing import Iterator, Sequence, Tuple
+import random
+
+from .日志 import get_logger
+from .品种信息 import 品种信息表
+
+# vnpy为可选依赖，未安装时行情以同字段的SimpleNamespace表示
+try:
+    from vnpy.trader.object import TickData
+except ImportError:
+    TickData = None
+
+# 一笔生成的行情；发送偏移为按名义速率排列的发送时间(秒)，价格为价格档，数量为手
+行情事件 = namedtuple("行情事件", ["发送偏移", "股票代码", "时间", "买盘", "卖盘", "最新价档", "累计成交量"])
+
+集合竞价时间 = 时刻(9, 25)
+连续竞价时间 = 时刻(9, 30)
+
+
+class _品种状态:
+    """单个品种的生成状态"""
+    __slots__ = ("股票代码", "品种", "昨收档", "买一", "累计成交量", "大象", "冰山")
+
+    def __init__(self, 股票代码: str, 品种, 昨收档: int):
+        self.股票代码 = 股票代码
+        self.品种 = 品种
+        self.昨收档 = 昨收档
+        self.买一 = 昨收档
+        self.累计成交量 = 0
+        self.大象 = None  # [系数, 价格档, 数量, 剩余笔数]，系数买盘为1、卖盘为-1
+        self.冰山 = None  # [系数, 价格档, 显示量, 隐藏剩余]
+
+
+class 行情生成器:
+    """
+    行情生成器
+
+    品种按轮转顺序逐笔生成行情，相邻两笔的间隔为 行情间隔秒/品种数，即每个品种每 行情间隔秒 一笔：
+    - 买一价按随机游走变化，各档数量随机
+    - 大象按概率出现在某一侧的前几档，驻留若干笔期间托住价格，之后撤单或被吃掉(价格越过大象)
+    - 冰山单出现在最优价，显示量被成交后立即补足，直到隐藏数量用完，期间成交集中在该价位
+    - 开盘集合竞价时所有品种同时发布一笔行情，连续竞价开始后的 开盘爆发秒数 内行情间隔缩短为 1/开盘爆发倍数
+
+    同一种子生成的行情序列相同。
+    """
+
+    def __init__(self, 股票列表: Sequence[str], 种子: int = 20250329, 档位数: int = 5,
+                 行情间隔秒: float = 3.0, 大象概率: float = 0.02,
+                 大象金额: Tuple[float, float] = (1_500_000.0, 5_000_000.0),
+                 大象持续笔数: Tuple[int, int] = (5, 40), 冰山概率: float = 0.01,
+                 冰山显示量: Tuple[int, int] = (50, 200), 冰山总量倍数: Tuple[int, int] = (5, 20),
+                 开盘集合竞价: bool = True, 开盘爆发秒数: float = 60.0, 开盘爆发倍数: float = 5.0,
+                 交易日: date = None):
+        """
+        初始化行情生成器
+
+        参数:
+            股票列表: 股票代码列表
+            种子: 随机种子
+            档位数: 每侧盘口档位数
+            行情间隔秒: 每个品种的行情间隔(秒)
+            大象概率: 没有大象的品种每笔行情出现大象的概率
+            大象金额: 大象委托金额范围(元)
+            大象持续笔数: 大象驻留的行情笔数范围
+            冰山概率: 没有冰山单的品种每笔行情出现冰山单的概率
+            冰山显示量: 冰山单显示数量范围(手)
+            冰山总量倍数: 冰山单总数量相对显示数量的倍数范围
+            开盘集合竞价: 是否从集合竞价开始生成
+            开盘爆发秒数: 连续竞价开始后行情加密的时长(秒)
+            开盘爆发倍数: 行情加密的倍数
+            交易日: 行情日期，为None时取当天
+        """
+        if not 股票列表:
+            raise ValueError("股票列表不能为空")
+        self.档位数 = 档位数
+        self.行情间隔秒 = 行情间隔秒
+        self.大象概率 = 大象概率
+        self.大象金额 = 大象金额
+        self.大象持续笔数 = 大象持续笔数
+        self.冰山概率 = 冰山概率
+        self.冰山显示量 = 冰山显示量
+        self.冰山总量倍数 = 冰山总量倍数
+        self.开盘集合竞价 = 开盘集合竞价
+        self.开盘爆发秒数 = 开盘爆发秒数
+        self.开盘爆发倍数 = max(开盘爆发倍数, 1.0)
+        self.交易日 = 交易日 or date.today()
+        self.随机 = random.Random(种子)
+        self.品种表 = 品种信息表()
+        self.统计 = {"行情": 0, "大象出现": 0, "大象撤单": 0, "大象被吃": 0, "冰山出现": 0, "冰山补单": 0}
+        self.logger = get_logger("行情生成")
+
+        self._品种 = []
+        for 股票代码 in dict.fromkeys(股票列表):
+            品种 = self.品种表.获取(股票代码)
+            self._品种.append(_品种状态(股票代码, 品种, 品种.转价格档(round(self.随机.uniform(5, 50), 2))))
+        self._状态表 = {状态.股票代码: 状态 for 状态 in self._品种}
+
+    @property
+    def 名义速率(self) -> float:
+        """连续竞价时全部品种合计每秒行情笔数(不含开盘爆发)"""
+        return len(self._品种) / self.行情间隔秒
+
+    def 事件(self, 数量: int = None) -> Iterator[行情事件]:
+        """
+        逐笔生成行情事件
+
+        参数:
+            数量: 生成的笔数，为None时无限生成
+
+        返回:
+            行情事件迭代器
+        """
+        已生成 = 0
+        if self.开盘集合竞价:
+            时间 = datetime.combine(self.交易日, 集合竞价时间)
+            for 状态 in self._品种:
+                if 数量 is not None and 已生成 >= 数量:
+                    return
+                yield self._集合竞价(状态, 时间)
+                已生成 += 1
+
+        开始 = datetime.combine(self.交易日, 连续竞价时间)
+        步长 = self.行情间隔秒 / len(self._品种)
+        偏移 = 0.0
+        序号 = 0
+        while 数量 is None or 已生成 < 数量:
+            状态 = self._品种[序号 % len(self._品种)]
+            yield self._连续竞价(状态, 偏移, 开始 + timedelta(seconds=偏移))
+            已生成 += 1
+            序号 += 1
+            偏移 += 步长 / self.开盘爆发倍数 if 偏移 < self.开盘爆发秒数 else 步长
+
+    def 转行情(self, 事件: 行情事件):
+        """
+        将行情事件转换为vnpy行情(TickData)，未安装vnpy时转换为同字段的SimpleNamespace
+
+        参数:
+            事件: 行情事件
+
+        返回:
+            行情对象
+        """
+        状态 = self._状态表[事件.股票代码]
+        品种 = 状态.品种
+        昨收 = 品种.转价格(状态.昨收档)
+        字段 = {
+            "symbol": 事件.股票代码,
+            "exchange": 品种.交易所,
+            "datetime": 事件.时间,
+            "name": 事件.股票代码,
+            "volume": 事件.累计成交量,
+            "last_price": 品种.转价格(事件.最新价档),
+            "pre_close": 昨收,
+            "limit_up": 品种.规整价格(昨收 * 1.1),
+            "limit_down": 品种.规整价格(昨收 * 0.9),
+            "gateway_name": "GEN",
+        }
+        for i in range(min(self.档位数, 5)):
+            字段[f"bid_price_{i + 1}"] = 品种.转价格(事件.买盘[i][0])
+            字段[f"bid_volume_{i + 1}"] = 事件.买盘[i][1]
+            字段[f"ask_price_{i + 1}"] = 品种.转价格(事件.卖盘[i][0])
+            字段[f"ask_volume_{i + 1}"] = 事件.卖盘[i][1]
+        if TickData is None:
+            return SimpleNamespace(extra=None, **字段)
+        return TickData(**字段)
+
+    def 行情(self, 数量: int = None) -> Iterator[Tuple[float, object]]:
+        """
+        逐笔生成行情对象
+
+        参数:
+            数量: 生成的笔数，为None时无限生成
+
+        返回:
+            (发送偏移, 行情对象) 迭代器
+        """
+        for 事件 in self.事件(数量):
+            yield 事件.发送偏移, self.转行情(事件)
+
+    # ===== 单笔生成 =====
+
+    def _集合竞价(self, 状态: _品种状态, 时间: datetime) -> 行情事件:
+        """集合竞价撮合结果：开盘价在昨收附近，成交量较大"""
+        状态.买一 = max(状态.昨收档 + self.随机.randint(-5, 5), 1)
+        状态.累计成交量 = self.随机.randint(500, 5000)
+        return self._生成事件(状态, 0.0, 时间, 状态.买一)
+
+    def _连续竞价(self, 状态: _品种状态, 偏移: float, 时间: datetime) -> 行情事件:
+        随机 = self.随机
+        状态.买一 = max(状态.买一 + 随机.choice((-1, 0, 0, 0, 1)), self.档位数 + 1)
+        最新价档 = 状态.买一 if 随机.random() < 0.5 else 状态.买一 + 1
+        状态.累计成交量 += 随机.randint(0, 50)
+
+        self._更新大象(状态)
+        冰山价格 = self._更新冰山(状态)
+        if 冰山价格:
+            最新价档 = 冰山价格
+        return self._生成事件(状态, 偏移, 时间, 最新价档)
+
+    def _更新大象(self, 状态: _品种状态):
+        """大象出现、驻留期间托住价格、到期后撤单或被吃掉"""
+        随机 = self.随机
+        大象 = 状态.大象
+        if 大象 is None:
+            if 随机.random() >= self.大象概率:
+                return
+            系数 = 随机.choice((1, -1))
+            距离 = 随机.randint(0, min(3, self.档位数 - 1))
+            价格档 = 状态.买一 - 距离 if 系数 == 1 else 状态.买一 + 1 + 距离
+            每手金额 = 状态.品种.转价格(价格档) * 100
+            数量 = int(随机.uniform(*self.大象金额) / 每手金额) + 1
+            状态.大象 = [系数, 价格档, 数量, 随机.randint(*self.大象持续笔数)]
+            self.统计["大象出现"] += 1
+            return
+
+        系数, 价格档, 数量, 剩余笔数 = 大象
+        if 剩余笔数 <= 0:
+            状态.大象 = None
+            if 随机.random() < 0.5:
+                self.统计["大象撤单"] += 1
+            else:
+                # 被吃掉：价格越过大象所在价格档
+                状态.买一 = 价格档 - 1 if 系数 == 1 else 价格档
+                self.统计["大象被吃"] += 1
+            return
+
+        大象[2] = max(数量 - 随机.randint(0, max(数量 // 50, 1)), 1)
+        大象[3] = 剩余笔数 - 1
+        # 驻留期间价格不越过大象
+        if 系数 == 1 and 状态.买一 < 价格档:
+            状态.买一 = 价格档
+        elif 系数 == -1 and 状态.买一 + 1 > 价格档:
+            状态.买一 = 价格档 - 1
+
+    def _更新冰山(self, 状态: _品种状态) -> int:
+        """冰山单出现在最优价，成交后补足显示量；返回本笔在冰山价位成交时的价格档，否则返回0"""
+        随机 = self.随机
+        冰山 = 状态.冰山
+        if 冰山 is None:
+            if 随机.random() >= self.冰山概率:
+                return 0
+            系数 = 随机.choice((1, -1))
+            显示量 = 随机.randint(*self.冰山显示量)
+            价格档 = 状态.买一 if 系数 == 1 else 状态.买一 + 1
+            状态.冰山 = [系数, 价格档, 显示量, 显示量 * 随机.randint(*self.冰山总量倍数)]
+            self.统计["冰山出现"] += 1
+            return 0
+
+        系数, 价格档, 显示量, 隐藏剩余 = 冰山
+        # 冰山单托住价格，价格离开冰山价位时冰山单不再成交
+        if 系数 == 1 and 状态.买一 < 价格档:
+            状态.买一 = 价格档
+        elif 系数 == -1 and 状态.买一 + 1 > 价格档:
+            状态.买一 = 价格档 - 1
+        if (状态.买一 if 系数 == 1 else 状态.买一 + 1) != 价格档:
+            return 0
+
+        成交 = 随机.randint(0, 显示量)
+        状态.累计成交量 += 成交
+        冰山[3] = 隐藏剩余 - 成交
+        if 成交:
+            self.统计["冰山补单"] += 1
+        if 冰山[3] <= 0:
+            状态.冰山 = None
+        return 价格档 if 成交 else 0
+
+    def _生成事件(self, 状态: _品种状态, 偏移: float, 时间: datetime, 最新价档: int) -> 行情事件:
+        随机 = self.随机
+        买盘 = [(状态.买一 - i, 随机.randint(10, 800)) for i in range(self.档位数)]
+        卖盘 = [(状态.买一 + 1 + i, 随机.randint(10, 800)) for i in range(self.档位数)]
+        for 挂单 in (状态.大象, 状态.冰山):
+            if 挂单 is None:
+                continue
+            系数, 价格档, 数量 = 挂单[0], 挂单[1], 挂单[2]
+            盘口 = 买盘 if 系数 == 1 else 卖盘
+            i = 系数 * (盘口[0][0] - 价格档)
+            if 0 <= i < self.档位数:
+                盘口[i] = (价格档, 数量)
+        self.统计["行情"] += 1
+        return 行情事件(偏移, 状态.股票代码, 时间, 买盘, 卖盘, 最新价档, 状态.累计成交量)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+账户状态模块 - 由账户、持仓事件和策略成交增量维护资金和持仓，后台线程低频对账
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from .日志 import get_logger
+from .最新价 import 最新价表
+
+# 快照: ([(账户号, 余额, 冻结), ...], [(股票代码, 数量, 成本价), ...])，取不到时为None
+账户快照 = Optional[Tuple[Sequence[Tuple[str, float, float]], Sequence[Tuple[str, float, float]]]]
+
+
+class 账户状态:
+    """
+    事件驱动的账户和持仓状态
+
+    账户和持仓事件带的是全量值，直接覆盖对应的账户或品种；策略自己的成交先增量更新持仓，
+    随后到达的持仓事件再覆盖为柜台的数量。持仓市值按最新价(没有行情时按成本价)增量维护，
+    读取总资产和持仓市值与持仓数量无关。
+
+    对账在后台线程中按较低频率取全量快照比较，修正遗漏事件和浮点累计造成的偏差。
+    每个品种和账户带版本号，快照期间收到事件的品种以事件为准，不会被较旧的快照覆盖。
+    """
+
+    def __init__(self, 市值容差: float = 0.01, 价格表: Optional[最新价表] = None):
+        """
+        初始化账户状态
+
+        参数:
+            市值容差: 对账时持仓成本价和余额允许的误差
+            价格表: 共享的最新价表，建仓时按其中的价格计算市值；为None时自建
+        """
+        self.市值容差 = 市值容差
+        self._锁 = threading.Lock()
+        self._账户 = {}  # {账户号: [余额, 冻结]}
+        self._余额 = 0.0
+        self._冻结 = 0.0
+        self._持仓 = {}  # {股票代码: [数量, 成本价, 最新价]}
+        self.价格表 = 价格表 if 价格表 is not None else 最新价表()
+        self._持仓市值 = 0.0
+        self._版本 = {}  # {股票代码: 版本号}
+        self._账户版本 = 0
+
+        self._停止事件 = threading.Event()
+        self._线程 = None
+        self.统计 = {"账户事件": 0, "持仓事件": 0, "成交": 0, "对账": 0, "修正": 0}
+        self.最近差异 = []
+        self.logger = get_logger("账户状态")
+
+    @property
+    def 总资产(self) -> float:
+        """各账户余额合计"""
+        return self._余额
+
+    @property
+    def 冻结(self) -> float:
+        """各账户冻结资金合计"""
+        return self._冻结
+
+    @property
+    def 持仓市值(self) -> float:
+        """全部持仓按最新价计算的市值"""
+        return self._持仓市值
+
+    def 获取持仓(self, 股票代码: str) -> Tuple[float, float]:
+        """
+        获取品种持仓
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            (数量, 成本价)，没有持仓时为(0, 0.0)
+        """
+        项 = self._持仓.get(股票代码)
+        return (项[0], 项[1]) if 项 else (0, 0.0)
+
+    def 持仓列表(self) -> Dict[str, Tuple[float, float]]:
+        """
+        获取全部持仓
+
+        返回:
+            {股票代码: (数量, 成本价)}
+        """
+        with self._锁:
+            return {代码: (项[0], 项[1]) for 代码, 项 in self._持仓.items()}
+
+    def 更新账户(self, 账户号: str, 余额: float, 冻结: float = 0.0):
+        """
+        账户事件：覆盖该账户的余额和冻结资金
+
+        参数:
+            账户号: 账户号
+            余额: 账户余额
+            冻结: 冻结资金
+        """
+        with self._锁:
+            原 = self._账户.get(账户号)
+            if 原 is None:
+                原 = self._账户[账户号] = [0.0, 0.0]
+            self._余额 += 余额 - 原[0]
+            self._冻结 += 冻结 - 原[1]
+            原[0] = 余额
+            原[1] = 冻结
+            self._账户版本 += 1
+            self.统计["账户事件"] += 1
+
+    def 更新持仓(self, 股票代码: str, 数量: float, 成本价: float):
+        """
+        持仓事件：覆盖该品种的数量和成本价
+
+        参数:
+            股票代码: 股票代码
+            数量: 持仓数量
+            成本价: 持仓成本价
+        """
+        with self._锁:
+            self._设置持仓(股票代码, 数量, 成本价)
+            self._版本[股票代码] = self._版本.get(股票代码, 0) + 1
+            self.统计["持仓事件"] += 1
+
+    def 记录成交(self, 股票代码: str, 数量: float, 价格: float, 是买入: bool):
+        """
+        策略成交：增量更新持仓数量和买入成本
+
+        参数:
+            股票代码: 股票代码
+            数量: 成交数量
+            价格: 成交价格
+            是买入: 是否买入
+        """
+        with self._锁:
+            原数量, 原成本 = self.获取持仓(股票代码)
+            if 是买入:
+                新数量 = 原数量 + 数量
+                新成本 = (原数量 * 原成本 + 数量 * 价格) / 新数量 if 新数量 > 0 else 价格
+            else:
+                新数量 = max(原数量 - 数量, 0)
+                新成本 = 原成本
+            self._设置持仓(股票代码, 新数量, 新成本)
+            self._版本[股票代码] = self._版本.get(股票代码, 0) + 1
+            self.统计["成交"] += 1
+
+    def 更新价格(self, 股票代码: str, 价格: float):
+        """
+        行情：持仓中的品种按最新价调整持仓市值，价格表由调用方更新
+
+        参数:
+            股票代码: 股票代码
+            价格: 最新价
+        """
+        if not 价格 or 股票代码 not in self._持仓:
+            return
+        with self._锁:
+            项 = self._持仓.get(股票代码)
+            if 项 is not None and 项[2] != 价格:
+                self._持仓市值 += (价格 - 项[2]) * 项[0]
+                项[2] = 价格
+
+    def _设置持仓(self, 股票代码: str, 数量: float, 成本价: float):
+        """在锁内设置品种持仓并调整持仓市值"""
+        原 = self._持仓.get(股票代码)
+        if 原 is not None:
+            self._持仓市值 -= 原[0] * 原[2]
+        if 数量 > 0:
+            价格 = self.价格表.获取(股票代码) or 成本价
+            self._持仓[股票代码] = [数量, 成本价, 价格]
+            self._持仓市值 += 数量 * 价格
+        elif 原 is not None:
+            del self._持仓[股票代码]
+
+    def 对账(self, 获取快照: Callable[[], 账户快照]) -> List[str]:
+        """
+        取全量快照与增量状态比较，修正差异并重新计算持仓市值
+
+        快照在锁外获取；获取期间收到事件的品种或账户跳过比较。
+
+        参数:
+            获取快照: 返回([(账户号, 余额, 冻结), ...], [(股票代码, 数量, 成本价), ...])的函数，取不到时返回None
+
+        返回:
+            差异描述列表
+        """
+        with self._锁:
+            开始版本 = dict(self._版本)
+            开始账户版本 = self._账户版本
+        快照 = 获取快照()
+        if 快照 is None:
+            return []
+        账户列表, 持仓 = 快照
+
+        差异 = []
+        with self._锁:
+            if self._账户版本 == 开始账户版本:
+                快照账户 = {账户号: [余额, 冻结] for 账户号, 余额, 冻结 in 账户列表}
+                for 账户号 in set(快照账户) | set(self._账户):
+                    余额, 冻结 = 快照账户.get(账户号, (0.0, 0.0))
+                    原余额, 原冻结 = self._账户.get(账户号, (0.0, 0.0))
+                    if abs(余额 - 原余额) > self.市值容差 or abs(冻结 - 原冻结) > self.市值容差:
+                        差异.append(f"账户{账户号} 余额 {原余额:.2f}->{余额:.2f}，冻结 {原冻结:.2f}->{冻结:.2f}")
+                self._账户 = 快照账户
+                self._余额 = sum(项[0] for 项 in 快照账户.values())
+                self._冻结 = sum(项[1] for 项 in 快照账户.values())
+
+            快照持仓 = {代码: (数量, 成本价) for 代码, 数量, 成本价 in 持仓 if 数量 > 0}
+            for 代码 in set(快照持仓) | set(self._持仓):
+                if self._版本.get(代码, 0) != 开始版本.get(代码, 0):
+                    continue
+                数量, 成本价 = 快照持仓.get(代码, (0, 0.0))
+                原数量, 原成本 = self.获取持仓(代码)
+                if 数量 != 原数量 or abs(成本价 - 原成本) > self.市值容差:
+                    差异.append(f"{代码} 持仓 {原数量}@{原成本:.3f}->{数量}@{成本价:.3f}")
+                    self._设置持仓(代码, 数量, 成本价)
+
+            # 重新累加持仓市值，消除增量更新的浮点误差
+            self._持仓市值 = sum(项[0] * 项[2] for 项 in self._持仓.values())
+            self.统计["对账"] += 1
+            self.统计["修正"] += len(差异)
+            self.最近差异 = 差异
+
+        if 差异:
+            self.logger.warning(f"对账修正 {len(差异)} 处差异: {差异[:10]}")
+        return 差异
+
+    @property
+    def 对账中(self) -> bool:
+        """后台对账线程是否在运行"""
+        return self._线程 is not None and self._线程.is_alive()
+
+    def 启动对账(self, 获取快照: Callable[[], 账户快照], 间隔: float = 60.0):
+        """
+        启动后台对账线程
+
+        参数:
+            获取快照: 见 对账
+            间隔: 对账间隔(秒)
+        """
+        if self.对账中:
+            return
+        self._停止事件.clear()
+
+        def 对账循环():
+            while not self._停止事件.wait(间隔):
+                try:
+                    self.对账(获取快照)
+                except Exception as e:
+                    self.logger.error(f"对账出错: {e}")
+
+        self._线程 = threading.Thread(target=对账循环, name="账户对账", daemon=True)
+        self._线程.start()
+        self.logger.info(f"账户对账已启动，间隔 {间隔} 秒")
+
+    def 停止对账(self, 等待: float = 2.0):
+        """
+        停止后台对账线程
+
+        参数:
+            等待: 等待线程退出的最长时间(秒)
+        """
+        self._停止事件.set()
+        if self._线程 is not None:
+            self._线程.join(等待)
+            self._线程 = None
+
+    def 导出(self) -> Dict:
+        """
+        导出账户状态摘要
+
+        返回:
+            {"总资产", "冻结", "持仓市值", "持仓数", "统计"}
+        """
+        return {
+            "总资产": self._余额,
+            "冻结": self._冻结,
+            "持仓市值": round(self._持仓市值, 2),
+            "持仓数": len(self._持仓),
+            "统计": dict(self.统计)
+        }
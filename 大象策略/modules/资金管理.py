@@ -3,16 +3,20 @@
 """
 资金管理模块 - 管理持仓和资金，支持调戏大象模式
 """
+from array import array
 from typing import Dict, List, Optional
-from datetime import datetime, date
-import numpy as np
+from datetime import datetime, date, timedelta
 from copy import copy
 
+from .最新价 import 最新价表
+from .持仓批次 import 持仓批次账本
+
 
 class 资金管理器:
     """资金管理器类，负责管理持仓和资金，处理T+1规则"""
     
-    def __init__(self, 初始资产: float = 0, 股票池比例: float = 0.5, 买回保障金比例: float = 0.7):
+    def __init__(self, 初始资产: float = 0, 股票池比例: float = 0.5, 买回保障金比例: float = 0.7,
+                 价格表: Optional[最新价表] = None):
         """
         初始化资金管理器
         
@@ -20,19 +24,107 @@ class 资金管理器:
             初始资产: 策略初始总资产
             股票池比例: 已弃用，保留兼容性
             买回保障金比例: 已弃用，保留兼容性
+            价格表: 共享的最新价表，为None时自建
         """
         self.初始资产 = 初始资产
         self.当前总资产 = 初始资产
         self.可用资金 = 初始资产
         
-        # T+1持仓记录 {股票代码: {总数量, 可交易数量, 冻结数量, 成本价, 买入时间}}
-        self.持仓记录 = {}
+        # T+1持仓按买入批次记录，卖出先进先出
+        self.持仓批次 = 持仓批次账本()
         
         # 交易记录
         self.今日交易记录 = []
         
         # 当前交易日
         self.当前交易日 = date.today()
+        
+        # 持仓市值和成本按价格表的品种索引增量维护，价格变化时只调整该品种
+        self.价格表 = 价格表 if 价格表 is not None else 最新价表()
+        self._持仓数量 = array("d")  # 按品种索引的总持仓数量
+        self._成本价 = array("d")  # 按品种索引的成本价
+        self._计价 = array("d")  # 按品种索引的计价价格，没有行情时为成本价
+        self.持仓市值 = 0.0
+        self.持仓成本总额 = 0.0
+    
+    @property
+    def 浮动盈亏(self) -> float:
+        """全部持仓按最新价计算的浮动盈亏"""
+        return self.持仓市值 - self.持仓成本总额
+    
+    @property
+    def 持仓记录(self) -> Dict[str, Dict]:
+        """持仓汇总 {股票代码: {总数量, 可交易数量, 冻结数量, 成本价, 批次数}}，每次读取时由持仓批次生成"""
+        批次 = self.持仓批次
+        return {
+            股票代码: {
+                "总数量": 批次.总数量(股票代码),
+                "可交易数量": 批次.可卖数量(股票代码),
+                "冻结数量": 批次.冻结数量(股票代码),
+                "成本价": 批次.成本价(股票代码),
+                "批次数": 批次.批次数(股票代码)
+            }
+            for 股票代码 in 批次
+        }
+    
+    def 更新价格(self, 索引: int, 价格: float):
+        """
+        行情价格变化：按差价乘持仓数量调整持仓市值
+        
+        参数:
+            索引: 品种在价格表中的索引
+            价格: 最新价
+        """
+        if 索引 < len(self._持仓数量) and 价格:
+            数量 = self._持仓数量[索引]
+            if 数量:
+                self.持仓市值 += (价格 - self._计价[索引]) * 数量
+                self._计价[索引] = 价格
+    
+    def 获取持仓市值(self, 股票代码: str) -> float:
+        """
+        获取单个品种按最新价计算的持仓市值
+        
+        参数:
+            股票代码: 股票代码
+            
+        返回:
+            持仓市值，没有持仓时为0
+        """
+        if 股票代码 not in self.价格表:
+            return 0.0
+        索引 = self.价格表.索引(股票代码)
+        if 索引 >= len(self._持仓数量):
+            return 0.0
+        return self._持仓数量[索引] * self._计价[索引]
+    
+    def _同步持仓市值(self, 股票代码: str):
+        """持仓数量或成本变化后，按持仓批次重新计算该品种的市值和成本"""
+        索引 = self.价格表.索引(股票代码)
+        if 索引 >= len(self._持仓数量):
+            扩展 = array("d", bytes(8 * (索引 + 1 - len(self._持仓数量))))
+            self._持仓数量.extend(扩展)
+            self._成本价.extend(扩展)
+            self._计价.extend(扩展)
+        
+        数量 = self.持仓批次.总数量(股票代码)
+        成本价 = self.持仓批次.成本价(股票代码)
+        计价 = self.价格表.价格[索引] or 成本价
+        
+        self.持仓市值 += 数量 * 计价 - self._持仓数量[索引] * self._计价[索引]
+        self.持仓成本总额 += 数量 * 成本价 - self._持仓数量[索引] * self._成本价[索引]
+        self._持仓数量[索引] = 数量
+        self._成本价[索引] = 成本价
+        self._计价[索引] = 计价
+    
+    def _重建持仓市值(self):
+        """按全部持仓批次重新计算持仓市值和成本，加载持仓状态后调用"""
+        for 列 in (self._持仓数量, self._成本价, self._计价):
+            del 列[:]
+        self.持仓市值 = 0.0
+        self.持仓成本总额 = 0.0
+        for 股票代码 in self.持仓批次:
+            self._同步持仓市值(股票代码)
     
     def 更新资产状态(self, 总资产: float, 持仓市值: float):
         """
@@ -56,56 +148,29 @@ class 资金管理器:
             数量: 交易数量
             价格: 交易价格
             是买入: 是否为买入操作
-        """
-        if 股票代码 not in self.持仓记录:
-            self.持仓记录[股票代码] = {
-                "总数量": 0,
-                "可交易数量": 0,
-                "冻结数量": 0,
-                "成本价": 0,
-                "买入时间": []  # 记录每笔买入的时间，用于T+1判断
-            }
-        
-        持仓信息 = self.持仓记录[股票代码]
-        
-        if 是买入:
-            # 买入操作更新持仓和成本
-            原总数量 = 持仓信息["总数量"]
-            原成本 = 持仓信息["成本价"]
             
-            新总数量 = 原总数量 + 数量
-            if 新总数量 > 0:
-                新成本 = (原总数量 * 原成本 + 数量 * 价格) / 新总数量
-            else:
-                新成本 = 价格
+        返回:
+            交易记录，卖出时包含按先进先出批次成本计算的已实现盈亏
             
-            # 更新持仓记录
-            持仓信息["总数量"] = 新总数量
-            持仓信息["成本价"] = 新成本
-            持仓信息["冻结数量"] += 数量  # 新买入的股票当天不能卖出
-            持仓信息["买入时间"].append(datetime.now())  # 记录买入时间
+        异常:
+            ValueError: 卖出数量超过可交易数量
+        """
+        已实现盈亏 = None
+        if 是买入:
+            # 新买入的批次当天不能卖出
+            self.持仓批次.买入(股票代码, 数量, 价格)
             
             # 扣减可用资金
             self.可用资金 -= 数量 * 价格
         else:
-            # 卖出操作
-            原总数量 = 持仓信息["总数量"]
-            原可交易数量 = 持仓信息["可交易数量"]
-            
-            # 确保有足够的可交易数量
-            if 原可交易数量 < 数量:
-                raise ValueError(f"可交易数量不足: 需要{数量}, 实际{原可交易数量}")
-            
-            新总数量 = 原总数量 - 数量
-            新可交易数量 = 原可交易数量 - 数量
-            
-            # 更新持仓记录
-            持仓信息["总数量"] = 新总数量
-            持仓信息["可交易数量"] = 新可交易数量
+            # 从最早的批次开始卖出，可交易数量不足时抛出ValueError
+            已实现盈亏 = self.持仓批次.卖出(股票代码, 数量, 价格)
             
             # 增加可用资金
             self.可用资金 += 数量 * 价格
         
+        self._同步持仓市值(股票代码)
+        
         # 记录交易
         交易记录 = {
             "时间": datetime.now(),
@@ -115,6 +180,8 @@ class 资金管理器:
             "数量": 数量,
             "金额": 数量 * 价格
         }
+        if 已实现盈亏 is not None:
+            交易记录["已实现盈亏"] = 已实现盈亏
         
         self.今日交易记录.append(交易记录)
         
@@ -132,11 +199,8 @@ class 资金管理器:
         
         # 如果是新的交易日
         if 新交易日 != self.当前交易日:
-            # 解冻前一天买入的股票
-            for 股票代码, 持仓信息 in self.持仓记录.items():
-                # 将所有冻结数量转为可交易数量
-                持仓信息["可交易数量"] += 持仓信息["冻结数量"]
-                持仓信息["冻结数量"] = 0
+            # 此前买入的批次全部解冻，只改变账本的当前交易日，不遍历品种
+            self.持仓批次.切换交易日(新交易日)
             
             # 更新当前交易日
             self.当前交易日 = 新交易日
@@ -154,9 +218,7 @@ class 资金管理器:
         返回:
             可卖出数量
         """
-        if 股票代码 in self.持仓记录:
-            return self.持仓记录[股票代码]["可交易数量"]
-        return 0
+        return self.持仓批次.可卖数量(股票代码)
     
     def 获取持仓总数量(self, 股票代码: str) -> int:
         """
@@ -168,9 +230,7 @@ class 资金管理器:
         返回:
             总持仓数量
         """
-        if 股票代码 in self.持仓记录:
-            return self.持仓记录[股票代码]["总数量"]
-        return 0
+        return self.持仓批次.总数量(股票代码)
     
     def 获取可用资金(self) -> float:
         """
@@ -181,7 +241,7 @@ class 资金管理器:
         """
         return self.可用资金
     
-    def 计算可交易数量(self, 股票代码: str, 价格: float, 目标数量: int = 100) -> int:
+    def 计算可交易数量(self, 股票代码: str, 价格: float, 目标数量: int = 100, 每手数量: int = 100) -> int:
         """
         计算调戏大象时的可交易数量
         
@@ -189,6 +249,7 @@ class 资金管理器:
             股票代码: 股票代码
             价格: 当前价格
             目标数量: 希望交易的数量，默认100股
+            每手数量: 品种的每手数量，取自品种信息表，默认100股
             
         返回:
             可交易数量
@@ -202,8 +263,8 @@ class 资金管理器:
         # 资金不足，计算能买入的最大数量
         可买数量 = int(self.可用资金 / 价格)
         
-        # 确保返回的是整百的股票数量
-        整百股数 = (可买数量 // 100) * 100
+        # 确保返回的是整手的股票数量
+        整百股数 = (可买数量 // 每手数量) * 每手数量
         
         # 如果资金足够买入至少1股但不足100股，至少返回0股
         if 整百股数 == 0 and 可买数量 > 0:
@@ -224,19 +285,16 @@ class 资金管理器:
         卖出总额 = sum(record["金额"] for record in self.今日交易记录 if record["方向"] == "卖出")
         交易次数 = len(self.今日交易记录)
         
-        # 计算持仓市值
-        持仓市值 = 0
-        # 需要通过外部接口获取当前价格，这里暂略
-        
         统计 = {
             "当前总资产": self.当前总资产,
             "可用资金": self.可用资金,
-            "持仓市值": 持仓市值,
+            "持仓市值": self.持仓市值,
+            "浮动盈亏": self.浮动盈亏,
             "交易总额": 交易总额,
             "买入总额": 买入总额,
             "卖出总额": 卖出总额,
             "交易次数": 交易次数,
-            "持仓股票数": len([code for code, info in self.持仓记录.items() if info["总数量"] > 0])
+            "持仓股票数": len(self.持仓批次)
         }
         
         return 统计
@@ -256,9 +314,28 @@ class 资金管理器:
             "当前总资产": self.当前总资产,
             "可用资金": self.可用资金,
             "持仓记录": self.持仓记录,
+            "持仓批次": self.持仓批次.导出(),
             "当前交易日": self.当前交易日.isoformat()
         }
     
+    def 导出状态(self) -> Dict:
+        """
+        导出用于状态快照的持仓状态，同 保存持仓状态
+        
+        返回:
+            持仓状态字典
+        """
+        return self.保存持仓状态()
+    
+    def 恢复状态(self, 状态: Dict):
+        """
+        从状态快照恢复持仓，同 加载持仓状态
+        
+        参数:
+            状态: 导出状态 的返回值
+        """
+        self.加载持仓状态(状态)
+    
     def 加载持仓状态(self, 状态: Dict):
         """
         从保存的状态恢复持仓
@@ -271,12 +348,28 @@ class 资金管理器:
             
         self.当前总资产 = 状态.get("当前总资产", self.初始资产)
         self.可用资金 = 状态.get("可用资金", self.初始资产)
-        self.持仓记录 = 状态.get("持仓记录", {})
         
-        # 恢复交易日
+        # 恢复交易日，批次是否冻结取决于交易日，须先于批次恢复
         日期字符串 = 状态.get("当前交易日")
         if 日期字符串:
             try:
                 self.当前交易日 = date.fromisoformat(日期字符串)
             except:
-                self.当前交易日 = date.today() 
\ No newline at end of file
+                self.当前交易日 = date.today()
+        self.持仓批次.切换交易日(self.当前交易日)
+        
+        if "持仓批次" in 状态:
+            self.持仓批次.加载(状态["持仓批次"])
+        else:
+            # 旧格式只有汇总，可交易数量记为前一交易日、冻结数量记为当日的批次
+            前一日 = (self.当前交易日 - timedelta(days=1)).isoformat()
+            当日 = self.当前交易日.isoformat()
+            批次 = {}
+            for 股票代码, 持仓信息 in 状态.get("持仓记录", {}).items():
+                成本价 = 持仓信息.get("成本价", 0)
+                批次[股票代码] = [
+                    [持仓信息.get("可交易数量", 0), 成本价, 前一日],
+                    [持仓信息.get("冻结数量", 0), 成本价, 当日]
+                ]
+            self.持仓批次.加载(批次)
+        self._重建持仓市值() 
\ No newline at end of file
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+配置监视模块 - 监视配置文件变化，在后台线程中回调
+"""
+from typing import Callable, Iterable, List, Optional, Tuple
+import os
+import threading
+
+from .日志 import get_logger
+
+# inotify为可选依赖，未安装时使用修改时间轮询
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+    inotify_flags = None
+
+
+def 文件签名(路径: str) -> Optional[Tuple[int, int]]:
+    """
+    获取文件签名(修改时间纳秒, 大小)
+
+    参数:
+        路径: 文件路径
+
+    返回:
+        文件签名，文件不存在时返回None
+    """
+    try:
+        状态 = os.stat(路径)
+    except OSError:
+        return None
+    return (状态.st_mtime_ns, 状态.st_size)
+
+
+class 配置监视器:
+    """
+    配置文件监视器
+
+    优先使用inotify监听所在目录的写入和改名事件，不可用时按固定间隔比较文件签名。
+    检测到变化后等待一个防抖间隔，确认文件不再变化才回调，避免读到写了一半的文件。
+    回调在监视线程中执行，不占用交易线程。
+    """
+
+    def __init__(self, 文件列表: Iterable[str], 回调: Callable[[List[str]], None],
+                 轮询间隔: float = 1.0, 防抖间隔: float = 0.2, 使用inotify: bool = True):
+        """
+        初始化配置监视器
+
+        参数:
+            文件列表: 要监视的文件路径
+            回调: 文件变化时的回调，参数为发生变化的文件路径列表
+            轮询间隔: 轮询模式下的检查间隔(秒)
+            防抖间隔: 检测到变化后等待文件稳定的时间(秒)
+            使用inotify: 是否优先使用inotify
+        """
+        self.文件列表 = [os.path.abspath(路径) for 路径 in 文件列表]
+        self.回调 = 回调
+        self.轮询间隔 = 轮询间隔
+        self.防抖间隔 = 防抖间隔
+        self.使用inotify = 使用inotify and INotify is not None
+
+        self._签名 = {路径: 文件签名(路径) for 路径 in self.文件列表}
+        self._停止事件 = threading.Event()
+        self._线程 = None
+        self._inotify = None
+
+        self.logger = get_logger("配置监视")
+
+    @property
+    def 运行中(self) -> bool:
+        """监视线程是否在运行"""
+        return self._线程 is not None and self._线程.is_alive()
+
+    def 启动(self):
+        """启动监视线程"""
+        if self.运行中:
+            return
+        self._停止事件.clear()
+        if self.使用inotify:
+            try:
+                self._inotify = INotify()
+                掩码 = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+                for 目录 in {os.path.dirname(路径) for 路径 in self.文件列表}:
+                    self._inotify.add_watch(目录, 掩码)
+            except Exception as e:
+                self.logger.warning(f"inotify不可用，改为轮询: {e}")
+                self._inotify = None
+
+        self._线程 = threading.Thread(target=self._监视循环, name="配置监视", daemon=True)
+        self._线程.start()
+        self.logger.info(f"配置监视已启动({'inotify' if self._inotify else '轮询'})，文件数:{len(self.文件列表)}")
+
+    def 停止(self, 等待: float = 2.0):
+        """
+        停止监视线程
+
+        参数:
+            等待: 等待线程退出的最长时间(秒)
+        """
+        self._停止事件.set()
+        if self._线程 is not None:
+            self._线程.join(等待)
+        if self._inotify is not None:
+            try:
+                self._inotify.close()
+            except Exception:
+                pass
+            self._inotify = None
+
+    def 检查变化(self) -> List[str]:
+        """
+        比较文件签名，返回签名发生变化且已稳定的文件
+
+        返回:
+            发生变化的文件路径列表
+        """
+        候选 = [路径 for 路径 in self.文件列表 if 文件签名(路径) != self._签名.get(路径)]
+        if not 候选:
+            return []
+
+        # 防抖：等待写入完成，签名仍在变化的文件留到下一轮
+        if self.防抖间隔 > 0:
+            首次签名 = {路径: 文件签名(路径) for 路径 in 候选}
+            self._停止事件.wait(self.防抖间隔)
+            候选 = [路径 for 路径 in 候选 if 文件签名(路径) == 首次签名[路径]]
+
+        for 路径 in 候选:
+            self._签名[路径] = 文件签名(路径)
+        return 候选
+
+    def _等待事件(self):
+        """等待下一次可能的变化"""
+        if self._inotify is not None:
+            # 超时后仍做一次签名比较，兜底处理丢失的事件
+            self._inotify.read(timeout=int(self.轮询间隔 * 1000))
+        else:
+            self._停止事件.wait(self.轮询间隔)
+
+    def _监视循环(self):
+        """监视线程主循环"""
+        while not self._停止事件.is_set():
+            try:
+                self._等待事件()
+                if self._停止事件.is_set():
+                    break
+                变化文件 = self.检查变化()
+                if 变化文件:
+                    self.回调(变化文件)
+            except Exception as e:
+                self.logger.error(f"配置监视出错: {e}")
+                self._停止事件.wait(self.轮询间隔)
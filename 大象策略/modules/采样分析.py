@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+采样分析模块 - 进程内按需启动的采样分析器，输出火焰图可用的折叠栈
+"""
+from typing import Dict, Iterable, Optional
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .日志 import get_logger
+
+
+class 采样分析器:
+    """
+    采样分析器
+
+    启动后由一个后台线程按固定间隔读取所有线程的当前调用栈(sys._current_frames)，
+    按"线程;外层函数;...;内层函数 次数"的折叠栈格式累计，停止时写入日志目录，
+    可直接交给 flamegraph.pl 或 speedscope 使用。未启动时不占用任何线程，也没有开销。
+    """
+
+    def __init__(self, 输出目录: str = "logs", 采样间隔: float = 0.005, 最大时长: float = 300):
+        """
+        初始化采样分析器
+
+        参数:
+            输出目录: 折叠栈文件的输出目录
+            采样间隔: 默认采样间隔(秒)
+            最大时长: 单次采样允许的最长时间(秒)
+        """
+        self.输出目录 = 输出目录
+        self.采样间隔 = 采样间隔
+        self.最大时长 = 最大时长
+
+        self._锁 = threading.Lock()
+        self._线程 = None
+        self._停止事件 = threading.Event()
+
+        # 本次采样的状态
+        self._栈计数 = {}
+        self._帧名缓存 = {}
+        self._样本数 = 0
+        self._开始时间 = None
+        self._计划时长 = 0
+        self._线程名过滤 = None
+        self.最近结果 = None
+
+        self.logger = get_logger("采样分析")
+
+    @property
+    def 运行中(self) -> bool:
+        """是否正在采样"""
+        return self._线程 is not None and self._线程.is_alive()
+
+    def 开始(self, 时长: float = 10, 采样间隔: float = None, 线程名: Iterable[str] = None) -> Dict:
+        """
+        开始采样，到达时长后自动停止并写出结果
+
+        参数:
+            时长: 采样时长(秒)，不超过最大时长
+            采样间隔: 采样间隔(秒)，为None时使用默认值
+            线程名: 只采样这些名称的线程，为None时采样除分析器外的所有线程
+
+        返回:
+            启动结果字典
+        """
+        with self._锁:
+            if self.运行中:
+                return {"成功": False, "消息": "采样分析已在运行", "状态": self.获取状态()}
+
+            时长 = max(0.1, min(float(时长), self.最大时长))
+            间隔 = max(0.001, float(采样间隔 or self.采样间隔))
+
+            self._栈计数 = {}
+            self._样本数 = 0
+            self._开始时间 = time.time()
+            self._计划时长 = 时长
+            self._线程名过滤 = set(线程名) if 线程名 else None
+            self._停止事件.clear()
+
+            self._线程 = threading.Thread(
+                target=self._采样循环, args=(时长, 间隔), name="采样分析", daemon=True
+            )
+            self._线程.start()
+
+        self.logger.info(f"采样分析已启动，时长:{时长}秒 间隔:{间隔 * 1000:.1f}毫秒")
+        return {"成功": True, "消息": "采样分析已启动", "时长": 时长, "采样间隔": 间隔}
+
+    def 停止(self, 等待: float = 5) -> Dict:
+        """
+        提前停止采样并写出结果
+
+        参数:
+            等待: 等待采样线程退出的最长时间(秒)
+
+        返回:
+            采样结果字典
+        """
+        线程 = self._线程
+        if 线程 is None:
+            return {"成功": False, "消息": "采样分析未运行", "最近结果": self.最近结果}
+
+        self._停止事件.set()
+        线程.join(等待)
+        return {"成功": True, "消息": "采样分析已停止", "结果": self.最近结果}
+
+    def 获取状态(self) -> Dict:
+        """
+        获取采样状态
+
+        返回:
+            状态字典
+        """
+        状态 = {"运行中": self.运行中, "最近结果": self.最近结果}
+        if self.运行中:
+            状态["已采样秒数"] = round(time.time() - self._开始时间, 2)
+            状态["计划时长"] = self._计划时长
+            状态["样本数"] = self._样本数
+        return 状态
+
+    def _帧名(self, 代码) -> str:
+        """获取代码对象的显示名称，结果按代码对象缓存"""
+        名称 = self._帧名缓存.get(代码)
+        if 名称 is None:
+            文件名 = os.path.basename(代码.co_filename)
+            名称 = f"{代码.co_name} ({文件名}:{代码.co_firstlineno})".replace(";", ":")
+            self._帧名缓存[代码] = 名称
+        return 名称
+
+    def _采样一次(self, 自身线程ID: int):
+        """对所有线程的当前调用栈采样一次"""
+        线程名称 = {线程.ident: 线程.name for 线程 in threading.enumerate()}
+        for 线程ID, 帧 in sys._current_frames().items():
+            if 线程ID == 自身线程ID:
+                continue
+            线程名 = 线程名称.get(线程ID, str(线程ID))
+            if self._线程名过滤 is not None and 线程名 not in self._线程名过滤:
+                continue
+
+            栈 = []
+            while 帧 is not None:
+                栈.append(self._帧名(帧.f_code))
+                帧 = 帧.f_back
+            栈.append(线程名.replace(";", ":").replace(" ", "_"))
+            栈.reverse()
+
+            键 = ";".join(栈)
+            self._栈计数[键] = self._栈计数.get(键, 0) + 1
+        self._样本数 += 1
+
+    def _采样循环(self, 时长: float, 间隔: float):
+        """采样线程主循环"""
+        自身线程ID = threading.get_ident()
+        截止时间 = time.perf_counter() + 时长
+        下次采样 = time.perf_counter()
+        try:
+            while not self._停止事件.is_set():
+                现在 = time.perf_counter()
+                if 现在 >= 截止时间:
+                    break
+                if 现在 >= 下次采样:
+                    self._采样一次(自身线程ID)
+                    下次采样 += 间隔
+                    # 采样落后太多时不追赶，避免连续采样挤占CPU
+                    if 下次采样 < 现在:
+                        下次采样 = 现在 + 间隔
+                self._停止事件.wait(max(0.0, min(下次采样, 截止时间) - time.perf_counter()))
+        except Exception as e:
+            self.logger.error(f"采样分析出错: {e}")
+        finally:
+            self.最近结果 = self._写出结果()
+            self._帧名缓存.clear()
+
+    def _写出结果(self) -> Optional[Dict]:
+        """将累计的折叠栈写入输出目录"""
+        实际时长 = round(time.time() - self._开始时间, 2)
+        文件路径 = None
+        if self._栈计数:
+            os.makedirs(self.输出目录, exist_ok=True)
+            文件名 = f"采样分析_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded"
+            文件路径 = os.path.join(self.输出目录, 文件名)
+            try:
+                with open(文件路径, "w", encoding="utf-8") as f:
+                    for 栈, 次数 in sorted(self._栈计数.items(), key=lambda 项: -项[1]):
+                        f.write(f"{栈} {次数}\n")
+            except Exception as e:
+                self.logger.error(f"写出采样结果失败: {e}")
+                文件路径 = None
+
+        结果 = {
+            "文件": 文件路径,
+            "样本数": self._样本数,
+            "栈数": len(self._栈计数),
+            "时长": 实际时长,
+            "结束时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.logger.info(f"采样分析结束，样本数:{self._样本数} 输出:{文件路径}")
+        self._栈计数 = {}
+        return 结果
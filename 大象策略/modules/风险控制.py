@@ -4,7 +4,7 @@
 风险控制模块 - 负责交易风险控制
 """
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import time
 
 from .日志 import get_logger
@@ -182,6 +182,70 @@ class 风险控制器:
         # 通过所有风控检查
         return True
     
+    def 检查日内亏损超限(self) -> bool:
+        """
+        检查日内总亏损是否超过限制
+
+        返回:
+            是否超限，超限时策略应撤销全部活跃订单
+        """
+        return self.日内总盈亏 < 0 and abs(self.日内总盈亏) > self.总资产 * self.日内最大亏损比例
+
+    def 检查全局风控(self) -> bool:
+        """
+        检查是否触发全局风控（日内总亏损或总交易次数超限）
+
+        返回:
+            是否触发全局风控，True表示应暂停全部交易
+        """
+        if self.检查日内亏损超限():
+            return True
+
+        if self.日内总交易次数 > self.总交易次数限制:
+            return True
+
+        return False
+
+    def 检查交易风险(self, 股票代码: str) -> tuple:
+        """
+        开仓前检查指定股票是否允许交易
+
+        参数:
+            股票代码: 股票代码
+
+        返回:
+            (是否允许交易, 拒绝原因)
+        """
+        if 股票代码 in self.风控冷却期:
+            if datetime.now() < self.风控冷却期[股票代码]:
+                return False, "风控冷却期"
+            del self.风控冷却期[股票代码]
+
+        if self.检查全局风控():
+            return False, "全局风控触发"
+
+        if self.股票交易次数.get(股票代码, 0) >= self.单股最大交易次数:
+            return False, "单股交易次数超限"
+
+        单股盈亏 = self.股票盈亏.get(股票代码, 0)
+        if 单股盈亏 < 0 and abs(单股盈亏) > self.总资产 * self.单股最大亏损比例:
+            return False, "单股累计亏损超限"
+
+        return True, ""
+
+    def 记录交易盈亏(self, 股票代码: str, 盈亏: float) -> bool:
+        """
+        记录一轮完整交易的盈亏
+
+        参数:
+            股票代码: 股票代码
+            盈亏: 净盈亏
+
+        返回:
+            是否通过风控检查
+        """
+        return self.记录交易({"股票代码": 股票代码, "盈亏": 盈亏, "方向": "平仓"})
+
     def _触发风控(self, 股票代码: str, 风控类型: str, 详情: str) -> None:
         """
         触发风控，记录风控信息并设置冷却期
@@ -239,6 +303,43 @@ class 风险控制器:
         for k in 过期键:
             del self.风控冷却期[k]
     
+    def 导出状态(self) -> Dict:
+        """
+        导出用于状态快照的风控状态，日内统计带上所属日期
+        
+        返回:
+            风控状态字典
+        """
+        return {
+            "日期": date.today().isoformat(),
+            "总资产": self.总资产,
+            "日内总盈亏": self.日内总盈亏,
+            "日内总交易次数": self.日内总交易次数,
+            "连续亏损次数": self.连续亏损次数,
+            "股票盈亏": self.股票盈亏,
+            "股票交易次数": self.股票交易次数,
+            "风控冷却期": self.风控冷却期,
+            "风控触发记录": self.风控触发记录
+        }
+    
+    def 恢复状态(self, 状态: Dict) -> None:
+        """
+        从状态快照恢复风控状态，快照不是当日的只恢复冷却期和触发记录
+        
+        参数:
+            状态: 导出状态 的返回值
+        """
+        self.总资产 = 状态.get("总资产", self.总资产)
+        self.风控冷却期 = dict(状态.get("风控冷却期", {}))
+        self.风控触发记录 = list(状态.get("风控触发记录", []))
+        if 状态.get("日期") != date.today().isoformat():
+            return
+        self.日内总盈亏 = 状态.get("日内总盈亏", 0)
+        self.日内总交易次数 = 状态.get("日内总交易次数", 0)
+        self.连续亏损次数 = 状态.get("连续亏损次数", 0)
+        self.股票盈亏 = dict(状态.get("股票盈亏", {}))
+        self.股票交易次数 = dict(状态.get("股票交易次数", {}))
+    
     def 获取股票风控状态(self, 股票代码: str) -> Dict:
         """
         获取指定股票的风控状态
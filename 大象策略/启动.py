@@ -24,7 +24,7 @@ try:
     from vnpy.trader.gateway.ctp import CtpGateway
     # 导入模拟交易网关用于测试
     from vnpy.gateway.tushare import TushareGateway
-    from vnpy.gateway.simulator import SimulatorGateway
+    from modules.模拟网关 import 模拟交易所网关
     from vnpy.app.cta_strategy import CtaStrategyApp
     from vnpy.app.cta_strategy.base import CtaEngine
 except ImportError as e:
@@ -73,11 +73,24 @@ def 连接实盘网关(main_engine):
         return False
 
 def 连接模拟网关(main_engine):
-    """连接模拟网关用于测试"""
+    """连接本地模拟交易所网关用于测试"""
+    # 模拟交易所设置(延迟、部分成交、合成行情等)可选，未配置的项使用网关默认值
+    config_path = os.path.join(当前路径, "modules", "config", "mock_config.json")
+    mock_setting = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            mock_setting = json.load(f)
+
+    # 交易股票列表用于推送合约和生成合成行情
+    stocks_path = os.path.join(当前路径, "modules", "config", "stocks.json")
+    if "股票列表" not in mock_setting and os.path.exists(stocks_path):
+        with open(stocks_path, "r", encoding="utf-8") as f:
+            mock_setting["股票列表"] = json.load(f).get("stocks", [])
+
     # 连接模拟网关
-    gateway_name = "SIMULATOR"
-    main_engine.add_gateway(SimulatorGateway)
-    main_engine.connect({}, gateway_name)
+    gateway_name = 模拟交易所网关.default_name
+    main_engine.add_gateway(模拟交易所网关)
+    main_engine.connect(mock_setting, gateway_name)
     print(f"已连接到模拟网关: {gateway_name}")
     return True
 
@@ -7,47 +7,61 @@
 作者: AI助手
 """
 
-from typing import Dict, List, Set, Optional, Any
-import os
 import time
+
+# 记录模块导入耗时，用于启动耗时报告
+_导入开始时间 = time.perf_counter()
+
+from typing import Dict, List, Optional
+import os
 import json
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime
 
 from vnpy.trader.constant import (
     Direction,
-    Offset,
     Exchange,
-    OrderType,
-    Status,
-    Interval
+    Status
 )
 from vnpy.trader.object import (
     TickData,
     BarData,
     OrderData,
-    TradeData,
-    ContractData,
-    PositionData,
-    AccountData
+    TradeData
 )
-from vnpy.trader.utility import round_to
-from vnpy.trader.event import EVENT_TIMER
+from vnpy.trader.event import EVENT_ACCOUNT, EVENT_POSITION, EVENT_TIMER
 # 从新版本导入CTA策略模块
-from vnpy_ctastrategy import (
-    CtaTemplate,
-    BarGenerator,
-    ArrayManager,
-    StopOrder
-)
+from vnpy_ctastrategy import CtaTemplate
 
 # 导入策略模块 - 修改为相对导入
+# 网页管理(Flask)和测试模块只在启用时导入，见 __init__ 和 _运行测试
 from modules.资金管理 import 资金管理器
 from modules.大象识别 import 大象识别器
+from modules.大象监控 import 大象消失监控器
+from modules.盘口增量 import 盘口增量引擎
+from modules.盘口适配 import 盘口适配器
+from modules.行情合并 import 行情合并器, 事件队列积压探测
+from modules.委托限流 import 委托限流器, 优先级_止损, 优先级_平仓, 优先级_开仓
+from modules.紧急撤单 import 紧急撤单器
+from modules.账户状态 import 账户状态
+from modules.最新价 import 最新价表
+from modules.状态快照 import 状态快照器
+from modules.状态日志 import 状态日志器
 from modules.交易执行 import 交易执行器
 from modules.风险控制 import 风险控制器
-from modules.网页管理 import 网页管理器
-from modules.测试模块 import 测试管理器, 运行所有测试
 from modules.参数管理 import 参数管理器
+from modules.品种信息 import 品种信息表
+from modules.指标 import 指标注册表
+from modules.延迟统计 import (
+    延迟统计器,
+    阶段_盘口构建,
+    阶段_参数解析,
+    阶段_大象检测,
+    阶段_风控检查,
+    阶段_订单发送
+)
+
+_模块导入耗时 = time.perf_counter() - _导入开始时间
 
 
 class 大象策略(CtaTemplate):
@@ -75,6 +89,10 @@ class 大象策略(CtaTemplate):
     跳过买一价 = False  # 是否跳过买一价搜索大象
     远距大象委托量倍数 = 1.5  # 远距大象委托量阈值倍数
     价差分界点 = 1  # 近距和远距大象的档位分界点
+    大象消失比例 = 0.8  # 持仓期间大象数量下降超过该比例视为消失
+    盘口档位数 = 5  # 每侧盘口档位数，Level-2行情为10
+    读取委托笔数 = False  # 是否读取Level-2各档委托笔数
+    单笔委托金额阈值 = 0.0  # 平均每笔金额低于该值的价格档不判定为大象，0为不检查
     
     # 交易执行参数
     价格偏移量 = 0.01  # 最小价格变动单位
@@ -135,6 +153,10 @@ class 大象策略(CtaTemplate):
         跳过买一价: bool = False,
         远距大象委托量倍数: float = 1.5,
         价差分界点: float = 0.02,
+        大象消失比例: float = 0.8,
+        盘口档位数: int = 5,
+        读取委托笔数: bool = False,
+        单笔委托金额阈值: float = 0.0,
         
         # 交易执行参数
         价格偏移量: float = 0.01,
@@ -167,22 +189,63 @@ class 大象策略(CtaTemplate):
         
         # 交易日志参数
         启用详细交易日志: bool = True,
-        交易日志文件名: str = ""
+        交易日志文件名: str = "",
+        
+        # 延迟统计参数
+        启用延迟统计: bool = True,
+        
+        # 行情合并参数
+        启用行情合并: bool = True,
+        行情最大等待毫秒: float = 200.0,
+        
+        # 委托限流参数，0表示不限制
+        委托每秒限制: float = 20.0,
+        撤单每秒限制: float = 20.0,
+        单品种委托每秒限制: float = 5.0,
+        
+        # 紧急撤单参数
+        紧急撤单批量: int = 20,
+        紧急撤单确认超时毫秒: float = 1000.0,
+        停止撤单等待秒: float = 3.0,
+        
+        # 账户对账间隔(秒)，账户和持仓由事件增量更新，后台线程按此间隔全量对账
+        对账间隔秒: float = 60.0,
+        
+        # 状态快照间隔(秒)，0表示只在策略停止时保存
+        快照间隔秒: float = 1.0,
+        
+        # 状态日志成批提交的最长等待时间(毫秒)
+        状态日志提交间隔毫秒: float = 20.0,
+        
+        # 参数热加载
+        启用参数热加载: bool = True,
+        
+        # 参数存储方式: json 或 sqlite
+        参数存储: str = "json"
     ):
         """初始化大象策略"""
+        # 启动耗时 {阶段: 秒}，on_init 结束时输出报告
+        self.启动耗时 = {"模块导入": _模块导入耗时}
+        阶段开始 = time.perf_counter()
+        
         super().__init__(cta_engine, strategy_name, vt_symbol, setting)
         
         # 初始化参数管理器
-        self.参数管理 = 参数管理器(配置目录="config")
+        self.参数管理 = 参数管理器(配置目录="config", 存储=参数存储)
+        self.启用参数热加载 = 启用参数热加载
+        阶段开始 = self._记录启动耗时("参数加载", 阶段开始)
         
         # 初始化交易接口属性
         self.交易接口 = None  # 实际运行时会被vnpy设置
         
         # 初始化各个模块
+        # 按品种索引的最新价表，由 on_tick/on_bar 更新，资金管理和账户状态共用
+        self.最新价 = 最新价表()
         self.资金管理 = 资金管理器(
             初始资产=0,
             股票池比例=0.5,  # 不再使用股票池比例，但保留兼容性
-            买回保障金比例=0.3  # 降低买回保障金比例
+            买回保障金比例=0.3,  # 降低买回保障金比例
+            价格表=self.最新价
         )
         
         # 初始化时使用全局参数初始化各模块
@@ -197,9 +260,33 @@ class 大象策略(CtaTemplate):
             卖单价差阈值=self.参数管理.获取参数("global", "大象识别", "卖单价差阈值", 卖单价差阈值),
             跳过买一价=self.参数管理.获取参数("global", "大象识别", "跳过买一价", 跳过买一价),
             远距大象委托量倍数=self.参数管理.获取参数("global", "大象识别", "远距大象委托量倍数", 远距大象委托量倍数),
-            价差分界点=self.参数管理.获取参数("global", "大象识别", "价差分界点", 价差分界点)
+            价差分界点=self.参数管理.获取参数("global", "大象识别", "价差分界点", 价差分界点),
+            单笔委托金额阈值=self.参数管理.获取参数("global", "大象识别", "单笔委托金额阈值", 单笔委托金额阈值)
+        )
+        
+        # 持仓期间逐笔监视大象所在价格档，大象消失时立即止损或买回
+        self.大象监控 = 大象消失监控器(
+            消失比例=self.参数管理.获取参数("global", "大象识别", "大象消失比例", 大象消失比例)
+        )
+        # 有进行中交易的品种的最新盘口，撤单确认后按最新盘口发送止损单
+        self._最新盘口 = {}
+        # 各品种上一次完整检测的盘口 {股票代码: (指纹, 参数版本, 买盘, 卖盘)}，相同盘口跳过重复检测
+        self._盘口指纹 = {}
+        
+        # 行情到整数盘口的转换，档位数和委托笔数取决于行情源(五档或Level-2)
+        self.盘口适配 = 盘口适配器(
+            档位数=int(self.参数管理.获取参数("global", "大象识别", "盘口档位数", 盘口档位数)),
+            读取委托笔数=self.参数管理.获取参数("global", "大象识别", "读取委托笔数", 读取委托笔数)
         )
         
+        # 相邻盘口的增量事件(新增、成交减少、撤单减少、补单增加、价格移动)，识别器和消失监控订阅；
+        # 只有跟踪中大象或监控中大象的品种生成事件，其余品种只保存盘口
+        self.盘口增量 = 盘口增量引擎(档位数=self.盘口适配.档位数)
+        self.盘口增量.订阅(self.大象识别.处理盘口事件, 关注=self.大象识别.有跟踪)
+        self.盘口增量.订阅(self.大象监控.处理盘口事件, 关注=self.大象监控.__contains__)
+        
+        阶段开始 = self._记录启动耗时("大象识别器", 阶段开始)
+        
         # 先初始化风险控制器
         self.风险控制 = 风险控制器(
             单笔最大亏损比例=self.参数管理.获取参数("global", "风险控制", "单笔最大亏损比例", 单笔最大亏损比例),
@@ -224,18 +311,72 @@ class 大象策略(CtaTemplate):
             最小止损点数=self.参数管理.获取参数("global", "交易执行", "最小止损点数", 最小止损点数)
         )
         
-        # 初始化网页管理器
+        # 品种信息表（交易所、vt_symbol、最小变动价位、每手数量、涨跌停价），on_init 中加载
+        self.品种表 = 品种信息表(
+            默认最小变动价位=self.参数管理.获取参数("global", "交易执行", "价格偏移量", 价格偏移量)
+        )
+        self.交易执行.品种表 = self.品种表
+        self.大象识别.品种表 = self.品种表
+        
+        阶段开始 = self._记录启动耗时("交易模块", 阶段开始)
+        
+        # 初始化网页管理器，只在启用时导入Flask相关依赖
         self.网页管理 = None
         if 启用Web管理:
+            from modules.网页管理 import 网页管理器
             self.网页管理 = 网页管理器(
                 端口=Web端口,
                 自动打开浏览器=(Web用户名 != ""),  # 如果有用户名则自动打开浏览器
                 参数管理器=self.参数管理  # 传入参数管理器
             )
         
+            阶段开始 = self._记录启动耗时("网页管理", 阶段开始)
+        
         # 初始化测试管理器
         self.测试管理器 = None
         
+        # 初始化延迟统计器（行情到下单各阶段耗时）
+        self.延迟统计 = 延迟统计器(启用=启用延迟统计)
+        
+        # 行情突发时每个品种只处理最新一笔，vnpy事件队列有积压时合并中间行情；
+        # 有进行中交易周期的品种不合并，止损和平仓始终看到最新盘口
+        self.行情合并 = 行情合并器(
+            最大等待毫秒=行情最大等待毫秒,
+            积压探测=事件队列积压探测(getattr(self.cta_engine, "event_engine", None)) if 启用行情合并 else None,
+            活跃判断=lambda 股票代码: self.交易状态.get(股票代码, {}).get("状态", "空闲") != "空闲"
+        )
+        
+        # 委托和撤单按令牌桶限流，超出的按优先级排队，止损和平仓先于新开仓发送
+        self.委托限流 = 委托限流器(
+            委托每秒=self.参数管理.获取参数("global", "交易执行", "委托每秒限制", 委托每秒限制),
+            撤单每秒=self.参数管理.获取参数("global", "交易执行", "撤单每秒限制", 撤单每秒限制),
+            单品种委托每秒=self.参数管理.获取参数("global", "交易执行", "单品种委托每秒限制", 单品种委托每秒限制)
+        )
+        
+        # 日内亏损超限、策略停止或网页触发时分批撤销全部活跃订单并跟踪确认，触发后不再发送新委托
+        # 紧急撤单自行分批控制撤单速率，不经过委托限流器
+        self.紧急撤单 = 紧急撤单器(
+            撤单函数=self.cancel_order,
+            批量大小=self.参数管理.获取参数("global", "交易执行", "紧急撤单批量", 紧急撤单批量),
+            确认超时毫秒=self.参数管理.获取参数("global", "交易执行", "紧急撤单确认超时毫秒", 紧急撤单确认超时毫秒)
+        )
+        self.停止撤单等待秒 = 停止撤单等待秒
+        self.交易执行.紧急撤单 = self.紧急撤单
+        
+        # 网页线程请求的紧急撤单原因，由策略线程在下一次行情、回报或定时事件中取出执行
+        self._紧急撤单请求 = deque()
+        
+        # 配置监视线程热加载的参数变更，由策略线程在下一次行情或定时事件中应用
+        self._参数变更请求 = deque()
+        
+        # 账户和持仓由vnpy账户、持仓事件和本策略成交增量维护，不再定时查询全量
+        self.账户状态 = 账户状态(价格表=self.最新价)
+        self.对账间隔秒 = self.参数管理.获取参数("global", "交易执行", "对账间隔秒", 对账间隔秒)
+        
+        # 初始化运行指标
+        self.指标 = 指标注册表(前缀="elephant_")
+        self._注册指标()
+        
         # 行情订阅标志
         self.已订阅股票 = set()
         
@@ -251,6 +392,28 @@ class 大象策略(CtaTemplate):
         os.makedirs(self.日志路径, exist_ok=True)
         os.makedirs(self.数据路径, exist_ok=True)
         
+        # 定期把交易状态、持仓、风控和冷却期写成二进制快照，进程异常退出后在 on_init 中恢复
+        self.状态快照 = 状态快照器(
+            f"{self.数据路径}状态快照.bin",
+            间隔秒=self.参数管理.获取参数("global", "交易执行", "快照间隔秒", 快照间隔秒)
+        )
+        self.状态快照.注册("交易状态", lambda: self.交易状态, self._恢复交易状态)
+        self.状态快照.注册("资金管理", self.资金管理.导出状态, self.资金管理.恢复状态)
+        self.状态快照.注册("风险控制", self.风险控制.导出状态, self.风险控制.恢复状态)
+        self.状态快照.注册("交易执行", self.交易执行.导出状态, self.交易执行.恢复状态)
+        self.指标.注册写入队列("状态快照", lambda: self.状态快照.待写入数)
+        
+        # 交易状态的每次变化追加到状态日志，恢复时在快照之上回放快照之后的记录
+        self.状态日志 = 状态日志器(
+            f"{self.数据路径}状态日志",
+            提交间隔毫秒=self.参数管理.获取参数("global", "交易执行", "状态日志提交间隔毫秒", 状态日志提交间隔毫秒)
+        )
+        # 每次保存快照时状态日志换新分段，快照写入磁盘后删除已包含在快照中的分段
+        self.状态快照.注册头部("状态日志序号", self.状态日志.轮换)
+        self.状态快照.注册写入完成(lambda 附加: self.状态日志.清理(附加.get("状态日志序号", 0)))
+        self.指标.注册写入队列("状态日志", lambda: self.状态日志.待写入数)
+        self._待核对恢复订单 = False
+        
         # 保存参数
         self.股票列表 = 股票列表 or []
         self.交易周期 = 交易周期
@@ -263,81 +426,199 @@ class 大象策略(CtaTemplate):
         # 初始化交易日志
         if self.启用详细交易日志:
             self._初始化交易日志文件()
+        self._记录启动耗时("其他初始化", 阶段开始)
     
     def on_init(self):
         """策略初始化完成"""
+        阶段开始 = time.perf_counter()
         self.write_log("策略初始化完成")
         self.策略状态 = "就绪"
         self.上次检查时间 = datetime.now()
         
         # 加载交易股票列表
         self._加载交易股票()
+        阶段开始 = self._记录启动耗时("加载股票", 阶段开始)
+        
+        # 建立品种信息表
+        self._加载品种信息()
+        阶段开始 = self._记录启动耗时("品种信息", 阶段开始)
+        
+        # 恢复上次退出前的状态快照，恢复的订单在 on_start 中与网关核对
+        self._恢复状态快照()
+        阶段开始 = self._记录启动耗时("恢复状态", 阶段开始)
         
         # 订阅行情
         self._订阅股票行情()
+        阶段开始 = self._记录启动耗时("订阅行情", 阶段开始)
+        
+        # 配置文件变化后在后台线程重新加载参数，新增股票增量订阅
+        if self.启用参数热加载:
+            self.参数管理.添加变更监听(self._处理参数变更)
+            self.参数管理.启动热加载()
         
         # 启动网页管理器
         if self.网页管理:
             self.网页管理.连接策略(self)
             self.网页管理.启动()
             self.write_log(f"网页管理服务已启动，端口:{self.网页管理.端口}")
+            self._记录启动耗时("启动网页管理", 阶段开始)
+        
+        self._输出启动报告()
+    
+    def _记录启动耗时(self, 阶段: str, 开始时间: float) -> float:
+        """
+        记录一个启动阶段的耗时
+        
+        参数:
+            阶段: 阶段名称
+            开始时间: 阶段开始的 perf_counter 时间
+            
+        返回:
+            当前 perf_counter 时间，作为下一阶段的开始时间
+        """
+        现在 = time.perf_counter()
+        self.启动耗时[阶段] = 现在 - 开始时间
+        return 现在
+    
+    def _输出启动报告(self):
+        """输出启动耗时报告"""
+        合计 = sum(self.启动耗时.values())
+        明细 = ", ".join(f"{阶段} {耗时 * 1000:.1f}ms" for 阶段, 耗时 in self.启动耗时.items())
+        self.write_log(f"启动耗时 {合计 * 1000:.1f}ms: {明细}")
     
     def on_start(self):
         """策略启动"""
         self.write_log("策略启动")
         self.策略状态 = "运行中"
         
-        # 更新账户信息
+        # 上次停止时触发的紧急撤单复位后才能下单
+        self.复位紧急撤单()
+        
+        # 订阅账户、持仓和定时事件，先同步对账一次作为初始状态，之后由后台线程低频对账
         try:
+            self._注册账户事件()
+            self.账户状态.对账(self._获取账户快照)
             self._更新账户信息()
+            self.账户状态.启动对账(self._获取账户快照, self.对账间隔秒)
         except Exception as e:
             self.write_log(f"更新账户信息失败: {e}")
         
+        # 启动状态日志后台提交，核对订单引起的变化也写入日志
+        self.状态日志.启动()
+        
+        # 恢复的交易状态与网关的活跃订单核对
+        if self._待核对恢复订单:
+            try:
+                self._核对恢复订单()
+            except Exception as e:
+                self.write_log(f"核对恢复订单失败: {e}")
+            self._待核对恢复订单 = False
+        
         # 检查未完成订单
         try:
             self._检查未完成订单()
         except Exception as e:
             self.write_log(f"检查未完成订单失败: {e}")
+        
+        # 启动状态快照后台写入
+        self.状态快照.启动()
     
     def on_stop(self):
         """策略停止"""
         self.write_log("策略停止")
         self.策略状态 = "已停止"
         
-        # 取消所有活跃订单
+        # 先处理尚未处理的行情，由此发出的委托随后一并撤销
+        self.行情合并.处理(self._处理行情, 全部=True)
+        
+        # 撤销所有活跃订单并等待撤单确认
         self._取消所有活跃订单()
+        self.write_log(f"委托限流统计: {self.委托限流.导出()['统计']}")
+        
+        # 停止对账线程并注销账户事件
+        self.账户状态.停止对账()
+        self._注销账户事件()
+        self.write_log(f"账户状态: {self.账户状态.导出()}")
+        
+        # 丢弃撤单等待期间到达的行情
+        self.行情合并.清空()
+        self.write_log(f"行情合并统计: {self.行情合并.导出()}")
+        
+        # 保存风控日志、资金统计和延迟统计
+        try:
+            self._保存交易记录()
+        except Exception as e:
+            self.write_log(f"保存交易记录失败: {e}")
+        
+        # 提交状态日志，写入最终状态快照并停止后台写入
+        self.状态日志.停止()
+        self.write_log(f"状态日志统计: {self.状态日志.导出()}")
+        self.状态快照.保存(强制=True)
+        self.状态快照.停止()
+        self.write_log(f"状态快照统计: {self.状态快照.导出()}")
+        
+        # 停止参数热加载，写回尚未落盘的参数修改
+        self.参数管理.关闭()
         
         # 关闭网页管理器
         if self.网页管理:
-            self.网页管理.关闭()
+            self.网页管理.停止()
     
     def on_tick(self, tick: TickData):
         """
-        收到行情Tick推送
+        收到行情Tick推送，放入行情合并器后按轮转顺序处理等待中的品种，再发送令牌已补充的排队委托
         """
-        # 提取股票代码
-        股票代码 = tick.symbol
+        self._处理紧急撤单请求()
+        self._应用参数变更()
+        self.延迟统计.收到(tick.symbol)
+        self.行情合并.放入(tick.symbol, tick)
+        self.行情合并.处理(self._处理行情)
+        self.委托限流.处理()
+        self.紧急撤单.推进()
+        if self.状态快照.到期():
+            self.状态快照.保存()
+    
+    def _处理行情(self, 股票代码: str, tick: TickData):
+        """
+        处理一个品种的最新行情
+        
+        参数:
+            股票代码: 股票代码
+            tick: 合并后该品种的最新行情
+        """
+        self.延迟统计.开始(股票代码)
+        self._行情计数.标签(股票代码).值 += 1
         
         # 记录最新价格
         self._更新最新价格(股票代码, tick.last_price)
         
-        # 处理盘口数据
-        盘口数据 = {
-            "时间戳": int(tick.datetime.timestamp() * 1000),
-            "买盘": [(tick.bid_price_1, tick.bid_volume_1),
-                   (tick.bid_price_2, tick.bid_volume_2),
-                   (tick.bid_price_3, tick.bid_volume_3),
-                   (tick.bid_price_4, tick.bid_volume_4),
-                   (tick.bid_price_5, tick.bid_volume_5)],
-            "卖盘": [(tick.ask_price_1, tick.ask_volume_1),
-                   (tick.ask_price_2, tick.ask_volume_2),
-                   (tick.ask_price_3, tick.ask_volume_3),
-                   (tick.ask_price_4, tick.ask_volume_4),
-                   (tick.ask_price_5, tick.ask_volume_5)],
-            "最新价": tick.last_price
-        }
+        # 更新当日涨跌停价，行情没有涨跌停价时按昨收估算
+        品种 = self.品种表.获取(股票代码)
+        if tick.limit_up != 品种.涨停价:
+            if tick.limit_up:
+                品种.涨停价 = tick.limit_up
+                品种.跌停价 = tick.limit_down
+            elif not 品种.涨停价:
+                self.品种表.按昨收估算涨跌停(股票代码, tick.pre_close)
+        
+        # 处理盘口数据，价格换算为整数价格档，数量换算为整数
+        盘口数据 = self.盘口适配.转换(tick, 品种)
+        self.盘口增量.更新(股票代码, 盘口数据["时间戳"], 盘口数据["买盘"], 盘口数据["卖盘"],
+                       盘口数据["最新价"], int(tick.volume))
+        self.延迟统计.打点(阶段_盘口构建)
+        
+        # 有进行中的交易时先检查大象是否消失，只看登记的价格档
+        if 股票代码 in self.交易状态:
+            self._最新盘口[股票代码] = 盘口数据
+            消失原因 = self.大象监控.检查(股票代码, 盘口数据)
+            if 消失原因:
+                self._处理大象消失(股票代码, 盘口数据, 消失原因)
+                self.状态日志.记录(股票代码, "大象消失", self.交易状态.get(股票代码))
         
-        self._处理盘口数据(股票代码, 盘口数据, tick.datetime)
+        try:
+            self._处理盘口数据(股票代码, 盘口数据, tick.datetime)
+        finally:
+            self.延迟统计.结束()
     
     def on_bar(self, bar: BarData):
         """
@@ -353,8 +634,27 @@ class 大象策略(CtaTemplate):
         """
         收到委托变化推送
         """
+        self._处理紧急撤单请求()
+        
         # 更新订单状态
         self.交易执行.更新订单状态(order)
+        
+        # 推进交易状态
+        self._处理订单完成(order)
+        self.状态日志.记录(order.symbol, "订单回报", self.交易状态.get(order.symbol))
+        
+        # 统计订单终态
+        订单计数 = self._订单终态计数.get(order.status)
+        if 订单计数:
+            订单计数.值 += 1
+        
+        # 紧急撤单期间委托到达终态即确认
+        if not order.is_active():
+            self.紧急撤单.确认(order.vt_orderid)
+        self.紧急撤单.推进()
+        
+        # 发送令牌已补充的排队委托
+        self.委托限流.处理()
     
     def on_trade(self, trade: TradeData):
         """
@@ -366,6 +666,9 @@ class 大象策略(CtaTemplate):
         # 更新资金管理
         是买入 = trade.direction == Direction.LONG
         self.资金管理.更新持仓(trade.symbol, trade.volume, trade.price, 是买入)
+        self.账户状态.记录成交(trade.symbol, trade.volume, trade.price, 是买入)
+        if self.状态快照.到期():
+            self.状态快照.保存()
         
         # 日志记录
         方向 = "买入" if 是买入 else "卖出"
@@ -373,8 +676,15 @@ class 大象策略(CtaTemplate):
     
     def on_timer(self, interval: int):
         """
-        定时器回调函数
+        定时器回调函数，由vnpy定时事件每秒调用
         """
+        self._处理紧急撤单请求()
+        self._应用参数变更()
+        
+        # 行情停止推送时，合并器中等待的品种由定时器处理
+        self.行情合并.处理(self._处理行情)
+        self.委托限流.处理()
+        
         # 每隔一段时间执行一次
         当前时间 = datetime.now()
         if self.上次检查时间:
@@ -382,7 +692,7 @@ class 大象策略(CtaTemplate):
             
             # 交易时间内每隔交易周期检查一次
             if 间隔秒数 >= self.交易周期 and self.是否交易时间(当前时间):
-                # 更新账户信息
+                # 同步事件维护的账户信息
                 self._更新账户信息()
                 
                 # 检查订单超时
@@ -391,6 +701,273 @@ class 大象策略(CtaTemplate):
                 # 更新上次检查时间
                 self.上次检查时间 = 当前时间
     
+    def _注册指标(self):
+        """注册策略运行指标，行情路径上只做缓存对象的整数自增"""
+        self._行情计数 = self.指标.计数器("ticks_total", "处理的行情Tick数", ("symbol",))
+        self._重复盘口计数 = self.指标.计数器("ticks_unchanged_total", "盘口未变化、跳过重复检测的行情数").标签()
+        
+        订单计数 = self.指标.计数器("orders_total", "订单数，按发送和终态统计", ("status",))
+        self._订单发送计数 = 订单计数.标签("sent")
+        self._订单终态计数 = {
+            Status.ALLTRADED: 订单计数.标签("filled"),
+            Status.CANCELLED: 订单计数.标签("cancelled"),
+            Status.REJECTED: 订单计数.标签("rejected")
+        }
+        
+        self.指标.回调指标(
+            "elephant_events_total", "大象候选、确认信号和消失次数",
+            lambda: {
+                (方向, 事件): 次数
+                for 方向, 统计 in self.大象识别.事件统计.items()
+                for 事件, 次数 in 统计.items()
+            },
+            ("side", "event"), 类型="counter"
+        )
+        
+        def 统计活跃周期():
+            统计 = {}
+            for 状态 in list(self.交易状态.values()):
+                名称 = 状态.get("状态", "未知")
+                if 名称 != "空闲":
+                    统计[(名称,)] = 统计.get((名称,), 0) + 1
+            return 统计
+        self.指标.回调指标("active_cycles", "交易状态中未结束的交易周期数", 统计活跃周期, ("state",))
+        
+        self.指标.回调指标("risk_daily_pnl", "风控日内总盈亏", lambda: self.风险控制.日内总盈亏)
+        self.指标.回调指标("risk_daily_trades", "风控日内总交易次数", lambda: self.风险控制.日内总交易次数)
+        self.指标.回调指标("risk_consecutive_losses", "风控连续亏损次数", lambda: self.风险控制.连续亏损次数)
+        self.指标.回调指标(
+            "risk_symbol_pnl", "风控单股日内盈亏",
+            lambda: dict(self.风险控制.股票盈亏), ("symbol",)
+        )
+        self.指标.回调指标(
+            "risk_symbol_trades", "风控单股日内交易次数",
+            lambda: dict(self.风险控制.股票交易次数), ("symbol",)
+        )
+        
+        def 统计阶段延迟():
+            统计 = {}
+            for 阶段, 结果 in self.延迟统计.导出(包含品种=False)["阶段"].items():
+                for 分位 in ("p50", "p99"):
+                    统计[(阶段, 分位)] = 结果[f"{分位}微秒"]
+            return 统计
+        self.指标.回调指标("stage_latency_microseconds", "行情处理各阶段延迟分位数(微秒)", 统计阶段延迟, ("stage", "quantile"))
+        
+        self.指标.回调指标(
+            "ticks_conflated_total", "行情合并时被覆盖的中间行情数",
+            lambda: {(股票代码,): 数量 for 股票代码, 数量 in list(self.行情合并.合并丢弃.items())},
+            ("symbol",), 类型="counter"
+        )
+        self.指标.回调指标("tick_queue_depth", "等待处理的品种数", lambda: len(self.行情合并))
+        
+        self.指标.回调指标(
+            "orders_queued", "委托限流队列中等待发送的请求数",
+            lambda: {("order",): self.委托限流.排队数(), ("cancel",): self.委托限流.排队数(撤单=True)},
+            ("kind",)
+        )
+        self.指标.回调指标(
+            "orders_throttled_total", "因限流进入排队的请求数",
+            lambda: {("order",): self.委托限流.统计["委托排队"], ("cancel",): self.委托限流.统计["撤单排队"]},
+            ("kind",), 类型="counter"
+        )
+        
+        def 统计排队延迟():
+            统计 = {}
+            for 类型, 直方图 in (("order", self.委托限流.委托排队延迟), ("cancel", self.委托限流.撤单排队延迟)):
+                结果 = 直方图.导出()
+                for 分位 in ("p50", "p99"):
+                    统计[(类型, 分位)] = 结果[f"{分位}微秒"]
+            return 统计
+        self.指标.回调指标("order_queue_delay_microseconds", "委托和撤单在限流队列中的等待时间分位数(微秒)",
+                       统计排队延迟, ("kind", "quantile"))
+        
+        self.指标.回调指标("kill_switch_active", "紧急撤单是否已触发", lambda: int(self.紧急撤单.已触发))
+        self.指标.回调指标(
+            "kill_switch_pending", "紧急撤单等待确认的订单数",
+            lambda: (self.紧急撤单.获取报告() or {}).get("等待确认", 0)
+        )
+        self.指标.回调指标(
+            "kill_switch_time_to_flat_milliseconds", "最近一次紧急撤单从触发到全部确认的耗时(毫秒)",
+            lambda: self.紧急撤单.最近清空耗时毫秒 or 0
+        )
+        
+        self.指标.回调指标("positions_market_value", "持仓按最新价计算的市值", lambda: self.账户状态.持仓市值)
+        self.指标.回调指标("strategy_exposure", "策略持仓按最新价计算的市值", lambda: self.资金管理.持仓市值)
+        self.指标.回调指标("strategy_unrealized_pnl", "策略持仓按最新价计算的浮动盈亏", lambda: self.资金管理.浮动盈亏)
+        self.指标.回调指标(
+            "account_reconcile_total", "账户对账次数和修正的差异数",
+            lambda: {("reconcile",): self.账户状态.统计["对账"], ("correction",): self.账户状态.统计["修正"]},
+            ("kind",), 类型="counter"
+        )
+        self.指标.回调指标(
+            "state_log_records_total", "状态日志追加的记录数和提交的批次数",
+            lambda: {("record",): self.状态日志.统计["记录"], ("batch",): self.状态日志.统计["批次"]},
+            ("kind",), 类型="counter"
+        )
+        self.指标.回调指标("state_log_commit_milliseconds", "最近一批状态日志的写入和同步耗时(毫秒)",
+                        lambda: self.状态日志.最近提交耗时毫秒)
+        self.指标.回调指标("state_snapshot_bytes", "最近一次写入的状态快照字节数", lambda: self.状态快照.最近写入字节)
+        self.指标.回调指标(
+            "state_snapshot_milliseconds", "最近一次状态快照的导出和写入耗时(毫秒)",
+            lambda: {
+                ("save",): self.状态快照.最近保存耗时毫秒,
+                ("write",): self.状态快照.最近写入耗时毫秒
+            },
+            ("stage",)
+        )
+        self.指标.回调指标(
+            "state_snapshot_total", "状态快照保存次数，按结果统计",
+            lambda: {
+                (标签,): self.状态快照.统计[结果]
+                for 结果, 标签 in (("保存", "save"), ("未变化", "unchanged"), ("写入", "written"),
+                                   ("覆盖", "superseded"), ("写入失败", "failed"))
+            },
+            ("result",), 类型="counter"
+        )
+    
+    def _下单(self, vt_symbol: str, 方向: Direction, 价格: float, 数量: int) -> Optional[str]:
+        """
+        为指定品种发送委托
+        
+        CtaTemplate 的 buy/sell 按 self.vt_symbol 下单，多品种策略下单时临时切换 vt_symbol。
+        
+        参数:
+            vt_symbol: 品种的vt_symbol
+            方向: Direction.LONG 买入，Direction.SHORT 卖出
+            价格: 委托价格
+            数量: 委托数量
+            
+        返回:
+            委托号，发送失败时返回None
+        """
+        原品种 = self.vt_symbol
+        self.vt_symbol = vt_symbol
+        try:
+            委托号列表 = self.buy(价格, 数量) if 方向 == Direction.LONG else self.sell(价格, 数量)
+        finally:
+            self.vt_symbol = 原品种
+        if not 委托号列表:
+            return None
+        self._订单发送计数.值 += 1
+        return 委托号列表[0]
+    
+    def _发送委托(self, 股票代码: str, 方向: Direction, 价格: float, 数量: int, 优先级: int,
+              订单键: str, 失败状态: str = None) -> Optional[str]:
+        """
+        经委托限流器发送委托
+        
+        限流时委托进入队列，返回的排队编号先作为订单ID记入交易状态，发出后替换为实际委托号；
+        排队期间交易状态被清理时 _清理交易状态 会撤销该品种排队中的委托。
+        
+        参数:
+            股票代码: 股票代码
+            方向: Direction.LONG 买入，Direction.SHORT 卖出
+            价格: 委托价格
+            数量: 委托数量
+            优先级: 优先级_止损、优先级_平仓 或 优先级_开仓
+            订单键: 交易状态中记录订单ID的键，"买入订单ID"或"卖出订单ID"
+            失败状态: 排队后发送失败时恢复的交易状态，为None时清理交易状态
+            
+        返回:
+            委托号或排队编号，当场发送失败时返回None
+        """
+        if self.紧急撤单.已触发:
+            self.write_log(f"紧急撤单已触发，不再发送委托: {股票代码}")
+            return None
+        vt_symbol = self.品种表.获取(股票代码).vt_symbol
+        
+        def 排队发出(委托号):
+            交易状态 = self.交易状态.get(股票代码)
+            if 交易状态 is None or 交易状态.get(订单键) != 订单ID:
+                return
+            if 委托号:
+                交易状态[订单键] = 委托号
+            elif 失败状态:
+                self.write_log(f"排队委托发送失败: {股票代码}，恢复为{失败状态}")
+                交易状态["状态"] = 失败状态
+            else:
+                self.write_log(f"排队委托发送失败: {股票代码}")
+                self._清理交易状态(股票代码)
+            self.状态日志.记录(股票代码, "委托发出", self.交易状态.get(股票代码))
+        
+        订单ID = self.委托限流.提交委托(
+            股票代码, 优先级, lambda: self._下单(vt_symbol, 方向, 价格, 数量), 排队发出
+        )
+        return 订单ID
+    
+    def _撤单(self, 股票代码: str, vt_orderid: str, 优先级: int = 优先级_止损):
+        """
+        经委托限流器撤单
+        
+        参数:
+            股票代码: 股票代码
+            vt_orderid: 委托号
+            优先级: 撤单优先级
+        """
+        self.委托限流.提交撤单(股票代码, 优先级, lambda: self.cancel_order(vt_orderid))
+    
+    def 触发紧急撤单(self, 原因: str) -> List[str]:
+        """
+        触发紧急撤单：丢弃限流队列中的委托，分批撤销全部活跃订单，复位前不再发送新委托
+        
+        参数:
+            原因: 触发原因
+            
+        返回:
+            本次加入撤单的委托号列表
+        """
+        if self.委托限流.清空委托():
+            # 丢弃的排队委托没有送达网关，等待这些委托的交易状态退回发单之前
+            for 股票代码, 交易状态 in list(self.交易状态.items()):
+                订单键 = self._等待订单键.get(交易状态.get("状态"))
+                if 订单键 and str(交易状态.get(订单键, "")).startswith("排队."):
+                    self._退回发单前状态(股票代码, 交易状态)
+                    self.状态日志.记录(股票代码, "紧急撤单", self.交易状态.get(股票代码))
+        活跃订单 = {}
+        if self.cta_engine and getattr(self.cta_engine, "main_engine", None):
+            活跃订单 = {
+                order.vt_orderid: order.symbol
+                for order in self.cta_engine.main_engine.get_all_active_orders()
+            }
+        else:
+            self.write_log("CTA引擎未初始化，无法获取活跃订单")
+        self.write_log(f"触发紧急撤单({原因})，撤销{len(活跃订单)}个活跃订单")
+        return self.紧急撤单.触发(原因, 活跃订单)
+    
+    def 请求紧急撤单(self, 原因: str):
+        """
+        从其他线程(如网页管理)请求紧急撤单
+        
+        限流队列和交易状态只在策略线程中访问，请求先记录下来，
+        由策略线程在下一次 on_tick、on_order 或 on_timer 中调用 触发紧急撤单。
+        
+        参数:
+            原因: 触发原因
+        """
+        self._紧急撤单请求.append(原因)
+    
+    def _处理紧急撤单请求(self):
+        """在策略线程中执行其他线程请求的紧急撤单"""
+        while self._紧急撤单请求:
+            self.触发紧急撤单(self._紧急撤单请求.popleft())
+    
+    def 复位紧急撤单(self) -> Optional[Dict]:
+        """
+        复位紧急撤单，恢复发送委托
+        
+        返回:
+            复位前的紧急撤单报告，未触发时返回None
+        """
+        报告 = self.紧急撤单.复位()
+        if 报告:
+            self.write_log(f"紧急撤单已复位: {报告}")
+        return 报告
+    
+    def _检查日内亏损(self):
+        """日内总亏损超限时触发紧急撤单"""
+        if not self.紧急撤单.已触发 and self.风险控制.检查日内亏损超限():
+            self.触发紧急撤单("日内总亏损超限")
+    
     def _加载交易股票(self):
         """加载要交易的股票列表"""
         try:
@@ -453,8 +1030,7 @@ class 大象策略(CtaTemplate):
         for 股票代码 in self.交易股票列表:
             if 股票代码 not in self.已订阅股票:
                 try:
-                    交易所 = self._判断交易所(股票代码)
-                    vt_symbol = f"{股票代码}.{交易所.value}"
+                    vt_symbol = self.品种表.获取(股票代码).vt_symbol
                     
                     self.cta_engine.subscribe(vt_symbol)
                     self.已订阅股票.add(股票代码)
@@ -462,6 +1038,57 @@ class 大象策略(CtaTemplate):
                 except Exception as e:
                     self.write_log(f"订阅行情失败 {股票代码}: {e}")
     
+    def _加载品种信息(self):
+        """
+        建立品种信息表：优先使用vnpy合约数据，并保存到本地文件；取不到合约时读取本地文件
+        """
+        文件路径 = os.path.join(self.参数管理.配置目录, "symbols.json")
+        
+        合约列表 = []
+        if self.cta_engine and getattr(self.cta_engine, "main_engine", None):
+            try:
+                合约列表 = self.cta_engine.main_engine.get_all_contracts()
+            except Exception as e:
+                self.write_log(f"获取合约数据失败: {e}")
+        
+        if 合约列表 and self.品种表.从合约加载(合约列表):
+            try:
+                self.品种表.保存到文件(文件路径)
+            except Exception as e:
+                self.write_log(f"保存品种信息文件失败: {e}")
+        elif not self.品种表.从文件加载(文件路径):
+            self.write_log("没有合约数据和品种信息文件，按股票代码规则推断品种信息")
+        
+        # 交易股票预先登记，行情和下单路径上只做查表
+        for 股票代码 in self.交易股票列表:
+            self.品种表.获取(股票代码)
+        self.write_log(f"品种信息表共{len(self.品种表)}个品种")
+    
+    def _处理参数变更(self, 变更: Dict):
+        """
+        参数热加载后的回调，在配置监视线程中执行
+        
+        交易股票列表、品种表和行情订阅由策略线程读写，这里只记录变更，
+        由策略线程在下一次 on_tick 或 on_timer 中调用 _应用参数变更。
+        
+        参数:
+            变更: 参数管理器给出的变更信息
+        """
+        self._参数变更请求.append(变更)
+    
+    def _应用参数变更(self):
+        """在策略线程中应用热加载的参数变更：更新交易股票列表，新增股票增量订阅行情"""
+        while self._参数变更请求:
+            变更 = self._参数变更请求.popleft()
+            if 变更["新增股票"] or 变更["移除股票"]:
+                self.交易股票列表 = self.参数管理.获取股票列表()
+                if 变更["新增股票"]:
+                    self._订阅股票行情()
+            
+            self.write_log(
+                f"参数已热加载，版本:{变更['版本']} 新增股票:{变更['新增股票']} 移除股票:{变更['移除股票']}"
+            )
+    
     def _判断交易所(self, 股票代码: str) -> Exchange:
         """
         根据股票代码判断交易所
@@ -472,46 +1099,116 @@ class 大象策略(CtaTemplate):
         返回:
             交易所: Exchange.SSE或Exchange.SZSE
         """
-        if 股票代码.startswith("6") or 股票代码.startswith("5"):
-            return Exchange.SSE  # 上海交易所
-        else:
-            return Exchange.SZSE  # 深圳交易所
+        return self.品种表.获取(股票代码).交易所
+    
+    def 是否交易时间(self, 当前时间: datetime = None) -> bool:
+        """
+        判断是否处于A股连续竞价交易时段
+        
+        参数:
+            当前时间: 当前时间，默认为系统时间
+            
+        返回:
+            是否为交易时间
+        """
+        if 当前时间 is None:
+            当前时间 = datetime.now()
+        
+        if 当前时间.weekday() >= 5:
+            return False
+        
+        时分 = 当前时间.hour * 100 + 当前时间.minute
+        return 930 <= 时分 < 1130 or 1300 <= 时分 < 1500
     
     def _更新账户信息(self):
-        """更新账户资产信息"""
-        if not self.cta_engine:
-            self.write_log("CTA引擎未初始化，无法更新账户信息")
+        """将事件维护的总资产和持仓市值同步到资金管理和风险控制，不查询主引擎"""
+        总资产 = self.账户状态.总资产
+        持仓市值 = self.账户状态.持仓市值
+        self.资金管理.更新资产状态(总资产, 持仓市值)
+        self.风险控制.更新总资产(总资产)
+        self.write_log(f"账户信息更新: 总资产 {总资产:.2f}, 持仓市值 {持仓市值:.2f}")
+    
+    def _同步资金(self):
+        """账户或持仓事件后同步资金管理和风险控制的总资产"""
+        总资产 = self.账户状态.总资产
+        self.资金管理.更新资产状态(总资产, self.账户状态.持仓市值)
+        self.风险控制.更新总资产(总资产)
+    
+    def _事件引擎(self):
+        """获取CTA引擎的事件引擎，测试和回测时可能不存在"""
+        return getattr(self.cta_engine, "event_engine", None) if self.cta_engine else None
+    
+    def _注册账户事件(self):
+        """订阅vnpy账户、持仓和定时事件"""
+        事件引擎 = self._事件引擎()
+        if 事件引擎 is None or not hasattr(事件引擎, "register"):
             return
-            
-        if not hasattr(self.cta_engine, "main_engine") or not self.cta_engine.main_engine:
-            self.write_log("CTA引擎的main_engine未初始化，无法更新账户信息")
+        事件引擎.register(EVENT_ACCOUNT, self._处理账户事件)
+        事件引擎.register(EVENT_POSITION, self._处理持仓事件)
+        事件引擎.register(EVENT_TIMER, self._处理定时事件)
+    
+    def _注销账户事件(self):
+        """注销vnpy账户、持仓和定时事件"""
+        事件引擎 = self._事件引擎()
+        if 事件引擎 is None or not hasattr(事件引擎, "unregister"):
             return
-            
-        try:
-            # 获取账户信息
-            account = self.cta_engine.main_engine.get_account()
-            
-            # 获取持仓信息
-            positions = self.cta_engine.main_engine.get_all_positions()
-            持仓市值 = sum(position.price * position.volume for position in positions)
-            
-            # 更新资金管理模块
-            总资产 = account.balance
-            self.资金管理.更新资产状态(总资产, 持仓市值)
-            
-            # 更新风险控制模块
-            self.风险控制.更新总资产(总资产)
-            
-            # 更新持仓信息
-            for position in positions:
-                if position.volume > 0:
-                    self.资金管理.持仓[position.symbol] = position.volume
-                    self.资金管理.持仓成本[position.symbol] = position.price
-            
-            # 日志记录
-            self.write_log(f"账户信息更新: 总资产 {总资产:.2f}, 持仓市值 {持仓市值:.2f}")
-        except Exception as e:
-            self.write_log(f"更新账户信息出错: {e}")
+        事件引擎.unregister(EVENT_ACCOUNT, self._处理账户事件)
+        事件引擎.unregister(EVENT_POSITION, self._处理持仓事件)
+        事件引擎.unregister(EVENT_TIMER, self._处理定时事件)
+    
+    def _处理定时事件(self, event):
+        """
+        定时事件：CTA引擎不向策略转发定时事件，在事件线程中调用 on_timer
+        
+        参数:
+            event: vnpy定时事件
+        """
+        self.on_timer(1)
+    
+    def _处理账户事件(self, event):
+        """
+        账户事件：覆盖该账户的余额和冻结资金
+        
+        参数:
+            event: vnpy事件，data为AccountData
+        """
+        account = event.data
+        self.账户状态.更新账户(account.vt_accountid, account.balance, account.frozen)
+        self._同步资金()
+    
+    def _处理持仓事件(self, event):
+        """
+        持仓事件：覆盖该品种的持仓数量和成本价，A股只有多头持仓
+        
+        参数:
+            event: vnpy事件，data为PositionData
+        """
+        position = event.data
+        if position.direction == Direction.SHORT:
+            return
+        self.账户状态.更新持仓(position.symbol, position.volume, position.price)
+        self._同步资金()
+    
+    def _获取账户快照(self):
+        """
+        从主引擎获取全量账户和持仓，在对账线程中调用
+        
+        返回:
+            ([(账户号, 余额, 冻结)], [(股票代码, 数量, 成本价)])，主引擎不可用时返回None
+        """
+        main_engine = getattr(self.cta_engine, "main_engine", None) if self.cta_engine else None
+        if not main_engine:
+            return None
+        账户列表 = [
+            (account.vt_accountid, account.balance, account.frozen)
+            for account in main_engine.get_all_accounts()
+        ]
+        持仓 = [
+            (position.symbol, position.volume, position.price)
+            for position in main_engine.get_all_positions()
+            if position.direction != Direction.SHORT
+        ]
+        return 账户列表, 持仓
             
     def _检查未完成订单(self):
         """检查未完成订单，必要时取消"""
@@ -520,28 +1217,148 @@ class 大象策略(CtaTemplate):
             return
             
         try:
-            orders = self.cta_engine.main_engine.get_all_active_orders()
+            # 恢复的交易状态仍在等待的订单不取消
+            跟踪中 = {
+                交易状态.get(订单键)
+                for 交易状态 in self.交易状态.values()
+                for 订单键 in set(self._等待订单键.values())
+            }
+            orders = [order for order in self.cta_engine.main_engine.get_all_active_orders()
+                      if order.vt_orderid not in 跟踪中]
             
             if orders:
                 self.write_log(f"发现{len(orders)}个未完成订单，尝试取消")
                 for order in orders:
-                    self.cancel_order(order.vt_orderid)
+                    self._撤单(order.symbol, order.vt_orderid)
         except Exception as e:
             self.write_log(f"检查未完成订单出错: {e}")
             
-    def _取消所有活跃订单(self):
-        """取消所有活跃订单"""
-        if not self.cta_engine or not hasattr(self.cta_engine, "main_engine") or not self.cta_engine.main_engine:
-            self.write_log("CTA引擎未初始化，无法取消活跃订单")
+    # 止损卖出和紧急买回被撤销或拒绝后重发剩余数量的最多次数
+    止损最大重发次数 = 5
+    
+    # 等待订单回报的状态及其订单号字段
+    _等待订单键 = {
+        "买入中": "买入订单ID",
+        "卖出中": "卖出订单ID",
+        "买回中": "买入订单ID",
+        "紧急买回中": "买入订单ID",
+        "止损中": "卖出订单ID",
+        "止损撤单中": "止损撤单ID"
+    }
+    
+    def _恢复状态快照(self):
+        """
+        读取状态快照恢复交易状态、持仓、风控和冷却期，再回放快照之后的状态日志，
+        有未结束的交易周期时等待 on_start 核对订单
+        """
+        try:
+            结果 = self.状态快照.恢复()
+        except Exception as e:
+            self.write_log(f"恢复状态快照失败: {e}")
+            结果 = None
+        if 结果 is not None:
+            self.write_log(f"已恢复状态快照 #{结果['序号']}: {结果['模块']}，耗时 {结果['耗时毫秒']}ms")
+        
+        起始序号 = 结果["附加"].get("状态日志序号", 0) if 结果 else 0
+        try:
+            回放结果 = self.状态日志.恢复(self.交易状态, 起始序号)
+        except Exception as e:
+            self.write_log(f"回放状态日志失败: {e}")
+            回放结果 = {"记录数": 0}
+        if 回放结果["记录数"]:
+            # 回放改变了交易状态，重新登记大象监控
+            self._恢复交易状态(self.交易状态)
+            self.write_log(f"回放状态日志 {回放结果['记录数']} 条记录，至 #{回放结果['序号']}")
+        
+        if self.交易状态:
+            self.write_log(f"未结束交易周期 {len(self.交易状态)} 个")
+        self._待核对恢复订单 = bool(self.交易状态)
+    
+    def _恢复交易状态(self, 状态: Dict):
+        """
+        恢复交易状态，已建仓的交易周期重新登记大象消失监控
+        
+        参数:
+            状态: 快照中的交易状态
+        """
+        self.交易状态 = 状态
+        for 交易状态 in 状态.values():
+            if 交易状态.get("状态") not in ("持有中", "卖出中", "已卖出待买回", "买回中"):
+                continue
+            大象信息 = 交易状态.get("大象信息", {})
+            成交键 = "卖出成交时间" if 大象信息.get("类型") == "卖单大象" else "买入成交时间"
+            if 成交键 in 交易状态:
+                self.大象监控.登记(大象信息)
+    
+    def _核对恢复订单(self):
+        """
+        恢复的交易状态与网关核对订单
+        
+        订单仍活跃时重新挂到CTA引擎的订单映射上，后续回报照常送达本策略；
+        网关有该订单的终态时按回报推进交易周期；网关查不到(包括停止前仍在限流队列中的订单)时
+        退回到发出该订单之前的状态。
+        """
+        main_engine = getattr(self.cta_engine, "main_engine", None) if self.cta_engine else None
+        if not main_engine:
+            self.write_log("CTA引擎未初始化，无法核对恢复订单")
             return
+        
+        活跃订单 = {order.vt_orderid for order in main_engine.get_all_active_orders()}
+        代码列表 = list(self.交易状态)
+        for 股票代码, 交易状态 in list(self.交易状态.items()):
+            订单键 = self._等待订单键.get(交易状态.get("状态"))
+            if 订单键 is None:
+                if 交易状态.get("状态") not in ("持有中", "已卖出待买回"):
+                    self.write_log(f"恢复的交易周期状态无法继续，清理: {股票代码} {交易状态.get('状态')}")
+                    self._清理交易状态(股票代码)
+                continue
             
-        try:
-            orders = self.cta_engine.main_engine.get_all_active_orders()
+            订单ID = 交易状态.get(订单键)
+            if 订单ID in 活跃订单:
+                if hasattr(self.cta_engine, "orderid_strategy_map"):
+                    self.cta_engine.orderid_strategy_map[订单ID] = self
+                if hasattr(self.cta_engine, "strategy_orderid_map"):
+                    self.cta_engine.strategy_orderid_map.setdefault(self.strategy_name, set()).add(订单ID)
+                self.write_log(f"恢复订单跟踪: {股票代码} {交易状态['状态']} {订单ID}")
+                continue
             
-            if orders:
-                self.write_log(f"取消{len(orders)}个活跃订单")
-                for order in orders:
-                    self.cancel_order(order.vt_orderid)
+            order = main_engine.get_order(订单ID) if 订单ID else None
+            if order is not None and not order.is_active():
+                self.write_log(f"恢复的订单已结束，按回报推进: {股票代码} {订单ID} {order.status}")
+                self._处理订单完成(order)
+                continue
+            
+            self.write_log(f"恢复的订单在网关中不存在，退回发单前状态: {股票代码} {交易状态['状态']} {订单ID}")
+            self._退回发单前状态(股票代码, 交易状态)
+        
+        for 股票代码 in 代码列表:
+            self.状态日志.记录(股票代码, "恢复核对", self.交易状态.get(股票代码))
+    
+    def _退回发单前状态(self, 股票代码: str, 交易状态: Dict):
+        """
+        订单没有送达网关时退回到发单之前的状态
+        
+        参数:
+            股票代码: 股票代码
+            交易状态: 该股票的交易状态
+        """
+        状态 = 交易状态.get("状态")
+        if 状态 == "买入中" or (状态 == "卖出中" and "买入成交时间" not in 交易状态):
+            self._清理交易状态(股票代码)
+        elif 状态 in ("卖出中", "止损中"):
+            交易状态["状态"] = "持有中"
+        elif 状态 in ("买回中", "紧急买回中"):
+            交易状态["状态"] = "已卖出待买回"
+        elif 状态 == "止损撤单中":
+            撤单前状态 = 交易状态.pop("撤单前状态", "卖出中")
+            交易状态["状态"] = "持有中" if 撤单前状态 == "卖出中" else "已卖出待买回"
+    
+    def _取消所有活跃订单(self):
+        """经紧急撤单器取消所有活跃订单，等待撤单确认"""
+        try:
+            self.触发紧急撤单("策略停止")
+            if not self.紧急撤单.等待完成(self.停止撤单等待秒):
+                self.write_log(f"活跃订单未在{self.停止撤单等待秒}秒内全部撤销: {self.紧急撤单.获取报告()}")
         except Exception as e:
             self.write_log(f"取消活跃订单出错: {e}")
     
@@ -561,39 +1378,57 @@ class 大象策略(CtaTemplate):
         if not self.是否交易时间(当前时间):
             return
         
-        # 获取品种特定参数
-        品种参数 = self.参数管理.获取品种所有参数(股票代码)
-        
         # 检查风控状态
         if self.风险控制.检查全局风控():
             self.write_log(f"风控触发，暂停交易 {股票代码}")
             return
         
-        # 更新大象识别器参数为品种特定参数
-        大象识别参数 = {}
-        if "大象识别" in 品种参数:
-            for 参数名, 参数值 in 品种参数["大象识别"].items():
-                大象识别参数[参数名] = 参数值
-                # 设置对象属性
-                if hasattr(self.大象识别, 参数名):
-                    setattr(self.大象识别, 参数名, 参数值)
-        
-        # 检测大象
-        买单大象信息, 卖单大象信息 = self.大象识别.检测大象(股票代码, 盘口数据, 当前时间)
+        时间戳 = 盘口数据["时间戳"]
+        买盘 = 盘口数据["买盘"]
+        卖盘 = 盘口数据["卖盘"]
+        最新价 = 盘口数据.get("最新价")
+        self.大象识别.更新特征(股票代码, 时间戳, 买盘, 卖盘)
+        
+        # 盘口与上一次检测相同(只有时间戳变化)且参数没有变化时，跳过参数解析和扫描，只按时间推进确认
+        指纹 = 盘口数据.get("指纹")
+        参数版本 = self.参数管理.版本
+        上次 = self._盘口指纹.get(股票代码)
+        if (指纹 is not None and 上次 is not None and 上次[0] == 指纹 and 上次[1] == 参数版本
+                and 上次[2] == 买盘 and 上次[3] == 卖盘):
+            self._重复盘口计数.值 += 1
+            买单大象信息, 卖单大象信息 = self.大象识别.重复盘口(股票代码, 时间戳)
+        else:
+            self._盘口指纹[股票代码] = (指纹, 参数版本, 买盘, 卖盘)
+            
+            # 更新大象识别器参数为品种特定参数
+            品种参数 = self.参数管理.获取品种所有参数(股票代码)
+            if "大象识别" in 品种参数:
+                for 参数名, 参数值 in 品种参数["大象识别"].items():
+                    # 设置对象属性
+                    if hasattr(self.大象识别, 参数名):
+                        setattr(self.大象识别, 参数名, 参数值)
+            self.延迟统计.打点(阶段_参数解析)
+            
+            # 检测大象
+            买单大象信息 = self.大象识别.检测大象(股票代码, 时间戳, 买盘, 卖盘, 最新价, 盘口数据.get("买盘笔数"))
+            卖单大象信息 = self.大象识别.检测卖单大象(股票代码, 时间戳, 买盘, 卖盘, 最新价, 盘口数据.get("卖盘笔数"))
+        self.延迟统计.打点(阶段_大象检测)
         
         # 处理买单大象信号
         if 买单大象信息:
-            self.write_log(f"检测到买单大象: {股票代码} 价格:{买单大象信息['价格']} 金额:{买单大象信息['金额']}")
+            self.write_log(f"检测到买单大象: {股票代码} 价格:{买单大象信息['价格']} 金额:{买单大象信息['委托金额']}")
             买单大象信息["股票代码"] = 股票代码
             买单大象信息["类型"] = "买单大象"
             self._处理大象交易信号(股票代码, 买单大象信息, 盘口数据)
+            self.状态日志.记录(股票代码, "大象信号", self.交易状态.get(股票代码))
         
         # 处理卖单大象信号（如果启用了卖单识别）
         if 卖单大象信息:
-            self.write_log(f"检测到卖单大象: {股票代码} 价格:{卖单大象信息['价格']} 金额:{卖单大象信息['金额']}")
+            self.write_log(f"检测到卖单大象: {股票代码} 价格:{卖单大象信息['价格']} 金额:{卖单大象信息['委托金额']}")
             卖单大象信息["股票代码"] = 股票代码
             卖单大象信息["类型"] = "卖单大象"
             self._处理大象交易信号(股票代码, 卖单大象信息, 盘口数据)
+            self.状态日志.记录(股票代码, "大象信号", self.交易状态.get(股票代码))
     
     def _处理大象交易信号(self, 股票代码: str, 大象信息: Dict, 盘口数据: Dict):
         """
@@ -604,6 +1439,10 @@ class 大象策略(CtaTemplate):
             大象信息: 大象信息
             盘口数据: 盘口深度数据
         """
+        # 紧急撤单后不再开仓
+        if self.紧急撤单.已触发:
+            return
+        
         # 检查该股票是否在交易中
         if 股票代码 in self.交易状态 and self.交易状态[股票代码].get("状态") != "空闲":
             return
@@ -622,7 +1461,8 @@ class 大象策略(CtaTemplate):
             return
         
         # 检查大象稳定性
-        if not self.大象识别.检查大象稳定性(股票代码):
+        大象方向 = "卖单" if "卖单大象" in 大象信息.get("类型", "") else "买单"
+        if not self.大象识别.检查大象稳定性(股票代码, 大象方向):
             return
         
         # 更新风险控制器参数
@@ -636,6 +1476,7 @@ class 大象策略(CtaTemplate):
         if not 允许交易:
             self.write_log(f"风险控制拒绝交易 {股票代码}: {拒绝原因}")
             return
+        self.延迟统计.打点(阶段_风控检查)
         
         # 更新资金管理器参数
         if "资金管理" in 品种参数:
@@ -679,26 +1520,24 @@ class 大象策略(CtaTemplate):
             盘口数据: 盘口深度数据
         """
         # 获取当前盘口价格
-        if not 盘口数据 or not 盘口数据.get("asks") or not 盘口数据["asks"][0]:
+        if not 盘口数据 or not 盘口数据.get("卖盘") or not 盘口数据["卖盘"][0]:
             self.write_log(f"无法获取盘口数据: {股票代码}")
             self._清理交易状态(股票代码)
             return
             
-        卖一价 = 盘口数据["asks"][0][0]
+        # 盘口价格为整数价格档，下单前换算为浮点价格
+        品种 = self.品种表.获取(股票代码)
+        卖一价 = 品种.转价格(盘口数据["卖盘"][0][0])
         
         # 计算买入价格和数量
         买入价格 = 卖一价  # 以卖一价买入
         买入数量 = self.交易执行.交易量  # 使用预设的交易量
         
-        # 计算预期卖出价格
-        预期卖出价格 = 买入价格 * (1 + self.交易执行.最小止盈点数 / 100)  # 按点数计算
+        # 计算预期卖出价格，规整到最小变动价位和涨跌停范围内
+        预期卖出价格 = 品种.规整价格(买入价格 * (1 + self.交易执行.最小止盈点数 / 100))  # 按点数计算
         
         # 计算止损价格
-        止损价格 = 大象信息["价格"] - self.交易执行.最小止损点数 / 100 * 买入价格
-        
-        # 发送买入订单
-        交易所 = self._判断交易所(股票代码)
-        vt_symbol = f"{股票代码}.{交易所.value}"
+        止损价格 = 品种.规整价格(大象信息["价格"] - self.交易执行.最小止损点数 / 100 * 买入价格)
         
         # 记录交易计划
         self.交易状态[股票代码].update({
@@ -719,11 +1558,12 @@ class 大象策略(CtaTemplate):
             "状态": "发送订单",
             "大象类型": "买单大象",
             "大象价格": 大象信息.get("价格", 0),
-            "大象金额": 大象信息.get("金额", 0)
+            "大象金额": 大象信息.get("委托金额", 0)
         })
         
         # 执行买入
-        order_id = self.buy(vt_symbol, 买入价格, 买入数量)
+        order_id = self._发送委托(股票代码, Direction.LONG, 买入价格, 买入数量, 优先级_开仓, "买入订单ID")
+        self.延迟统计.打点(阶段_订单发送)
         
         if order_id:
             self.交易状态[股票代码]["买入订单ID"] = order_id
@@ -742,7 +1582,7 @@ class 大象策略(CtaTemplate):
                 "状态": "发送失败",
                 "大象类型": "买单大象",
                 "大象价格": 大象信息.get("价格", 0),
-                "大象金额": 大象信息.get("金额", 0)
+                "大象金额": 大象信息.get("委托金额", 0)
             })
     
     def _执行上方大象策略(self, 股票代码: str, 大象信息: Dict, 盘口数据: Dict):
@@ -755,26 +1595,24 @@ class 大象策略(CtaTemplate):
             盘口数据: 盘口深度数据
         """
         # 获取当前盘口价格
-        if not 盘口数据 or not 盘口数据.get("bids") or not 盘口数据["bids"][0]:
+        if not 盘口数据 or not 盘口数据.get("买盘") or not 盘口数据["买盘"][0]:
             self.write_log(f"无法获取盘口数据: {股票代码}")
             self._清理交易状态(股票代码)
             return
             
-        买一价 = 盘口数据["bids"][0][0]
+        # 盘口价格为整数价格档，下单前换算为浮点价格
+        品种 = self.品种表.获取(股票代码)
+        买一价 = 品种.转价格(盘口数据["买盘"][0][0])
         
         # 计算卖出价格和数量
         卖出价格 = 买一价  # 以买一价卖出
         卖出数量 = self.交易执行.交易量  # 使用预设的交易量
         
-        # 计算预期买回价格
-        预期买回价格 = 卖出价格 * (1 - self.交易执行.最小止盈点数 / 100)  # 按点数计算
+        # 计算预期买回价格，规整到最小变动价位和涨跌停范围内
+        预期买回价格 = 品种.规整价格(卖出价格 * (1 - self.交易执行.最小止盈点数 / 100))  # 按点数计算
         
         # 计算止损价格
-        止损价格 = 大象信息["价格"] + self.交易执行.最小止损点数 / 100 * 卖出价格
-        
-        # 发送卖出订单
-        交易所 = self._判断交易所(股票代码)
-        vt_symbol = f"{股票代码}.{交易所.value}"
+        止损价格 = 品种.规整价格(大象信息["价格"] + self.交易执行.最小止损点数 / 100 * 卖出价格)
         
         # 记录交易计划
         self.交易状态[股票代码].update({
@@ -795,11 +1633,12 @@ class 大象策略(CtaTemplate):
             "状态": "发送订单",
             "大象类型": "卖单大象",
             "大象价格": 大象信息.get("价格", 0),
-            "大象金额": 大象信息.get("金额", 0)
+            "大象金额": 大象信息.get("委托金额", 0)
         })
         
         # 执行卖出
-        order_id = self.sell(vt_symbol, 卖出价格, 卖出数量)
+        order_id = self._发送委托(股票代码, Direction.SHORT, 卖出价格, 卖出数量, 优先级_开仓, "卖出订单ID")
+        self.延迟统计.打点(阶段_订单发送)
         
         if order_id:
             self.交易状态[股票代码]["卖出订单ID"] = order_id
@@ -818,7 +1657,7 @@ class 大象策略(CtaTemplate):
                 "状态": "发送失败",
                 "大象类型": "卖单大象",
                 "大象价格": 大象信息.get("价格", 0),
-                "大象金额": 大象信息.get("金额", 0)
+                "大象金额": 大象信息.get("委托金额", 0)
             })
     
     def _处理订单完成(self, order: OrderData):
@@ -840,18 +1679,31 @@ class 大象策略(CtaTemplate):
             
         交易状态 = self.交易状态[股票代码]
         
+        # ==== 大象消失后撤销止盈单 ====
+        if 交易状态.get("状态") == "止损撤单中" and order.vt_orderid == 交易状态.get("止损撤单ID"):
+            if order.status != Status.ALLTRADED:
+                # 止盈单已撤销，撤单前的部分成交先记入平仓，再按最新盘口止损剩余数量
+                self._记录平仓成交(股票代码, order)
+                交易状态.pop("撤单前状态", None)
+                self._继续平仓(股票代码, "止损撤单中")
+                return
+            # 止盈单在撤单前已全部成交，按原流程完成交易
+            交易状态["状态"] = 交易状态.pop("撤单前状态")
+        
         # ==== 处理下方大象策略 ====
         # 买入订单成交后，等待价格上涨到目标价格再卖出
         if "买入订单ID" in 交易状态 and 交易状态["买入订单ID"] == order.vt_orderid and 交易状态.get("状态") == "买入中":
-            if order.status == Status.ALLTRADED:
+            # 部分成交后撤单的按已成交数量继续，避免留下无人管理的持仓
+            if order.status == Status.ALLTRADED or order.traded > 0:
                 # 买入成交，更新状态
-                self.write_log(f"下方大象策略买入成交: {股票代码} {order.volume_traded}股 @ {order.price}")
+                self.write_log(f"下方大象策略买入成交: {股票代码} {order.traded}股 @ {order.price}")
                 交易状态.update({
                     "状态": "持有中",
                     "买入成交价格": order.price,
-                    "买入成交数量": order.volume_traded,
+                    "买入成交数量": order.traded,
                     "买入成交时间": datetime.now()
                 })
+                self.大象监控.登记(交易状态.get("大象信息", {}))
                 
                 # 记录交易日志
                 self._记录交易日志({
@@ -859,20 +1711,19 @@ class 大象策略(CtaTemplate):
                     "类型": "下方大象策略",
                     "操作": "买入",
                     "价格": order.price,
-                    "数量": order.volume_traded,
+                    "数量": order.traded,
                     "状态": "成交",
                     "大象类型": 交易状态.get("大象信息", {}).get("类型", ""),
                     "大象价格": 交易状态.get("大象信息", {}).get("价格", 0),
-                    "大象金额": 交易状态.get("大象信息", {}).get("金额", 0)
+                    "大象金额": 交易状态.get("大象信息", {}).get("委托金额", 0)
                 })
                 
                 # 设置卖出价格
-                卖出价格 = 交易状态.get("预期卖出价格", order.price * (1 + self.交易执行.最小止盈点数 / 100))
+                卖出价格 = 交易状态.get("预期卖出价格") or self.品种表.获取(股票代码).规整价格(
+                    order.price * (1 + self.交易执行.最小止盈点数 / 100))
                 
                 # 发送卖出订单
-                交易所 = self._判断交易所(股票代码)
-                vt_symbol = f"{股票代码}.{交易所.value}"
-                卖出数量 = order.volume_traded
+                卖出数量 = order.traded
                 
                 # 记录交易日志
                 self._记录交易日志({
@@ -884,10 +1735,10 @@ class 大象策略(CtaTemplate):
                     "状态": "发送订单",
                     "大象类型": 交易状态.get("大象信息", {}).get("类型", ""),
                     "大象价格": 交易状态.get("大象信息", {}).get("价格", 0),
-                    "大象金额": 交易状态.get("大象信息", {}).get("金额", 0)
+                    "大象金额": 交易状态.get("大象信息", {}).get("委托金额", 0)
                 })
                 
-                order_id = self.sell(vt_symbol, 卖出价格, 卖出数量)
+                order_id = self._发送委托(股票代码, Direction.SHORT, 卖出价格, 卖出数量, 优先级_平仓, "卖出订单ID", "持有中")
                 
                 if order_id:
                     交易状态.update({
@@ -897,83 +1748,58 @@ class 大象策略(CtaTemplate):
                         "卖出数量": 卖出数量
                     })
                     self.write_log(f"下方大象策略发送卖出订单: {股票代码} {卖出数量}股 @ {卖出价格}")
-            else:
-                self.write_log(f"下方大象策略卖出订单发送失败: {股票代码}")
-                self._清理交易状态(股票代码)
-                
-                # 记录交易日志
-                self._记录交易日志({
-                    "股票代码": 股票代码,
-                    "类型": "下方大象策略",
-                    "操作": "卖出",
-                    "价格": 卖出价格,
-                    "数量": 卖出数量,
-                    "状态": "发送失败",
-                    "大象类型": 交易状态.get("大象信息", {}).get("类型", ""),
-                    "大象价格": 交易状态.get("大象信息", {}).get("价格", 0),
-                    "大象金额": 交易状态.get("大象信息", {}).get("金额", 0)
-                })
-        elif "卖出订单ID" in 交易状态 and 交易状态["卖出订单ID"] == order.vt_orderid and 交易状态.get("状态") == "卖出中":
-            if order.status == Status.ALLTRADED:
-                # 卖出成交，计算盈亏
-                self.write_log(f"下方大象策略卖出成交: {股票代码} {order.volume_traded}股 @ {order.price}")
-                交易状态.update({
-                    "状态": "已完成",
-                    "卖出成交价格": order.price,
-                    "卖出成交数量": order.volume_traded,
-                    "卖出成交时间": datetime.now()
-                })
-                
-                # 计算盈亏
-                if "买入成交价格" in 交易状态 and "卖出成交价格" in 交易状态:
-                    买入价格 = 交易状态["买入成交价格"]
-                    卖出价格 = 交易状态["卖出成交价格"]
-                    交易数量 = min(交易状态.get("买入成交数量", 0), 交易状态.get("卖出成交数量", 0))
-                    
-                    盈亏 = (卖出价格 - 买入价格) * 交易数量
-                    手续费 = (卖出价格 + 买入价格) * 交易数量 * 0.0003  # 假设手续费为万三
-                    净盈亏 = 盈亏 - 手续费
+                else:
+                    # 止盈单发送失败时保持持有中，大象消失监控仍会止损
+                    self.write_log(f"下方大象策略卖出订单发送失败: {股票代码}")
                     
-                    交易状态.update({
-                        "盈亏": 盈亏,
-                        "手续费": 手续费,
-                        "净盈亏": 净盈亏
+                    # 记录交易日志
+                    self._记录交易日志({
+                        "股票代码": 股票代码,
+                        "类型": "下方大象策略",
+                        "操作": "卖出",
+                        "价格": 卖出价格,
+                        "数量": 卖出数量,
+                        "状态": "发送失败",
+                        "大象类型": 交易状态.get("大象信息", {}).get("类型", ""),
+                        "大象价格": 交易状态.get("大象信息", {}).get("价格", 0),
+                        "大象金额": 交易状态.get("大象信息", {}).get("委托金额", 0)
                     })
-                    
-                    self.write_log(f"下方大象策略交易完成: {股票代码} 盈亏: {盈亏:.2f}, 净盈亏: {净盈亏:.2f}")
-                    
-                    # 记录盈亏
-                    self.风险控制.记录交易盈亏(股票代码, 净盈亏)
-                
-                # 清理交易状态
-                self._清理交易状态(股票代码)
             else:
-                # 卖出订单被取消或拒绝
-                self.write_log(f"下方大象策略卖出订单未成交: {股票代码} {order.status}")
+                # 买入订单被取消或拒绝
+                self.write_log(f"下方大象策略买入订单未成交: {股票代码} {order.status}")
                 self._清理交易状态(股票代码)
+        elif ("卖出订单ID" in 交易状态 and 交易状态["卖出订单ID"] == order.vt_orderid
+              and 交易状态.get("状态") in ("卖出中", "止损中")
+              and 交易状态.get("大象信息", {}).get("类型") != "卖单大象"):
+            self._记录平仓成交(股票代码, order)
+            if order.status == Status.ALLTRADED:
+                self._完成交易(股票代码)
+            else:
+                self.write_log(f"下方大象策略卖出订单未全部成交: {股票代码} {order.status} 已成交{order.traded}股")
+                self._继续平仓(股票代码, 交易状态["状态"])
         
         # ==== 处理上方大象策略 ====
         # 卖出订单成交后，等待价格下跌到目标价格再买回
         elif "卖出订单ID" in 交易状态 and 交易状态["卖出订单ID"] == order.vt_orderid and 交易状态.get("状态") == "卖出中" and 交易状态.get("大象信息", {}).get("类型") == "卖单大象":
-            if order.status == Status.ALLTRADED:
+            if order.status == Status.ALLTRADED or order.traded > 0:
                 # 卖出成交，更新状态
-                self.write_log(f"上方大象策略卖出成交: {股票代码} {order.volume_traded}股 @ {order.price}")
+                self.write_log(f"上方大象策略卖出成交: {股票代码} {order.traded}股 @ {order.price}")
                 交易状态.update({
                     "状态": "已卖出待买回",
                     "卖出成交价格": order.price,
-                    "卖出成交数量": order.volume_traded,
+                    "卖出成交数量": order.traded,
                     "卖出成交时间": datetime.now()
                 })
+                self.大象监控.登记(交易状态.get("大象信息", {}))
                 
                 # 设置买回价格
-                买回价格 = 交易状态.get("预期买回价格", order.price * (1 - self.交易执行.最小止盈点数 / 100))
+                买回价格 = 交易状态.get("预期买回价格") or self.品种表.获取(股票代码).规整价格(
+                    order.price * (1 - self.交易执行.最小止盈点数 / 100))
                 
                 # 发送买回订单
-                交易所 = self._判断交易所(股票代码)
-                vt_symbol = f"{股票代码}.{交易所.value}"
-                买回数量 = order.volume_traded
+                买回数量 = order.traded
                 
-                order_id = self.buy(vt_symbol, 买回价格, 买回数量)
+                order_id = self._发送委托(股票代码, Direction.LONG, 买回价格, 买回数量, 优先级_平仓, "买入订单ID", "已卖出待买回")
                 
                 if order_id:
                     交易状态.update({
@@ -984,53 +1810,123 @@ class 大象策略(CtaTemplate):
                     })
                     self.write_log(f"上方大象策略发送买回订单: {股票代码} {买回数量}股 @ {买回价格}")
                 else:
+                    # 买回单发送失败时保持已卖出待买回，大象消失监控仍会紧急买回
                     self.write_log(f"上方大象策略买回订单发送失败: {股票代码}")
-                    self._清理交易状态(股票代码)
             else:
                 # 卖出订单被取消或拒绝
                 self.write_log(f"上方大象策略卖出订单未成交: {股票代码} {order.status}")
                 self._清理交易状态(股票代码)
         
-        # 买回订单成交后，计算盈亏并完成交易
-        elif "买入订单ID" in 交易状态 and 交易状态["买入订单ID"] == order.vt_orderid and 交易状态.get("状态") == "买回中":
+        # 买回订单成交后，计算盈亏并完成交易；止损和紧急买回未全部成交时重发剩余数量
+        elif ("买入订单ID" in 交易状态 and 交易状态["买入订单ID"] == order.vt_orderid
+              and 交易状态.get("状态") in ("买回中", "紧急买回中")):
+            self._记录平仓成交(股票代码, order)
             if order.status == Status.ALLTRADED:
-                # 买回成交，计算盈亏
-                self.write_log(f"上方大象策略买回成交: {股票代码} {order.volume_traded}股 @ {order.price}")
-                交易状态.update({
-                    "状态": "已完成",
-                    "买入成交价格": order.price,
-                    "买入成交数量": order.volume_traded,
-                    "买入成交时间": datetime.now()
-                })
-                
-                # 计算盈亏
-                if "卖出成交价格" in 交易状态 and "买入成交价格" in 交易状态:
-                    卖出价格 = 交易状态["卖出成交价格"]
-                    买入价格 = 交易状态["买入成交价格"]
-                    交易数量 = min(交易状态.get("卖出成交数量", 0), 交易状态.get("买入成交数量", 0))
-                    
-                    盈亏 = (卖出价格 - 买入价格) * 交易数量
-                    手续费 = (卖出价格 + 买入价格) * 交易数量 * 0.0003  # 假设手续费为万三
-                    净盈亏 = 盈亏 - 手续费
-                    
-                    交易状态.update({
-                        "盈亏": 盈亏,
-                        "手续费": 手续费,
-                        "净盈亏": 净盈亏
-                    })
-                    
-                    self.write_log(f"上方大象策略交易完成: {股票代码} 盈亏: {盈亏:.2f}, 净盈亏: {净盈亏:.2f}")
-                    
-                    # 记录盈亏
-                    self.风险控制.记录交易盈亏(股票代码, 净盈亏)
-                
-                # 清理交易状态
-                self._清理交易状态(股票代码)
+                self._完成交易(股票代码)
             else:
-                # 买回订单被取消或拒绝
-                self.write_log(f"上方大象策略买回订单未成交: {股票代码} {order.status}")
-                self._清理交易状态(股票代码)
+                self.write_log(f"上方大象策略买回订单未全部成交: {股票代码} {order.status} 已成交{order.traded}股")
+                self._继续平仓(股票代码, 交易状态["状态"])
+    
+    def _剩余持仓(self, 交易状态: Dict) -> int:
+        """
+        获取交易周期尚未平仓的数量
+        
+        参数:
+            交易状态: 该股票的交易状态
+            
+        返回:
+            开仓成交数量减去已平仓数量，下方大象为多头持仓，上方大象为待买回的空头数量
+        """
+        开仓数量键 = "卖出成交数量" if 交易状态.get("大象信息", {}).get("类型") == "卖单大象" else "买入成交数量"
+        return 交易状态.get(开仓数量键, 0) - 交易状态.get("平仓成交数量", 0)
+    
+    def _记录平仓成交(self, 股票代码: str, order: OrderData):
+        """
+        累计平仓订单(止盈、止损卖出或买回)的成交数量和金额，订单部分成交后撤销时也记入
+        
+        参数:
+            股票代码: 股票代码
+            order: 平仓订单的终态回报
+        """
+        if order.traded <= 0:
+            return
+        交易状态 = self.交易状态[股票代码]
+        交易状态["平仓成交数量"] = 交易状态.get("平仓成交数量", 0) + order.traded
+        交易状态["平仓成交金额"] = 交易状态.get("平仓成交金额", 0.0) + order.price * order.traded
+        策略类型 = "上方大象策略" if 交易状态.get("大象信息", {}).get("类型") == "卖单大象" else "下方大象策略"
+        self.write_log(f"{策略类型}{'买回' if order.direction == Direction.LONG else '卖出'}成交: "
+                       f"{股票代码} {order.traded}股 @ {order.price}")
     
+    def _继续平仓(self, 股票代码: str, 状态: str):
+        """
+        平仓订单未全部成交时处理剩余数量
+        
+        止盈单撤单完成(止损撤单中)后按最新对手价止损剩余数量；止损卖出和紧急买回被撤销或拒绝时重发剩余数量，
+        保持原状态，重发次数用完后退回持有状态继续跟踪；止盈卖出和买回被撤销时剩余数量退回持有状态，
+        由大象消失监控继续止损。剩余数量为0时完成交易。
+        
+        参数:
+            股票代码: 股票代码
+            状态: 未全部成交的平仓订单所处的状态
+        """
+        交易状态 = self.交易状态[股票代码]
+        剩余数量 = self._剩余持仓(交易状态)
+        if 剩余数量 <= 0:
+            self._完成交易(股票代码)
+            return
+        
+        上方 = 交易状态.get("大象信息", {}).get("类型") == "卖单大象"
+        if 状态 in ("止损中", "紧急买回中", "止损撤单中"):
+            重发次数 = 交易状态.get("止损重发次数", 0)
+            if 状态 != "止损撤单中" and 重发次数 >= self.止损最大重发次数:
+                self.write_log(f"止损重发{重发次数}次仍未全部成交，剩余{剩余数量}股退回持有状态: {股票代码}")
+            else:
+                if 状态 != "止损撤单中":
+                    交易状态["止损重发次数"] = 重发次数 + 1
+                交易状态["撤单前状态"] = "买回中" if 上方 else "卖出中"
+                self._发送止损订单(股票代码, 剩余数量)
+                return
+        
+        交易状态["状态"] = "已卖出待买回" if 上方 else "持有中"
+    
+    def _完成交易(self, 股票代码: str):
+        """
+        交易周期全部平仓后按累计平仓成交计算盈亏并清理交易状态
+        
+        参数:
+            股票代码: 股票代码
+        """
+        交易状态 = self.交易状态[股票代码]
+        上方 = 交易状态.get("大象信息", {}).get("类型") == "卖单大象"
+        策略类型 = "上方大象策略" if 上方 else "下方大象策略"
+        平仓数量 = 交易状态.get("平仓成交数量", 0)
+        开仓价格 = 交易状态.get("卖出成交价格" if 上方 else "买入成交价格")
+        
+        if 平仓数量 > 0 and 开仓价格 is not None:
+            平仓价格 = 交易状态["平仓成交金额"] / 平仓数量
+            交易状态.update({
+                "状态": "已完成",
+                ("买入成交价格" if 上方 else "卖出成交价格"): 平仓价格,
+                ("买入成交数量" if 上方 else "卖出成交数量"): 平仓数量,
+                ("买入成交时间" if 上方 else "卖出成交时间"): datetime.now()
+            })
+            
+            盈亏 = ((开仓价格 - 平仓价格) if 上方 else (平仓价格 - 开仓价格)) * 平仓数量
+            手续费 = (开仓价格 + 平仓价格) * 平仓数量 * 0.0003  # 假设手续费为万三
+            净盈亏 = 盈亏 - 手续费
+            交易状态.update({
+                "盈亏": 盈亏,
+                "手续费": 手续费,
+                "净盈亏": 净盈亏
+            })
+            self.write_log(f"{策略类型}交易完成: {股票代码} 盈亏: {盈亏:.2f}, 净盈亏: {净盈亏:.2f}")
+            
+            # 记录盈亏，日内亏损超限时撤销全部活跃订单
+            self.风险控制.记录交易盈亏(股票代码, 净盈亏)
+            self._检查日内亏损()
+        
+        # 清理交易状态
+        self._清理交易状态(股票代码)
     def _处理订单取消(self, order: OrderData):
         """
         处理订单取消
@@ -1058,17 +1954,14 @@ class 大象策略(CtaTemplate):
                 self.write_log(f"买回订单被取消: {股票代码}, 尝试重新买回")
                 
                 # 获取当前市场价格
-                市场数据 = self.get_tick(f"{股票代码}.{self._判断交易所(股票代码).value}")
+                市场数据 = self.get_tick(self.品种表.获取(股票代码).vt_symbol)
                 
                 if 市场数据:
                     买回价格 = 市场数据.bid_price_1  # 使用买一价
                     买回数量 = 交易状态["卖出数量"]
                     
                     # 发送新的买入订单
-                    交易所 = self._判断交易所(股票代码)
-                    vt_symbol = f"{股票代码}.{交易所.value}"
-                    
-                    order_id = self.buy(vt_symbol, 买回价格, 买回数量)
+                    order_id = self._发送委托(股票代码, Direction.LONG, 买回价格, 买回数量, 优先级_平仓, "买入订单ID", "已卖出待买回")
                     
                     if order_id:
                         交易状态["买入订单ID"] = order_id
@@ -1101,6 +1994,10 @@ class 大象策略(CtaTemplate):
             
             # 删除交易状态
             del self.交易状态[股票代码]
+        
+        self.委托限流.撤销品种(股票代码)
+        self.大象监控.移除(股票代码)
+        self._最新盘口.pop(股票代码, None)
     
     def _保存单笔交易记录(self, 记录: Dict):
         """
@@ -1141,6 +2038,7 @@ class 大象策略(CtaTemplate):
         
         # 导出资金统计
         资金统计 = self.资金管理.获取每日统计()
+        资金统计["延迟统计"] = self.延迟统计.导出()
         统计文件路径 = f"{self.数据路径}资金统计_{日期}.json"
         
         with open(统计文件路径, "w", encoding="utf-8") as f:
@@ -1152,83 +2050,114 @@ class 大象策略(CtaTemplate):
             return obj.strftime("%Y-%m-%d %H:%M:%S.%f")
         return str(obj)
 
-    def _处理大象消失(self, 股票代码: str, 盘口数据: Dict):
+    def _处理大象消失(self, 股票代码: str, 盘口数据: Dict, 原因: str = ""):
         """
         处理大象消失事件
         
+        持仓中直接按对手价止损(下方大象)或紧急买回(上方大象)；
+        止盈单还挂在盘口时先撤单，撤单确认后在 _处理订单完成 中发送止损单。
+        
         参数:
             股票代码: 股票代码
             盘口数据: 盘口数据
+            原因: 大象消失原因
         """
         if 股票代码 not in self.交易状态:
             return
             
         交易状态 = self.交易状态[股票代码]
         大象信息 = 交易状态.get("大象信息", {})
-        大象类型 = 大象信息.get("类型", "")
-        
-        # 根据不同的大象类型和交易状态处理
-        if "买单大象" in 大象类型:
-            # 下方大象消失处理
-            if 交易状态.get("状态") == "持有中":
-                # 如果持有股票但还没卖出，需要紧急止损
-                self.write_log(f"下方大象消失，执行止损: {股票代码}")
-                
-                交易所 = self._判断交易所(股票代码)
-                vt_symbol = f"{股票代码}.{交易所.value}"
-                
-                # 以当前市场价格止损卖出
-                if 盘口数据 and 盘口数据.get("bids") and 盘口数据["bids"][0]:
-                    买一价 = 盘口数据["bids"][0][0]
-                    卖出数量 = 交易状态.get("买入成交数量", 0)
-                    
-                    if 卖出数量 > 0:
-                        order_id = self.sell(vt_symbol, 买一价, 卖出数量)
-                        
-                        if order_id:
-                            交易状态.update({
-                                "状态": "止损中",
-                                "卖出订单ID": order_id,
-                                "卖出价格": 买一价,
-                                "卖出数量": 卖出数量
-                            })
-                            self.write_log(f"下方大象消失止损卖出: {股票代码} {卖出数量}股 @ {买一价}")
-                        else:
-                            self.write_log(f"下方大象消失止损卖出失败: {股票代码}")
+        状态 = 交易状态.get("状态")
+        
+        if 大象信息.get("价格档"):
+            self.大象识别.移除大象(股票代码, 大象信息["价格档"], "卖单" if 大象信息.get("类型") == "卖单大象" else "买单")
+        
+        if 状态 in ("持有中", "已卖出待买回"):
+            self.write_log(f"大象消失({原因})，立即{'止损' if 状态 == '持有中' else '买回'}: {股票代码}")
+            交易状态["撤单前状态"] = "卖出中" if 状态 == "持有中" else "买回中"
+            self._最新盘口[股票代码] = 盘口数据
+            self._发送止损订单(股票代码, self._剩余持仓(交易状态))
+        
+        elif 状态 in ("卖出中", "买回中"):
+            # 先撤销挂着的止盈单，避免与止损单重复成交
+            订单ID = 交易状态.get("卖出订单ID" if 状态 == "卖出中" else "买入订单ID")
+            if not 订单ID:
+                return
+            if self.委托限流.撤销排队(订单ID):
+                # 止盈单还在限流队列中没有发出，直接止损
+                self.write_log(f"大象消失({原因})，撤销排队中的止盈单并立即止损: {股票代码}")
+                交易状态["撤单前状态"] = 状态
+                self._发送止损订单(股票代码, self._剩余持仓(交易状态))
+                return
+            self.write_log(f"大象消失({原因})，撤销止盈单: {股票代码} {订单ID}")
+            交易状态.update({
+                "状态": "止损撤单中",
+                "撤单前状态": 状态,
+                "止损撤单ID": 订单ID,
+                "大象消失原因": 原因
+            })
+            self._撤单(股票代码, 订单ID)
+    
+    def _发送止损订单(self, 股票代码: str, 数量: int):
+        """
+        大象消失后按最新盘口的对手价止损卖出(下方大象)或紧急买回(上方大象)
         
-        elif "卖单大象" in 大象类型:
-            # 上方大象消失处理
-            if 交易状态.get("状态") == "已卖出待买回":
-                # 如果已卖出但还没买回，需要紧急买回
-                self.write_log(f"上方大象消失，执行紧急买回: {股票代码}")
-                
-                交易所 = self._判断交易所(股票代码)
-                vt_symbol = f"{股票代码}.{交易所.value}"
-                
-                # 以当前市场价格紧急买回
-                if 盘口数据 and 盘口数据.get("asks") and 盘口数据["asks"][0]:
-                    卖一价 = 盘口数据["asks"][0][0]
-                    买回数量 = 交易状态.get("卖出成交数量", 0)
-                    
-                    if 买回数量 > 0:
-                        order_id = self.buy(vt_symbol, 卖一价, 买回数量)
-                        
-                        if order_id:
-                            交易状态.update({
-                                "状态": "紧急买回中",
-                                "买入订单ID": order_id,
-                                "买入价格": 卖一价,
-                                "买入数量": 买回数量
-                            })
-                            self.write_log(f"上方大象消失紧急买回: {股票代码} {买回数量}股 @ {卖一价}")
-                        else:
-                            self.write_log(f"上方大象消失紧急买回失败: {股票代码}")
+        参数:
+            股票代码: 股票代码
+            数量: 止损数量
+        """
+        交易状态 = self.交易状态[股票代码]
+        撤单前状态 = 交易状态.pop("撤单前状态", "卖出中")
+        盘口数据 = self._最新盘口.get(股票代码)
+        品种 = self.品种表.获取(股票代码)
+        
+        if 撤单前状态 == "卖出中":
+            # 下方大象消失：以买一价止损卖出
+            if 数量 <= 0 or not 盘口数据 or not 盘口数据["买盘"][0][0]:
+                self.write_log(f"下方大象消失止损卖出失败，无可用盘口或数量: {股票代码}")
+                交易状态["状态"] = "持有中"
+                return
+            买一价 = 品种.转价格(盘口数据["买盘"][0][0])
+            order_id = self._发送委托(股票代码, Direction.SHORT, 买一价, 数量, 优先级_止损, "卖出订单ID", "持有中")
+            if order_id:
+                交易状态.update({
+                    "状态": "止损中",
+                    "卖出订单ID": order_id,
+                    "卖出价格": 买一价,
+                    "卖出数量": 数量
+                })
+                self.write_log(f"下方大象消失止损卖出: {股票代码} {数量}股 @ {买一价}")
+            else:
+                交易状态["状态"] = "持有中"
+                self.write_log(f"下方大象消失止损卖出失败: {股票代码}")
+        else:
+            # 上方大象消失：以卖一价紧急买回
+            if 数量 <= 0 or not 盘口数据 or not 盘口数据["卖盘"][0][0]:
+                self.write_log(f"上方大象消失紧急买回失败，无可用盘口或数量: {股票代码}")
+                交易状态["状态"] = "已卖出待买回"
+                return
+            卖一价 = 品种.转价格(盘口数据["卖盘"][0][0])
+            order_id = self._发送委托(股票代码, Direction.LONG, 卖一价, 数量, 优先级_止损, "买入订单ID", "已卖出待买回")
+            if order_id:
+                交易状态.update({
+                    "状态": "紧急买回中",
+                    "买入订单ID": order_id,
+                    "买入价格": 卖一价,
+                    "买入数量": 数量
+                })
+                self.write_log(f"上方大象消失紧急买回: {股票代码} {数量}股 @ {卖一价}")
+            else:
+                交易状态["状态"] = "已卖出待买回"
+                self.write_log(f"上方大象消失紧急买回失败: {股票代码}")
 
     def _运行测试(self):
         """运行策略模块测试"""
         self.write_log("开始运行策略模块测试")
         
         try:
+            # 测试模块只在需要时导入
+            from modules.测试模块 import 运行所有测试
+            
             # 运行所有测试
             测试结果 = 运行所有测试()
             
@@ -1321,12 +2250,13 @@ class 大象策略(CtaTemplate):
             股票代码: 股票代码
             价格: 最新价格
         """
-        # 这里可以添加价格存储逻辑，目前先简单记录即可
-        # 如果需要保存价格历史，可以使用字典存储
-        if not hasattr(self, "_最新价格"):
-            self._最新价格 = {}
+        索引, 原价格 = self.最新价.更新(股票代码, 价格)
+        if 价格 == 原价格:
+            return
         
-        self._最新价格[股票代码] = 价格
+        # 持仓品种按差价乘持仓数量增量调整持仓市值
+        self.资金管理.更新价格(索引, 价格)
+        self.账户状态.更新价格(股票代码, 价格)
 
     def write_log(self, msg: str):
         """
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+状态回放脚本 - 回放状态日志重建交易状态，查看单只股票的状态变化，或对比两次运行的状态日志
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+
+# 添加当前目录到系统路径
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+if 当前路径 not in sys.path:
+    sys.path.append(当前路径)
+
+from modules.日志 import 配置日志
+from modules.状态快照 import 读取快照
+from modules.状态日志 import 读取日志, 读取目录, 回放, 对比
+
+
+def 读取记录(路径: str, 起始序号: int = 0) -> list:
+    """
+    读取日志文件或日志目录中的记录
+
+    参数:
+        路径: 日志文件或日志目录
+        起始序号: 只读取序号大于该值的记录
+
+    返回:
+        记录列表
+    """
+    if os.path.isdir(路径):
+        return list(读取目录(路径, 起始序号))
+    return [项 for 项 in 读取日志(路径) if 项[0] > 起始序号]
+
+
+def 启动状态回放(路径: str, 对比路径: str = None, 快照路径: str = None, 到序号: int = None,
+           股票代码: str = None) -> int:
+    """
+    回放或对比状态日志
+
+    参数:
+        路径: 日志文件或日志目录
+        对比路径: 另一次运行的日志文件或目录，指定时输出两次运行的差异
+        快照路径: 状态快照文件，指定时从快照的交易状态开始回放快照之后的记录
+        到序号: 只回放到该序号
+        股票代码: 只输出该股票的状态变化和最终状态
+
+    返回:
+        退出码，对比有差异时为1
+    """
+    if 对比路径:
+        差异 = 对比(读取记录(路径), 读取记录(对比路径))
+        if not 差异:
+            print("两次运行的交易状态变化一致")
+            return 0
+        print(f"发现{len(差异)}处差异:")
+        for 行 in 差异:
+            print(f"  {行}")
+        return 1
+
+    初始状态 = {}
+    起始序号 = 0
+    if 快照路径:
+        头部, 快照 = 读取快照(快照路径)
+        初始状态 = 快照.get("交易状态", {})
+        起始序号 = 头部.get("附加", {}).get("状态日志序号", 0)
+        print(f"从状态快照 #{头部['序号']} 开始回放，状态日志序号 {起始序号}")
+
+    记录列表 = 读取记录(路径, 起始序号)
+    for 序号, 时间, 代码, 事件, 变化, 删除键 in 记录列表:
+        if 到序号 is not None and 序号 > 到序号:
+            break
+        if 股票代码 and 代码 != 股票代码:
+            continue
+        内容 = "交易周期结束" if 变化 is None else {键: 变化[键] for 键 in 变化 if 键 != "大象信息"}
+        print(f"#{序号} {datetime.fromtimestamp(时间):%Y-%m-%d %H:%M:%S.%f} {代码} {事件}: {内容}" + (f" 删除{list(删除键)}" if 删除键 else ""))
+
+    状态 = 回放(记录列表, 初始状态, 到序号)
+    print("\n" + "=" * 50)
+    回放数 = sum(1 for 项 in 记录列表 if 到序号 is None or 项[0] <= 到序号)
+    print(f"回放 {回放数} 条记录后未结束的交易周期: {len(状态)} 个")
+    for 代码, 项 in sorted(状态.items()):
+        if 股票代码 and 代码 != 股票代码:
+            continue
+        print(f"{代码}: {项}")
+    return 0
+
+
+if __name__ == "__main__":
+    解析器 = argparse.ArgumentParser(description="大象策略状态日志回放脚本")
+    解析器.add_argument("路径", help="状态日志文件或目录，如 data/状态日志")
+    解析器.add_argument("--对比", help="另一次运行的状态日志文件或目录，输出两次运行的差异")
+    解析器.add_argument("--快照", help="状态快照文件，从快照的交易状态开始回放之后的记录")
+    解析器.add_argument("--到序号", type=int, help="只回放到该序号")
+    解析器.add_argument("-s", "--股票", help="只输出该股票的状态变化")
+    参数 = 解析器.parse_args()
+
+    配置日志(级别="info")
+    sys.exit(启动状态回放(参数.路径, 参数.对比, 参数.快照, 参数.到序号, 参数.股票))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+运行压力测试脚本 - 按逐级提高的速率推送合成行情，找出策略或模拟交易所的饱和点
+"""
+import os
+import sys
+import json
+import argparse
+
+# 添加当前目录到系统路径
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+if 当前路径 not in sys.path:
+    sys.path.append(当前路径)
+
+from modules.日志 import 配置日志
+from modules.性能测试 import 生成股票代码, 跳过基准
+from modules.压力测试 import 压力测试器
+
+
+def 启动压力测试(目标: str = "策略", 速率列表: list = None, 时长秒: float = 10.0, 品种数: int = 50,
+           种子: int = 20250329, 开盘爆发: bool = True, 输出路径: str = None) -> int:
+    """
+    运行压力测试
+
+    参数:
+        目标: "策略"或"撮合"
+        速率列表: 逐级测试的目标速率(笔/秒)
+        时长秒: 每级速率的发送时长
+        品种数: 合成行情的品种数
+        种子: 行情生成随机种子
+        开盘爆发: 是否包含开盘集合竞价和开盘后的行情加密
+        输出路径: 结果JSON文件路径，为None时不保存
+
+    返回:
+        退出码，无法运行或策略目标没有发出委托时为1
+    """
+    print("=" * 50)
+    print("开始运行大象策略压力测试")
+    print("=" * 50)
+
+    生成参数 = {} if 开盘爆发 else {"开盘集合竞价": False, "开盘爆发秒数": 0.0}
+    测试器 = 压力测试器(生成股票代码(品种数), 目标, 种子, **生成参数)
+    try:
+        结果列表 = 测试器.阶梯运行(速率列表 or [1000, 5000, 20000], 时长秒)
+    except 跳过基准 as e:
+        print(f"无法运行压力测试: {e}")
+        return 1
+
+    print("\n" + 测试器.生成报告(结果列表))
+
+    if 输出路径:
+        with open(输出路径, "w", encoding="utf-8") as f:
+            json.dump(结果列表, f, indent=4, ensure_ascii=False)
+        print(f"已保存结果: {输出路径}")
+
+    # 策略目标没有发出委托时信号到下单延迟无从测量，测试无效
+    无委托 = [结果 for 结果 in 结果列表 if "委托数" in 结果 and not 结果["委托数"]]
+    if 无委托:
+        速率 = ", ".join(f"{结果['目标速率']:.0f}" for 结果 in 无委托)
+        print(f"策略目标在 {速率} 笔/秒下没有发出委托，压力测试未覆盖下单路径")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    解析器 = argparse.ArgumentParser(description="大象策略压力测试脚本")
+    解析器.add_argument("-t", "--目标", choices=["策略", "撮合"], default="策略",
+                     help="策略：行情经on_tick送入大象策略(需要vnpy)；撮合：行情同步到模拟交易所")
+    解析器.add_argument("-r", "--速率", default="1000,5000,20000", help="逐级测试的速率(笔/秒)，逗号分隔")
+    解析器.add_argument("-d", "--时长", type=float, default=10.0, help="每级速率的发送时长(秒)")
+    解析器.add_argument("-n", "--品种数", type=int, default=50, help="合成行情的品种数")
+    解析器.add_argument("--种子", type=int, default=20250329, help="行情生成随机种子")
+    解析器.add_argument("--无开盘爆发", action="store_true", help="不生成开盘集合竞价和开盘后的行情加密")
+    解析器.add_argument("-o", "--输出", help="结果JSON文件路径")
+    参数 = 解析器.parse_args()
+
+    配置日志(级别="info")
+    速率列表 = [float(速率) for 速率 in 参数.速率.split(",") if 速率.strip()]
+    sys.exit(启动压力测试(参数.目标, 速率列表, 参数.时长, 参数.品种数, 参数.种子, not 参数.无开盘爆发, 参数.输出))
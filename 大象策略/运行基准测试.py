@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+运行基准测试脚本 - 测量策略热点路径性能，保存基线并检查性能回退
+"""
+import os
+import sys
+import argparse
+
+# 添加当前目录到系统路径
+当前路径 = os.path.dirname(os.path.abspath(__file__))
+if 当前路径 not in sys.path:
+    sys.path.append(当前路径)
+
+from modules.日志 import 配置日志
+from modules.性能测试 import 创建默认基准测试器, 默认基线路径
+
+
+def 启动基准测试(基准名称: str = None, 次数: int = 20000, 种子: int = 20250329,
+           基线路径: str = 默认基线路径, 保存基线: bool = False, 阈值: float = 0.2) -> int:
+    """
+    运行基准测试
+
+    参数:
+        基准名称: 指定要运行的基准，如果为None则运行所有基准
+        次数: 每个基准的计时次数
+        种子: 合成数据随机种子
+        基线路径: 基线文件路径
+        保存基线: 是否将本次结果保存为新基线
+        阈值: 允许的性能回退比例
+
+    返回:
+        退出码，存在性能回退或基准执行出错时为1
+    """
+    print("=" * 50)
+    print("开始运行大象策略基准测试")
+    print("=" * 50)
+
+    测试器 = 创建默认基准测试器(种子=种子, 次数=次数)
+    测试器.运行(基准名称)
+
+    回退列表 = [] if 保存基线 else 测试器.对比基线(基线路径, 阈值)
+    print("\n" + 测试器.生成报告(回退列表))
+
+    出错列表 = 测试器.出错基准()
+    if 出错列表:
+        print(f"发现{len(出错列表)}项基准执行出错: {', '.join(出错列表)}")
+        if 保存基线:
+            print("存在出错的基准，未保存基线")
+        return 1
+
+    if 保存基线:
+        测试器.保存基线(基线路径)
+        print(f"已保存基线: {基线路径}")
+        return 0
+
+    if 回退列表:
+        print(f"发现{len(回退列表)}项性能回退(阈值{阈值:.0%})")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    解析器 = argparse.ArgumentParser(description="大象策略基准测试脚本")
+    解析器.add_argument("-m", "--基准", help="指定要运行的基准，如检测大象、完整行情路径等")
+    解析器.add_argument("-n", "--次数", type=int, default=20000, help="每个基准的计时次数")
+    解析器.add_argument("--种子", type=int, default=20250329, help="合成数据随机种子")
+    解析器.add_argument("--基线", default=默认基线路径, help="基线文件路径")
+    解析器.add_argument("--保存基线", action="store_true", help="将本次结果保存为新基线")
+    解析器.add_argument("--阈值", type=float, default=0.2, help="允许的性能回退比例，默认0.2")
+    参数 = 解析器.parse_args()
+
+    配置日志(级别="info")
+    sys.exit(启动基准测试(参数.基准, 参数.次数, 参数.种子, 参数.基线, 参数.保存基线, 参数.阈值))
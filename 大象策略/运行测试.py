@@ -59,28 +59,10 @@ def 启动测试(模块名: Optional[str] = None) -> Dict:
             # 这里可以添加针对特定模块的测试逻辑
             print(f"测试模块: {模块名}")
             # 例如可以创建测试管理器并只运行指定模块测试
-            from modules.测试模块 import 测试管理器
+            from modules.测试模块 import 测试管理器, 添加测试表
             测试器 = 测试管理器()
             
-            if 模块名 == "大象识别":
-                try:
-                    from modules.tests.test_大象识别 import 测试大象识别, 测试大象消失检测
-                    测试器.添加测试("大象识别", lambda _: 测试大象识别(), "测试大象识别功能")
-                    测试器.添加测试("大象消失检测", lambda _: 测试大象消失检测(), "测试大象消失检测功能")
-                except ImportError as e:
-                    print(f"导入大象识别测试模块出错: {e}")
-                    traceback.print_exc()
-                    return {"错误": f"导入大象识别测试模块出错: {e}"}
-            elif 模块名 == "风险控制":
-                try:
-                    from modules.tests.test_风险控制 import 测试风险控制, 测试资金风险控制
-                    测试器.添加测试("风险控制", lambda _: 测试风险控制(), "测试风险控制功能")
-                    测试器.添加测试("资金风险控制", lambda _: 测试资金风险控制(), "测试资金风险控制功能")
-                except ImportError as e:
-                    print(f"导入风险控制测试模块出错: {e}")
-                    traceback.print_exc()
-                    return {"错误": f"导入风险控制测试模块出错: {e}"}
-            else:
+            if not 添加测试表(测试器, 模块名):
                 print(f"未知模块: {模块名}")
                 return {"错误": f"未知模块: {模块名}"}
                 